@@ -0,0 +1,166 @@
+"""
+Auditoria acessos - Política de auditoria dos acessos a telas (VIEW).
+
+Cada GET autenticado é classificado por AUDITORIA_ACESSOS:
+
+- IGNORAR: prefixos em EXCLUIR (estáticos, debug...).
+- REGISTRAR: prefixos em REGISTRAR (telas sensíveis), ou todos no modo
+  "registro". Gera um RegistroAuditoria VIEW, no máximo um por usuário e
+  caminho a cada JANELA_DEDUP segundos.
+- CONTAR: demais acessos e requisições HTMX parciais. Só incrementam um
+  contador em memória, enviado a cada INTERVALO_ENVIO segundos à task
+  gravar_contadores_acesso, que soma em ContadorAcesso fora da requisição.
+  O que restar é enviado no fim do processo (atexit e worker_process_shutdown
+  do Celery), para não se perder quando gunicorn/Celery reciclam o worker.
+"""
+
+import atexit
+import hashlib
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+IGNORAR = "ignorar"
+CONTAR = "contar"
+REGISTRAR = "registrar"
+
+EXCLUIR_PADRAO = ("/static/", "/media/", "/admin/jsi18n/", "/__debug__/", "/favicon.ico")
+
+_lock = threading.Lock()
+_contagens: dict = {}
+_ultimo_envio = time.monotonic()
+
+
+def _config(nome: str, padrao):
+    return getattr(settings, "AUDITORIA_ACESSOS", {}).get(nome, padrao)
+
+
+def politica(request) -> str:
+    """Classifica o acesso: IGNORAR, CONTAR ou REGISTRAR."""
+    path = request.path
+    if path.startswith(tuple(_config("EXCLUIR", EXCLUIR_PADRAO))):
+        return IGNORAR
+    if _config("MODO", "agregado") == "registro":
+        return REGISTRAR
+    if request.headers.get("HX-Request") == "true":
+        return CONTAR
+    if path.startswith(tuple(_config("REGISTRAR", ()))):
+        return REGISTRAR
+    return CONTAR
+
+
+def auditar_acesso(request) -> None:
+    """Aplica a política ao GET autenticado corrente."""
+    acao = politica(request)
+    if acao == IGNORAR:
+        return
+    contar(request)
+    if acao == REGISTRAR and not _duplicado(request):
+        from .fila import registrar_eventos
+        from .models import AcaoAuditoria, evento_auditoria
+
+        registrar_eventos(
+            [
+                evento_auditoria(
+                    "VIEW",
+                    "0",
+                    AcaoAuditoria.VIEW,
+                    request,
+                    dados_antes={"query_params": dict(request.GET)},
+                    justificativa=f"Acesso à tela: {request.path}",
+                )
+            ]
+        )
+
+
+def _duplicado(request) -> bool:
+    """True se o usuário já acessou o caminho dentro da janela de deduplicação."""
+    janela = _config("JANELA_DEDUP", 300)
+    if janela <= 0:
+        return False
+    caminho = hashlib.md5(request.path.encode(), usedforsecurity=False).hexdigest()
+    try:
+        return not cache.add(f"auditoria:acesso:{request.user.pk}:{caminho}", 1, janela)
+    except Exception:
+        # Cache unavailable: record the access
+        return False
+
+
+def contar(request) -> None:
+    """Incrementa o contador em memória do acesso (usuário, caminho, dia)."""
+    agora = timezone.now()
+    chave = (
+        str(request.user.tenant_id) if getattr(request.user, "tenant_id", None) else None,
+        request.user.pk,
+        request.path[:255],
+        timezone.localdate(agora),
+    )
+    with _lock:
+        total, _ = _contagens.get(chave, (0, None))
+        _contagens[chave] = (total + 1, agora)
+
+
+def descarregar(forcar: bool = False) -> int:
+    """
+    Envia as contagens acumuladas à fila (task gravar_contadores_acesso), se
+    INTERVALO_ENVIO já passou desde o último envio (ou se forcar). Retorna
+    quantos contadores enviou.
+    """
+    global _contagens, _ultimo_envio
+
+    with _lock:
+        if not _contagens:
+            return 0
+        if not forcar and time.monotonic() - _ultimo_envio < _config("INTERVALO_ENVIO", 60):
+            return 0
+        contagens, _contagens = _contagens, {}
+        _ultimo_envio = time.monotonic()
+
+    _enviar(contagens)
+    return len(contagens)
+
+
+def _enviar(contagens: dict) -> None:
+    """Publica as contagens na fila; sem broker, grava na hora."""
+    from .tasks import gravar_contadores_acesso
+
+    linhas = [
+        [tenant_id, str(usuario_id), caminho, dia.isoformat(), total, ultimo.isoformat()]
+        for (tenant_id, usuario_id, caminho, dia), (total, ultimo) in contagens.items()
+    ]
+    try:
+        gravar_contadores_acesso.delay(linhas)
+    except Exception:
+        logger.warning("Fila de auditoria indisponível; gravando %d contador(es)", len(linhas))
+        from .models import ContadorAcesso
+
+        try:
+            ContadorAcesso.acumular(contagens)
+        except Exception:
+            logger.exception("Falha ao gravar %d contador(es) de acesso", len(contagens))
+
+
+def descarregar_ao_sair() -> None:
+    """Envia as contagens pendentes ao encerrar o processo."""
+    try:
+        descarregar(forcar=True)
+    except Exception:
+        logger.exception("Falha ao enviar contadores de acesso no encerramento")
+
+
+atexit.register(descarregar_ao_sair)
+
+
+def reiniciar() -> None:
+    """Descarta as contagens em memória (testes)."""
+    global _ultimo_envio
+
+    with _lock:
+        _contagens.clear()
+        _ultimo_envio = time.monotonic()
@@ -5,7 +5,7 @@ Auditoria admin configuration.
 from django.contrib import admin
 from django.utils.html import format_html
 
-from .models import RegistroAuditoria
+from .models import ContadorAcesso, EventoAuditoriaPendente, RegistroAuditoria
 
 
 @admin.register(RegistroAuditoria)
@@ -40,6 +40,8 @@ class RegistroAuditoriaAdmin(admin.ModelAdmin):
         "justificativa",
         "hash_registro",
         "hash_anterior",
+        "particao",
+        "sequencia",
     ]
     date_hierarchy = "created_at"
     ordering = ["-created_at"]
@@ -73,3 +75,40 @@ class RegistroAuditoriaAdmin(admin.ModelAdmin):
         return obj.hash_registro[:16] + "..."
 
     hash_curto.short_description = "Hash"
+
+
+@admin.register(ContadorAcesso)
+class ContadorAcessoAdmin(admin.ModelAdmin):
+    """Admin for ContadorAcesso - read-only."""
+
+    list_display = ["dia", "usuario", "caminho", "total", "ultimo_acesso"]
+    list_filter = ["dia"]
+    search_fields = ["caminho", "usuario__email"]
+    date_hierarchy = "dia"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(EventoAuditoriaPendente)
+class EventoAuditoriaPendenteAdmin(admin.ModelAdmin):
+    """Admin for EventoAuditoriaPendente - read-only, with a retry action."""
+
+    list_display = ["created_at", "__str__", "erro"]
+    readonly_fields = ["id", "created_at", "evento", "erro"]
+    actions = ["regravar"]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    @admin.action(description="Gravar novamente na trilha de auditoria")
+    def regravar(self, request, queryset):
+        total = queryset.count()
+        gravados = EventoAuditoriaPendente.regravar(queryset)
+        self.message_user(request, f"{gravados} de {total} evento(s) gravados.")
@@ -0,0 +1,98 @@
+"""
+Auditoria fila - Escrita assíncrona e em lote dos registros de auditoria.
+
+Eventos de tabelas financeiras (TABELAS_SINCRONAS) são gravados na própria
+transação. Os demais (incluindo VIEW) ficam em memória até o commit, são
+acumulados por requisição e enviados em lote à task gravar_eventos_auditoria
+(Celery/Redis), que encadeia os hashes e grava com bulk_create.
+"""
+
+import logging
+import threading
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import RegistroAuditoria
+
+logger = logging.getLogger(__name__)
+
+TABELAS_SINCRONAS = (
+    "Caixa",
+    "AberturaCaixa",
+    "MovimentoCaixa",
+    "FechamentoCaixa",
+    "MovimentoImportado",
+    "ParcelaRecebimento",
+    "NotaFiscalServico",
+    "LancamentoContabil",
+    "PartidaLancamento",
+)
+
+_local = threading.local()
+
+
+def _config(nome: str, padrao):
+    return getattr(settings, "AUDITORIA_ESCRITA", {}).get(nome, padrao)
+
+
+def sincrona(tabela: str) -> bool:
+    """True se os eventos da tabela devem ser gravados na transação corrente."""
+    if not _config("ASSINCRONA", True):
+        return True
+    return tabela in _config("TABELAS_SINCRONAS", TABELAS_SINCRONAS)
+
+
+def registrar_eventos(eventos) -> None:
+    """
+    Registra eventos (dicts de evento_auditoria) conforme a política de
+    durabilidade: síncronos agora; assíncronos só após o commit (descartados
+    em rollback).
+    """
+    sincronos = [evento for evento in eventos if sincrona(evento["tabela"])]
+    assincronos = [evento for evento in eventos if not sincrona(evento["tabela"])]
+
+    if sincronos:
+        RegistroAuditoria.gravar_eventos(sincronos)
+    if assincronos:
+        # Outside an atomic block on_commit runs the callback immediately
+        transaction.on_commit(partial(_confirmados, assincronos))
+
+
+def _confirmados(eventos) -> None:
+    pendentes = getattr(_local, "pendentes", None)
+    if pendentes is not None:
+        pendentes.extend(eventos)  # flushed by AuditMiddleware at the end of the request
+    else:
+        publicar(eventos)
+
+
+def iniciar_lote() -> None:
+    """Passa a acumular os eventos confirmados da thread (uma requisição)."""
+    _local.pendentes = []
+
+
+def despachar_lote() -> None:
+    """Publica os eventos acumulados desde iniciar_lote."""
+    pendentes = getattr(_local, "pendentes", None)
+    _local.pendentes = None
+    if pendentes:
+        publicar(pendentes)
+
+
+def publicar(eventos) -> None:
+    """Envia os eventos à fila em lotes; sem broker, grava na hora."""
+    from .tasks import gravar_eventos_auditoria
+
+    tamanho = _config("LOTE", 500)
+    for inicio in range(0, len(eventos), tamanho):
+        lote = eventos[inicio : inicio + tamanho]
+        try:
+            gravar_eventos_auditoria.delay(lote)
+        except Exception:
+            logger.warning("Fila de auditoria indisponível; gravando %d evento(s)", len(lote))
+            try:
+                RegistroAuditoria.gravar_eventos(lote)
+            except Exception:
+                logger.exception("Failed to create audit records")
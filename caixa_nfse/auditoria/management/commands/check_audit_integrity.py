@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
 from caixa_nfse.auditoria.models import RegistroAuditoria
@@ -6,10 +7,20 @@ from caixa_nfse.auditoria.models import RegistroAuditoria
 class Command(BaseCommand):
     help = "Verifica a integridade da cadeia de hash dos registros de auditoria."
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "AUDITORIA_CADEIA", {}).get("VERIFICACAO_WORKERS", 1),
+            help="Partições verificadas em paralelo.",
+        )
+
     def handle(self, *args, **options):
         self.stdout.write("Iniciando verificação de integridade da auditoria...")
 
-        is_valid, broken_records = RegistroAuditoria.verificar_integridade()
+        is_valid, broken_records = RegistroAuditoria.verificar_integridade(
+            workers=options["workers"]
+        )
 
         if is_valid:
             self.stdout.write(
@@ -21,42 +21,27 @@ class AuditMiddleware:
         self.get_response = get_response
 
     def __call__(self, request):
+        from .acessos import auditar_acesso, descarregar
+        from .fila import despachar_lote, iniciar_lote
+
         _request_local.request = request
+        iniciar_lote()
 
         try:
-            # Audit view access (GET requests only, ignoring static/admin assets)
+            # Audit view access (GET requests only), per AUDITORIA_ACESSOS
             if request.method == "GET" and request.user.is_authenticated:
-                path = request.path
-                if not any(
-                    path.startswith(p)
-                    for p in [
-                        "/static/",
-                        "/media/",
-                        "/admin/jsi18n/",
-                        "/__debug__/",
-                        "/favicon.ico",
-                    ]
-                ):
-                    from .models import AcaoAuditoria, RegistroAuditoria
-
-                    # Run in background or try/except to not block response
-                    try:
-                        RegistroAuditoria.registrar(
-                            tabela="VIEW",
-                            registro_id="0",
-                            acao=AcaoAuditoria.VIEW,
-                            request=request,
-                            justificativa=f"Acesso à tela: {path}",
-                            dados_antes={"query_params": dict(request.GET)},
-                        )
-                    except Exception:
-                        # Fail silently for audit logging to not break app
-                        pass
+                try:
+                    auditar_acesso(request)
+                except Exception:
+                    # Fail silently for audit logging to not break app
+                    pass
 
             response = self.get_response(request)
         finally:
             # Clean up
             if hasattr(_request_local, "request"):
                 del _request_local.request
+            despachar_lote()
+            descarregar()
 
         return response
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-16 16:00
+
+import uuid
+
+from django.db import migrations, models
+
+PARTICAO_LEGADO = "legado"
+
+
+def particionar_legado(apps, schema_editor):
+    """Registros existentes formam a partição "legado" (antiga cadeia global)."""
+    RegistroAuditoria = apps.get_model("auditoria", "RegistroAuditoria")
+    CadeiaAuditoria = apps.get_model("auditoria", "CadeiaAuditoria")
+
+    lote = []
+    seq = 0
+    ultimo_hash = ""
+    registros = RegistroAuditoria.objects.order_by("created_at").values_list("pk", "hash_registro")
+    for pk, hash_registro in registros.iterator():
+        seq += 1
+        ultimo_hash = hash_registro
+        lote.append(RegistroAuditoria(pk=pk, particao=PARTICAO_LEGADO, sequencia=seq))
+        if len(lote) >= 1000:
+            RegistroAuditoria.objects.bulk_update(lote, ["particao", "sequencia"])
+            lote = []
+    if lote:
+        RegistroAuditoria.objects.bulk_update(lote, ["particao", "sequencia"])
+    if seq:
+        CadeiaAuditoria.objects.create(
+            particao=PARTICAO_LEGADO, ultimo_hash=ultimo_hash, sequencia=seq
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CadeiaAuditoria',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+                ('particao', models.CharField(max_length=64, unique=True, verbose_name='partição')),
+                ('ultimo_hash', models.CharField(blank=True, max_length=64, verbose_name='último hash')),
+                ('sequencia', models.PositiveBigIntegerField(default=0, verbose_name='sequência')),
+            ],
+            options={
+                'verbose_name': 'cadeia de auditoria',
+                'verbose_name_plural': 'cadeias de auditoria',
+            },
+        ),
+        migrations.AddField(
+            model_name='registroauditoria',
+            name='particao',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='partição da cadeia'),
+        ),
+        migrations.AddField(
+            model_name='registroauditoria',
+            name='sequencia',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='sequência na partição'),
+        ),
+        migrations.RunPython(particionar_legado, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='registroauditoria',
+            constraint=models.UniqueConstraint(fields=('particao', 'sequencia'), name='auditoria_particao_sequencia_unica'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-16 18:00
+
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0003_cadeia_particionada'),
+        ('core', '0011_tenant_cadeia_aberturas'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContadorAcesso',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+                ('caminho', models.CharField(max_length=255, verbose_name='caminho')),
+                ('dia', models.DateField(db_index=True, verbose_name='dia')),
+                ('total', models.PositiveBigIntegerField(default=0, verbose_name='acessos')),
+                ('ultimo_acesso', models.DateTimeField(verbose_name='último acesso')),
+                ('tenant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='contadores_acesso', to='core.tenant', verbose_name='empresa')),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contadores_acesso', to=settings.AUTH_USER_MODEL, verbose_name='usuário')),
+            ],
+            options={
+                'verbose_name': 'contador de acesso',
+                'verbose_name_plural': 'contadores de acesso',
+                'ordering': ['-dia', '-total'],
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'caminho', 'dia'), name='auditoria_contador_acesso_unico')],
+            },
+        ),
+    ]
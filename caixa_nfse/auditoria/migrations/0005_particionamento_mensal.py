@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:00
+
+from django.db import migrations, models
+
+from caixa_nfse.core.particoes import particionar_tabela
+
+
+def particionar(apps, schema_editor):
+    RegistroAuditoria = apps.get_model("auditoria", "RegistroAuditoria")
+    particionar_tabela(schema_editor, RegistroAuditoria._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0004_contadoracesso'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cadeiaauditoria',
+            name='hash_arquivado',
+            field=models.CharField(blank=True, max_length=64, verbose_name='hash arquivado'),
+        ),
+        migrations.AddField(
+            model_name='cadeiaauditoria',
+            name='sequencia_arquivada',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='sequência arquivada'),
+        ),
+        migrations.RunPython(particionar, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-16 20:00
+
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auditoria', '0005_particionamento_mensal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EventoAuditoriaPendente',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='criado em')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='atualizado em')),
+                ('evento', models.JSONField(verbose_name='evento')),
+                ('erro', models.TextField(blank=True, verbose_name='erro')),
+            ],
+            options={
+                'verbose_name': 'evento de auditoria pendente',
+                'verbose_name_plural': 'eventos de auditoria pendentes',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AlterField(
+            model_name='registroauditoria',
+            name='created_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='criado em'),
+        ),
+    ]
@@ -2,11 +2,19 @@
 Auditoria models - Immutable audit trail.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from caixa_nfse.core.models import BaseModel, generate_hash
+from caixa_nfse.core.particoes import ParticionadoManager
+
+# Partição dos registros anteriores ao particionamento (antiga cadeia global)
+PARTICAO_LEGADO = "legado"
 
 
 class AcaoAuditoria(models.TextChoices):
@@ -23,12 +31,48 @@ class AcaoAuditoria(models.TextChoices):
     REJECT = "REJECT", _("Rejeição")
 
 
+class CadeiaAuditoria(BaseModel):
+    """
+    Cabeça de uma partição da cadeia de auditoria (por empresa e, opcionalmente,
+    por dia). Lida e avançada sob lock da linha na transação que insere os registros.
+    """
+
+    particao = models.CharField(_("partição"), max_length=64, unique=True)
+    ultimo_hash = models.CharField(_("último hash"), max_length=64, blank=True)
+    sequencia = models.PositiveBigIntegerField(_("sequência"), default=0)
+    # Último registro já arquivado (partição mensal removida): a verificação parte dele
+    hash_arquivado = models.CharField(_("hash arquivado"), max_length=64, blank=True)
+    sequencia_arquivada = models.PositiveBigIntegerField(_("sequência arquivada"), default=0)
+
+    class Meta:
+        verbose_name = _("cadeia de auditoria")
+        verbose_name_plural = _("cadeias de auditoria")
+
+    def __str__(self):
+        return f"{self.particao} #{self.sequencia}"
+
+    @classmethod
+    def travar(cls, particao: str) -> "CadeiaAuditoria":
+        """Cabeça da partição (criada se preciso), com select_for_update."""
+        cls.objects.get_or_create(particao=particao)
+        return cls.objects.select_for_update().get(particao=particao)
+
+
 class RegistroAuditoria(BaseModel):
     """
     Trilha de auditoria imutável com hash encadeado.
     Armazena todas as operações críticas do sistema.
     """
 
+    # Instant of the audited change (evento_auditoria), not of the write: queued
+    # events keep their time and month partition even when written late
+    created_at = models.DateTimeField(
+        _("criado em"),
+        default=timezone.now,
+        db_index=True,
+        editable=False,
+    )
+
     # Tenant (optional for superuser actions)
     tenant = models.ForeignKey(
         "core.Tenant",
@@ -121,6 +165,20 @@ class RegistroAuditoria(BaseModel):
         blank=True,
         editable=False,
     )
+    particao = models.CharField(
+        _("partição da cadeia"),
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
+    sequencia = models.PositiveBigIntegerField(
+        _("sequência na partição"),
+        default=0,
+        editable=False,
+    )
+
+    # Particionada por mês em created_at no PostgreSQL (core.particoes)
+    objects = ParticionadoManager()
 
     class Meta:
         verbose_name = _("registro de auditoria")
@@ -131,6 +189,13 @@ class RegistroAuditoria(BaseModel):
             models.Index(fields=["tenant", "usuario", "created_at"]),
             models.Index(fields=["created_at"]),
         ]
+        constraints = [
+            # On the PostgreSQL partitioned table it also covers created_at
+            # (core.particoes.particionar_tabela)
+            models.UniqueConstraint(
+                fields=["particao", "sequencia"], name="auditoria_particao_sequencia_unica"
+            ),
+        ]
         # Prevent modifications
         permissions = [
             ("view_audit_report", "Can view audit reports"),
@@ -145,24 +210,70 @@ class RegistroAuditoria(BaseModel):
         if self.pk and not self._state.adding:
             raise ValueError("Registros de auditoria não podem ser alterados.")
 
-        if not self.hash_registro:
-            # Get previous hash for chain integrity
-            last_record = RegistroAuditoria.objects.order_by("-created_at").first()
-            self.hash_anterior = last_record.hash_registro if last_record else ""
-
-            # Generate hash including previous hash
-            data = {
-                "tenant_id": str(self.tenant_id) if self.tenant_id else "",
-                "tabela": self.tabela,
-                "registro_id": self.registro_id,
-                "acao": self.acao,
-                "usuario_id": str(self.usuario_id) if self.usuario_id else "",
-                "dados_antes": self.dados_antes,
-                "dados_depois": self.dados_depois,
-            }
-            self.hash_registro = generate_hash(data, self.hash_anterior)
+        if self.hash_registro:
+            return super().save(*args, **kwargs)
 
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            RegistroAuditoria.encadear_lote([self])
+            super().save(*args, **kwargs)
+
+    @staticmethod
+    def encadear_lote(registros) -> None:
+        """
+        Encadeia os registros, em ordem, na partição de cada um, a partir da
+        cabeça da partição (lida sob lock) e avança as cabeças. Deve rodar na
+        transação que insere os registros.
+        """
+        por_particao = {}
+        for registro in registros:
+            registro.particao = particao_de(
+                registro.tenant_id, timezone.localdate(registro.created_at)
+            )
+            por_particao.setdefault(registro.particao, []).append(registro)
+
+        # Fixed lock order: concurrent batches never deadlock on the heads
+        for particao in sorted(por_particao):
+            cabeca = CadeiaAuditoria.travar(particao)
+            hash_anterior, seq = cabeca.ultimo_hash, cabeca.sequencia
+            for registro in por_particao[particao]:
+                seq += 1
+                registro.sequencia = seq
+                hash_anterior = registro.encadear(hash_anterior)
+            CadeiaAuditoria.objects.filter(pk=cabeca.pk).update(
+                ultimo_hash=hash_anterior, sequencia=seq
+            )
+
+    @classmethod
+    def antes_de_arquivar(cls, fim) -> None:
+        """
+        Ancora cada cadeia no seu último registro anterior a fim (que será
+        arquivado): a verificação passa a partir desse hash.
+        """
+        ultimos = (
+            cls.objects.filter(created_at__lt=fim)
+            .order_by("particao", "-sequencia")
+            .distinct("particao")
+            .values_list("particao", "sequencia", "hash_registro")
+        )
+        for particao, sequencia, hash_registro in ultimos:
+            CadeiaAuditoria.objects.filter(
+                particao=particao, sequencia_arquivada__lt=sequencia
+            ).update(hash_arquivado=hash_registro, sequencia_arquivada=sequencia)
+
+    def encadear(self, hash_anterior: str) -> str:
+        """Link this record to hash_anterior and compute its hash_registro."""
+        self.hash_anterior = hash_anterior
+        data = {
+            "tenant_id": str(self.tenant_id) if self.tenant_id else "",
+            "tabela": self.tabela,
+            "registro_id": self.registro_id,
+            "acao": self.acao,
+            "usuario_id": str(self.usuario_id) if self.usuario_id else "",
+            "dados_antes": self.dados_antes,
+            "dados_depois": self.dados_depois,
+        }
+        self.hash_registro = generate_hash(data, hash_anterior)
+        return self.hash_registro
 
     def delete(self, *args, **kwargs):
         """Prevent deletion of audit records."""
@@ -194,78 +305,303 @@ class RegistroAuditoria(BaseModel):
         Returns:
             RegistroAuditoria instance
         """
-        tenant = None
-        usuario = None
-        ip_address = None
-        user_agent = ""
-        session_id = ""
-
-        if request:
-            if hasattr(request, "user") and request.user.is_authenticated:
-                usuario = request.user
-                tenant = getattr(request.user, "tenant", None)
-
-            # Get IP from headers
-            x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
-            if x_forwarded_for:
-                ip_address = x_forwarded_for.split(",")[0].strip()
-            else:
-                ip_address = request.META.get("REMOTE_ADDR")
-
-            user_agent = request.META.get("HTTP_USER_AGENT", "")[:500]
-            session_id = request.session.session_key or ""
-
-        # Calculate changed fields
-        campos_alterados = None
-        if dados_antes and dados_depois:
-            campos_alterados = [
-                k
-                for k in set(dados_antes.keys()) | set(dados_depois.keys())
-                if dados_antes.get(k) != dados_depois.get(k)
-            ]
-
+        evento = evento_auditoria(
+            tabela, registro_id, acao, request, dados_antes, dados_depois, justificativa
+        )
         return cls.objects.create(
-            tenant=tenant,
-            tabela=tabela,
-            registro_id=str(registro_id),
-            acao=acao,
-            usuario=usuario,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            session_id=session_id,
-            dados_antes=dados_antes,
-            dados_depois=dados_depois,
-            campos_alterados=campos_alterados,
-            justificativa=justificativa,
+            campos_alterados=_campos_alterados(dados_antes, dados_depois),
+            **_campos_registro(evento),
+        )
+
+    @classmethod
+    def registrar_lote(cls, registros, request=None) -> list:
+        """
+        Bulk variant of registrar, for changes written with bulk_create/bulk_update
+        (which bypass model signals).
+
+        Args:
+            registros: iterable of (tabela, registro_id, acao, dados_antes, dados_depois)
+            request: HTTP request (for context)
+
+        Returns:
+            List of RegistroAuditoria instances
+        """
+        return cls.gravar_eventos(
+            [
+                evento_auditoria(tabela, registro_id, acao, request, dados_antes, dados_depois)
+                for tabela, registro_id, acao, dados_antes, dados_depois in registros
+            ]
         )
 
     @classmethod
-    def verificar_integridade(cls, tenant=None) -> tuple[bool, list]:
+    def gravar_eventos(cls, eventos) -> list:
+        """
+        Grava eventos (dicts de evento_auditoria) em lotes de AUDITORIA_ESCRITA["LOTE"].
+
+        The hash chain is computed in memory from the head of each partition, so
+        each batch costs one INSERT plus one head lock per partition. Events are
+        chained in event-time order and keep their own created_at.
+        """
+        tamanho = getattr(settings, "AUDITORIA_ESCRITA", {}).get("LOTE", 500)
+        eventos = sorted((_campos_registro(evento) for evento in eventos), key=_instante)
+        criados = []
+        for inicio in range(0, len(eventos), tamanho):
+            objs = [
+                cls(
+                    campos_alterados=_campos_alterados(
+                        evento.get("dados_antes"), evento.get("dados_depois")
+                    ),
+                    **evento,
+                )
+                for evento in eventos[inicio : inicio + tamanho]
+            ]
+            with transaction.atomic():
+                cls.encadear_lote(objs)
+                criados.extend(cls.objects.bulk_create(objs))
+        return criados
+
+    @classmethod
+    def verificar_integridade(cls, tenant=None, workers: int = 1) -> tuple[bool, list]:
         """
-        Verify chain integrity of audit records.
+        Verify chain integrity of audit records, one partition at a time.
+
+        Each partition is checked independently (in parallel with workers > 1,
+        one DB connection per thread). With a tenant, only its own partitions are
+        checked; the legacy global chain is only checked without a tenant.
 
         Returns:
             Tuple of (is_valid, list of broken records)
         """
         qs = cls.objects.all()
         if tenant:
-            qs = qs.filter(tenant=tenant)
-
-        qs = qs.order_by("created_at")
-
-        broken_records = []
-        previous_hash = ""
-
-        for record in qs.iterator():
-            expected_previous = record.hash_anterior
-            if expected_previous != previous_hash:
-                broken_records.append(
-                    {
-                        "id": str(record.id),
-                        "expected": previous_hash,
-                        "found": expected_previous,
-                    }
-                )
-            previous_hash = record.hash_registro
+            qs = qs.filter(tenant=tenant).exclude(particao=PARTICAO_LEGADO)
+        particoes = sorted(set(qs.values_list("particao", flat=True)))
+
+        if workers > 1 and len(particoes) > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                resultados = list(pool.map(_verificar_particao_thread, particoes))
+        else:
+            resultados = [_verificar_particao(particao) for particao in particoes]
 
+        broken_records = [erro for resultado in resultados for erro in resultado]
         return len(broken_records) == 0, broken_records
+
+
+class ContadorAcesso(BaseModel):
+    """
+    Acessos a telas agregados por usuário, caminho e dia. Substitui um
+    RegistroAuditoria VIEW por acesso nas telas fora de AUDITORIA_ACESSOS["REGISTRAR"].
+    Fora da cadeia de hash.
+    """
+
+    tenant = models.ForeignKey(
+        "core.Tenant",
+        on_delete=models.CASCADE,
+        related_name="contadores_acesso",
+        verbose_name=_("empresa"),
+        null=True,
+        blank=True,
+    )
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="contadores_acesso",
+        verbose_name=_("usuário"),
+    )
+    caminho = models.CharField(_("caminho"), max_length=255)
+    dia = models.DateField(_("dia"), db_index=True)
+    total = models.PositiveBigIntegerField(_("acessos"), default=0)
+    ultimo_acesso = models.DateTimeField(_("último acesso"))
+
+    class Meta:
+        verbose_name = _("contador de acesso")
+        verbose_name_plural = _("contadores de acesso")
+        ordering = ["-dia", "-total"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["usuario", "caminho", "dia"],
+                name="auditoria_contador_acesso_unico",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.caminho} ({self.dia}): {self.total}"
+
+    @classmethod
+    def acumular(cls, contagens: dict) -> None:
+        """
+        Soma contagens {(tenant_id, usuario_id, caminho, dia): (total, ultimo_acesso)}
+        aos contadores com UPDATE atômico, criando os que ainda não existem.
+        """
+        for (tenant_id, usuario_id, caminho, dia), (total, ultimo) in contagens.items():
+            filtro = {"usuario_id": usuario_id, "caminho": caminho, "dia": dia}
+            delta = {"total": models.F("total") + total, "ultimo_acesso": ultimo}
+            if cls.objects.filter(**filtro).update(**delta):
+                continue
+            try:
+                with transaction.atomic():
+                    cls.objects.create(
+                        tenant_id=tenant_id, total=total, ultimo_acesso=ultimo, **filtro
+                    )
+            except IntegrityError:
+                # Created concurrently by another process
+                cls.objects.filter(**filtro).update(**delta)
+
+
+class EventoAuditoriaPendente(BaseModel):
+    """
+    Evento de auditoria que gravar_eventos_auditoria não gravou após esgotar os
+    retries (dead letter). Fica aqui até ser regravado, em vez de se perder.
+    """
+
+    evento = models.JSONField(_("evento"))
+    erro = models.TextField(_("erro"), blank=True)
+
+    class Meta:
+        verbose_name = _("evento de auditoria pendente")
+        verbose_name_plural = _("eventos de auditoria pendentes")
+        ordering = ["created_at"]
+
+    def __str__(self):
+        return f"{self.evento.get('tabela')} #{self.evento.get('registro_id')}"
+
+    @classmethod
+    def regravar(cls, pendentes) -> int:
+        """Tenta gravar de novo os eventos pendentes; remove os gravados."""
+        gravados = 0
+        for pendente in pendentes:
+            try:
+                with transaction.atomic():
+                    RegistroAuditoria.gravar_eventos([pendente.evento])
+                    pendente.delete()
+            except Exception as exc:
+                cls.objects.filter(pk=pendente.pk).update(erro=str(exc))
+            else:
+                gravados += 1
+        return gravados
+
+
+def particao_de(tenant_id, dia=None) -> str:
+    """Chave da partição da cadeia: empresa (ou "global") e, se configurado, o dia."""
+    chave = str(tenant_id) if tenant_id else "global"
+    if getattr(settings, "AUDITORIA_CADEIA", {}).get("DIARIA", False):
+        chave = f"{chave}:{(dia or timezone.localdate()).isoformat()}"
+    return chave
+
+
+def _verificar_particao(particao: str) -> list:
+    """Broken links of one partition, walked in sequence order."""
+    broken_records = []
+    cabeca = CadeiaAuditoria.objects.filter(particao=particao).first()
+    # Archived partitions removed the start of the chain
+    previous_hash = cabeca.hash_arquivado if cabeca else ""
+
+    registros = (
+        RegistroAuditoria.objects.filter(
+            particao=particao, sequencia__gt=cabeca.sequencia_arquivada if cabeca else 0
+        )
+        .order_by("sequencia")
+        .values_list("id", "hash_anterior", "hash_registro")
+    )
+    for record_id, hash_anterior, hash_registro in registros.iterator():
+        if hash_anterior != previous_hash:
+            broken_records.append(
+                {
+                    "id": str(record_id),
+                    "expected": previous_hash,
+                    "found": hash_anterior,
+                }
+            )
+        previous_hash = hash_registro
+
+    # The head must point at the last record (detects a truncated tail)
+    if cabeca and cabeca.ultimo_hash != previous_hash:
+        broken_records.append(
+            {
+                "id": f"cadeia:{particao}",
+                "expected": cabeca.ultimo_hash,
+                "found": previous_hash,
+            }
+        )
+    return broken_records
+
+
+def _verificar_particao_thread(particao: str) -> list:
+    try:
+        return _verificar_particao(particao)
+    finally:
+        connection.close()
+
+
+def evento_auditoria(
+    tabela: str,
+    registro_id,
+    acao: str,
+    request=None,
+    dados_antes: dict = None,
+    dados_depois: dict = None,
+    justificativa: str = "",
+) -> dict:
+    """Audit event as a JSON-serializable dict (kwargs of RegistroAuditoria)."""
+    return {
+        "created_at": timezone.now().isoformat(),
+        "tabela": tabela,
+        "registro_id": str(registro_id),
+        "acao": acao,
+        "dados_antes": dados_antes,
+        "dados_depois": dados_depois,
+        "justificativa": justificativa,
+        **_contexto_request(request),
+    }
+
+
+def _campos_registro(evento: dict) -> dict:
+    """Kwargs of RegistroAuditoria for an event (created_at back to a datetime)."""
+    instante = evento.get("created_at")
+    if isinstance(instante, str):
+        return {**evento, "created_at": datetime.fromisoformat(instante)}
+    return evento
+
+
+def _instante(evento: dict):
+    # Events queued before created_at was recorded are written as "now"
+    return evento.get("created_at") or timezone.now()
+
+
+def _contexto_request(request) -> dict:
+    """User, tenant and client data of the request, for audit records (ids only)."""
+    contexto = {
+        "tenant_id": None,
+        "usuario_id": None,
+        "ip_address": None,
+        "user_agent": "",
+        "session_id": "",
+    }
+    if request:
+        if hasattr(request, "user") and request.user.is_authenticated:
+            contexto["usuario_id"] = request.user.pk
+            tenant_id = getattr(request.user, "tenant_id", None)
+            contexto["tenant_id"] = str(tenant_id) if tenant_id else None
+
+        # Get IP from headers
+        x_forwarded_for = request.META.get("HTTP_X_FORWARDED_FOR")
+        if x_forwarded_for:
+            contexto["ip_address"] = x_forwarded_for.split(",")[0].strip()
+        else:
+            contexto["ip_address"] = request.META.get("REMOTE_ADDR")
+
+        contexto["user_agent"] = request.META.get("HTTP_USER_AGENT", "")[:500]
+        sessao = getattr(request, "session", None)
+        contexto["session_id"] = (sessao.session_key if sessao else "") or ""
+    return contexto
+
+
+def _campos_alterados(dados_antes, dados_depois):
+    """List of fields whose value differs between the two states."""
+    if not (dados_antes and dados_depois):
+        return None
+    return [
+        k
+        for k in set(dados_antes.keys()) | set(dados_depois.keys())
+        if dados_antes.get(k) != dados_depois.get(k)
+    ]
@@ -2,11 +2,17 @@
 Auditoria signals - Automatic audit logging.
 """
 
-from django.db.models.signals import post_delete, post_save, pre_save
+from copy import deepcopy
+
+from django.db.models import ForeignKey
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
 from django.dispatch import receiver
 
+from caixa_nfse.core.encrypted_fields import EncryptedCharField, ValorCifrado, decifrar
+
+from .fila import registrar_eventos
 from .middleware import get_current_request
-from .models import AcaoAuditoria, RegistroAuditoria
+from .models import AcaoAuditoria, evento_auditoria
 
 # Apps to audit automatically
 AUDITED_APPS = [
@@ -18,27 +24,97 @@ AUDITED_APPS = [
 ]
 
 
-def model_to_dict(instance) -> dict:
-    """Convert model instance to dictionary for audit."""
+def _valor_auditoria(value):
+    """Normalize a field value for the audit JSON."""
+    if hasattr(value, "pk"):
+        return str(value.pk)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return "[BINARY DATA]"
+    return str(value) if value is not None else None
+
+
+def _mascarar(value, alterado=False):
+    # Secrets never go to the audit trail; a changed one gets its own marker
+    if not value:
+        return value
+    return "[ENCRYPTED:ALTERADO]" if alterado else "[ENCRYPTED]"
+
+
+def _segredos_alterados(instance, snapshot) -> set:
+    """
+    Attnames of encrypted fields whose value differs from the snapshot (the
+    database state). A ValorCifrado still in __dict__ was never touched; a
+    plaintext value is compared with the stored token decrypted in memory.
+    """
+    alterados = set()
+    for field in instance._meta.concrete_fields:
+        if not isinstance(field, EncryptedCharField) or field.attname not in snapshot:
+            continue
+        atual = instance.__dict__.get(field.attname)
+        if isinstance(atual, ValorCifrado) or field.attname not in instance.__dict__:
+            continue
+        if atual != decifrar(snapshot[field.attname]):
+            alterados.add(field.attname)
+    return alterados
+
+
+def model_to_dict(instance, fields=None) -> dict:
+    """Convert model instance (optionally only the given fields) to dictionary for audit."""
     data = {}
-    for field in instance._meta.fields:
+    alterados = getattr(instance, "_audit_segredos_alterados", ())
+    for field in instance._meta.fields if fields is None else fields:
         try:
-            value = getattr(instance, field.name)
-            # Handle special types
-            if hasattr(value, "pk"):
-                value = str(value.pk)
-            elif hasattr(value, "isoformat"):
-                value = value.isoformat()
-            elif isinstance(value, bytes):
-                value = "[BINARY DATA]"
-            else:
-                value = str(value) if value is not None else None
-            data[field.name] = value
+            if isinstance(field, EncryptedCharField):
+                data[field.name] = _mascarar(
+                    instance.__dict__.get(field.attname), field.attname in alterados
+                )
+                continue
+            if isinstance(field, ForeignKey):
+                # Raw id: same value as related.pk without loading the relation
+                value = getattr(instance, field.attname)
+                data[field.name] = str(value) if value is not None else None
+                continue
+            data[field.name] = _valor_auditoria(getattr(instance, field.name))
         except Exception:
             data[field.name] = "[ERROR GETTING VALUE]"
     return data
 
 
+def snapshot_auditoria(instance, fields=None) -> dict:
+    """
+    Raw values (attname -> value) of the loaded concrete fields, as read from
+    the database. Deferred fields are left out.
+    """
+    loaded = instance.__dict__
+    snapshot = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname not in loaded:
+            continue
+        if fields is not None and field.attname not in fields and field.name not in fields:
+            continue
+        value = loaded[field.attname]
+        # JSON fields may be mutated in place after loading
+        snapshot[field.attname] = deepcopy(value) if isinstance(value, dict | list) else value
+    return snapshot
+
+
+def _snapshot_to_dict(instance, snapshot) -> dict:
+    data = {}
+    for field in instance._meta.fields:
+        if field.attname not in snapshot:
+            continue
+        value = snapshot[field.attname]
+        if isinstance(field, EncryptedCharField):
+            data[field.name] = _mascarar(value)
+        elif isinstance(field, ForeignKey):
+            data[field.name] = str(value) if value is not None else None
+        else:
+            data[field.name] = _valor_auditoria(value)
+    return data
+
+
 def should_audit(sender) -> bool:
     """Check if model should be audited."""
     # Don't audit the audit log itself to prevent infinite recursion
@@ -52,28 +128,66 @@ def should_audit(sender) -> bool:
     return False
 
 
+def _campos_salvos(sender, update_fields):
+    """Concrete fields written by save(update_fields=...) (names or attnames)."""
+    return [
+        field
+        for field in sender._meta.concrete_fields
+        if update_fields is None or field.name in update_fields or field.attname in update_fields
+    ]
+
+
+@receiver(post_init)
+def store_loaded_state(sender, instance, **kwargs):
+    """Snapshot the field values at load time (from_db), so updates need no re-fetch."""
+    if should_audit(sender):
+        instance._audit_snapshot = snapshot_auditoria(instance)
+
+
 @receiver(pre_save)
-def store_original_state(sender, instance, **kwargs):
+def store_original_state(sender, instance, update_fields=None, **kwargs):
     """Store original state before save for comparison."""
     if not should_audit(sender):
         return
 
-    if instance.pk:
-        try:
-            original = sender.objects.get(pk=instance.pk)
-            instance._audit_original = model_to_dict(original)
-        except sender.DoesNotExist:
-            instance._audit_original = None
-    else:
+    if instance._state.adding or not instance.pk:
+        # Insert: nothing to compare against
         instance._audit_original = None
+        instance._audit_segredos_alterados = set()
+        return
+
+    snapshot = dict(getattr(instance, "_audit_snapshot", None) or {})
+    # Fields deferred at load time: only those being written need their old value
+    faltando = [
+        field.attname
+        for field in _campos_salvos(sender, update_fields)
+        if field.attname not in snapshot
+    ]
+    if faltando:
+        original = sender._base_manager.filter(pk=instance.pk).values(*faltando).first()
+        if original is None:
+            instance._audit_original = None
+            instance._audit_segredos_alterados = set()
+            return
+        snapshot.update(original)
+    instance._audit_original = _snapshot_to_dict(instance, snapshot)
+    instance._audit_segredos_alterados = _segredos_alterados(instance, snapshot)
 
 
 @receiver(post_save)
-def audit_save(sender, instance, created, **kwargs):
+def audit_save(sender, instance, created, update_fields=None, **kwargs):
     """Create audit record after save."""
     if not should_audit(sender):
         return
 
+    # The saved fields now match the database
+    try:
+        snapshot = getattr(instance, "_audit_snapshot", None) or {}
+        snapshot.update(snapshot_auditoria(instance, update_fields))
+        instance._audit_snapshot = snapshot
+    except Exception:
+        instance._audit_snapshot = None
+
     # Skip if this is the RegistroAuditoria model itself
     if sender.__name__ == "RegistroAuditoria":
         return
@@ -82,20 +196,28 @@ def audit_save(sender, instance, created, **kwargs):
     acao = AcaoAuditoria.CREATE if created else AcaoAuditoria.UPDATE
 
     dados_antes = getattr(instance, "_audit_original", None)
-    dados_depois = model_to_dict(instance)
+    if dados_antes is not None and update_fields is not None:
+        # Fields outside update_fields were not written (and may be deferred)
+        dados_depois = {
+            **dados_antes,
+            **model_to_dict(instance, _campos_salvos(sender, update_fields)),
+        }
+    else:
+        dados_depois = model_to_dict(instance)
+    # The marker describes this save only (not a later delete)
+    instance._audit_segredos_alterados = set()
 
     # Only create audit record if there are actual changes
     if not created and dados_antes == dados_depois:
         return
 
     try:
-        RegistroAuditoria.registrar(
-            tabela=sender.__name__,
-            registro_id=str(instance.pk),
-            acao=acao,
-            request=request,
-            dados_antes=dados_antes,
-            dados_depois=dados_depois,
+        registrar_eventos(
+            [
+                evento_auditoria(
+                    sender.__name__, instance.pk, acao, request, dados_antes, dados_depois
+                )
+            ]
         )
     except Exception:
         # Don't fail the main operation if audit fails
@@ -114,14 +236,61 @@ def audit_delete(sender, instance, **kwargs):
     dados_antes = model_to_dict(instance)
 
     try:
-        RegistroAuditoria.registrar(
-            tabela=sender.__name__,
-            registro_id=str(instance.pk),
-            acao=AcaoAuditoria.DELETE,
-            request=request,
-            dados_antes=dados_antes,
+        registrar_eventos(
+            [
+                evento_auditoria(
+                    sender.__name__, instance.pk, AcaoAuditoria.DELETE, request, dados_antes
+                )
+            ]
         )
     except Exception:
         import logging
 
         logging.getLogger(__name__).exception("Failed to create audit record")
+
+
+def audit_bulk(created=(), updated=()) -> None:
+    """
+    Audit records for bulk_create/bulk_update, which bypass the signals above.
+
+    Args:
+        created: instances inserted with bulk_create
+        updated: (instance, dados_antes) pairs written with bulk_update
+    """
+    request = get_current_request()
+    eventos = []
+    for instance in created:
+        if should_audit(type(instance)):
+            eventos.append(
+                evento_auditoria(
+                    type(instance).__name__,
+                    instance.pk,
+                    AcaoAuditoria.CREATE,
+                    request,
+                    dados_depois=model_to_dict(instance),
+                )
+            )
+    for instance, dados_antes in updated:
+        instance._audit_segredos_alterados = _segredos_alterados(
+            instance, getattr(instance, "_audit_snapshot", None) or {}
+        )
+        dados_depois = model_to_dict(instance)
+        instance._audit_segredos_alterados = set()
+        if should_audit(type(instance)) and dados_antes != dados_depois:
+            eventos.append(
+                evento_auditoria(
+                    type(instance).__name__,
+                    instance.pk,
+                    AcaoAuditoria.UPDATE,
+                    request,
+                    dados_antes,
+                    dados_depois,
+                )
+            )
+
+    try:
+        registrar_eventos(eventos)
+    except Exception:
+        import logging
+
+        logging.getLogger(__name__).exception("Failed to create audit records")
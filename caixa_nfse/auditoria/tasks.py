@@ -0,0 +1,71 @@
+"""
+Auditoria tasks - Celery writers for queued audit events and access counters.
+"""
+
+import json
+import logging
+from datetime import date, datetime
+
+from celery import shared_task
+from django.db import transaction
+
+from .models import ContadorAcesso, EventoAuditoriaPendente, RegistroAuditoria
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=5, retry_backoff=True, retry_backoff_max=300)
+def gravar_eventos_auditoria(self, eventos: list) -> int:
+    """
+    Grava um lote de eventos de auditoria (dicts de evento_auditoria):
+    encadeia os hashes por partição e grava com bulk_create. Esgotados os
+    retries, grava evento a evento e guarda os que falharem em
+    EventoAuditoriaPendente.
+    """
+    try:
+        return len(RegistroAuditoria.gravar_eventos(eventos))
+    except Exception as exc:
+        logger.exception("Erro ao gravar %d evento(s) de auditoria", len(eventos))
+        if self.request.retries >= self.max_retries:
+            return _gravar_um_a_um(eventos)
+        raise self.retry(exc=exc) from exc
+
+
+def _gravar_um_a_um(eventos: list) -> int:
+    """Último recurso do lote: isola os eventos que falham (dead letter)."""
+    gravados = 0
+    for evento in eventos:
+        try:
+            RegistroAuditoria.gravar_eventos([evento])
+            gravados += 1
+        except Exception as exc:
+            try:
+                EventoAuditoriaPendente.objects.create(evento=evento, erro=str(exc))
+            except Exception:
+                logger.critical("Evento de auditoria perdido: %s", json.dumps(evento, default=str))
+    if gravados < len(eventos):
+        logger.error("%d evento(s) de auditoria guardados como pendentes", len(eventos) - gravados)
+    return gravados
+
+
+@shared_task(bind=True, max_retries=5, retry_backoff=True, retry_backoff_max=300)
+def gravar_contadores_acesso(self, linhas: list) -> int:
+    """
+    Soma contagens de acesso ([tenant_id, usuario_id, caminho, dia, total,
+    ultimo_acesso], datas ISO) em ContadorAcesso. Tudo numa transação: um
+    retry não soma duas vezes.
+    """
+    contagens = {
+        (tenant_id, usuario_id, caminho, date.fromisoformat(dia)): (
+            total,
+            datetime.fromisoformat(ultimo),
+        )
+        for tenant_id, usuario_id, caminho, dia, total, ultimo in linhas
+    }
+    try:
+        with transaction.atomic():
+            ContadorAcesso.acumular(contagens)
+    except Exception as exc:
+        logger.exception("Erro ao gravar %d contador(es) de acesso", len(contagens))
+        raise self.retry(exc=exc) from exc
+    return len(contagens)
@@ -0,0 +1,101 @@
+"""
+Tests for auditoria/acessos.py: VIEW audit policy, dedup window and access counters.
+"""
+
+from unittest.mock import patch
+
+import pytest
+from django.test import RequestFactory
+
+from caixa_nfse.auditoria import acessos
+from caixa_nfse.auditoria.models import ContadorAcesso, RegistroAuditoria
+from caixa_nfse.conftest import *  # noqa: F401,F403
+
+
+@pytest.fixture
+def politica(settings):
+    settings.AUDITORIA_ACESSOS = {
+        "MODO": "agregado",
+        "REGISTRAR": ["/auditoria/"],
+        "EXCLUIR": ["/static/"],
+        "JANELA_DEDUP": 300,
+        "INTERVALO_ENVIO": 60,
+    }
+    return settings.AUDITORIA_ACESSOS
+
+
+def _get(user, path, **headers):
+    request = RequestFactory().get(path, headers=headers)
+    request.user = user
+    return request
+
+
+@pytest.mark.django_db
+class TestPoliticaAcesso:
+    def test_classification(self, politica, user):
+        assert acessos.politica(_get(user, "/static/app.css")) == acessos.IGNORAR
+        assert acessos.politica(_get(user, "/auditoria/")) == acessos.REGISTRAR
+        assert acessos.politica(_get(user, "/caixa/")) == acessos.CONTAR
+        assert acessos.politica(_get(user, "/auditoria/", HX_Request="true")) == acessos.CONTAR
+
+        politica["MODO"] = "registro"
+        assert acessos.politica(_get(user, "/caixa/")) == acessos.REGISTRAR
+
+    def test_counted_pages_write_no_audit_record(self, politica, user):
+        for _ in range(5):
+            acessos.auditar_acesso(_get(user, "/caixa/movimentos/", HX_Request="true"))
+
+        assert not RegistroAuditoria.objects.filter(tabela="VIEW").exists()
+        assert acessos.descarregar() == 0  # INTERVALO_ENVIO not reached
+        assert acessos.descarregar(forcar=True) == 1
+
+        contador = ContadorAcesso.objects.get(usuario=user, caminho="/caixa/movimentos/")
+        assert contador.total == 5
+        assert contador.tenant_id == user.tenant_id
+
+        # Later flushes add to the same row
+        acessos.auditar_acesso(_get(user, "/caixa/movimentos/"))
+        acessos.descarregar(forcar=True)
+        contador.refresh_from_db()
+        assert contador.total == 6
+
+    def test_registered_pages_deduplicated(self, politica, user):
+        with patch.object(acessos.cache, "add", side_effect=[True, False]):
+            acessos.auditar_acesso(_get(user, "/auditoria/?page=2"))
+            acessos.auditar_acesso(_get(user, "/auditoria/?page=3"))
+
+        registros = RegistroAuditoria.objects.filter(tabela="VIEW")
+        assert registros.count() == 1
+        assert registros.get().dados_antes == {"query_params": {"page": ["2"]}}
+
+        acessos.descarregar(forcar=True)
+        assert ContadorAcesso.objects.get(caminho="/auditoria/").total == 2
+
+    def test_flush_goes_to_queue_not_request(self, politica, user):
+        acessos.auditar_acesso(_get(user, "/caixa/"))
+
+        with (
+            patch("caixa_nfse.auditoria.tasks.gravar_contadores_acesso.delay") as delay,
+            patch.object(ContadorAcesso, "acumular") as acumular,
+        ):
+            assert acessos.descarregar(forcar=True) == 1
+
+        acumular.assert_not_called()
+        (linhas,) = delay.call_args.args
+        assert linhas[0][1:3] == [str(user.pk), "/caixa/"]
+        assert linhas[0][4] == 1
+
+    def test_pending_counts_sent_on_process_exit(self, politica, user):
+        acessos.auditar_acesso(_get(user, "/caixa/"))
+        # Interval not reached: the request path keeps the count in memory
+        with patch("caixa_nfse.auditoria.tasks.gravar_contadores_acesso.delay") as delay:
+            assert acessos.descarregar() == 0
+            acessos.descarregar_ao_sair()
+
+        (linhas,) = delay.call_args.args
+        assert linhas[0][1:3] == [str(user.pk), "/caixa/"]
+
+    def test_exit_flush_never_raises(self, politica, user):
+        acessos.auditar_acesso(_get(user, "/caixa/"))
+        with patch.object(acessos, "_enviar", side_effect=RuntimeError("db down")):
+            acessos.descarregar_ao_sair()
@@ -0,0 +1,115 @@
+"""
+Tests for auditoria/fila.py: sync/async audit writes and request batching,
+and the gravar_eventos_auditoria task.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.utils import timezone
+
+from caixa_nfse.auditoria import fila
+from caixa_nfse.auditoria.models import (
+    AcaoAuditoria,
+    EventoAuditoriaPendente,
+    RegistroAuditoria,
+    evento_auditoria,
+)
+from caixa_nfse.conftest import *  # noqa: F401,F403
+
+
+def _evento(tabela, registro_id="1"):
+    return evento_auditoria(tabela, registro_id, AcaoAuditoria.CREATE, dados_depois={"x": 1})
+
+
+@pytest.fixture
+def assincrona(settings):
+    settings.AUDITORIA_ESCRITA = {"ASSINCRONA": True, "LOTE": 2}
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("assincrona")
+class TestFilaAuditoria:
+    def test_financial_table_written_in_transaction(self):
+        fila.registrar_eventos([_evento("MovimentoCaixa")])
+        assert RegistroAuditoria.objects.filter(tabela="MovimentoCaixa").exists()
+
+    def test_async_event_written_only_after_commit(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks(execute=False) as callbacks:
+            fila.registrar_eventos([_evento("Cliente")])
+        assert not RegistroAuditoria.objects.filter(tabela="Cliente").exists()
+
+        # Commit: the eager Celery task writes the batch
+        for callback in callbacks:
+            callback()
+        assert RegistroAuditoria.objects.filter(tabela="Cliente").count() == 1
+
+    def test_request_batch_published_once(self, django_capture_on_commit_callbacks):
+        fila.iniciar_lote()
+        with django_capture_on_commit_callbacks(execute=True):
+            fila.registrar_eventos([_evento("Cliente", "1")])
+            fila.registrar_eventos([_evento("VIEW", "0")])
+
+        with patch.object(fila, "publicar") as publicar:
+            fila.despachar_lote()
+        publicar.assert_called_once()
+        assert [e["tabela"] for e in publicar.call_args.args[0]] == ["Cliente", "VIEW"]
+
+    def test_publicar_splits_batches_and_falls_back(self):
+        eventos = [_evento("VIEW", str(i)) for i in range(3)]
+        with patch(
+            "caixa_nfse.auditoria.tasks.gravar_eventos_auditoria.delay",
+            side_effect=ConnectionError("broker down"),
+        ) as delay:
+            fila.publicar(eventos)
+
+        assert delay.call_count == 2  # LOTE=2
+        registros = RegistroAuditoria.objects.filter(tabela="VIEW").order_by("sequencia")
+        assert [r.registro_id for r in registros] == ["0", "1", "2"]
+        assert registros[1].hash_anterior == registros[0].hash_registro
+
+
+@pytest.mark.django_db
+class TestGravarEventosAuditoria:
+    def test_late_write_keeps_event_time_and_order(self):
+        from caixa_nfse.auditoria.tasks import gravar_eventos_auditoria
+
+        agora = timezone.now()
+        depois = {**_evento("VIEW", "2"), "created_at": agora.isoformat()}
+        antes = {**_evento("VIEW", "1"), "created_at": (agora - timedelta(minutes=25)).isoformat()}
+
+        assert gravar_eventos_auditoria.apply(args=[[depois, antes]]).get() == 2
+
+        registros = RegistroAuditoria.objects.filter(tabela="VIEW").order_by("sequencia")
+        assert [r.registro_id for r in registros] == ["1", "2"]
+        assert registros[0].created_at == agora - timedelta(minutes=25)
+        assert registros[1].hash_anterior == registros[0].hash_registro
+
+    def test_exhausted_retries_keep_failed_events(self):
+        from caixa_nfse.auditoria.tasks import gravar_eventos_auditoria
+
+        gravar = RegistroAuditoria.gravar_eventos
+
+        def falha_com_ruim(eventos):
+            if any(evento["tabela"] == "Ruim" for evento in eventos):
+                raise ValueError("evento inválido")
+            return gravar(eventos)
+
+        eventos = [_evento("VIEW", "1"), _evento("Ruim", "2"), _evento("VIEW", "3")]
+        with patch.object(RegistroAuditoria, "gravar_eventos", side_effect=falha_com_ruim):
+            # Last attempt (retries == max_retries): written one by one
+            resultado = gravar_eventos_auditoria.apply(args=[eventos], retries=5)
+
+        assert resultado.get() == 2
+        assert RegistroAuditoria.objects.filter(tabela="VIEW").count() == 2
+        pendente = EventoAuditoriaPendente.objects.get()
+        assert pendente.evento["registro_id"] == "2"
+        assert pendente.erro == "evento inválido"
+
+        # Retried from the admin once the cause is fixed
+        pendente.evento["tabela"] = "Corrigido"
+        pendente.save()
+        assert EventoAuditoriaPendente.regravar(EventoAuditoriaPendente.objects.all()) == 1
+        assert not EventoAuditoriaPendente.objects.exists()
+        assert RegistroAuditoria.objects.filter(tabela="Corrigido").exists()
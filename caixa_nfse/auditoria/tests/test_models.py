@@ -1,6 +1,6 @@
 import pytest
 
-from caixa_nfse.auditoria.models import RegistroAuditoria
+from caixa_nfse.auditoria.models import CadeiaAuditoria, RegistroAuditoria
 from caixa_nfse.tests.factories import RegistroAuditoriaFactory, TenantFactory
 
 
@@ -81,3 +81,53 @@ class TestRegistroAuditoriaModel:
         valid, broken = RegistroAuditoria.verificar_integridade()
         assert valid is False
         assert len(broken) > 0
+
+    def test_chain_partitioned_per_tenant(self):
+        t1, t2 = TenantFactory(), TenantFactory()
+        a1 = RegistroAuditoriaFactory(tenant=t1)
+        b1 = RegistroAuditoriaFactory(tenant=t2)
+        a2 = RegistroAuditoriaFactory(tenant=t1)
+
+        assert a1.particao == str(t1.pk) and b1.particao == str(t2.pk)
+        assert a2.hash_anterior == a1.hash_registro
+        assert a2.sequencia == a1.sequencia + 1
+        cabeca = CadeiaAuditoria.objects.get(particao=str(t1.pk))
+        assert (cabeca.ultimo_hash, cabeca.sequencia) == (a2.hash_registro, a2.sequencia)
+
+        valid, broken = RegistroAuditoria.verificar_integridade(tenant=t2)
+        assert valid is True and broken == []
+
+    def test_daily_partition(self, settings):
+        from django.utils import timezone
+
+        settings.AUDITORIA_CADEIA = {"DIARIA": True}
+        t = TenantFactory()
+        record = RegistroAuditoriaFactory(tenant=t)
+        assert record.particao.startswith(f"{t.pk}:")
+        assert record.particao.endswith(timezone.localdate().isoformat())
+
+    def test_integridade_detects_truncated_tail(self):
+        t = TenantFactory()
+        RegistroAuditoriaFactory(tenant=t)
+        ultimo = RegistroAuditoriaFactory(tenant=t)
+
+        # Queryset delete bypasses the model's delete() guard
+        RegistroAuditoria.objects.filter(pk=ultimo.pk).delete()
+
+        valid, broken = RegistroAuditoria.verificar_integridade(tenant=t)
+        assert valid is False
+        assert broken[-1]["id"] == f"cadeia:{t.pk}"
+
+    def test_integridade_starts_from_archived_anchor(self):
+        t = TenantFactory()
+        arquivado = RegistroAuditoriaFactory(tenant=t)
+        RegistroAuditoriaFactory(tenant=t)
+
+        # Archiving a monthly partition removes the start of the chain
+        RegistroAuditoria.objects.filter(pk=arquivado.pk).delete()
+        assert RegistroAuditoria.verificar_integridade(tenant=t)[0] is False
+
+        CadeiaAuditoria.objects.filter(particao=arquivado.particao).update(
+            hash_arquivado=arquivado.hash_registro, sequencia_arquivada=arquivado.sequencia
+        )
+        assert RegistroAuditoria.verificar_integridade(tenant=t) == (True, [])
@@ -6,6 +6,8 @@ Covers lines 33, 37-38, 79, 100-104, 124-127.
 from unittest.mock import MagicMock, patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 from caixa_nfse.auditoria.models import RegistroAuditoria
 from caixa_nfse.auditoria.signals import model_to_dict, should_audit
@@ -58,7 +60,7 @@ class TestAuditSignals:
         )
         assert r.pk is not None
 
-    @patch("caixa_nfse.auditoria.signals.RegistroAuditoria.registrar")
+    @patch("caixa_nfse.auditoria.signals.registrar_eventos")
     def test_post_save_exception_handled(self, mock_registrar, tenant):
         """Exception in audit_save should not crash the save operation."""
         mock_registrar.side_effect = Exception("DB error")
@@ -68,7 +70,7 @@ class TestAuditSignals:
         fp = FormaPagamento.objects.create(tenant=tenant, nome="Test", ativo=True)
         assert fp.pk is not None
 
-    @patch("caixa_nfse.auditoria.signals.RegistroAuditoria.registrar")
+    @patch("caixa_nfse.auditoria.signals.registrar_eventos")
     def test_post_delete_exception_handled(self, mock_registrar, tenant):
         """Exception in audit_delete should not crash the delete operation."""
         from caixa_nfse.core.models import FormaPagamento
@@ -78,7 +80,7 @@ class TestAuditSignals:
         # This should NOT raise even though audit fails
         fp.delete()
 
-    @patch("caixa_nfse.auditoria.signals.RegistroAuditoria.registrar")
+    @patch("caixa_nfse.auditoria.signals.registrar_eventos")
     def test_audit_save_skips_when_no_changes(self, mock_registrar, tenant):
         """Saving without changes should not create audit record (L89)."""
         from caixa_nfse.auditoria.signals import audit_save
@@ -108,3 +110,50 @@ class TestAuditSignals:
         mock_sender._meta.app_label = "core"  # would normally be audited
         # Should return early without error
         audit_save(mock_sender, instance=MagicMock(), created=True)
+
+
+@pytest.mark.django_db
+class TestOriginalStateSnapshot:
+    def _selects(self, ctx, tabela):
+        return [
+            q["sql"]
+            for q in ctx.captured_queries
+            if q["sql"].startswith("SELECT") and f'FROM "{tabela}"' in q["sql"]
+        ]
+
+    def test_update_does_not_refetch(self, forma_pagamento):
+        from caixa_nfse.core.models import FormaPagamento
+
+        fp = FormaPagamento.objects.get(pk=forma_pagamento.pk)
+        fp.nome = "PIX"
+        with CaptureQueriesContext(connection) as ctx:
+            fp.save()
+        assert self._selects(ctx, FormaPagamento._meta.db_table) == []
+
+        registro = RegistroAuditoria.objects.filter(
+            tabela="FormaPagamento", registro_id=str(fp.pk), acao="UPDATE"
+        ).latest("sequencia")
+        assert registro.dados_antes["nome"] == "Dinheiro"
+        assert registro.dados_depois["nome"] == "PIX"
+
+    def test_update_fields_diff_ignores_unsaved_fields(self, forma_pagamento):
+        fp = forma_pagamento
+        fp.nome = "Não salvo"
+        fp.ativo = False
+        fp.save(update_fields=["ativo"])
+
+        registro = RegistroAuditoria.objects.filter(
+            tabela="FormaPagamento", registro_id=str(fp.pk), acao="UPDATE"
+        ).latest("sequencia")
+        assert registro.dados_antes["ativo"] == "True"
+        assert registro.dados_depois["ativo"] == "False"
+        assert registro.dados_depois["nome"] == "Dinheiro"
+
+    def test_deferred_field_fetched_only_when_saved(self, forma_pagamento):
+        from caixa_nfse.core.models import FormaPagamento
+
+        fp = FormaPagamento.objects.only("id", "ativo", "updated_at").get(pk=forma_pagamento.pk)
+        fp.ativo = False
+        with CaptureQueriesContext(connection) as ctx:
+            fp.save(update_fields=["ativo", "updated_at"])
+        assert self._selects(ctx, FormaPagamento._meta.db_table) == []
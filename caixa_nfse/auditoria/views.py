@@ -41,10 +41,8 @@ class AuditoriaListView(LoginRequiredMixin, TenantAdminRequiredMixin, ListView):
             qs = qs.filter(acao=acao)
         if usuario:
             qs = qs.filter(usuario_id=usuario)
-        if data_inicio:
-            qs = qs.filter(created_at__date__gte=data_inicio)
-        if data_fim:
-            qs = qs.filter(created_at__date__lte=data_fim)
+        # created_at range (not __date): lets PostgreSQL prune monthly partitions
+        qs = qs.periodo(data_inicio, data_fim)
 
         return qs.select_related("usuario", "tenant")
 
@@ -110,10 +108,8 @@ class ExportarAuditoriaView(LoginRequiredMixin, TenantAdminRequiredMixin, View):
         data_inicio = request.GET.get("data_inicio")
         data_fim = request.GET.get("data_fim")
 
-        if data_inicio:
-            qs = qs.filter(created_at__date__gte=data_inicio)
-        if data_fim:
-            qs = qs.filter(created_at__date__lte=data_fim)
+        # created_at range (not __date): lets PostgreSQL prune monthly partitions
+        qs = qs.periodo(data_inicio, data_fim)
 
         for registro in qs.iterator():
             writer.writerow(
@@ -5,3 +5,7 @@ class BackofficeConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "caixa_nfse.backoffice"
     verbose_name = "Backoffice (Plataforma)"
+
+    def ready(self):
+        """Import signals when app is ready."""
+        import caixa_nfse.backoffice.signals  # noqa: F401
@@ -45,7 +45,7 @@ class Rotina(models.Model):
 
     def extrair_variaveis(self):
         """Extract @VARIABLE names from SQL content. Returns sorted unique list."""
-        import re
+        from caixa_nfse.core.services.sql_executor import SQLExecutor
 
         # System-managed vars (injected automatically, never shown to user)
         SYSTEM_VARS = {"SERVICOANDAMENTO"}
@@ -53,10 +53,8 @@ class Rotina(models.Model):
         sql = self.sql_content or ""
         if self.sql_content_extra:
             sql += "\n" + self.sql_content_extra
-        # Match @WORD_CHARS not inside quotes
-        variaveis = set(re.findall(r"@(\w+)", sql, re.IGNORECASE))
-        # Remove SQL Server built-in variables (@@IDENTITY, @@ROWCOUNT, etc.)
-        variaveis = {v for v in variaveis if not v.startswith("@")}
+        # Same rules as the compiled SQL: skips @@GLOBALS, comments and literals
+        variaveis = set(SQLExecutor.extract_variables(sql))
         # Remove system-managed vars
         variaveis -= SYSTEM_VARS
         return sorted(variaveis)
@@ -0,0 +1,27 @@
+"""
+Backoffice signals — Mantém o cache de rotinas compiladas coerente com o cadastro.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+
+@receiver(post_save, sender="backoffice.Rotina")
+@receiver(post_delete, sender="backoffice.Rotina")
+def invalidate_compiled_rotina(sender, instance, **kwargs):
+    """Rotina salva já ganha novo updated_at; só descarta a cópia local."""
+    from caixa_nfse.caixa.services.rotina_compilada import RotinaCache
+
+    RotinaCache.invalidate(instance.pk)
+
+
+@receiver(post_save, sender="backoffice.MapeamentoColunaRotina")
+@receiver(post_delete, sender="backoffice.MapeamentoColunaRotina")
+def bump_rotina_version(sender, instance, **kwargs):
+    """Mapeamento alterado: nova versão da rotina invalida o cache em todos os processos."""
+    from caixa_nfse.backoffice.models import Rotina
+    from caixa_nfse.caixa.services.rotina_compilada import RotinaCache
+
+    Rotina.objects.filter(pk=instance.rotina_id).update(updated_at=timezone.now())
+    RotinaCache.invalidate(instance.rotina_id)
@@ -252,7 +252,9 @@ class TestTenantHealthCheck:
             response = self.client.post(url)
             assert response.status_code == 200
             assert "Conexão OK" in response.content.decode()
-            mock_conn.close.assert_called_once()
+            mock_conn.cursor.return_value.execute.assert_called_once_with(
+                "SELECT 1 FROM RDB$DATABASE"
+            )
 
     def test_health_check_connection_failure(self):
         from unittest.mock import patch
@@ -380,8 +380,7 @@ class TenantHealthCheckView(LoginRequiredMixin, PlatformAdminRequiredMixin, View
         results = []
         for c in conexoes:
             try:
-                conn = SQLExecutor.get_connection(c)
-                conn.close()
+                SQLExecutor.check_connection(c)
                 results.append({"conexao": c, "ok": True, "msg": "Conexão OK"})
             except Exception as e:
                 results.append({"conexao": c, "ok": False, "msg": str(e)})
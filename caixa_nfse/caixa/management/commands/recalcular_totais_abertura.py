@@ -0,0 +1,63 @@
+"""
+Management command to rebuild or verify the materialized totals of AberturaCaixa
+(total_entradas, total_saidas, qtd_movimentos) against the movements.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from caixa_nfse.caixa.models import AberturaCaixa
+from caixa_nfse.caixa.services.saldo import SaldoCaixa
+
+CAMPOS = ["total_entradas", "total_saidas", "qtd_movimentos"]
+
+
+class Command(BaseCommand):
+    help = "Reconstrói (ou apenas verifica) os totais materializados das aberturas de caixa."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verificar",
+            action="store_true",
+            help="Apenas relata divergências, sem corrigir.",
+        )
+        parser.add_argument("--abertura", help="ID de uma abertura específica.")
+        parser.add_argument(
+            "--abertas",
+            action="store_true",
+            help="Somente aberturas ainda não fechadas.",
+        )
+
+    def handle(self, *args, **options):
+        aberturas = AberturaCaixa.objects.order_by("data_hora")
+        if options["abertura"]:
+            aberturas = aberturas.filter(pk=options["abertura"])
+        if options["abertas"]:
+            aberturas = aberturas.filter(fechado=False)
+
+        verificadas = divergentes = 0
+        for abertura_id in aberturas.values_list("pk", flat=True).iterator():
+            with transaction.atomic():
+                # Lock the row so concurrent inserts wait for the rebuild
+                abertura = AberturaCaixa.objects.select_for_update().get(pk=abertura_id)
+                totais = SaldoCaixa.totais(abertura)
+                verificadas += 1
+
+                atuais = {campo: getattr(abertura, campo) for campo in CAMPOS}
+                if atuais == totais:
+                    continue
+
+                divergentes += 1
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"Abertura {abertura.pk}: armazenado {atuais}, calculado {totais}"
+                    )
+                )
+                if not options["verificar"]:
+                    AberturaCaixa.objects.filter(pk=abertura.pk).update(**totais)
+
+        acao = "encontrada(s)" if options["verificar"] else "corrigida(s)"
+        estilo = self.style.ERROR if options["verificar"] and divergentes else self.style.SUCCESS
+        self.stdout.write(
+            estilo(f"{verificadas} abertura(s) verificada(s), {divergentes} divergência(s) {acao}.")
+        )
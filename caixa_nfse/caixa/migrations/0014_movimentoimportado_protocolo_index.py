@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-16 10:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caixa', '0013_add_cliente_nome_to_movimentocaixa'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimentoimportado',
+            index=models.Index(fields=['tenant', 'rotina', 'protocolo'], name='caixa_movim_tenant__10c632_idx'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-16 14:00
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def preencher_totais(apps, schema_editor):
+    AberturaCaixa = apps.get_model("caixa", "AberturaCaixa")
+    MovimentoCaixa = apps.get_model("caixa", "MovimentoCaixa")
+    totais = MovimentoCaixa.objects.values("abertura_id").annotate(
+        entradas=Sum("valor", filter=Q(tipo__in=["ENTRADA", "SUPRIMENTO"])),
+        saidas=Sum("valor", filter=Q(tipo__in=["SAIDA", "SANGRIA", "ESTORNO"])),
+        qtd=Count("pk"),
+    )
+    for total in totais:
+        AberturaCaixa.objects.filter(pk=total["abertura_id"]).update(
+            total_entradas=total["entradas"] or Decimal("0.00"),
+            total_saidas=total["saidas"] or Decimal("0.00"),
+            qtd_movimentos=total["qtd"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caixa', '0014_movimentoimportado_protocolo_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aberturacaixa',
+            name='total_entradas',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14, verbose_name='total de entradas'),
+        ),
+        migrations.AddField(
+            model_name='aberturacaixa',
+            name='total_saidas',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=14, verbose_name='total de saídas'),
+        ),
+        migrations.AddField(
+            model_name='aberturacaixa',
+            name='qtd_movimentos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='quantidade de movimentos'),
+        ),
+        migrations.RunPython(preencher_totais, migrations.RunPython.noop),
+    ]
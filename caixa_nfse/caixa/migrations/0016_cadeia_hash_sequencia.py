@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-16 15:00
+
+from django.db import migrations, models
+
+
+def preencher_sequencias(apps, schema_editor):
+    """Numera as cadeias existentes pela ordem de criação e grava as cabeças."""
+    Tenant = apps.get_model("core", "Tenant")
+    AberturaCaixa = apps.get_model("caixa", "AberturaCaixa")
+    MovimentoCaixa = apps.get_model("caixa", "MovimentoCaixa")
+
+    for tenant in Tenant.objects.all():
+        aberturas = list(AberturaCaixa.objects.filter(tenant=tenant).order_by("created_at"))
+        for seq, abertura in enumerate(aberturas, start=1):
+            abertura.sequencia = seq
+
+            movimentos = list(MovimentoCaixa.objects.filter(abertura=abertura).order_by("created_at"))
+            for mov_seq, movimento in enumerate(movimentos, start=1):
+                movimento.sequencia = mov_seq
+            MovimentoCaixa.objects.bulk_update(movimentos, ["sequencia"], batch_size=500)
+            if movimentos:
+                abertura.cadeia_movimentos_hash = movimentos[-1].hash_registro
+                abertura.cadeia_movimentos_seq = len(movimentos)
+
+        AberturaCaixa.objects.bulk_update(
+            aberturas,
+            ["sequencia", "cadeia_movimentos_hash", "cadeia_movimentos_seq"],
+            batch_size=500,
+        )
+        if aberturas:
+            Tenant.objects.filter(pk=tenant.pk).update(
+                cadeia_aberturas_hash=aberturas[-1].hash_registro,
+                cadeia_aberturas_seq=len(aberturas),
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caixa', '0015_aberturacaixa_totais_materializados'),
+        ('core', '0011_tenant_cadeia_aberturas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='aberturacaixa',
+            name='sequencia',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='sequência na cadeia'),
+        ),
+        migrations.AddField(
+            model_name='aberturacaixa',
+            name='cadeia_movimentos_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='hash do último movimento'),
+        ),
+        migrations.AddField(
+            model_name='aberturacaixa',
+            name='cadeia_movimentos_seq',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='sequência do último movimento'),
+        ),
+        migrations.AddField(
+            model_name='movimentocaixa',
+            name='sequencia',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='sequência na cadeia'),
+        ),
+        migrations.RunPython(preencher_sequencias, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='aberturacaixa',
+            constraint=models.UniqueConstraint(fields=('tenant', 'sequencia'), name='caixa_abertura_sequencia_unica'),
+        ),
+        migrations.AddConstraint(
+            model_name='movimentocaixa',
+            constraint=models.UniqueConstraint(fields=('abertura', 'sequencia'), name='caixa_movimento_sequencia_unica'),
+        ),
+    ]
@@ -7,7 +7,7 @@ from decimal import Decimal
 
 from django.conf import settings
 from django.core.validators import MinValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
@@ -194,27 +194,87 @@ class AberturaCaixa(TenantAwareModel):
         blank=True,
         editable=False,
     )
+    sequencia = models.PositiveIntegerField(
+        _("sequência na cadeia"),
+        default=0,
+        editable=False,
+    )
+
+    # Cabeça da cadeia de hash dos movimentos (atualizada sob lock da linha)
+    cadeia_movimentos_hash = models.CharField(
+        _("hash do último movimento"),
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
+    cadeia_movimentos_seq = models.PositiveIntegerField(
+        _("sequência do último movimento"),
+        default=0,
+        editable=False,
+    )
+
+    # Totais materializados, mantidos por SaldoCaixa.registrar na inserção de
+    # movimentos (estornos contam como saída). Reconstrução/verificação:
+    # manage.py recalcular_totais_abertura
+    total_entradas = models.DecimalField(
+        _("total de entradas"),
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        editable=False,
+    )
+    total_saidas = models.DecimalField(
+        _("total de saídas"),
+        max_digits=14,
+        decimal_places=2,
+        default=Decimal("0.00"),
+        editable=False,
+    )
+    qtd_movimentos = models.PositiveIntegerField(
+        _("quantidade de movimentos"),
+        default=0,
+        editable=False,
+    )
 
     # Status
     fechado = models.BooleanField(_("fechado"), default=False)
 
+    CAMPOS_ATOMICOS = (
+        "cadeia_movimentos_hash",
+        "cadeia_movimentos_seq",
+        "total_entradas",
+        "total_saidas",
+        "qtd_movimentos",
+    )
+
     class Meta:
         verbose_name = _("abertura de caixa")
         verbose_name_plural = _("aberturas de caixa")
         ordering = ["-data_hora"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["tenant", "sequencia"], name="caixa_abertura_sequencia_unica"
+            ),
+        ]
 
     def __str__(self):
         return f"Abertura {self.caixa.identificador} - {self.data_hora.strftime('%d/%m/%Y %H:%M')}"
 
     def save(self, *args, **kwargs):
-        """Generate hash before saving."""
-        if not self.hash_registro:
-            # Get previous hash
-            last_abertura = (
-                AberturaCaixa.objects.filter(tenant=self.tenant).order_by("-created_at").first()
+        """Generate hash before saving, chained to the tenant's chain head."""
+        if self.hash_registro:
+            return super().save(*args, **kwargs)
+
+        from caixa_nfse.core.models import Tenant
+
+        with transaction.atomic():
+            # Chain head read under row lock: concurrent aberturas get strict sequence
+            self.hash_anterior, seq = (
+                Tenant.all_objects.select_for_update()
+                .values_list("cadeia_aberturas_hash", "cadeia_aberturas_seq")
+                .get(pk=self.tenant_id)
             )
-
-            self.hash_anterior = last_abertura.hash_registro if last_abertura else ""
+            self.sequencia = seq + 1
 
             # Generate hash
             data = {
@@ -226,7 +286,11 @@ class AberturaCaixa(TenantAwareModel):
             }
             self.hash_registro = generate_hash(data, self.hash_anterior)
 
-        super().save(*args, **kwargs)
+            super().save(*args, **kwargs)
+            Tenant.all_objects.filter(pk=self.tenant_id).update(
+                cadeia_aberturas_hash=self.hash_registro,
+                cadeia_aberturas_seq=self.sequencia,
+            )
 
     @property
     def pode_editar_saldo_inicial(self) -> bool:
@@ -247,30 +311,8 @@ class AberturaCaixa(TenantAwareModel):
 
     @property
     def saldo_movimentos(self) -> Decimal:
-        """Calcula saldo baseado nos movimentos."""
-        entradas = self.movimentos.filter(
-            tipo__in=[TipoMovimento.ENTRADA, TipoMovimento.SUPRIMENTO]
-        ).aggregate(total=models.Sum("valor"))["total"] or Decimal("0.00")
-
-        saidas = self.movimentos.filter(
-            tipo__in=[TipoMovimento.SAIDA, TipoMovimento.SANGRIA, TipoMovimento.ESTORNO]
-        ).aggregate(total=models.Sum("valor"))["total"] or Decimal("0.00")
-
-        return self.saldo_abertura + entradas - saidas
-
-    @property
-    def total_entradas(self) -> Decimal:
-        """Calcula total de entradas."""
-        return self.movimentos.filter(
-            tipo__in=[TipoMovimento.ENTRADA, TipoMovimento.SUPRIMENTO]
-        ).aggregate(total=models.Sum("valor"))["total"] or Decimal("0.00")
-
-    @property
-    def total_saidas(self) -> Decimal:
-        """Calcula total de saídas."""
-        return self.movimentos.filter(
-            tipo__in=[TipoMovimento.SAIDA, TipoMovimento.SANGRIA, TipoMovimento.ESTORNO]
-        ).aggregate(total=models.Sum("valor"))["total"] or Decimal("0.00")
+        """Saldo de abertura mais os totais materializados (sem agregação)."""
+        return self.saldo_abertura + self.total_entradas - self.total_saidas
 
     @property
     def saldo_calculado(self) -> Decimal:
@@ -505,6 +547,11 @@ class MovimentoCaixa(TenantAwareModel):
         blank=True,
         editable=False,
     )
+    sequencia = models.PositiveIntegerField(
+        _("sequência na cadeia"),
+        default=0,
+        editable=False,
+    )
 
     # Data/hora do movimento
     data_hora = models.DateTimeField(
@@ -544,35 +591,63 @@ class MovimentoCaixa(TenantAwareModel):
         verbose_name = _("movimento de caixa")
         verbose_name_plural = _("movimentos de caixa")
         ordering = ["-data_hora"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["abertura", "sequencia"], name="caixa_movimento_sequencia_unica"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_display()} - R$ {self.valor}"
 
     def save(self, *args, **kwargs):
-        """Generate hash before saving."""
-        if not self.hash_registro:
-            # Get previous hash
-            last_movimento = (
-                MovimentoCaixa.objects.filter(abertura=self.abertura)
-                .order_by("-created_at")
-                .first()
-            )
-
-            self.hash_anterior = (
-                last_movimento.hash_registro if last_movimento else self.abertura.hash_registro
-            )
-
-            # Generate hash
-            data = {
-                "abertura_id": str(self.abertura_id),
-                "tipo": self.tipo,
-                "forma_pagamento_id": str(self.forma_pagamento_id),
-                "valor": str(self.valor),
-                "data_hora": str(self.data_hora),
-            }
-            self.hash_registro = generate_hash(data, self.hash_anterior)
-
-        super().save(*args, **kwargs)
+        """Generate hash before saving; inserts also update the abertura totals."""
+        from caixa_nfse.caixa.services.saldo import SaldoCaixa
+
+        novo = self._state.adding
+        with transaction.atomic():
+            if not self.hash_registro:
+                MovimentoCaixa.encadear_lote(self.abertura, [self])
+            super().save(*args, **kwargs)
+            if novo:
+                SaldoCaixa.registrar(self.abertura, [self])
+
+    @staticmethod
+    def encadear_lote(abertura, movimentos) -> None:
+        """
+        Encadeia os movimentos, em ordem, a partir da cabeça da cadeia da abertura
+        (lida sob lock da linha) e avança a cabeça. Deve rodar na transação que
+        insere os movimentos.
+        """
+        hash_abertura, hash_anterior, seq = (
+            AberturaCaixa.objects.select_for_update()
+            .values_list("hash_registro", "cadeia_movimentos_hash", "cadeia_movimentos_seq")
+            .get(pk=abertura.pk)
+        )
+        hash_anterior = hash_anterior or hash_abertura
+        for movimento in movimentos:
+            seq += 1
+            movimento.sequencia = seq
+            hash_anterior = movimento.encadear(hash_anterior)
+
+        AberturaCaixa.objects.filter(pk=abertura.pk).update(
+            cadeia_movimentos_hash=hash_anterior, cadeia_movimentos_seq=seq
+        )
+        abertura.cadeia_movimentos_hash = hash_anterior
+        abertura.cadeia_movimentos_seq = seq
+
+    def encadear(self, hash_anterior: str) -> str:
+        """Encadeia o movimento a hash_anterior e calcula hash_registro."""
+        self.hash_anterior = hash_anterior
+        data = {
+            "abertura_id": str(self.abertura_id),
+            "tipo": self.tipo,
+            "forma_pagamento_id": str(self.forma_pagamento_id),
+            "valor": str(self.valor),
+            "data_hora": str(self.data_hora),
+        }
+        self.hash_registro = generate_hash(data, hash_anterior)
+        return self.hash_registro
 
     @property
     def valor_total_taxas(self) -> Decimal:
@@ -911,6 +986,10 @@ class MovimentoImportado(TenantAwareModel):
         verbose_name = _("movimento importado")
         verbose_name_plural = _("movimentos importados")
         ordering = ["-importado_em"]
+        indexes = [
+            # Duplicate-protocolo lookups (protocolo__in) of the importer
+            models.Index(fields=["tenant", "rotina", "protocolo"]),
+        ]
 
     def __str__(self):
         return f"Import #{self.pk} - {self.protocolo or 'S/P'}"
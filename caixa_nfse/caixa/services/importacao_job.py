@@ -0,0 +1,108 @@
+"""
+Estado das buscas de importação executadas em background (Celery).
+
+A view cria o job e dispara a task; a task publica o progresso (rotinas
+concluídas, linhas lidas, grupos montados) e, ao final, o contexto da
+pré-visualização. A UI consulta o status por polling HTMX.
+"""
+
+import logging
+import re
+import secrets
+import threading
+import time
+
+from caixa_nfse.caixa.services.preview_cache import cache_importacao
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "importacao_job"
+TTL = 60 * 60  # seconds
+
+_TOKEN_RE = re.compile(r"^[\w-]{16,64}$")
+_lock = threading.Lock()  # rotinas concluem em threads do mesmo processo
+
+
+class ImportacaoJob:
+    """Status e resultado de uma busca de movimentos, indexados por job_id."""
+
+    PENDENTE = "pendente"
+    EXECUTANDO = "executando"
+    CONCLUIDO = "concluido"
+    ERRO = "erro"
+
+    @staticmethod
+    def criar(user, abertura, total_rotinas: int) -> str:
+        job_id = secrets.token_urlsafe(16)
+        status = {
+            "user_id": user.pk,
+            "abertura_id": str(abertura.pk),
+            "estado": ImportacaoJob.PENDENTE,
+            "inicio": time.time(),
+            "decorrido": 0.0,
+            "total_rotinas": total_rotinas,
+            "rotinas_concluidas": 0,
+            "linhas": 0,
+            "grupos": 0,
+            "mensagem": "",
+        }
+        cache_importacao().set(_key(job_id), status, TTL)
+        return job_id
+
+    @staticmethod
+    def status(job_id, user, abertura) -> dict | None:
+        """Status do job, ou None se não existir ou pertencer a outro usuário/abertura."""
+        if not job_id or not _TOKEN_RE.match(job_id):
+            return None
+        status = cache_importacao().get(_key(job_id))
+        if status is None:
+            return None
+        if status["user_id"] != user.pk or status["abertura_id"] != str(abertura.pk):
+            return None
+        return status
+
+    @staticmethod
+    def publicar(job_id, **campos) -> None:
+        """Atualiza campos do status (e o tempo decorrido)."""
+        with _lock:
+            status = cache_importacao().get(_key(job_id))
+            if status is None:
+                return
+            status.update(campos)
+            status["decorrido"] = round(time.time() - status["inicio"], 1)
+            cache_importacao().set(_key(job_id), status, TTL)
+
+    @staticmethod
+    def rotina_concluida(job_id, linhas: int) -> None:
+        """Incrementa os contadores quando uma rotina termina."""
+        with _lock:
+            status = cache_importacao().get(_key(job_id))
+            if status is None:
+                return
+            status["rotinas_concluidas"] += 1
+            status["linhas"] += linhas
+            status["decorrido"] = round(time.time() - status["inicio"], 1)
+            cache_importacao().set(_key(job_id), status, TTL)
+
+    @staticmethod
+    def concluir(job_id, template: str, contexto: dict) -> None:
+        """Armazena o resultado (template + contexto) e marca o job como concluído."""
+        cache_importacao().set(_resultado_key(job_id), (template, contexto), TTL)
+        ImportacaoJob.publicar(job_id, estado=ImportacaoJob.CONCLUIDO)
+
+    @staticmethod
+    def falhar(job_id, mensagem: str) -> None:
+        ImportacaoJob.publicar(job_id, estado=ImportacaoJob.ERRO, mensagem=mensagem)
+
+    @staticmethod
+    def resultado(job_id):
+        """(template, contexto) do job concluído, ou None."""
+        return cache_importacao().get(_resultado_key(job_id))
+
+
+def _key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:{job_id}"
+
+
+def _resultado_key(job_id: str) -> str:
+    return f"{KEY_PREFIX}:{job_id}:resultado"
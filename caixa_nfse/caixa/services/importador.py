@@ -5,14 +5,22 @@ Service layer for importing movements from external databases via Rotinas SQL.
 import logging
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
+from functools import partial
 
+from django.conf import settings
 from django.db import transaction
 from django.utils import timezone
 
+from caixa_nfse.caixa.services.mapeador_colunar import MapeadorColunar
+from caixa_nfse.caixa.services.rotina_compilada import RotinaCache
+from caixa_nfse.caixa.services.saldo import SaldoCaixa
 from caixa_nfse.core.services.sql_executor import SQLExecutor
 
 logger = logging.getLogger(__name__)
 
+# Max objects per bulk INSERT / pk__in UPDATE issued by the importer
+BULK_BATCH_SIZE = 500
+
 
 class ImportadorMovimentos:
     """Orchestrates import of movements from external databases."""
@@ -22,21 +30,100 @@ class ImportadorMovimentos:
         """
         Execute multiple rotinas against an external connection.
         Accepts dynamic params dict (e.g. {"DATA_INICIO": "...", "PROTOCOLO": "..."}).
+        All rotinas borrow from the SQLExecutor connection pool, so the same
+        connection is reused instead of reconnecting per rotina.
         Returns list of (rotina, headers, rows, logs) tuples.
         """
+        resultados = ImportadorMovimentos.executar_em_paralelo([(conexao, rotinas)], params)
+        return [(rotina, headers, rows, logs) for _, rotina, headers, rows, logs in resultados]
+
+    @staticmethod
+    def executar_em_paralelo(
+        jobs, params=None, max_workers=None, max_por_conexao=None, timeout=None, ao_concluir=None
+    ):
+        """
+        Execute (conexao, rotinas) jobs concurrently in a bounded thread pool.
+
+        The DB drivers release the GIL while waiting on the network, so the
+        preview latency becomes that of the slowest rotina instead of the sum.
+        - ``max_workers``: total threads (IMPORTACAO_PARALELA["MAX_WORKERS"])
+        - ``max_por_conexao``: concurrent queries per ConexaoExterna
+        - ``timeout``: seconds for the whole batch; rotinas still running are
+          reported with an error log and an empty result
+        - ``ao_concluir``: optional ``callback(origem, linhas)`` called from the
+          worker thread as each rotina finishes (progress reporting)
+
+        Results keep the input order. Each log entry is prefixed with its origin
+        ("Sistema - Rotina") so merged logs stay attributable.
+        Returns list of (conexao, rotina, headers, rows, logs) tuples.
+        """
+        import threading
+        from concurrent.futures import ThreadPoolExecutor, wait
+
         if params is None:
             params = {}
+        config = getattr(settings, "IMPORTACAO_PARALELA", {})
+        max_workers = max_workers or config.get("MAX_WORKERS", 8)
+        max_por_conexao = max_por_conexao or config.get("MAX_POR_CONEXAO", 2)
+        timeout = timeout or config.get("TIMEOUT", 120)
+
+        tarefas = []  # (conexao, rotina, sql, origem), in input order
+        semaforos = {}
+        for conexao, rotinas in jobs:
+            semaforos.setdefault(conexao.pk, threading.BoundedSemaphore(max_por_conexao))
+            for rotina in rotinas:
+                sql = RotinaCache.get(rotina).sql
+                tarefas.append((conexao, rotina, sql, f"{conexao.sistema} - {rotina.nome}"))
+
+        if not tarefas:
+            return []
+
+        def executar(conexao, sql, origem):
+            with semaforos[conexao.pk]:
+                resultado = SQLExecutor.execute_routine(conexao, sql, params)
+            if ao_concluir is not None:
+                try:
+                    ao_concluir(origem, len(resultado[1]))
+                except Exception:
+                    logger.warning("Falha ao publicar progresso de %s", origem, exc_info=True)
+            return resultado
+
+        executor = ThreadPoolExecutor(
+            max_workers=min(max_workers, len(tarefas)), thread_name_prefix="importador"
+        )
+        try:
+            futures = [
+                executor.submit(executar, conexao, sql, origem)
+                for conexao, _, sql, origem in tarefas
+            ]
+            wait(futures, timeout=timeout)
+        finally:
+            # Do not block on rotinas past the timeout; their connections go back
+            # to the pool when the driver call returns
+            executor.shutdown(wait=False, cancel_futures=True)
 
         resultados = []
-        for rotina in rotinas:
-            sql_parts = [rotina.sql_content.strip()]
-            if rotina.sql_content_extra:
-                sql_parts.append(rotina.sql_content_extra.strip())
-            sql = "\n".join(sql_parts).replace("\r", "")
-            headers, rows, logs = SQLExecutor.execute_routine(conexao, sql, params)
-            resultados.append((rotina, headers, rows, logs))
+        for (conexao, rotina, _, origem), future in zip(tarefas, futures, strict=True):
+            if future.cancelled() or not future.done():
+                logs = [ImportadorMovimentos._log_erro(f"Tempo limite de {timeout}s excedido.")]
+                headers, rows = [], []
+                logger.warning("Rotina %s excedeu o tempo limite de %ss", origem, timeout)
+            elif future.exception() is not None:
+                logs = [ImportadorMovimentos._log_erro(f"Erro inesperado: {future.exception()}")]
+                headers, rows = [], []
+            else:
+                headers, rows, logs = future.result()
+            for entry in logs:
+                entry["origem"] = origem
+                entry["msg"] = f"[{origem}] {entry['msg']}"
+            resultados.append((conexao, rotina, headers, rows, logs))
         return resultados
 
+    @staticmethod
+    def _log_erro(msg):
+        """Log entry in the SQLExecutor format, for failures outside execute_routine."""
+        return {"time": timezone.localtime().strftime("%H:%M:%S"), "msg": msg, "type": "error"}
+
     # Auto-mapping aliases: SQL column names -> campo_destino
     AUTO_MAP_ALIASES = {
         # protocolo
@@ -141,27 +228,11 @@ class ImportadorMovimentos:
         When multiple SQL columns map to the same decimal target (e.g. VALOR +
         VALORRECEITAADICIONAL1), values are accumulated (summed) instead of
         overwritten.
+        The mapping comes from the cached CompiledRotina, so no query is issued
+        per row; hot loops should build indice_colunas once and call mapear.
         """
-        manual = {m.coluna_sql.upper(): m.campo_destino for m in rotina.mapeamentos.all()}
-        use_auto = not manual
-
-        mapped = {}
-        for i, header in enumerate(headers):
-            h = header.upper()
-            if use_auto:
-                campo = ImportadorMovimentos.AUTO_MAP_ALIASES.get(h)
-            else:
-                campo = manual.get(h)
-            if campo and i < len(row):
-                # Accumulate decimal fields when same target appears multiple times
-                if campo in ImportadorMovimentos._ACCUMULATE_FIELDS and campo in mapped:
-                    existing = ImportadorMovimentos._parse_decimal(mapped[campo])
-                    new_val = ImportadorMovimentos._parse_decimal(row[i])
-                    mapped[campo] = str(existing + new_val)
-                else:
-                    mapped[campo] = row[i]
-
-        return mapped
+        compilada = RotinaCache.get(rotina)
+        return compilada.mapear(compilada.indice_colunas(headers), row)
 
     @staticmethod
     def _parse_decimal(value):
@@ -194,6 +265,14 @@ class ImportadorMovimentos:
                 continue
         return None
 
+    @staticmethod
+    def _parse_quantidade(value):
+        """Parse a quantity; empty or invalid values count as 1."""
+        try:
+            return int(value) if value else 1
+        except (ValueError, TypeError):
+            return 1
+
     @staticmethod
     def salvar_importacao(abertura, conexao, rotina, headers, rows, user):
         """
@@ -202,35 +281,254 @@ class ImportadorMovimentos:
         Returns tuple (created_count, skipped_count).
         Skips rows whose protocolo already exists for the same sistema+rotina.
         """
+        return ImportadorMovimentos.salvar_importacoes(
+            abertura, [(conexao, rotina, headers, rows)], user
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def salvar_importacoes(abertura, selecoes, user):
+        """
+        Save several (conexao, rotina, headers, rows) selections in one transaction.
+        Selections are grouped by (conexão, rotina): only the protocolos of each
+        group are checked against the database, the valor backfill is computed in
+        memory and all parents and children are written with one bulk_create each.
+        Returns tuple (created_count, skipped_count).
+        """
         from caixa_nfse.caixa.models import ItemAtoImportado, MovimentoImportado
 
-        DECIMAL_FIELDS = set(MovimentoImportado.TAXA_FIELDS) | {"valor"}
+        # (conexao, rotina) -> {headers: rows}; same headers are merged so a
+        # protocolo selected in more than one group still yields a single parent
+        por_rotina = {}
+        for conexao, rotina, headers, rows in selecoes:
+            entrada = por_rotina.setdefault((conexao.pk, rotina.pk), (conexao, rotina, {}))
+            entrada[2].setdefault(tuple(headers), []).extend(rows)
+
+        parents = []
+        children = []
+        total_skipped = 0
+        for conexao, rotina, blocos in por_rotina.values():
+            existentes = partial(
+                ImportadorMovimentos.protocolos_existentes, user.tenant, conexao, rotina
+            )
+            for headers, rows in blocos.items():
+                grupos, skipped = ImportadorMovimentos._agrupar_lote(
+                    rotina, list(headers), rows, user, existentes
+                )
+                total_skipped += skipped
+                for grupo in grupos:
+                    parent = ImportadorMovimentos._novo_movimento(
+                        abertura, conexao, rotina, user, grupo
+                    )
+                    # Backfill valor: when SQL has no 'valor' column, use sum of TAXA_FIELDS
+                    if not parent.valor:
+                        parent.valor = sum(grupo["taxas"].values(), Decimal("0.00"))
+                    parents.append(parent)
+                    for child in grupo["itens"]:
+                        child.movimento_importado = parent
+                    children.extend(grupo["itens"])
+
+        if parents:
+            MovimentoImportado.objects.bulk_create(parents, batch_size=BULK_BATCH_SIZE)
+        if children:
+            ItemAtoImportado.objects.bulk_create(children, batch_size=BULK_BATCH_SIZE)
+
+        return len(parents), total_skipped
 
-        # Fetch existing protocolos for this sistema + rotina
-        existing = set(
-            MovimentoImportado.objects.filter(
-                tenant=user.tenant,
-                conexao__sistema=conexao.sistema,
-                rotina=rotina,
+    @staticmethod
+    def importar_rotina(abertura, conexao, rotina, params, user, batch_size=None):
+        """
+        Execute a rotina and save its result without materializing it in memory.
+        Rows are streamed from the external database (SQLExecutor.stream_routine)
+        and grouped/bulk-inserted batch by batch.
+        Returns tuple (created_count, skipped_count, logs).
+        """
+        sql = RotinaCache.get(rotina).sql
+        stream_kwargs = {"batch_size": batch_size} if batch_size else {}
+        with SQLExecutor.stream_routine(conexao, sql, params, **stream_kwargs) as stream:
+            if not stream.headers:
+                return 0, 0, stream.logs
+            created, skipped = ImportadorMovimentos.salvar_importacao_em_lotes(
+                abertura, conexao, rotina, stream.headers, stream, user
             )
-            .exclude(protocolo="")
-            .values_list("protocolo", flat=True)
+        return created, skipped, stream.logs
+
+    @staticmethod
+    @transaction.atomic
+    def salvar_importacao_em_lotes(abertura, conexao, rotina, headers, batches, user):
+        """
+        Incremental variant of salvar_importacao.
+        Consumes an iterable of row batches (e.g. a RoutineStream) and groups and
+        bulk-inserts each batch before reading the next one, so memory is bounded
+        by the batch size rather than by the whole result set.
+        A protocolo whose rows span several batches keeps a single parent: rows
+        from later batches become children of the parent already created and its
+        totals are incremented in the database.
+        Returns tuple (created_count, skipped_count).
+        """
+        from django.db.models import F
+
+        from caixa_nfse.caixa.models import MovimentoImportado
+
+        # protocolo -> {"pk": parent pk, "descricoes": [...]} for parents created so far
+        parents_by_proto = {}
+        created_pks = []
+        total_skipped = 0
+
+        for rows in batches:
+            total_skipped += ImportadorMovimentos._salvar_lote(
+                abertura,
+                conexao,
+                rotina,
+                headers,
+                rows,
+                user,
+                parents_by_proto,
+                created_pks,
+            )
+
+        # Backfill valor: when SQL has no 'valor' column, use sum of TAXA_FIELDS.
+        # Done in the database because a later batch may still add to valor.
+        if created_pks:
+            first_taxa, *demais_taxas = MovimentoImportado.TAXA_FIELDS
+            total_taxas = sum((F(f) for f in demais_taxas), F(first_taxa))
+            for i in range(0, len(created_pks), BULK_BATCH_SIZE):
+                MovimentoImportado.objects.filter(
+                    pk__in=created_pks[i : i + BULK_BATCH_SIZE], valor=Decimal("0.00")
+                ).update(valor=total_taxas)
+
+        return len(created_pks), total_skipped
+
+    @staticmethod
+    def protocolos_existentes(tenant, conexao, rotina, protocolos):
+        """
+        Subset of protocolos already imported for this sistema + rotina.
+        Only the given protocolos are looked up (chunked protocolo__in over the
+        tenant/rotina/protocolo index), so cost follows the batch, not the history.
+        """
+        from caixa_nfse.caixa.models import MovimentoImportado
+
+        protocolos = sorted(p for p in set(protocolos) if p)
+        existentes = set()
+        for i in range(0, len(protocolos), BULK_BATCH_SIZE):
+            existentes.update(
+                MovimentoImportado.objects.filter(
+                    tenant=tenant,
+                    conexao__sistema=conexao.sistema,
+                    rotina=rotina,
+                    protocolo__in=protocolos[i : i + BULK_BATCH_SIZE],
+                ).values_list("protocolo", flat=True)
+            )
+        return existentes
+
+    @staticmethod
+    def _salvar_lote(abertura, conexao, rotina, headers, rows, user, parents_by_proto, created_pks):
+        """
+        Group one batch of rows by protocolo and persist it.
+        New protocolos get a parent MovimentoImportado; protocolos already created
+        by a previous batch get their totals incremented. Returns skipped count.
+        """
+        from django.db.models import F
+
+        from caixa_nfse.caixa.models import ItemAtoImportado, MovimentoImportado
+
+        def existentes(protocolos):
+            # Parents created by earlier batches of this stream are continued, not skipped
+            return ImportadorMovimentos.protocolos_existentes(
+                user.tenant, conexao, rotina, protocolos - parents_by_proto.keys()
+            )
+
+        grupos, skipped = ImportadorMovimentos._agrupar_lote(
+            rotina, headers, rows, user, existentes
         )
 
+        importados = []
+        child_items = []
+        for grupo in grupos:
+            protocolo = grupo["protocolo"]
+
+            if protocolo and protocolo in parents_by_proto:
+                anterior = parents_by_proto[protocolo]
+                novas = [d for d in grupo["descricoes"] if d not in anterior["descricoes"]]
+                anterior["descricoes"].extend(novas)
+                updates = {"valor": F("valor") + grupo["valor"]}
+                for tax_field, tax_val in grupo["taxas"].items():
+                    updates[tax_field] = F(tax_field) + tax_val
+                if novas:
+                    updates["descricao"] = ImportadorMovimentos._descricao_grupo(
+                        rotina, anterior["descricoes"]
+                    )
+                MovimentoImportado.objects.filter(pk=anterior["pk"]).update(**updates)
+                parent_pk = anterior["pk"]
+            else:
+                parent = ImportadorMovimentos._novo_movimento(
+                    abertura, conexao, rotina, user, grupo
+                )
+                importados.append(parent)
+                parent_pk = parent.pk
+                created_pks.append(parent_pk)
+                if protocolo:
+                    parents_by_proto[protocolo] = {
+                        "pk": parent_pk,
+                        "descricoes": list(grupo["descricoes"]),
+                    }
+
+            for child in grupo["itens"]:
+                child.movimento_importado_id = parent_pk
+            child_items.extend(grupo["itens"])
+
+        if importados:
+            MovimentoImportado.objects.bulk_create(importados)
+        if child_items:
+            ItemAtoImportado.objects.bulk_create(child_items, batch_size=BULK_BATCH_SIZE)
+
+        return skipped
+
+    @staticmethod
+    def _agrupar_lote(rotina, headers, rows, user, existentes):
+        """
+        Map rows column-wise and group them by protocolo, entirely in memory.
+        ``existentes(protocolos)`` returns the protocolos of the batch that are
+        already imported; their rows are skipped.
+        Returns (grupos, skipped): each grupo carries the summed valor/taxas, the
+        distinct descriptions, the non-summable fields of its first row and its
+        unsaved ItemAtoImportado children (without parent).
+        """
+        from caixa_nfse.caixa.models import ItemAtoImportado, MovimentoImportado
+
         # Helper to normalize description
         def normalize_desc(d):
             return " ".join(str(d).split()) if d else ""
 
+        dados = MapeadorColunar.mapear(rotina, headers, rows)
+        total = len(dados)
+        if not dados.colunas:
+            return [], 0
+
+        # Columns converted once per batch; absent columns become constant defaults
+        zeros = [Decimal("0.00")] * total
+
+        def coluna(campo, converter, default):
+            convertida = dados.convertida(campo, converter)
+            return convertida if convertida is not None else [default] * total
+
+        protocolos = coluna("protocolo", lambda v: str(v or "").strip(), "")
+        descricoes = coluna("descricao", normalize_desc, "")
+        clientes = coluna("cliente_nome", lambda v: str(v or ""), "")
+        status = coluna("status_item", lambda v: str(v or ""), "")
+        quantidades = coluna("quantidade", ImportadorMovimentos._parse_quantidade, 1)
+        datas = coluna("data_ato", ImportadorMovimentos._parse_date, None)
+        valores = dados.coluna("valor") or zeros
+        taxas = {f: dados.coluna(f) or zeros for f in MovimentoImportado.TAXA_FIELDS}
+        taxas_presentes = [(f, col) for f, col in taxas.items() if f in dados]
+        existing = existentes(set(protocolos)) if "protocolo" in dados else set()
+
         grouped_data = {}
         skipped = 0
 
-        # 1. First pass: Group rows by protocol
-        for row in rows:
-            mapped = ImportadorMovimentos.mapear_colunas(rotina, headers, row)
-            if not mapped:
-                continue
-
-            protocolo = str(mapped.get("protocolo", "") or "").strip()
+        # 1. Group row indexes by protocol
+        for i in range(total):
+            protocolo = protocolos[i]
 
             # Check if protocol exists in DB
             if protocolo and protocolo in existing:
@@ -240,128 +538,82 @@ class ImportadorMovimentos:
             # Key for grouping
             group_key = protocolo if protocolo else f"NO_PROTO_{len(grouped_data)}"
 
-            if group_key not in grouped_data:
-                grouped_data[group_key] = {
+            group = grouped_data.get(group_key)
+            if group is None:
+                first = {
+                    "cliente_nome": clientes[i][:200],
+                    "status_item": status[i][:100],
+                    "quantidade": quantidades[i],
+                }
+                if datas[i]:
+                    first["data_ato"] = datas[i]
+                group = grouped_data[group_key] = {
                     "protocolo": protocolo,
                     "valor": Decimal("0.00"),
-                    "taxas": {f: Decimal("0.00") for f in DECIMAL_FIELDS if f != "valor"},
+                    "taxas": {f: Decimal("0.00") for f in MovimentoImportado.TAXA_FIELDS},
                     "descricoes": [],
-                    "first_mapped": mapped,
-                    "raw_items": [],  # Store each row for child creation
+                    "first": first,  # non-summable fields from first record
+                    "rows": [],
                 }
 
-            # Accumulate values
-            group = grouped_data[group_key]
-
-            # Valor principal
-            valor_row = ImportadorMovimentos._parse_decimal(mapped.get("valor"))
-            group["valor"] += valor_row
-
-            # Taxas
-            for tax_field in group["taxas"]:
-                val_tax = ImportadorMovimentos._parse_decimal(mapped.get(tax_field))
-                group["taxas"][tax_field] += val_tax
+            # Accumulate values (already Decimal)
+            group["valor"] += valores[i]
+            for tax_field, col in taxas_presentes:
+                group["taxas"][tax_field] += col[i]
 
             # Collect description (avoid duplicates)
-            desc = normalize_desc(mapped.get("descricao"))
+            desc = descricoes[i]
             if desc and desc not in group["descricoes"]:
                 group["descricoes"].append(desc)
 
-            # Store raw mapped row for children
-            group["raw_items"].append(mapped)
-
-        # 2. Second pass: Create parent objects
-        importados = []
-        importados_raw = []  # parallel list of raw_items for each parent
-        for _, data in grouped_data.items():
-            first = data["first_mapped"]
-            protocolo = data["protocolo"]
-
-            # Format description
-            desc_list = data["descricoes"]
-            if desc_list:
-                combined_desc = "; ".join(desc_list)
-                final_descricao = f"{rotina.nome} - {combined_desc}"
-            else:
-                final_descricao = f"{rotina.nome}"
-            final_descricao = final_descricao[:500]
-
-            kwargs = {
-                "tenant": user.tenant,
-                "abertura": abertura,
-                "conexao": conexao,
-                "rotina": rotina,
-                "importado_por": user,
-                "protocolo": protocolo,
-                "valor": data["valor"],
-                "descricao": final_descricao,
-            }
-
-            # Populate tax fields
-            for tax_field, tax_val in data["taxas"].items():
-                kwargs[tax_field] = tax_val
-
-            # Populate non-summable fields from first record
-            kwargs["cliente_nome"] = str(first.get("cliente_nome") or "")[:200]
-            kwargs["status_item"] = str(first.get("status_item") or "")[:100]
+            group["rows"].append(i)
 
-            q_val = first.get("quantidade")
-            try:
-                kwargs["quantidade"] = int(q_val) if q_val else 1
-            except (ValueError, TypeError):
-                kwargs["quantidade"] = 1
-
-            data_ato = ImportadorMovimentos._parse_date(first.get("data_ato"))
-            if data_ato:
-                kwargs["data_ato"] = data_ato
-
-            importados.append(MovimentoImportado(**kwargs))
-            importados_raw.append(data["raw_items"])
-            if protocolo:
-                existing.add(protocolo)
-
-        created = MovimentoImportado.objects.bulk_create(importados)
-
-        # 3. Third pass: Create child ItemAtoImportado records
-        child_items = []
-        for parent, raw_items in zip(created, importados_raw, strict=True):
-            for mapped in raw_items:
+        # 2. Build the (unsaved) ItemAtoImportado children of each group
+        grupos = list(grouped_data.values())
+        for group in grupos:
+            itens = []
+            for i in group.pop("rows"):
                 item_kwargs = {
                     "tenant": user.tenant,
-                    "movimento_importado": parent,
-                    "descricao": normalize_desc(mapped.get("descricao"))[:500],
-                    "valor": ImportadorMovimentos._parse_decimal(mapped.get("valor")),
-                    "cliente_nome": str(mapped.get("cliente_nome") or "")[:200],
-                    "status_item": str(mapped.get("status_item") or "")[:100],
+                    "descricao": descricoes[i][:500],
+                    "valor": valores[i],
+                    "cliente_nome": clientes[i][:200],
+                    "status_item": status[i][:100],
+                    "quantidade": quantidades[i],
                 }
-                # Quantity
-                q = mapped.get("quantidade")
-                try:
-                    item_kwargs["quantidade"] = int(q) if q else 1
-                except (ValueError, TypeError):
-                    item_kwargs["quantidade"] = 1
-                # Date
-                d = ImportadorMovimentos._parse_date(mapped.get("data_ato"))
-                if d:
-                    item_kwargs["data_ato"] = d
-                # Tax fields
-                for tf in MovimentoImportado.TAXA_FIELDS:
-                    item_kwargs[tf] = ImportadorMovimentos._parse_decimal(mapped.get(tf))
-
-                child_items.append(ItemAtoImportado(**item_kwargs))
+                if datas[i]:
+                    item_kwargs["data_ato"] = datas[i]
+                for tf, col in taxas.items():
+                    item_kwargs[tf] = col[i]
+                itens.append(ItemAtoImportado(**item_kwargs))
+            group["itens"] = itens
 
-        if child_items:
-            ItemAtoImportado.objects.bulk_create(child_items)
+        return grupos, skipped
 
-        # 4. Backfill valor: when SQL has no 'valor' column, use sum of TAXA_FIELDS
-        for obj in created:
-            if obj.valor == Decimal("0.00"):
-                total_taxas = obj.valor_total_taxas
-                if total_taxas > Decimal("0.00"):
-                    obj.valor = total_taxas
-                    obj.save(update_fields=["valor"])
+    @staticmethod
+    def _novo_movimento(abertura, conexao, rotina, user, grupo):
+        """Unsaved parent MovimentoImportado for a group built by _agrupar_lote."""
+        from caixa_nfse.caixa.models import MovimentoImportado
+
+        return MovimentoImportado(
+            tenant=user.tenant,
+            abertura=abertura,
+            conexao=conexao,
+            rotina=rotina,
+            importado_por=user,
+            protocolo=grupo["protocolo"],
+            valor=grupo["valor"],
+            descricao=ImportadorMovimentos._descricao_grupo(rotina, grupo["descricoes"]),
+            **grupo["first"],
+            **grupo["taxas"],
+        )
 
-        return len(created), skipped
+    @staticmethod
+    def _descricao_grupo(rotina, descricoes):
+        """Format a grouped description: "NomeRotina - Desc1; Desc2" (max 500 chars)."""
+        if descricoes:
+            return f"{rotina.nome} - {'; '.join(descricoes)}"[:500]
+        return f"{rotina.nome}"[:500]
 
     @staticmethod
     @transaction.atomic
@@ -373,7 +625,14 @@ class ImportadorMovimentos:
         Also copies ItemAtoImportado children to ItemAtoMovimento.
         Auto-registers Cliente from apresentante name if available.
         Returns count of confirmed movements.
+
+        Set-based: saldo and numero_parcela come from the prefetched parcelas,
+        the movimento hash chain is computed in memory and every table is written
+        with one bulk statement, so the query count does not grow with the
+        selection. bulk writes skip model signals, so audit records are written
+        in bulk as well (auditoria.signals.audit_bulk).
         """
+        from caixa_nfse.auditoria.signals import audit_bulk, model_to_dict
         from caixa_nfse.caixa.models import (
             ItemAtoMovimento,
             MovimentoCaixa,
@@ -406,17 +665,26 @@ class ImportadorMovimentos:
             .exclude(status_recebimento=StatusRecebimento.QUITADO)
         )
 
-        count = 0
         caixa = abertura.caixa
-        movimentos_para_nfse = []
+        agora = timezone.now()
+        confirmados = []  # (imp, movimento, cliente, valor_parcela, numero_parcela, is_quitacao)
+        alterados = []  # (imp, dados_antes) for bulk_update + audit
 
         for imp in importados:
+            dados_antes = model_to_dict(imp)
+            valor_original = imp.valor
+
             # Ensure imp.valor is populated (backfill from taxa fields)
             if imp.valor == Decimal("0.00"):
                 total_taxas = imp.valor_total_taxas
                 if total_taxas > Decimal("0.00"):
                     imp.valor = total_taxas
-                    imp.save(update_fields=["valor"])
+
+            # Saldo and next parcela number from the prefetched parcelas
+            parcelas = imp.parcelas.all()
+            saldo = (imp.valor or Decimal("0.00")) - sum(
+                (p.valor for p in parcelas), Decimal("0.00")
+            )
 
             # Determine payment value
             str_id = str(imp.pk)
@@ -425,30 +693,30 @@ class ImportadorMovimentos:
             elif imp.pk in parcelas_map:
                 valor_parcela = Decimal(str(parcelas_map[imp.pk]))
             else:
-                valor_parcela = imp.saldo_pendente
+                valor_parcela = saldo
 
             # Validate
-            saldo = imp.saldo_pendente
-            if saldo <= Decimal("0.00"):
-                continue  # Already fully paid
-            if valor_parcela <= Decimal("0.00"):
+            if saldo <= Decimal("0.00") or valor_parcela <= Decimal("0.00"):
+                if imp.valor != valor_original:
+                    alterados.append((imp, dados_antes))
                 continue
             if valor_parcela > saldo:
                 valor_parcela = saldo
 
             # Determine if this is full payment
-            remaining = saldo - valor_parcela
-            is_quitacao = remaining <= Decimal("0.00")
-            numero_parcela = imp.parcelas.count() + 1
+            is_quitacao = saldo - valor_parcela <= Decimal("0.00")
+            numero_parcela = len(parcelas) + 1
 
             # Auto-register client from apresentante name (only on first parcela)
             cliente = None
             if imp.cliente_nome and numero_parcela == 1:
-                cliente = Cliente.objects.create(
+                cliente = Cliente(
                     tenant=user.tenant,
                     razao_social=imp.cliente_nome.strip(),
                     cadastro_completo=False,
                 )
+                # bulk_create skips Cliente.save()
+                cliente.preparar_para_gravar()
 
             # Build description
             parts = []
@@ -483,11 +751,36 @@ class ImportadorMovimentos:
                 else:
                     mov_kwargs[field] = Decimal("0.00")
 
-            movimento = MovimentoCaixa.objects.create(**mov_kwargs)
+            # UUID pk and data_hora are assigned on instantiation
+            movimento = MovimentoCaixa(**mov_kwargs)
 
+            # Update MovimentoImportado status
+            if is_quitacao:
+                imp.confirmado = True
+                imp.confirmado_em = agora
+                imp.movimento_destino = movimento
+                imp.status_recebimento = StatusRecebimento.QUITADO
+            else:
+                imp.status_recebimento = StatusRecebimento.PARCIAL
+
+            confirmados.append(
+                (imp, movimento, cliente, valor_parcela, numero_parcela, is_quitacao)
+            )
+            alterados.append((imp, dados_antes))
+
+        clientes = [cliente for _, _, cliente, _, _, _ in confirmados if cliente]
+        movimentos = [movimento for _, movimento, _, _, _, _ in confirmados]
+
+        # Hash chain in memory, from the abertura's chain head (locked until commit)
+        if movimentos:
+            MovimentoCaixa.encadear_lote(abertura, movimentos)
+
+        child_items = []
+        parcelas_novas = []
+        delta_caixa = Decimal("0.00")
+        for imp, movimento, _, valor_parcela, numero_parcela, _ in confirmados:
             # Copy child items: ItemAtoImportado → ItemAtoMovimento (only on first parcela)
             if numero_parcela == 1:
-                child_items = []
                 for item in imp.itens.all():
                     item_data = {"tenant": user.tenant, "movimento": movimento}
                     for f in item_copy_fields:
@@ -503,62 +796,61 @@ class ImportadorMovimentos:
                                 val = ""
                         item_data[f] = val
                     child_items.append(ItemAtoMovimento(**item_data))
-                if child_items:
-                    ItemAtoMovimento.objects.bulk_create(child_items)
-
-            # Create ParcelaRecebimento
-            ParcelaRecebimento.objects.create(
-                tenant=user.tenant,
-                movimento_importado=imp,
-                movimento_caixa=movimento,
-                abertura=abertura,
-                forma_pagamento=forma_pagamento,
-                valor=valor_parcela,
-                numero_parcela=numero_parcela,
-                recebido_por=user,
-            )
 
-            # Update caixa balance (use valor_total_taxas as the real amount)
-            valor_real = movimento.valor_total_taxas or movimento.valor
-            if movimento.is_entrada:
-                caixa.saldo_atual += valor_real
-            else:
-                caixa.saldo_atual -= valor_real
-
-            # Update MovimentoImportado status
-            if is_quitacao:
-                imp.confirmado = True
-                imp.confirmado_em = timezone.now()
-                imp.movimento_destino = movimento
-                imp.status_recebimento = StatusRecebimento.QUITADO
-                imp.save(
-                    update_fields=[
-                        "confirmado",
-                        "confirmado_em",
-                        "movimento_destino",
-                        "status_recebimento",
-                    ]
+            parcelas_novas.append(
+                ParcelaRecebimento(
+                    tenant=user.tenant,
+                    movimento_importado=imp,
+                    movimento_caixa=movimento,
+                    abertura=abertura,
+                    forma_pagamento=forma_pagamento,
+                    valor=valor_parcela,
+                    numero_parcela=numero_parcela,
+                    recebido_por=user,
                 )
-            else:
-                imp.status_recebimento = StatusRecebimento.PARCIAL
-                imp.save(update_fields=["status_recebimento"])
+            )
 
-            count += 1
+            # Caixa balance uses valor_total_taxas as the real amount
+            delta_caixa += SaldoCaixa.delta(
+                movimento, movimento.valor_total_taxas or movimento.valor
+            )
 
-            # Collect for NFS-e dispatch (only on quitação)
-            if is_quitacao and cliente:
-                movimentos_para_nfse.append(str(movimento.pk))
+        if clientes:
+            Cliente.objects.bulk_create(clientes, batch_size=BULK_BATCH_SIZE)
+        if movimentos:
+            MovimentoCaixa.objects.bulk_create(movimentos, batch_size=BULK_BATCH_SIZE)
+        if child_items:
+            ItemAtoMovimento.objects.bulk_create(child_items, batch_size=BULK_BATCH_SIZE)
+        if parcelas_novas:
+            ParcelaRecebimento.objects.bulk_create(parcelas_novas, batch_size=BULK_BATCH_SIZE)
+        if alterados:
+            MovimentoImportado.objects.bulk_update(
+                [imp for imp, _ in alterados],
+                [
+                    "valor",
+                    "confirmado",
+                    "confirmado_em",
+                    "movimento_destino",
+                    "status_recebimento",
+                ],
+                batch_size=BULK_BATCH_SIZE,
+            )
+        audit_bulk(created=clientes + movimentos + parcelas_novas, updated=alterados)
 
-        caixa.save(update_fields=["saldo_atual"])
+        # bulk_create skips MovimentoCaixa.save(): totals and balance get one atomic delta
+        SaldoCaixa.registrar(abertura, movimentos)
+        SaldoCaixa.aplicar(caixa, delta_caixa)
 
-        # Dispatch NFS-e tasks after transaction commits (only for quitação)
+        # bulk_create skips post_save, so nfse.signals.auto_emitir_nfse does not run:
+        # dispatch its emission (movimentos with a cliente) after the commit
+        movimentos_para_nfse = [str(movimento.pk) for movimento in movimentos if movimento.cliente]
         if movimentos_para_nfse and _deve_gerar_nfse(user.tenant):
             from caixa_nfse.nfse.tasks import emitir_nfse_movimento
 
             for mov_id in movimentos_para_nfse:
                 transaction.on_commit(lambda mid=mov_id: emitir_nfse_movimento.delay(mid))
 
-        return count
+        return len(confirmados)
 
     @staticmethod
     def limpar_confirmados(tenant):
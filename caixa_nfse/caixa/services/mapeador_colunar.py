@@ -0,0 +1,105 @@
+"""
+Mapeamento colunar das linhas retornadas pelas rotinas.
+
+Em vez de montar um dict por linha e converter cada célula isoladamente, o
+result set é lido coluna a coluna: cada coluna decimal é convertida uma única
+vez (valores repetidos são convertidos só na primeira ocorrência) e campos
+alimentados por várias colunas são somados coluna a coluna, sempre em Decimal.
+"""
+
+from decimal import Decimal
+from operator import add, itemgetter
+
+from caixa_nfse.caixa.services.rotina_compilada import RotinaCache
+
+
+class ColunasMapeadas:
+    """
+    Resultado do mapeamento: campo -> lista de valores, uma posição por linha.
+    Campos decimais (valor e taxas) já vêm como Decimal; os demais, brutos.
+    """
+
+    def __init__(self, total: int, colunas: dict):
+        self.total = total
+        self.colunas = colunas
+
+    def __len__(self):
+        return self.total
+
+    def __contains__(self, campo):
+        return campo in self.colunas
+
+    def coluna(self, campo):
+        """Valores do campo, ou None se nenhuma coluna do SQL o alimenta."""
+        return self.colunas.get(campo)
+
+    def convertida(self, campo, converter):
+        """Coluna convertida com memo: cada valor distinto passa uma vez por converter."""
+        valores = self.colunas.get(campo)
+        if valores is None:
+            return None
+        return _converter_coluna(valores, converter)
+
+    def linha(self, i: int) -> dict:
+        """Linha i no formato de mapear_colunas (apenas campos mapeados)."""
+        return {campo: valores[i] for campo, valores in self.colunas.items()}
+
+
+class MapeadorColunar:
+    """Mapeia (headers, rows) de uma rotina para colunas de MovimentoImportado."""
+
+    @staticmethod
+    def mapear(rotina, headers, rows) -> ColunasMapeadas:
+        from caixa_nfse.caixa.services.importador import ImportadorMovimentos
+
+        if not isinstance(rows, list):
+            rows = list(rows)
+        total = len(rows)
+
+        indice = RotinaCache.get(rotina).indice_colunas(headers)
+        if not indice or not total:
+            return ColunasMapeadas(total, {})
+
+        largura = max(i for i, _, _ in indice) + 1
+        completas = all(len(row) >= largura for row in rows)
+
+        def extrair(i):
+            if completas:
+                return list(map(itemgetter(i), rows))
+            return [row[i] if i < len(row) else None for row in rows]
+
+        posicoes = {}  # campo -> (acumula, [posições]) na ordem do cabeçalho
+        for i, campo, acumula in indice:
+            posicoes.setdefault(campo, (acumula, []))[1].append(i)
+
+        parse = ImportadorMovimentos._parse_decimal
+        colunas = {}
+        for campo, (acumula, indices) in posicoes.items():
+            if not acumula:
+                # Campo repetido não somável: prevalece a última coluna (como mapear_colunas)
+                colunas[campo] = extrair(indices[-1])
+                continue
+            soma = _converter_coluna(extrair(indices[0]), parse, decimal=True)
+            for i in indices[1:]:
+                soma = list(map(add, soma, _converter_coluna(extrair(i), parse, decimal=True)))
+            colunas[campo] = soma
+
+        return ColunasMapeadas(total, colunas)
+
+
+def _converter_coluna(valores, converter, decimal=False):
+    """Converte uma coluna; cada valor distinto passa uma única vez por converter."""
+    memo = {}
+    convertidos = []
+    append = convertidos.append
+    for valor in valores:
+        if decimal and valor.__class__ is Decimal:
+            append(valor)
+            continue
+        try:
+            append(memo[valor])
+        except KeyError:
+            append(memo.setdefault(valor, converter(valor)))
+        except TypeError:  # valor não hashable
+            append(converter(valor))
+    return convertidos
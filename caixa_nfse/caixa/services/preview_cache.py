@@ -0,0 +1,78 @@
+"""
+Armazenamento server-side da pré-visualização da importação de movimentos.
+
+O passo "buscar" guarda as linhas brutas de cada grupo (protocolo) no cache,
+comprimidas, sob um token com TTL. O formulário do passo "importar" envia só
+o token e as chaves dos grupos selecionados, em vez de devolver todo o result
+set em campos ocultos.
+"""
+
+import json
+import logging
+import re
+import secrets
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache, caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = "importacao"
+KEY_PREFIX = "importacao_preview"
+DEFAULT_TTL = 1800  # seconds
+
+_TOKEN_RE = re.compile(r"^[\w-]{16,64}$")
+
+
+class PreviewCache:
+    """
+    Pré-visualizações de importação indexadas por token.
+
+    ``grupos`` é um dict ``{chave: {"conexao_id", "rotina_id", "headers", "rows"}}``,
+    onde ``chave`` é o valor do checkbox ``selected_rows`` no template.
+    """
+
+    @staticmethod
+    def salvar(user, abertura, grupos: dict) -> str:
+        """Armazena os grupos e retorna o token da pré-visualização."""
+        token = secrets.token_urlsafe(24)
+        payload = {"user_id": user.pk, "abertura_id": str(abertura.pk), "grupos": grupos}
+        blob = zlib.compress(json.dumps(payload, separators=(",", ":")).encode())
+        cache_importacao().set(_key(token), blob, _ttl())
+        logger.debug("Pré-visualização %s armazenada (%d bytes)", token, len(blob))
+        return token
+
+    @staticmethod
+    def carregar(token, user, abertura) -> dict | None:
+        """
+        Retorna os grupos da pré-visualização, ou None se o token for inválido,
+        tiver expirado ou pertencer a outro usuário/abertura.
+        """
+        if not token or not _TOKEN_RE.match(token):
+            return None
+        blob = cache_importacao().get(_key(token))
+        if blob is None:
+            return None
+        payload = json.loads(zlib.decompress(blob))
+        if payload["user_id"] != user.pk or payload["abertura_id"] != str(abertura.pk):
+            logger.warning("Token de pré-visualização usado por outro usuário/abertura")
+            return None
+        return payload["grupos"]
+
+    @staticmethod
+    def descartar(token) -> None:
+        if token and _TOKEN_RE.match(token):
+            cache_importacao().delete(_key(token))
+
+
+def cache_importacao():
+    return caches[CACHE_ALIAS] if CACHE_ALIAS in settings.CACHES else cache
+
+
+def _key(token: str) -> str:
+    return f"{KEY_PREFIX}:{token}"
+
+
+def _ttl() -> int:
+    return getattr(settings, "IMPORTACAO_PREVIEW", {}).get("TTL", DEFAULT_TTL)
@@ -0,0 +1,271 @@
+"""
+Montagem da pré-visualização da importação de movimentos (passo "buscar").
+
+Executa as rotinas selecionadas, mapeia e agrupa as linhas por protocolo e
+devolve o template e o contexto a renderizar. Roda dentro da task
+``buscar_movimentos``; as linhas brutas vão para o PreviewCache.
+"""
+
+import json
+from collections import OrderedDict
+from decimal import Decimal
+
+from caixa_nfse.caixa.services.importacao_job import ImportacaoJob
+from caixa_nfse.caixa.services.importador import ImportadorMovimentos
+from caixa_nfse.caixa.services.mapeador_colunar import MapeadorColunar
+from caixa_nfse.caixa.services.preview_cache import PreviewCache
+
+PREVIEW_TEMPLATE = "caixa/partials/importados_preview.html"
+RESULTADOS_TEMPLATE = "caixa/partials/importados_results.html"
+
+
+def montar_preview(abertura, user, jobs, sql_params, job_id=None):
+    """
+    Executa os jobs (conexao, rotinas) e monta a pré-visualização.
+    Com ``job_id``, publica o progresso em ImportacaoJob.
+    Retorna (template, contexto); o contexto não inclui a abertura.
+    """
+    from caixa_nfse.caixa.models import MovimentoImportado
+
+    ao_concluir = None
+    if job_id:
+        ImportacaoJob.publicar(job_id, estado=ImportacaoJob.EXECUTANDO)
+
+        def ao_concluir(origem, linhas):
+            ImportacaoJob.rotina_concluida(job_id, linhas)
+
+    all_logs = []
+    preview_rows = []
+
+    # All (conexao, rotina) pairs run concurrently; results keep request order
+    resultados = ImportadorMovimentos.executar_em_paralelo(
+        jobs, sql_params, ao_concluir=ao_concluir
+    )
+
+    for conexao, rotina, headers, rows, logs in resultados:
+        all_logs.extend(logs)
+        if not (headers and rows):
+            continue
+
+        # Columnar mapping: decimal columns are parsed once per result set
+        dados = MapeadorColunar.mapear(rotina, headers, rows)
+        if not dados.colunas:
+            continue
+
+        # Duplicate detection: only this result's protocolos are looked up
+        protocolos = dados.convertida("protocolo", lambda v: str(v or "").strip())
+        existing = (
+            ImportadorMovimentos.protocolos_existentes(user.tenant, conexao, rotina, protocolos)
+            if protocolos
+            else set()
+        )
+
+        for i, row in enumerate(rows):
+            mapped = dados.linha(i)
+            mapped["meta_conexao_id"] = str(conexao.pk)
+            mapped["meta_rotina_id"] = str(rotina.pk)
+            mapped["meta_rotina_nome"] = rotina.nome
+            mapped["meta_origem"] = f"{conexao.sistema} - {rotina.nome}"
+            mapped["meta_raw_headers"] = headers
+            mapped["meta_raw_row"] = [str(v) if v is not None else "" for v in row]
+            # Full data for preview details
+            full_data = {}
+            for h, v in zip(headers, row, strict=False):
+                if isinstance(v, Decimal):
+                    full_data[h] = f"{v:.2f}"
+                elif hasattr(v, "isoformat"):
+                    full_data[h] = v.strftime("%d/%m/%Y %H:%M:%S")
+                else:
+                    full_data[h] = str(v) if v is not None else ""
+            mapped["meta_full_data"] = full_data
+            protocolo = str(mapped.get("protocolo", "") or "").strip()
+            mapped["meta_duplicado"] = bool(protocolo and protocolo in existing)
+            preview_rows.append(mapped)
+
+    # --- Group preview_rows by protocol ---
+    SUMMABLE = set(MovimentoImportado.TAXA_FIELDS) | {
+        "valor",
+        "emolumento",
+        "taxa_judiciaria",
+    }
+    grouped = {}  # key -> grouped row dict
+    ungrouped = []  # rows without protocol
+
+    for row in preview_rows:
+        proto = str(row.get("protocolo", "") or "").strip()
+        if not proto:
+            # No protocol → cannot group, keep as-is
+            row["meta_raw_rows"] = [row["meta_raw_row"]]
+            row["meta_full_data"] = json.dumps(row["meta_full_data"])
+            ungrouped.append(row)
+            continue
+
+        if proto not in grouped:
+            grouped[proto] = {
+                **row,
+                "_descricoes": [],
+                "_raw_rows": [],
+                "_full_data_list": [],
+            }
+            # Initialize summable fields to Decimal
+            for sf in SUMMABLE:
+                grouped[proto][sf] = ImportadorMovimentos._parse_decimal(row.get(sf))
+
+            # Non-summable: already set from first row
+        else:
+            g = grouped[proto]
+            # Sum financial fields
+            for sf in SUMMABLE:
+                g[sf] = g[sf] + ImportadorMovimentos._parse_decimal(row.get(sf))
+
+            # Duplicate detection: if any sub-row is duplicated, mark group
+            if row.get("meta_duplicado"):
+                g["meta_duplicado"] = True
+
+        # Collect descriptions
+        desc = str(row.get("descricao", "") or "").strip()
+        if desc and desc not in grouped[proto]["_descricoes"]:
+            grouped[proto]["_descricoes"].append(desc)
+
+        # Collect raw rows
+        grouped[proto]["_raw_rows"].append(row["meta_raw_row"])
+        grouped[proto]["_full_data_list"].append(row["meta_full_data"])
+
+    # Finalize grouped rows
+    preview_rows = []
+    for _, g in grouped.items():
+        rotina_nome = g.get("meta_rotina_nome", "")
+        descs = g.pop("_descricoes")
+        raw_rows_list = g.pop("_raw_rows")
+        full_data_list = g.pop("_full_data_list")
+
+        # Format description: "NomeRotina - Desc1; Desc2"
+        if descs:
+            g["descricao"] = f"{rotina_nome} - {'; '.join(descs)}"
+        else:
+            g["descricao"] = rotina_nome
+
+        # Format summable fields for display
+        for sf in SUMMABLE:
+            val = g.get(sf)
+            if isinstance(val, Decimal):
+                g[sf] = f"{val:.2f}"
+
+        # Raw rows are stored in the preview cache, not rendered
+        g["meta_raw_rows"] = raw_rows_list
+
+        # Merge full_data for detail modal
+        merged_full = {}
+        for fd in full_data_list:
+            for k, v in fd.items():
+                if k not in merged_full:
+                    merged_full[k] = v
+                elif merged_full[k] != v:
+                    # Append different values
+                    if v not in merged_full[k]:
+                        merged_full[k] += f" | {v}"
+        g["meta_full_data"] = json.dumps(merged_full)
+
+        preview_rows.append(g)
+
+    preview_rows.extend(ungrouped)
+
+    if not preview_rows:
+        return RESULTADOS_TEMPLATE, {"total_importados": 0, "total_rows": 0, "logs": all_logs}
+
+    # Assign global indices (checkbox values) and keep the raw rows server-side;
+    # the import form posts back only the preview token and selected indices
+    grupos = {}
+    for idx, row in enumerate(preview_rows):
+        row["meta_global_index"] = idx
+        grupos[str(idx)] = {
+            "conexao_id": row["meta_conexao_id"],
+            "rotina_id": row["meta_rotina_id"],
+            "headers": row.pop("meta_raw_headers"),
+            "rows": row.pop("meta_raw_rows"),
+        }
+    preview_token = PreviewCache.salvar(user, abertura, grupos)
+    if job_id:
+        ImportacaoJob.publicar(job_id, grupos=len(grupos))
+
+    # Group rows by rotina for tabbed display
+    preview_groups = OrderedDict()
+    for row in preview_rows:
+        rotina_nome = row.get("meta_rotina_nome", "Outros")
+        if rotina_nome not in preview_groups:
+            preview_groups[rotina_nome] = []
+        preview_groups[rotina_nome].append(row)
+
+    # Convert to list of dicts for template iteration
+    preview_tabs = [
+        {"name": name, "rows": rows, "index": idx}
+        for idx, (name, rows) in enumerate(preview_groups.items())
+    ]
+
+    # Check NFS-e config
+    nfse_config_ativa = False
+    nfse_backend = None
+    try:
+        from caixa_nfse.nfse.models import ConfiguracaoNFSe
+
+        cfg = ConfiguracaoNFSe.objects.filter(tenant=user.tenant).first()
+        if cfg and cfg.ativa:
+            nfse_config_ativa = True
+            nfse_backend = cfg.backend
+    except Exception:
+        pass
+
+    # Compute active financial columns (non-zero across all rows)
+    ALL_VALUE_FIELDS = ["valor", "emolumento", "taxa_judiciaria"] + [
+        f for f in MovimentoImportado.TAXA_FIELDS if f not in ("emolumento", "taxa_judiciaria")
+    ]
+    LABEL_MAP = {
+        "valor": "Valor Total",
+        "emolumento": "Emolumento",
+        "taxa_judiciaria": "T. Judiciária",
+        "iss": "ISS",
+        "fundesp": "FUNDESP",
+        "funesp": "FUNESP",
+        "estado": "Estado",
+        "fesemps": "FESEMPS",
+        "funemp": "FUNEMP",
+        "funcomp": "FUNCOMP",
+        "fepadsaj": "FEPADSAJ",
+        "funproge": "FUNPROGE",
+        "fundepeg": "FUNDEPEG",
+        "fundaf": "FUNDAF",
+        "femal": "FEMAL",
+        "fecad": "FECAD",
+        "valor_receita_adicional_1": "Rec. Adic. 1",
+        "valor_receita_adicional_2": "Rec. Adic. 2",
+    }
+    active_value_cols = []
+    for field in ALL_VALUE_FIELDS:
+        for row in preview_rows:
+            raw = row.get(field, "0.00")
+            try:
+                if Decimal(str(raw).replace(",", ".")) != Decimal("0.00"):
+                    active_value_cols.append(
+                        {
+                            "key": field,
+                            "label": LABEL_MAP.get(field, field.upper()),
+                        }
+                    )
+                    break
+            except Exception:
+                pass
+    # Compute min-width for the grid table based on active columns
+    # Base: ~750px for fixed columns + 100px per value column
+    grid_min_width = 750 + len(active_value_cols) * 100
+
+    context = {
+        "preview_rows": preview_rows,
+        "preview_tabs": preview_tabs,
+        "preview_token": preview_token,
+        "logs": all_logs,
+        "nfse_config_ativa": nfse_config_ativa,
+        "nfse_backend": nfse_backend,
+        "active_value_cols": active_value_cols,
+        "grid_min_width": grid_min_width,
+    }
+    return PREVIEW_TEMPLATE, context
@@ -0,0 +1,162 @@
+"""
+Cache de rotinas compiladas para a importação de movimentos.
+
+Uma CompiledRotina guarda tudo o que a importação deriva de uma Rotina e que
+não muda entre execuções: SQL normalizado, variáveis e mapeamento de colunas.
+Fica em memória no processo e no cache Django (Redis), indexada pela versão da
+rotina (``updated_at``). Salvar a Rotina ou um MapeamentoColunaRotina gera
+nova versão, invalidando as duas camadas.
+"""
+
+import logging
+import threading
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "rotina_compilada"
+CACHE_TIMEOUT = 60 * 60 * 24  # 1 dia; versões antigas simplesmente expiram
+
+
+class CompiledRotina:
+    """
+    Forma pré-processada de uma Rotina.
+
+    - ``sql``: sql_content + sql_content_extra, normalizado
+    - ``variaveis``: variáveis exibidas ao usuário (Rotina.extrair_variaveis)
+    - ``mapeamento``: coluna SQL (maiúsculas) -> campo; vazio usa o auto-mapeamento
+    """
+
+    def __init__(self, rotina_id, versao, nome, sql, variaveis, mapeamento):
+        self.rotina_id = rotina_id
+        self.versao = versao
+        self.nome = nome
+        self.sql = sql
+        self.variaveis = tuple(variaveis)
+        self.mapeamento = dict(mapeamento)
+        self._indices = {}
+
+    @classmethod
+    def from_rotina(cls, rotina):
+        """Compila a partir do banco (única consulta: os mapeamentos)."""
+        sql_parts = [rotina.sql_content.strip()]
+        if rotina.sql_content_extra:
+            sql_parts.append(rotina.sql_content_extra.strip())
+
+        return cls(
+            rotina_id=rotina.pk,
+            versao=_versao(rotina),
+            nome=rotina.nome,
+            sql="\n".join(sql_parts).replace("\r", ""),
+            variaveis=rotina.extrair_variaveis(),
+            mapeamento={m.coluna_sql.upper(): m.campo_destino for m in rotina.mapeamentos.all()},
+        )
+
+    def to_cache(self) -> dict:
+        return {
+            "rotina_id": self.rotina_id,
+            "versao": self.versao,
+            "nome": self.nome,
+            "sql": self.sql,
+            "variaveis": list(self.variaveis),
+            "mapeamento": self.mapeamento,
+        }
+
+    @classmethod
+    def from_cache(cls, data: dict):
+        return cls(**data)
+
+    def indice_colunas(self, headers):
+        """
+        Índice posicional do result set: tupla de (posição, campo, acumula).
+        Montado uma vez por cabeçalho; colunas sem campo de destino ficam de fora.
+        """
+        key = tuple(headers)
+        indice = self._indices.get(key)
+        if indice is None:
+            from caixa_nfse.caixa.services.importador import ImportadorMovimentos
+
+            origem = self.mapeamento or ImportadorMovimentos.AUTO_MAP_ALIASES
+            acumulaveis = ImportadorMovimentos._ACCUMULATE_FIELDS
+            indice = tuple(
+                (i, campo, campo in acumulaveis)
+                for i, header in enumerate(headers)
+                if (campo := origem.get(header.upper()))
+            )
+            self._indices[key] = indice
+        return indice
+
+    @staticmethod
+    def mapear(indice, row) -> dict:
+        """
+        Mapeia uma linha usando o índice de indice_colunas.
+        Campos decimais repetidos (ex.: VALOR + VALORRECEITAADICIONAL1) são somados.
+        """
+        total = len(row)
+        mapped = {}
+        for i, campo, acumula in indice:
+            if i >= total:
+                continue
+            if acumula and campo in mapped:
+                from caixa_nfse.caixa.services.importador import ImportadorMovimentos
+
+                parse = ImportadorMovimentos._parse_decimal
+                mapped[campo] = str(parse(mapped[campo]) + parse(row[i]))
+            else:
+                mapped[campo] = row[i]
+        return mapped
+
+
+class RotinaCache:
+    """Cache em duas camadas (processo + cache Django) de CompiledRotina."""
+
+    _lock = threading.Lock()
+    _local = {}  # rotina_id -> CompiledRotina
+
+    @staticmethod
+    def get(rotina) -> CompiledRotina:
+        """Retorna a CompiledRotina da versão atual da rotina, compilando se preciso."""
+        versao = _versao(rotina)
+        compilada = RotinaCache._local.get(rotina.pk)
+        if compilada is not None and compilada.versao == versao:
+            return compilada
+
+        key = _cache_key(rotina.pk, versao)
+        data = None
+        try:
+            data = cache.get(key)
+        except Exception:
+            logger.warning("Cache indisponível ao buscar rotina compilada", exc_info=True)
+
+        if data is not None:
+            compilada = CompiledRotina.from_cache(data)
+        else:
+            compilada = CompiledRotina.from_rotina(rotina)
+            try:
+                cache.set(key, compilada.to_cache(), CACHE_TIMEOUT)
+            except Exception:
+                logger.warning("Cache indisponível ao gravar rotina compilada", exc_info=True)
+
+        with RotinaCache._lock:
+            RotinaCache._local[rotina.pk] = compilada
+        return compilada
+
+    @staticmethod
+    def invalidate(rotina_id) -> None:
+        """Descarta a versão em memória deste processo."""
+        with RotinaCache._lock:
+            RotinaCache._local.pop(rotina_id, None)
+
+    @staticmethod
+    def clear() -> None:
+        with RotinaCache._lock:
+            RotinaCache._local.clear()
+
+
+def _versao(rotina) -> str:
+    return str(rotina.updated_at)
+
+
+def _cache_key(rotina_id, versao: str) -> str:
+    return f"{CACHE_PREFIX}:{rotina_id}:{versao}".replace(" ", "_")
@@ -0,0 +1,94 @@
+"""
+Livro de saldos do caixa.
+
+Os saldos são atualizados com deltas atômicos no banco
+(``UPDATE ... SET saldo = saldo + delta``), nunca lidos, alterados e gravados
+em Python: confirmações concorrentes no mesmo caixa não perdem atualizações.
+"""
+
+from decimal import Decimal
+
+from django.db.models import Count, F, Q, Sum
+
+
+class SaldoCaixa:
+    """Aplica deltas ao saldo do caixa e aos totais materializados da abertura."""
+
+    @staticmethod
+    def delta(movimento, valor: Decimal | None = None) -> Decimal:
+        """Valor com sinal do movimento (positivo para entradas)."""
+        valor = movimento.valor if valor is None else valor
+        return valor if movimento.is_entrada else -valor
+
+    @staticmethod
+    def aplicar(caixa, delta: Decimal) -> None:
+        """Soma delta a caixa.saldo_atual em um UPDATE atômico e recarrega o valor."""
+        from caixa_nfse.caixa.models import Caixa
+
+        if not delta:
+            return
+        Caixa.objects.filter(pk=caixa.pk).update(saldo_atual=F("saldo_atual") + delta)
+        caixa.refresh_from_db(fields=["saldo_atual"])
+
+    @staticmethod
+    def registrar(abertura, movimentos) -> None:
+        """
+        Soma os movimentos novos aos totais materializados da abertura
+        (total_entradas, total_saidas, qtd_movimentos) em um UPDATE atômico.
+        A instância em memória acompanha os deltas.
+        """
+        from caixa_nfse.caixa.models import AberturaCaixa
+
+        entradas = saidas = Decimal("0.00")
+        qtd = 0
+        for movimento in movimentos:
+            valor = Decimal(str(movimento.valor))
+            if movimento.is_entrada:
+                entradas += valor
+            else:
+                saidas += valor
+            qtd += 1
+        if not qtd:
+            return
+        AberturaCaixa.objects.filter(pk=abertura.pk).update(
+            total_entradas=F("total_entradas") + entradas,
+            total_saidas=F("total_saidas") + saidas,
+            qtd_movimentos=F("qtd_movimentos") + qtd,
+        )
+        abertura.total_entradas += entradas
+        abertura.total_saidas += saidas
+        abertura.qtd_movimentos += qtd
+
+    @staticmethod
+    def totais(abertura) -> dict:
+        """Totais da abertura agregados a partir dos movimentos (para reconstrução)."""
+        from caixa_nfse.caixa.models import TipoMovimento
+
+        totais = abertura.movimentos.aggregate(
+            total_entradas=Sum(
+                "valor", filter=Q(tipo__in=[TipoMovimento.ENTRADA, TipoMovimento.SUPRIMENTO])
+            ),
+            total_saidas=Sum(
+                "valor",
+                filter=Q(
+                    tipo__in=[TipoMovimento.SAIDA, TipoMovimento.SANGRIA, TipoMovimento.ESTORNO]
+                ),
+            ),
+            qtd_movimentos=Count("pk"),
+        )
+        totais["total_entradas"] = totais["total_entradas"] or Decimal("0.00")
+        totais["total_saidas"] = totais["total_saidas"] or Decimal("0.00")
+        return totais
+
+    @staticmethod
+    def sincronizar(abertura) -> Decimal:
+        """
+        Define caixa.saldo_atual como o saldo da abertura. A abertura é lida com
+        select_for_update: inserções de movimentos concorrentes aguardam.
+        """
+        from caixa_nfse.caixa.models import AberturaCaixa, Caixa
+
+        atual = AberturaCaixa.objects.select_for_update().get(pk=abertura.pk)
+        saldo = atual.saldo_movimentos
+        Caixa.objects.filter(pk=atual.caixa_id).update(saldo_atual=saldo)
+        return saldo
@@ -0,0 +1,58 @@
+"""
+Caixa tasks - Celery tasks for long-running import operations.
+"""
+
+import logging
+
+from celery import shared_task
+
+from .services.importacao_job import ImportacaoJob
+
+logger = logging.getLogger(__name__)
+
+ERRO_BUSCA = "Erro ao conectar ou executar rotinas. Verifique a conexão e tente novamente."
+
+
+@shared_task
+def buscar_movimentos(
+    job_id: str, abertura_id: str, user_id, conexao_rotinas: dict, sql_params: dict
+) -> dict:
+    """
+    Passo "buscar" da importação em background.
+
+    Executa as rotinas de cada conexão ({conexao_id: [rotina_ids]}), monta a
+    pré-visualização (linhas brutas no PreviewCache) e publica progresso e
+    resultado em ImportacaoJob, consultado pela UI via polling.
+    """
+    from caixa_nfse.backoffice.models import Rotina
+    from caixa_nfse.core.models import ConexaoExterna, User
+
+    from .models import AberturaCaixa
+    from .services.preview_importacao import montar_preview
+
+    try:
+        user = User.objects.select_related("tenant").get(pk=user_id)
+        abertura = AberturaCaixa.objects.get(pk=abertura_id, tenant=user.tenant)
+
+        # Inject tenant-level system params (kept out of the broker message)
+        if user.tenant.chave_servico_andamento_ri:
+            sql_params = {
+                **sql_params,
+                "SERVICOANDAMENTO": user.tenant.chave_servico_andamento_ri,
+            }
+
+        jobs = []
+        for con_id, rot_ids in conexao_rotinas.items():
+            conexao = ConexaoExterna.objects.select_related("sistema").get(
+                pk=con_id, tenant=user.tenant
+            )
+            jobs.append((conexao, list(Rotina.objects.filter(pk__in=rot_ids, ativo=True))))
+
+        template, contexto = montar_preview(abertura, user, jobs, sql_params, job_id=job_id)
+        ImportacaoJob.concluir(job_id, template, contexto)
+        return {"success": True, "job_id": job_id}
+
+    except Exception:
+        logger.exception("Erro ao buscar movimentos (job %s)", job_id)
+        ImportacaoJob.falhar(job_id, ERRO_BUSCA)
+        return {"success": False, "job_id": job_id}
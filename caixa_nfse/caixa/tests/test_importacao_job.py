@@ -0,0 +1,45 @@
+"""
+Tests for caixa/services/importacao_job.py: ImportacaoJob.
+"""
+
+from types import SimpleNamespace
+
+from caixa_nfse.caixa.services.importacao_job import ImportacaoJob
+
+USER = SimpleNamespace(pk=1)
+ABERTURA = SimpleNamespace(pk="a1")
+
+
+class TestImportacaoJob:
+    def test_lifecycle(self):
+        job_id = ImportacaoJob.criar(USER, ABERTURA, total_rotinas=2)
+        status = ImportacaoJob.status(job_id, USER, ABERTURA)
+        assert status["estado"] == ImportacaoJob.PENDENTE
+
+        ImportacaoJob.publicar(job_id, estado=ImportacaoJob.EXECUTANDO)
+        ImportacaoJob.rotina_concluida(job_id, 10)
+        ImportacaoJob.rotina_concluida(job_id, 5)
+        status = ImportacaoJob.status(job_id, USER, ABERTURA)
+        assert (status["rotinas_concluidas"], status["linhas"]) == (2, 15)
+        assert ImportacaoJob.resultado(job_id) is None
+
+        ImportacaoJob.concluir(job_id, "t.html", {"preview_rows": [1]})
+        assert ImportacaoJob.status(job_id, USER, ABERTURA)["estado"] == ImportacaoJob.CONCLUIDO
+        assert ImportacaoJob.resultado(job_id) == ("t.html", {"preview_rows": [1]})
+
+    def test_falhar(self):
+        job_id = ImportacaoJob.criar(USER, ABERTURA, total_rotinas=1)
+        ImportacaoJob.falhar(job_id, "Erro")
+        status = ImportacaoJob.status(job_id, USER, ABERTURA)
+        assert (status["estado"], status["mensagem"]) == (ImportacaoJob.ERRO, "Erro")
+
+    def test_status_checks_owner_and_token(self):
+        job_id = ImportacaoJob.criar(USER, ABERTURA, total_rotinas=1)
+        assert ImportacaoJob.status(job_id, SimpleNamespace(pk=2), ABERTURA) is None
+        assert ImportacaoJob.status(job_id, USER, SimpleNamespace(pk="a2")) is None
+        assert ImportacaoJob.status("../x", USER, ABERTURA) is None
+
+    def test_publicar_unknown_job_is_noop(self):
+        ImportacaoJob.publicar("y" * 22, estado=ImportacaoJob.ERRO)
+        ImportacaoJob.rotina_concluida("y" * 22, 3)
+        assert ImportacaoJob.status("y" * 22, USER, ABERTURA) is None
@@ -7,7 +7,7 @@ Covers lines 27-38 (executar_rotinas), 154-160 (accumulation), 170-176 (_parse_d
 
 from datetime import date, datetime
 from decimal import Decimal
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -204,6 +204,101 @@ class TestExecutarRotinas:
         assert "t2" in sql_arg
 
 
+@pytest.mark.django_db
+class TestExecutarEmParalelo:
+    @pytest.fixture
+    def rotinas(self, sistema):
+        return [
+            Rotina.objects.create(
+                sistema=sistema, nome=f"Rotina {i}", sql_content=f"SELECT {i}", ativo=True
+            )
+            for i in range(4)
+        ]
+
+    @patch("caixa_nfse.caixa.services.importador.SQLExecutor.execute_routine")
+    def test_results_keep_input_order(self, mock_exec, conexao, rotinas):
+        import time
+
+        def fake(conexao, sql, params):
+            # Earlier rotinas finish last
+            time.sleep(0.01 * (4 - int(sql.split()[-1])))
+            return ["N"], [(sql,)], [{"time": "00:00:00", "msg": "ok", "type": "info"}]
+
+        mock_exec.side_effect = fake
+        results = ImportadorMovimentos.executar_em_paralelo([(conexao, rotinas)], max_por_conexao=4)
+        assert [r[1] for r in results] == rotinas
+        assert [r[3] for r in results] == [[(f"SELECT {i}",)] for i in range(4)]
+        assert all(r[0] == conexao for r in results)
+
+    @patch("caixa_nfse.caixa.services.importador.SQLExecutor.execute_routine")
+    def test_logs_are_attributed(self, mock_exec, conexao, rotinas):
+        mock_exec.side_effect = lambda *a: ([], [], [{"time": "t", "msg": "ok", "type": "info"}])
+        results = ImportadorMovimentos.executar_em_paralelo([(conexao, rotinas[:2])])
+        for _, rotina, _, _, logs in results:
+            assert logs[0]["origem"] == f"{conexao.sistema} - {rotina.nome}"
+            assert logs[0]["msg"] == f"[{conexao.sistema} - {rotina.nome}] ok"
+
+    @patch("caixa_nfse.caixa.services.importador.SQLExecutor.execute_routine")
+    def test_concurrency_limited_per_conexao(self, mock_exec, conexao, rotinas):
+        import threading
+        import time
+
+        lock = threading.Lock()
+        state = {"running": 0, "peak": 0}
+
+        def fake(*args):
+            with lock:
+                state["running"] += 1
+                state["peak"] = max(state["peak"], state["running"])
+            time.sleep(0.02)
+            with lock:
+                state["running"] -= 1
+            return [], [], []
+
+        mock_exec.side_effect = fake
+        ImportadorMovimentos.executar_em_paralelo(
+            [(conexao, rotinas)], max_workers=4, max_por_conexao=2
+        )
+        assert mock_exec.call_count == 4
+        assert state["peak"] == 2
+
+    @patch("caixa_nfse.caixa.services.importador.SQLExecutor.execute_routine")
+    def test_timeout_reports_error(self, mock_exec, conexao, rotinas):
+        import threading
+
+        release = threading.Event()
+
+        def fake(conexao, sql, params):
+            if sql == "SELECT 1":
+                release.wait(2)
+            return ["N"], [(1,)], []
+
+        mock_exec.side_effect = fake
+        try:
+            results = ImportadorMovimentos.executar_em_paralelo(
+                [(conexao, rotinas[:2])], max_por_conexao=2, timeout=0.2
+            )
+        finally:
+            release.set()
+
+        assert results[0][3] == [(1,)]
+        _, _, headers, rows, logs = results[1]
+        assert (headers, rows) == ([], [])
+        assert logs[0]["type"] == "error"
+        assert "Tempo limite" in logs[0]["msg"]
+
+    @patch("caixa_nfse.caixa.services.importador.SQLExecutor.execute_routine")
+    def test_unexpected_exception_is_logged(self, mock_exec, conexao, rotinas):
+        mock_exec.side_effect = RuntimeError("boom")
+        results = ImportadorMovimentos.executar_em_paralelo([(conexao, rotinas[:1])])
+        _, _, headers, rows, logs = results[0]
+        assert (headers, rows) == ([], [])
+        assert "boom" in logs[0]["msg"]
+
+    def test_no_jobs(self):
+        assert ImportadorMovimentos.executar_em_paralelo([]) == []
+
+
 # ===========================================================================
 # mapear_colunas (accumulation logic)
 # ===========================================================================
@@ -339,6 +434,149 @@ class TestSalvarImportacao:
         assert imp.data_ato == date(2025, 3, 15)
 
 
+@pytest.mark.django_db
+class TestSalvarImportacaoEmLotes:
+    def test_protocolo_spanning_batches_keeps_single_parent(
+        self, abertura, conexao, rotina, admin_user
+    ):
+        headers = ["PROTOCOLO", "VALOR", "DESCRICAO"]
+        batches = [
+            [("P-001", "50.00", "Ato 1"), ("P-002", "10.00", "Ato X")],
+            [("P-001", "25.00", "Ato 2")],
+        ]
+        created, skipped = ImportadorMovimentos.salvar_importacao_em_lotes(
+            abertura, conexao, rotina, headers, iter(batches), admin_user
+        )
+        assert created == 2
+        assert skipped == 0
+        imp = MovimentoImportado.objects.get(abertura=abertura, protocolo="P-001")
+        assert imp.valor == Decimal("75.00")
+        assert imp.descricao == f"{rotina.nome} - Ato 1; Ato 2"
+        assert imp.itens.count() == 2
+
+    def test_backfill_valor_from_taxas(self, abertura, conexao, rotina, admin_user):
+        headers = ["PROTOCOLO", "ISS", "EMOLUMENTO"]
+        batches = [[("P-001", "1.50", "10.00")], [("P-001", "0.50", "5.00")]]
+        ImportadorMovimentos.salvar_importacao_em_lotes(
+            abertura, conexao, rotina, headers, batches, admin_user
+        )
+        imp = MovimentoImportado.objects.get(abertura=abertura, protocolo="P-001")
+        assert imp.iss == Decimal("2.00")
+        assert imp.valor == Decimal("17.00")
+
+
+@pytest.mark.django_db
+class TestSalvarImportacoes:
+    def test_groups_selection_by_conexao_rotina(
+        self, abertura, conexao, rotina, sistema, admin_user, django_assert_num_queries
+    ):
+        outra = Rotina.objects.create(sistema=sistema, nome="Outra", sql_content="SELECT 2")
+        headers = ["PROTOCOLO", "VALOR", "DESCRICAO"]
+        selecoes = [
+            (conexao, rotina, headers, [("P-001", "50.00", "Ato 1")]),
+            (conexao, rotina, headers, [("P-001", "25.00", "Ato 2"), ("P-002", "5.00", "")]),
+            (conexao, outra, headers, [("P-001", "10.00", "Ato 3")]),
+        ]
+        ImportadorMovimentos.salvar_importacoes(abertura, selecoes, admin_user)  # warm caches
+        MovimentoImportado.objects.all().delete()
+
+        # savepoint + 2 existing lookups + 1 parent insert + 1 child insert + release
+        with django_assert_num_queries(6):
+            created, skipped = ImportadorMovimentos.salvar_importacoes(
+                abertura, selecoes, admin_user
+            )
+        assert (created, skipped) == (3, 0)
+        imp = MovimentoImportado.objects.get(rotina=rotina, protocolo="P-001")
+        assert imp.valor == Decimal("75.00")
+        assert imp.itens.count() == 2
+        assert MovimentoImportado.objects.get(rotina=outra).valor == Decimal("10.00")
+
+    def test_skips_existing_and_backfills_in_memory(self, abertura, conexao, rotina, admin_user):
+        ImportadorMovimentos.salvar_importacao(
+            abertura, conexao, rotina, ["PROTOCOLO", "VALOR"], [("P-001", "1.00")], admin_user
+        )
+        headers = ["PROTOCOLO", "ISS", "EMOLUMENTO"]
+        rows = [("P-001", "1.00", "1.00"), ("P-002", "1.50", "10.00")]
+        created, skipped = ImportadorMovimentos.salvar_importacoes(
+            abertura, [(conexao, rotina, headers, rows)], admin_user
+        )
+        assert (created, skipped) == (1, 1)
+        imp = MovimentoImportado.objects.get(protocolo="P-002")
+        assert imp.valor == Decimal("11.50")
+
+    def test_failure_rolls_back_whole_selection(self, abertura, conexao, rotina, admin_user):
+        headers = ["PROTOCOLO", "VALOR"]
+        selecoes = [(conexao, rotina, headers, [("P-001", "1.00")])]
+        with (
+            patch(
+                "caixa_nfse.caixa.models.ItemAtoImportado.objects.bulk_create",
+                side_effect=RuntimeError("boom"),
+            ),
+            pytest.raises(RuntimeError),
+        ):
+            ImportadorMovimentos.salvar_importacoes(abertura, selecoes, admin_user)
+        assert not MovimentoImportado.objects.exists()
+
+
+@pytest.mark.django_db
+class TestProtocolosExistentes:
+    def test_only_batch_protocolos_in_chunks(
+        self, abertura, conexao, rotina, admin_user, tenant, django_assert_num_queries
+    ):
+        ImportadorMovimentos.salvar_importacao(
+            abertura,
+            conexao,
+            rotina,
+            ["PROTOCOLO", "VALOR"],
+            [("P-1", "1"), ("P-2", "1"), ("P-3", "1")],
+            admin_user,
+        )
+        with (
+            patch("caixa_nfse.caixa.services.importador.BULK_BATCH_SIZE", 2),
+            django_assert_num_queries(2),
+        ):
+            existentes = ImportadorMovimentos.protocolos_existentes(
+                tenant, conexao, rotina, ["P-1", "P-3", "P-9", "", "P-1"]
+            )
+        assert existentes == {"P-1", "P-3"}
+
+    def test_empty_batch_issues_no_query(self, conexao, rotina, tenant, django_assert_num_queries):
+        with django_assert_num_queries(0):
+            assert (
+                ImportadorMovimentos.protocolos_existentes(tenant, conexao, rotina, [""]) == set()
+            )
+
+
+@pytest.mark.django_db
+class TestImportarRotina:
+    @patch("caixa_nfse.caixa.services.importador.SQLExecutor.stream_routine")
+    def test_consumes_stream(self, mock_stream, abertura, conexao, rotina, admin_user):
+        stream = MagicMock()
+        stream.headers = ["PROTOCOLO", "VALOR"]
+        stream.logs = [{"msg": "ok"}]
+        stream.__iter__.return_value = iter([[("P-001", "5.00")], [("P-002", "7.00")]])
+        mock_stream.return_value.__enter__.return_value = stream
+
+        created, skipped, logs = ImportadorMovimentos.importar_rotina(
+            abertura, conexao, rotina, {"DATA": "2025-01-01"}, admin_user, batch_size=1
+        )
+        assert (created, skipped) == (2, 0)
+        assert logs == [{"msg": "ok"}]
+        assert mock_stream.call_args.kwargs == {"batch_size": 1}
+
+    @patch("caixa_nfse.caixa.services.importador.SQLExecutor.stream_routine")
+    def test_empty_stream(self, mock_stream, abertura, conexao, rotina, admin_user):
+        stream = MagicMock()
+        stream.headers = []
+        stream.logs = []
+        mock_stream.return_value.__enter__.return_value = stream
+
+        created, skipped, _ = ImportadorMovimentos.importar_rotina(
+            abertura, conexao, rotina, {}, admin_user
+        )
+        assert (created, skipped) == (0, 0)
+
+
 # ===========================================================================
 # confirmar_movimentos
 # ===========================================================================
@@ -455,6 +693,135 @@ class TestConfirmarMovimentos:
         assert mov.valor == imp.valor_total_taxas
 
 
+@pytest.mark.django_db
+class TestConfirmarMovimentosEmLote:
+    def _importados(self, n, abertura, conexao, rotina, admin_user, tenant):
+        from caixa_nfse.caixa.models import ItemAtoImportado
+
+        imps = [
+            MovimentoImportado.objects.create(
+                tenant=tenant,
+                abertura=abertura,
+                conexao=conexao,
+                rotina=rotina,
+                importado_por=admin_user,
+                protocolo=f"P-{i}",
+                valor=Decimal("10.00"),
+                cliente_nome=f"Cliente {i}",
+            )
+            for i in range(n)
+        ]
+        for imp in imps:
+            ItemAtoImportado.objects.create(
+                tenant=tenant, movimento_importado=imp, descricao="Ato", valor=Decimal("10.00")
+            )
+        return [imp.pk for imp in imps]
+
+    def _queries(self, ids, abertura, forma_pagamento, admin_user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            count = ImportadorMovimentos.confirmar_movimentos(
+                ids, abertura, forma_pagamento, TipoMovimento.ENTRADA, admin_user
+            )
+        assert count == len(ids)
+        return len(ctx.captured_queries)
+
+    def test_query_count_does_not_grow_with_selection(
+        self, abertura, conexao, rotina, admin_user, forma_pagamento, tenant
+    ):
+        poucos = self._importados(2, abertura, conexao, rotina, admin_user, tenant)
+        muitos = self._importados(30, abertura, conexao, rotina, admin_user, tenant)[2:]
+        base = self._queries(poucos, abertura, forma_pagamento, admin_user)
+        # Backends with a low parameter limit (SQLite: 999) split bulk statements
+        # in a few batches; one query per row would add len(muitos) queries
+        assert (
+            self._queries(muitos, abertura, forma_pagamento, admin_user) < base + len(muitos) // 4
+        )
+
+    def test_hash_chain_and_audit(
+        self, abertura, conexao, rotina, admin_user, forma_pagamento, tenant, caixa
+    ):
+        from caixa_nfse.auditoria.models import AcaoAuditoria, RegistroAuditoria
+        from caixa_nfse.clientes.models import Cliente
+
+        ids = self._importados(3, abertura, conexao, rotina, admin_user, tenant)
+        self._queries(ids, abertura, forma_pagamento, admin_user)
+
+        movimentos = list(MovimentoCaixa.objects.filter(abertura=abertura).order_by("sequencia"))
+        assert [m.sequencia for m in movimentos] == [1, 2, 3]
+        assert movimentos[0].hash_anterior == abertura.hash_registro
+        for anterior, atual in zip(movimentos, movimentos[1:], strict=False):
+            assert atual.hash_anterior == anterior.hash_registro
+        abertura.refresh_from_db()
+        assert abertura.cadeia_movimentos_hash == movimentos[-1].hash_registro
+        assert abertura.cadeia_movimentos_seq == 3
+
+        assert Cliente.objects.filter(tenant=tenant).count() == 3
+        assert sum(m.itens.count() for m in movimentos) == 3
+        caixa.refresh_from_db()
+        assert caixa.saldo_atual == Decimal("1030.00")
+
+        criados = RegistroAuditoria.objects.filter(
+            tabela="MovimentoCaixa", acao=AcaoAuditoria.CREATE
+        )
+        assert {r.registro_id for r in criados} == {str(m.pk) for m in movimentos}
+        alterado = RegistroAuditoria.objects.get(
+            tabela="MovimentoImportado", acao=AcaoAuditoria.UPDATE, registro_id=str(ids[0])
+        )
+        assert "status_recebimento" in alterado.campos_alterados
+
+    @patch("caixa_nfse.caixa.services.importador._deve_gerar_nfse", return_value=True)
+    @patch("caixa_nfse.nfse.tasks.emitir_nfse_movimento")
+    def test_nfse_dispatched_for_movimentos_with_cliente(
+        self,
+        mock_task,
+        _mock_config,
+        abertura,
+        conexao,
+        rotina,
+        admin_user,
+        forma_pagamento,
+        tenant,
+        django_capture_on_commit_callbacks,
+    ):
+        ids = self._importados(2, abertura, conexao, rotina, admin_user, tenant)
+        parcial = {str(ids[1]): Decimal("4.00")}
+
+        with django_capture_on_commit_callbacks(execute=True):
+            ImportadorMovimentos.confirmar_movimentos(
+                ids,
+                abertura,
+                forma_pagamento,
+                TipoMovimento.ENTRADA,
+                admin_user,
+                parcelas_map=parcial,
+            )
+
+        # bulk_create skips the post_save auto-emission: both first parcelas have a cliente
+        movimentos = MovimentoCaixa.objects.filter(abertura=abertura)
+        assert {c.args[0] for c in mock_task.delay.call_args_list} == {
+            str(m.pk) for m in movimentos
+        }
+
+    def test_clientes_saved_with_document_hash(
+        self, abertura, conexao, rotina, admin_user, forma_pagamento, tenant
+    ):
+        from caixa_nfse.clientes.models import Cliente
+
+        ids = self._importados(1, abertura, conexao, rotina, admin_user, tenant)
+        with patch(
+            "caixa_nfse.clientes.models.Cliente.preparar_para_gravar",
+            autospec=True,
+            side_effect=lambda c: setattr(c, "cpf_cnpj_hash", "h"),
+        ) as preparar:
+            self._queries(ids, abertura, forma_pagamento, admin_user)
+
+        preparar.assert_called_once()
+        assert Cliente.objects.get(tenant=tenant).cpf_cnpj_hash == "h"
+
+
 # ===========================================================================
 # limpar_confirmados
 # ===========================================================================
@@ -0,0 +1,83 @@
+"""
+Tests for caixa/services/mapeador_colunar.py: MapeadorColunar.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from caixa_nfse.backoffice.models import Rotina, Sistema
+from caixa_nfse.caixa.services.importador import ImportadorMovimentos
+from caixa_nfse.caixa.services.mapeador_colunar import MapeadorColunar
+from caixa_nfse.caixa.services.rotina_compilada import RotinaCache
+from caixa_nfse.conftest import *  # noqa: F401,F403
+
+
+@pytest.fixture
+def rotina(db):
+    sistema = Sistema.objects.create(nome="RI", ativo=True)
+    return Rotina.objects.create(sistema=sistema, nome="Atos", sql_content="SELECT 1", ativo=True)
+
+
+@pytest.mark.django_db
+class TestMapeadorColunar:
+    def test_decimal_columns_are_parsed(self, rotina):
+        headers = ["PROTOCOLO", "VALOR", "ISS", "DATA_ATO"]
+        rows = [("P-1", "10,50", Decimal("1.00"), "20250101"), ("P-2", None, "abc", None)]
+        dados = MapeadorColunar.mapear(rotina, headers, rows)
+
+        assert len(dados) == 2
+        assert dados.coluna("protocolo") == ["P-1", "P-2"]
+        assert dados.coluna("valor") == [Decimal("10.50"), Decimal("0.00")]
+        assert dados.coluna("iss") == [Decimal("1.00"), Decimal("0.00")]
+        assert dados.convertida("data_ato", ImportadorMovimentos._parse_date) == [
+            date(2025, 1, 1),
+            None,
+        ]
+        assert dados.coluna("emolumento") is None
+
+    def test_multi_column_target_is_summed(self, rotina):
+        headers = ["VALOR", "VALOR_PRINCIPAL"]
+        dados = MapeadorColunar.mapear(rotina, headers, [("1.10", "2.20"), ("3", Decimal("4"))])
+        assert dados.coluna("valor") == [Decimal("3.30"), Decimal("7")]
+
+    def test_linha_matches_mapear_colunas_keys(self, rotina):
+        headers = ["UNKNOWN", "PROTOCOLO", "DESCRICAO"]
+        rows = [("x", "P-1", "Ato")]
+        dados = MapeadorColunar.mapear(rotina, headers, rows)
+        assert dados.linha(0) == ImportadorMovimentos.mapear_colunas(rotina, headers, rows[0])
+
+    def test_short_rows(self, rotina):
+        dados = MapeadorColunar.mapear(rotina, ["PROTOCOLO", "VALOR"], [("P-1",), ("P-2", "5")])
+        assert dados.coluna("valor") == [Decimal("0.00"), Decimal("5")]
+
+    def test_no_mapped_columns(self, rotina):
+        dados = MapeadorColunar.mapear(rotina, ["FOO"], iter([("a",)]))
+        assert len(dados) == 1
+        assert dados.colunas == {}
+
+
+@pytest.mark.slow
+@pytest.mark.django_db
+def test_benchmark_100k_rows(rotina):
+    """Columnar mapping matches the row-by-row mapping + _parse_decimal (run with -m slow)."""
+    headers = ["PROTOCOLO", "DESCRICAO", "VALOR", "VALOR_PRINCIPAL", "ISS", "EMOLUMENTO", "FUNDESP"]
+    rows = [
+        (f"P-{i // 3}", "Certidão", f"{i % 500}.{i % 100:02d}", "1.00", "2,50", "10.00", "0.00")
+        for i in range(100_000)
+    ]
+    decimais = ["valor", "iss", "emolumento", "fundesp"]
+    compilada = RotinaCache.get(rotina)
+    indice = compilada.indice_colunas(headers)
+
+    por_linha = {campo: Decimal("0") for campo in decimais}
+    for row in rows:
+        mapped = compilada.mapear(indice, row)
+        for campo in decimais:
+            por_linha[campo] += ImportadorMovimentos._parse_decimal(mapped.get(campo))
+
+    dados = MapeadorColunar.mapear(rotina, headers, rows)
+    colunar = {campo: sum(dados.coluna(campo), Decimal("0")) for campo in decimais}
+
+    assert colunar == por_linha
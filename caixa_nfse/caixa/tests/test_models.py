@@ -139,6 +139,29 @@ class TestAberturaCaixaModel:
             mock_tz.localdate.return_value = abertura.data_hora.date()
             assert abertura.is_operacional_hoje is True
 
+    def test_abertura_chain_uses_tenant_head(self, abertura, user):
+        """Aberturas chain through the tenant head with strict sequence numbers."""
+        tenant = abertura.tenant
+        tenant.refresh_from_db()
+        assert (tenant.cadeia_aberturas_seq, tenant.cadeia_aberturas_hash) == (
+            abertura.sequencia,
+            abertura.hash_registro,
+        )
+
+        segunda = AberturaCaixa.objects.create(
+            tenant=tenant,
+            caixa=abertura.caixa,
+            operador=user,
+            saldo_abertura=Decimal("0.00"),
+        )
+        assert segunda.sequencia == abertura.sequencia + 1
+        assert segunda.hash_anterior == abertura.hash_registro
+
+        # A full save of a stale tenant instance keeps the chain head
+        tenant.save()
+        tenant.refresh_from_db()
+        assert tenant.cadeia_aberturas_hash == segunda.hash_registro
+
 
 @pytest.mark.django_db
 class TestMovimentoCaixaModel:
@@ -202,6 +225,26 @@ class TestMovimentoCaixaModel:
         )
         assert movimento.is_entrada is True
 
+    def test_movimento_chain_uses_abertura_head(self, abertura, forma_pagamento):
+        """Movements chain from the abertura hash through its chain head."""
+        movimentos = [
+            MovimentoCaixa.objects.create(
+                tenant=abertura.tenant,
+                abertura=abertura,
+                tipo=TipoMovimento.ENTRADA,
+                forma_pagamento=forma_pagamento,
+                valor=Decimal("10.00"),
+            )
+            for _ in range(3)
+        ]
+        assert [m.sequencia for m in movimentos] == [1, 2, 3]
+        assert movimentos[0].hash_anterior == abertura.hash_registro
+        assert movimentos[2].hash_anterior == movimentos[1].hash_registro
+
+        abertura.refresh_from_db()
+        assert abertura.cadeia_movimentos_seq == 3
+        assert abertura.cadeia_movimentos_hash == movimentos[2].hash_registro
+
 
 @pytest.mark.django_db
 class TestFechamentoCaixaModel:
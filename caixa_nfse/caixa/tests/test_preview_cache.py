@@ -0,0 +1,50 @@
+"""
+Tests for caixa/services/preview_cache.py: PreviewCache.
+"""
+
+import zlib
+from types import SimpleNamespace
+
+import pytest
+
+from caixa_nfse.caixa.services.preview_cache import PreviewCache, _key, cache_importacao
+
+USER = SimpleNamespace(pk=1)
+ABERTURA = SimpleNamespace(pk="a1")
+GRUPOS = {
+    "0": {
+        "conexao_id": "c1",
+        "rotina_id": "r1",
+        "headers": ["PROTOCOLO", "VALOR"],
+        "rows": [["P-1", "10.00"], ["P-1", "5.00"]],
+    }
+}
+
+
+class TestPreviewCache:
+    def test_roundtrip(self):
+        token = PreviewCache.salvar(USER, ABERTURA, GRUPOS)
+        assert PreviewCache.carregar(token, USER, ABERTURA) == GRUPOS
+
+    def test_payload_is_compressed(self):
+        token = PreviewCache.salvar(USER, ABERTURA, GRUPOS)
+        blob = cache_importacao().get(_key(token))
+        assert isinstance(blob, bytes)
+        assert b"P-1" in zlib.decompress(blob)
+
+    @pytest.mark.parametrize(
+        "user,abertura",
+        [(SimpleNamespace(pk=2), ABERTURA), (USER, SimpleNamespace(pk="a2"))],
+    )
+    def test_other_owner_is_rejected(self, user, abertura):
+        token = PreviewCache.salvar(USER, ABERTURA, GRUPOS)
+        assert PreviewCache.carregar(token, user, abertura) is None
+
+    @pytest.mark.parametrize("token", [None, "", "curto", "../../etc", "x" * 32])
+    def test_invalid_or_unknown_token(self, token):
+        assert PreviewCache.carregar(token, USER, ABERTURA) is None
+
+    def test_descartar(self):
+        token = PreviewCache.salvar(USER, ABERTURA, GRUPOS)
+        PreviewCache.descartar(token)
+        assert PreviewCache.carregar(token, USER, ABERTURA) is None
@@ -0,0 +1,111 @@
+"""
+Tests for caixa/services/rotina_compilada.py: CompiledRotina and RotinaCache.
+"""
+
+from unittest.mock import patch
+
+import pytest
+
+from caixa_nfse.backoffice.models import MapeamentoColunaRotina, Rotina, Sistema
+from caixa_nfse.caixa.services.rotina_compilada import CompiledRotina, RotinaCache
+from caixa_nfse.conftest import *  # noqa: F401,F403
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    RotinaCache.clear()
+    yield
+    RotinaCache.clear()
+
+
+@pytest.fixture
+def rotina(db):
+    sistema = Sistema.objects.create(nome="RI", ativo=True)
+    return Rotina.objects.create(
+        sistema=sistema,
+        nome="Protocolos",
+        sql_content="SELECT * FROM t\r\nWHERE dt >= @DATA_INICIO ",
+        sql_content_extra="UNION SELECT * FROM t2 WHERE k = @SERVICOANDAMENTO",
+        ativo=True,
+    )
+
+
+@pytest.mark.django_db
+class TestCompiledRotina:
+    def test_from_rotina(self, rotina):
+        compilada = CompiledRotina.from_rotina(rotina)
+        assert compilada.sql == (
+            "SELECT * FROM t\nWHERE dt >= @DATA_INICIO\n"
+            "UNION SELECT * FROM t2 WHERE k = @SERVICOANDAMENTO"
+        )
+        assert compilada.variaveis == ("DATA_INICIO",)
+        assert compilada.mapeamento == {}
+
+    def test_auto_mapping_index(self, rotina):
+        compilada = CompiledRotina.from_rotina(rotina)
+        indice = compilada.indice_colunas(["X", "protocolo", "VALOR", "VALOR_PRINCIPAL"])
+        assert indice == ((1, "protocolo", False), (2, "valor", True), (3, "valor", True))
+        assert compilada.indice_colunas(["X", "protocolo", "VALOR", "VALOR_PRINCIPAL"]) is indice
+
+    def test_mapear_accumulates_and_ignores_short_rows(self, rotina):
+        compilada = CompiledRotina.from_rotina(rotina)
+        indice = compilada.indice_colunas(["PROTOCOLO", "VALOR", "VALOR_PRINCIPAL"])
+        assert compilada.mapear(indice, ("P-1", "10.00", "2,50")) == {
+            "protocolo": "P-1",
+            "valor": "12.50",
+        }
+        assert compilada.mapear(indice, ("P-2",)) == {"protocolo": "P-2"}
+
+    def test_manual_mapping_replaces_auto(self, rotina):
+        MapeamentoColunaRotina.objects.create(
+            rotina=rotina, coluna_sql="num_prot", campo_destino="protocolo"
+        )
+        compilada = CompiledRotina.from_rotina(rotina)
+        indice = compilada.indice_colunas(["NUM_PROT", "PROTOCOLO"])
+        assert compilada.mapear(indice, ("A", "B")) == {"protocolo": "A"}
+
+    def test_cache_roundtrip(self, rotina):
+        compilada = CompiledRotina.from_rotina(rotina)
+        copia = CompiledRotina.from_cache(compilada.to_cache())
+        assert copia.to_cache() == compilada.to_cache()
+
+
+@pytest.mark.django_db
+class TestRotinaCache:
+    def test_get_is_cached_in_process(self, rotina, django_assert_num_queries):
+        primeira = RotinaCache.get(rotina)
+        with django_assert_num_queries(0):
+            assert RotinaCache.get(rotina) is primeira
+
+    def test_uses_shared_cache_payload(self, rotina):
+        payload = CompiledRotina.from_rotina(rotina).to_cache()
+        payload["sql"] = "SELECT 42"
+        with (
+            patch("caixa_nfse.caixa.services.rotina_compilada.cache.get", return_value=payload),
+            patch.object(CompiledRotina, "from_rotina") as mock_compile,
+        ):
+            assert RotinaCache.get(rotina).sql == "SELECT 42"
+        mock_compile.assert_not_called()
+
+    def test_shared_cache_failure_falls_back(self, rotina):
+        with patch(
+            "caixa_nfse.caixa.services.rotina_compilada.cache.get",
+            side_effect=ConnectionError("redis down"),
+        ):
+            assert RotinaCache.get(rotina).nome == "Protocolos"
+
+    def test_rotina_save_invalidates(self, rotina):
+        RotinaCache.get(rotina)
+        rotina.sql_content = "SELECT 2"
+        rotina.sql_content_extra = ""
+        rotina.save()
+        assert RotinaCache.get(rotina).sql == "SELECT 2"
+
+    def test_mapeamento_save_bumps_version(self, rotina):
+        antiga = RotinaCache.get(rotina)
+        MapeamentoColunaRotina.objects.create(
+            rotina=rotina, coluna_sql="NUM_PROT", campo_destino="protocolo"
+        )
+        rotina.refresh_from_db()
+        assert str(rotina.updated_at) != antiga.versao
+        assert RotinaCache.get(rotina).mapeamento == {"NUM_PROT": "protocolo"}
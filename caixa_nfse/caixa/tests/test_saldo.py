@@ -0,0 +1,109 @@
+"""
+Tests for caixa/services/saldo.py (SaldoCaixa) and the recalcular_totais_abertura command.
+"""
+
+from decimal import Decimal
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from caixa_nfse.caixa.models import AberturaCaixa, Caixa, MovimentoCaixa, TipoMovimento
+from caixa_nfse.caixa.services.saldo import SaldoCaixa
+from caixa_nfse.conftest import *  # noqa: F401,F403
+
+
+def _movimento(abertura, forma_pagamento, tipo, valor):
+    return MovimentoCaixa.objects.create(
+        tenant=abertura.tenant,
+        abertura=abertura,
+        tipo=tipo,
+        forma_pagamento=forma_pagamento,
+        valor=Decimal(valor),
+    )
+
+
+@pytest.mark.django_db
+class TestSaldoCaixa:
+    def test_delta_sign(self):
+        entrada = MovimentoCaixa(tipo=TipoMovimento.ENTRADA, valor=Decimal("10.00"))
+        estorno = MovimentoCaixa(tipo=TipoMovimento.ESTORNO, valor=Decimal("10.00"))
+        assert SaldoCaixa.delta(entrada) == Decimal("10.00")
+        assert SaldoCaixa.delta(estorno) == Decimal("-10.00")
+        assert SaldoCaixa.delta(estorno, Decimal("4.00")) == Decimal("-4.00")
+
+    def test_aplicar_does_not_lose_concurrent_updates(self, caixa):
+        # Two stale copies of the same row, as in two concurrent requests
+        outra = Caixa.objects.get(pk=caixa.pk)
+        SaldoCaixa.aplicar(caixa, Decimal("50.00"))
+        SaldoCaixa.aplicar(outra, Decimal("-20.00"))
+
+        assert outra.saldo_atual == Decimal("30.00")
+        caixa.refresh_from_db()
+        assert caixa.saldo_atual == Decimal("30.00")
+
+    def test_movimento_insert_updates_totals(self, abertura, forma_pagamento):
+        _movimento(abertura, forma_pagamento, TipoMovimento.ENTRADA, "150.00")
+        _movimento(abertura, forma_pagamento, TipoMovimento.SANGRIA, "40.00")
+        _movimento(abertura, forma_pagamento, TipoMovimento.ESTORNO, "10.00")
+
+        esperado = {
+            "total_entradas": Decimal("150.00"),
+            "total_saidas": Decimal("50.00"),
+            "qtd_movimentos": 3,
+        }
+        assert {campo: getattr(abertura, campo) for campo in esperado} == esperado
+        abertura.refresh_from_db()
+        assert {campo: getattr(abertura, campo) for campo in esperado} == esperado
+        assert SaldoCaixa.totais(abertura) == esperado
+
+        # Re-saving an existing movement does not count it twice
+        MovimentoCaixa.objects.filter(abertura=abertura).first().save()
+        abertura.refresh_from_db()
+        assert abertura.qtd_movimentos == 3
+
+    def test_saldo_movimentos_does_not_query(self, abertura, forma_pagamento):
+        _movimento(abertura, forma_pagamento, TipoMovimento.ENTRADA, "25.00")
+        abertura = AberturaCaixa.objects.get(pk=abertura.pk)
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert abertura.saldo_movimentos == Decimal("125.00")
+        assert len(ctx.captured_queries) == 0
+
+    def test_sincronizar(self, abertura, forma_pagamento):
+        _movimento(abertura, forma_pagamento, TipoMovimento.SAIDA, "30.00")
+
+        assert SaldoCaixa.sincronizar(abertura) == Decimal("70.00")
+        abertura.caixa.refresh_from_db()
+        assert abertura.caixa.saldo_atual == Decimal("70.00")
+
+
+@pytest.mark.django_db
+class TestRecalcularTotaisAbertura:
+    def _divergir(self, abertura, forma_pagamento):
+        _movimento(abertura, forma_pagamento, TipoMovimento.ENTRADA, "80.00")
+        AberturaCaixa.objects.filter(pk=abertura.pk).update(total_entradas=0, qtd_movimentos=0)
+
+    def test_verificar_only_reports(self, abertura, forma_pagamento):
+        self._divergir(abertura, forma_pagamento)
+        out = StringIO()
+        call_command("recalcular_totais_abertura", "--verificar", stdout=out)
+
+        assert "1 divergência(s) encontrada(s)" in out.getvalue()
+        abertura.refresh_from_db()
+        assert abertura.total_entradas == Decimal("0.00")
+
+    def test_rebuild_fixes_totals(self, abertura, forma_pagamento):
+        self._divergir(abertura, forma_pagamento)
+        out = StringIO()
+        call_command("recalcular_totais_abertura", stdout=out)
+
+        assert "1 divergência(s) corrigida(s)" in out.getvalue()
+        abertura.refresh_from_db()
+        assert (abertura.total_entradas, abertura.qtd_movimentos) == (Decimal("80.00"), 1)
+
+        out = StringIO()
+        call_command("recalcular_totais_abertura", "--verificar", stdout=out)
+        assert "0 divergência(s)" in out.getvalue()
@@ -14,6 +14,9 @@ class TestImportadorMovimentos(TestCase):
         conexao.sistema = "SISTEMA_TESTE"
         rotina = MagicMock()
         rotina.nome = "Rotina X"
+        rotina.sql_content = "SELECT * FROM t"
+        rotina.sql_content_extra = None
+        rotina.mapeamentos.all.return_value = []
         user = MagicMock()
         user.tenant = MagicMock()
 
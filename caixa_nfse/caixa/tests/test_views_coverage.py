@@ -27,6 +27,7 @@ from caixa_nfse.caixa.models import (
     StatusCaixa,
     StatusFechamento,
 )
+from caixa_nfse.caixa.services.preview_cache import PreviewCache
 from caixa_nfse.conftest import *  # noqa: F401,F403
 from caixa_nfse.core.models import ConexaoExterna, FormaPagamento
 
@@ -108,14 +109,14 @@ class TestImportarBuscarPreview:
     """Cover the full buscar flow: params collection, duplicate detection,
     grouping by protocol, serialization, and template rendering."""
 
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_rotinas")
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.mapear_colunas")
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_em_paralelo")
     def test_buscar_returns_preview_grouped(
-        self, mock_map, mock_exec, admin_client, abertura, conexao, rotina
+        self, mock_exec, admin_client, abertura, conexao, rotina
     ):
         """Two rows with same protocol should be grouped into one preview row."""
         mock_exec.return_value = [
             (
+                conexao,
                 rotina,
                 ["PROTOCOLO", "VALOR", "ISS", "DESCRICAO"],
                 [
@@ -125,22 +126,6 @@ class TestImportarBuscarPreview:
                 [],
             ),
         ]
-        mock_map.side_effect = [
-            {
-                "protocolo": "PROT-1",
-                "valor": "100.00",
-                "iss": "10.00",
-                "descricao": "Ato A",
-                "emolumento": "0",
-            },
-            {
-                "protocolo": "PROT-1",
-                "valor": "200.00",
-                "iss": "20.00",
-                "descricao": "Ato B",
-                "emolumento": "0",
-            },
-        ]
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
             url,
@@ -152,13 +137,21 @@ class TestImportarBuscarPreview:
         assert response.status_code == 200
         content = response.content.decode()
         assert "PROT-1" in content
+        assert 'name="preview_token"' in content
+        assert "raw_rows_" not in content
+        token = response.context["preview_token"]
+        user = response.wsgi_request.user
+        grupos = PreviewCache.carregar(token, user, abertura)
+        assert grupos["0"]["rows"] == [
+            ["PROT-1", "100.00", "10.00", "Ato A"],
+            ["PROT-1", "200.00", "20.00", "Ato B"],
+        ]
 
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_rotinas")
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.mapear_colunas")
-    def test_buscar_no_results(self, mock_map, mock_exec, admin_client, abertura, conexao, rotina):
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_em_paralelo")
+    def test_buscar_no_results(self, mock_exec, admin_client, abertura, conexao, rotina):
         """Empty result set should render importados_results with total_rows=0."""
         mock_exec.return_value = [
-            (rotina, ["PROTOCOLO"], [], []),
+            (conexao, rotina, ["PROTOCOLO"], [], []),
         ]
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
@@ -170,16 +163,12 @@ class TestImportarBuscarPreview:
         )
         assert response.status_code == 200
 
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_rotinas")
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.mapear_colunas")
-    def test_buscar_with_sql_params(
-        self, mock_map, mock_exec, admin_client, abertura, conexao, rotina
-    ):
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_em_paralelo")
+    def test_buscar_with_sql_params(self, mock_exec, admin_client, abertura, conexao, rotina):
         """Params starting with param_ should be collected and passed through."""
         mock_exec.return_value = [
-            (rotina, ["PROTOCOLO", "VALOR"], [("P-1", "50.00")], []),
+            (conexao, rotina, ["PROTOCOLO", "VALOR"], [("P-1", "50.00")], []),
         ]
-        mock_map.return_value = {"protocolo": "P-1", "valor": "50.00", "descricao": "X"}
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
             url,
@@ -197,10 +186,9 @@ class TestImportarBuscarPreview:
             call_kwargs[0][3] if len(call_kwargs[0]) > 3 else {}
         )
 
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_rotinas")
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.mapear_colunas")
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_em_paralelo")
     def test_buscar_duplicate_detection(
-        self, mock_map, mock_exec, admin_client, abertura, conexao, rotina, tenant, admin_user
+        self, mock_exec, admin_client, abertura, conexao, rotina, tenant, admin_user
     ):
         """Rows with protocol already in DB should be marked as duplicated."""
         # Create existing importado with same protocol
@@ -214,13 +202,8 @@ class TestImportarBuscarPreview:
             valor=Decimal("100.00"),
         )
         mock_exec.return_value = [
-            (rotina, ["PROTOCOLO", "VALOR"], [("PROT-DUP", "100.00")], []),
+            (conexao, rotina, ["PROTOCOLO", "VALOR"], [("PROT-DUP", "100.00")], []),
         ]
-        mock_map.return_value = {
-            "protocolo": "PROT-DUP",
-            "valor": "100.00",
-            "descricao": "Dup",
-        }
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
             url,
@@ -231,20 +214,12 @@ class TestImportarBuscarPreview:
         )
         assert response.status_code == 200
 
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_rotinas")
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.mapear_colunas")
-    def test_buscar_ungrouped_no_protocol(
-        self, mock_map, mock_exec, admin_client, abertura, conexao, rotina
-    ):
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_em_paralelo")
+    def test_buscar_ungrouped_no_protocol(self, mock_exec, admin_client, abertura, conexao, rotina):
         """Rows without protocol stay ungrouped."""
         mock_exec.return_value = [
-            (rotina, ["VALOR", "DESCRICAO"], [("50.00", "Sem Proto")], []),
+            (conexao, rotina, ["VALOR", "DESCRICAO"], [("50.00", "Sem Proto")], []),
         ]
-        mock_map.return_value = {
-            "protocolo": "",
-            "valor": "50.00",
-            "descricao": "Sem Proto",
-        }
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
             url,
@@ -255,15 +230,14 @@ class TestImportarBuscarPreview:
         )
         assert response.status_code == 200
 
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_rotinas")
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.mapear_colunas")
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_em_paralelo")
     def test_buscar_with_servicoandamento(
-        self, mock_map, mock_exec, admin_client, abertura, conexao, rotina, tenant
+        self, mock_exec, admin_client, abertura, conexao, rotina, tenant
     ):
         """When tenant has chave_servico_andamento_ri, it should be injected."""
         tenant.chave_servico_andamento_ri = "CHAVE123"
         tenant.save(update_fields=["chave_servico_andamento_ri"])
-        mock_exec.return_value = [(rotina, [], [], [])]
+        mock_exec.return_value = [(conexao, rotina, [], [], [])]
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
             url,
@@ -274,16 +248,16 @@ class TestImportarBuscarPreview:
         )
         assert response.status_code == 200
 
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_rotinas")
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.mapear_colunas")
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_em_paralelo")
     def test_buscar_decimal_and_date_formatting(
-        self, mock_map, mock_exec, admin_client, abertura, conexao, rotina
+        self, mock_exec, admin_client, abertura, conexao, rotina
     ):
         """Cover Decimal and date formatting in full_data (lines 616-621)."""
         from datetime import datetime
 
         mock_exec.return_value = [
             (
+                conexao,
                 rotina,
                 ["PROTOCOLO", "VALOR", "DATA"],
                 [
@@ -292,11 +266,6 @@ class TestImportarBuscarPreview:
                 [],
             ),
         ]
-        mock_map.return_value = {
-            "protocolo": "P-FMT",
-            "valor": "123.45",
-            "descricao": "Fmt Test",
-        }
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
             url,
@@ -313,40 +282,140 @@ class TestImportarBuscarPreview:
 # ===========================================================================
 
 
+@pytest.mark.django_db
+class TestImportacaoAssincrona:
+    """buscar enqueues buscar_movimentos; the UI polls importacao_status."""
+
+    def _buscar(self, admin_client, abertura, conexao, rotina):
+        url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
+        with patch("caixa_nfse.caixa.tasks.buscar_movimentos.delay") as mock_delay:
+            response = admin_client.post(
+                url,
+                {"action": "buscar", "conexao_rotina_pairs": [f"{conexao.pk}:{rotina.pk}"]},
+            )
+        return response, mock_delay.call_args[0]
+
+    def test_buscar_returns_polling_progress(self, admin_client, abertura, conexao, rotina):
+        response, args = self._buscar(admin_client, abertura, conexao, rotina)
+        job_id = args[0]
+        status_url = reverse(
+            "caixa:importacao_status", kwargs={"pk": abertura.pk, "job_id": job_id}
+        )
+        content = response.content.decode()
+        assert status_url in content
+        assert "Rotinas: 0/1" in content
+        assert args[3] == {str(conexao.pk): [str(rotina.pk)]}
+
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_em_paralelo")
+    def test_status_renders_preview_when_done(
+        self, mock_exec, admin_client, abertura, conexao, rotina
+    ):
+        from caixa_nfse.caixa.tasks import buscar_movimentos
+
+        mock_exec.return_value = [
+            (conexao, rotina, ["PROTOCOLO", "VALOR"], [("PROT-9", "10.00")], []),
+        ]
+        _, args = self._buscar(admin_client, abertura, conexao, rotina)
+        assert buscar_movimentos(*args)["success"] is True
+
+        url = reverse("caixa:importacao_status", kwargs={"pk": abertura.pk, "job_id": args[0]})
+        content = admin_client.get(url).content.decode()
+        assert "PROT-9" in content
+        assert 'name="preview_token"' in content
+
+    def test_service_key_loaded_by_worker(self, admin_client, abertura, conexao, rotina, tenant):
+        from caixa_nfse.caixa.tasks import buscar_movimentos
+
+        tenant.chave_servico_andamento_ri = "CHAVE123"
+        tenant.save(update_fields=["chave_servico_andamento_ri"])
+        _, args = self._buscar(admin_client, abertura, conexao, rotina)
+        assert "CHAVE123" not in repr(args)
+
+        with patch(
+            "caixa_nfse.caixa.services.preview_importacao.montar_preview",
+            return_value=("caixa/partials/importados_preview.html", {}),
+        ) as mock_preview:
+            buscar_movimentos(*args)
+        assert mock_preview.call_args[0][3]["SERVICOANDAMENTO"] == "CHAVE123"
+
+    def test_status_done_with_expired_result_stops_polling(
+        self, admin_client, abertura, conexao, rotina
+    ):
+        from caixa_nfse.caixa.services.importacao_job import ImportacaoJob, _resultado_key
+        from caixa_nfse.caixa.services.preview_cache import cache_importacao
+
+        _, args = self._buscar(admin_client, abertura, conexao, rotina)
+        ImportacaoJob.concluir(args[0], "caixa/partials/importados_preview.html", {})
+        cache_importacao().delete(_resultado_key(args[0]))
+
+        url = reverse("caixa:importacao_status", kwargs={"pk": abertura.pk, "job_id": args[0]})
+        content = admin_client.get(url).content.decode()
+        assert "O resultado da busca expirou" in content
+        assert "hx-trigger" not in content
+
+    def test_status_unknown_job(self, admin_client, abertura):
+        url = reverse("caixa:importacao_status", kwargs={"pk": abertura.pk, "job_id": "x" * 22})
+        assert "A busca expirou" in admin_client.get(url).content.decode()
+
+    def test_status_other_user(self, client, admin_client, abertura, conexao, rotina, tenant):
+        from caixa_nfse.core.models import User
+
+        _, args = self._buscar(admin_client, abertura, conexao, rotina)
+        outro = User.objects.create_user(
+            email="outro@test.com", password="x", tenant=tenant, pode_operar_caixa=True
+        )
+        client.force_login(outro)
+        url = reverse("caixa:importacao_status", kwargs={"pk": abertura.pk, "job_id": args[0]})
+        assert "A busca expirou" in client.get(url).content.decode()
+
+
 @pytest.mark.django_db
 class TestSalvarImportadosSuccess:
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.salvar_importacao")
-    def test_importar_success(self, mock_save, admin_client, abertura, conexao, rotina):
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.salvar_importacoes")
+    def test_importar_success(self, mock_save, admin_client, admin_user, abertura, conexao, rotina):
         """Successful import should show total_importados in results template."""
         mock_save.return_value = (3, 1)
+        token = PreviewCache.salvar(
+            admin_user,
+            abertura,
+            {
+                "0": {
+                    "conexao_id": str(conexao.pk),
+                    "rotina_id": str(rotina.pk),
+                    "headers": ["PROTOCOLO", "VALOR"],
+                    "rows": [["P-001", "100.00"]],
+                }
+            },
+        )
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
             url,
-            {
-                "action": "importar",
-                "selected_rows": ["0"],
-                "conexao_id_0": str(conexao.pk),
-                "rotina_id_0": str(rotina.pk),
-                "raw_headers_0": '["PROTOCOLO","VALOR"]',
-                "raw_rows_0": '[["P-001","100.00"]]',
-            },
+            {"action": "importar", "selected_rows": ["0"], "preview_token": token},
         )
         assert response.status_code == 200
         mock_save.assert_called_once()
+        assert mock_save.call_args[0][1] == [
+            (conexao, rotina, ["PROTOCOLO", "VALOR"], [["P-001", "100.00"]])
+        ]
 
-    def test_importar_skip_incomplete_rows(self, admin_client, abertura, conexao, rotina):
-        """Rows missing required fields should be skipped (line 784)."""
+    def test_importar_skip_unknown_rows(self, admin_client, admin_user, abertura):
+        """Selected keys that are not in the preview are skipped."""
+        token = PreviewCache.salvar(admin_user, abertura, {})
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
             url,
-            {
-                "action": "importar",
-                "selected_rows": ["0"],
-                "conexao_id_0": str(conexao.pk),
-                # Missing rotina_id_0, raw_headers_0, raw_rows_0
-            },
+            {"action": "importar", "selected_rows": ["0"], "preview_token": token},
+        )
+        assert response.status_code == 200
+
+    def test_importar_expired_preview(self, admin_client, abertura):
+        url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
+        response = admin_client.post(
+            url,
+            {"action": "importar", "selected_rows": ["0"], "preview_token": "x" * 32},
         )
         assert response.status_code == 200
+        assert "expirou" in response.content.decode()
 
 
 # ===========================================================================
@@ -142,7 +142,7 @@ class TestImportarMovimentosView:
         assert response.status_code == 200
         assert "Selecione ao menos uma" in response.content.decode()
 
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_rotinas")
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.executar_em_paralelo")
     def test_post_buscar_exception(self, mock_exec, admin_client, abertura, conexao, rotina):
         mock_exec.side_effect = Exception("DB connection failed")
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
@@ -162,20 +162,29 @@ class TestImportarMovimentosView:
         assert response.status_code == 200
         assert "Nenhum item selecionado" in response.content.decode()
 
-    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.salvar_importacao")
-    def test_post_importar_exception(self, mock_save, admin_client, abertura, conexao, rotina):
+    @patch("caixa_nfse.caixa.services.importador.ImportadorMovimentos.salvar_importacoes")
+    def test_post_importar_exception(
+        self, mock_save, admin_client, admin_user, abertura, conexao, rotina
+    ):
+        from caixa_nfse.caixa.services.preview_cache import PreviewCache
+
         mock_save.side_effect = Exception("Save failed")
+        token = PreviewCache.salvar(
+            admin_user,
+            abertura,
+            {
+                "0": {
+                    "conexao_id": str(conexao.pk),
+                    "rotina_id": str(rotina.pk),
+                    "headers": ["col1"],
+                    "rows": [["val1"]],
+                }
+            },
+        )
         url = reverse("caixa:importar_movimentos", kwargs={"pk": abertura.pk})
         response = admin_client.post(
             url,
-            {
-                "action": "importar",
-                "selected_rows": ["0"],
-                "conexao_id_0": str(conexao.pk),
-                "rotina_id_0": str(rotina.pk),
-                "raw_headers_0": '["col1"]',
-                "raw_rows_0": '[["val1"]]',
-            },
+            {"action": "importar", "selected_rows": ["0"], "preview_token": token},
         )
         assert response.status_code == 200
         assert "Erro ao importar" in response.content.decode()
@@ -31,6 +31,11 @@ urlpatterns = [
         views.ImportarMovimentosView.as_view(),
         name="importar_movimentos",
     ),
+    path(
+        "abertura/<uuid:pk>/importar/status/<str:job_id>/",
+        views.ImportacaoStatusView.as_view(),
+        name="importacao_status",
+    ),
     path(
         "abertura/<uuid:pk>/importados/",
         views.ListaImportadosView.as_view(),
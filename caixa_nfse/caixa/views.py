@@ -28,6 +28,7 @@ from .models import (
     StatusFechamento,
     StatusRecebimento,
 )
+from .services.saldo import SaldoCaixa
 from .tables import CaixaTable, MovimentoTable
 
 
@@ -419,13 +420,8 @@ class NovoMovimentoView(LoginRequiredMixin, UserPassesTestMixin, CreateView):
             movimento.created_by = self.request.user
             movimento.save()
 
-            # Atualiza saldo do caixa
-            caixa = abertura.caixa
-            if movimento.is_entrada:
-                caixa.saldo_atual += movimento.valor
-            else:
-                caixa.saldo_atual -= movimento.valor
-            caixa.save(update_fields=["saldo_atual"])
+            # Atualiza saldo do caixa (UPDATE atômico com F())
+            SaldoCaixa.aplicar(abertura.caixa, SaldoCaixa.delta(movimento))
 
         messages.success(self.request, "Movimento registrado com sucesso!")
 
@@ -569,6 +565,7 @@ class ImportarMovimentosView(LoginRequiredMixin, UserPassesTestMixin, DetailView
 
         context = super().get_context_data(**kwargs)
         from caixa_nfse.backoffice.models import Rotina
+        from caixa_nfse.caixa.services.rotina_compilada import RotinaCache
         from caixa_nfse.core.models import ConexaoExterna
 
         context["abertura"] = self.object
@@ -583,22 +580,19 @@ class ImportarMovimentosView(LoginRequiredMixin, UserPassesTestMixin, DetailView
             if rotinas:
                 conexoes_tree.append({"conexao": con, "rotinas": rotinas})
                 for rot in rotinas:
-                    rotina_variaveis[str(rot.pk)] = rot.extrair_variaveis()
+                    rotina_variaveis[str(rot.pk)] = list(RotinaCache.get(rot).variaveis)
         context["conexoes_tree"] = conexoes_tree
         context["rotina_variaveis"] = json.dumps(rotina_variaveis)
         return context
 
     def post(self, request, *args, **kwargs):
         """Two-step import: buscar (preview) then importar (save selected)."""
-        import json
         import logging
 
         from django.http import HttpResponse
-        from django.template.loader import render_to_string
 
-        from caixa_nfse.backoffice.models import Rotina
-        from caixa_nfse.caixa.services.importador import ImportadorMovimentos
-        from caixa_nfse.core.models import ConexaoExterna
+        from caixa_nfse.caixa.services.importacao_job import ImportacaoJob
+        from caixa_nfse.caixa.tasks import buscar_movimentos
 
         logger = logging.getLogger(__name__)
         self.object = self.get_object()
@@ -639,274 +633,22 @@ class ImportarMovimentosView(LoginRequiredMixin, UserPassesTestMixin, DetailView
                 "Selecione ao menos uma conexão e rotina.</div>"
             )
 
+        # External SQL, mapping and grouping run in a Celery worker; the UI polls
+        # ImportacaoStatusView until the preview is ready. Only ids go in the
+        # message: tenant-level system params are loaded by the worker
+        total_rotinas = sum(len(rot_ids) for rot_ids in conexao_rotinas.values())
+        job_id = ImportacaoJob.criar(request.user, abertura, total_rotinas)
+        args = (job_id, str(abertura.pk), str(request.user.pk), dict(conexao_rotinas), sql_params)
         try:
-            from caixa_nfse.caixa.models import MovimentoImportado
-
-            # Inject tenant-level system params
-            tenant = request.user.tenant
-            if tenant.chave_servico_andamento_ri:
-                sql_params["SERVICOANDAMENTO"] = tenant.chave_servico_andamento_ri
-
-            all_logs = []
-            preview_rows = []
-
-            for con_id, rot_ids in conexao_rotinas.items():
-                conexao = ConexaoExterna.objects.get(pk=con_id, tenant=request.user.tenant)
-                rotinas = Rotina.objects.filter(pk__in=rot_ids, ativo=True)
-
-                resultados = ImportadorMovimentos.executar_rotinas(conexao, rotinas, sql_params)
-
-                # Duplicate detection per conexao
-                existing_by_rotina = {}
-                for rot in rotinas:
-                    existing_by_rotina[str(rot.pk)] = set(
-                        MovimentoImportado.objects.filter(
-                            tenant=request.user.tenant,
-                            conexao__sistema=conexao.sistema,
-                            rotina=rot,
-                        )
-                        .exclude(protocolo="")
-                        .values_list("protocolo", flat=True)
-                    )
-
-                for rotina, headers, rows, logs in resultados:
-                    all_logs.extend(logs)
-                    if headers and rows:
-                        for row in rows:
-                            mapped = ImportadorMovimentos.mapear_colunas(rotina, headers, row)
-                            if mapped:
-                                mapped["meta_conexao_id"] = str(conexao.pk)
-                                mapped["meta_rotina_id"] = str(rotina.pk)
-                                mapped["meta_rotina_nome"] = rotina.nome
-                                mapped["meta_origem"] = f"{conexao.sistema} - {rotina.nome}"
-                                mapped["meta_raw_headers"] = headers
-                                mapped["meta_raw_row"] = [
-                                    str(v) if v is not None else "" for v in row
-                                ]
-                                # Full data for preview details
-                                full_data = {}
-                                for h, v in zip(headers, row, strict=False):
-                                    if isinstance(v, Decimal):
-                                        full_data[h] = f"{v:.2f}"
-                                    elif hasattr(v, "isoformat"):
-                                        full_data[h] = v.strftime("%d/%m/%Y %H:%M:%S")
-                                    else:
-                                        full_data[h] = str(v) if v is not None else ""
-                                mapped["meta_full_data"] = full_data
-                                protocolo = str(mapped.get("protocolo", "") or "").strip()
-                                existing = existing_by_rotina.get(str(rotina.pk), set())
-                                mapped["meta_duplicado"] = bool(protocolo and protocolo in existing)
-                                preview_rows.append(mapped)
-
-            # --- Group preview_rows by protocol ---
-            from caixa_nfse.caixa.services.importador import ImportadorMovimentos as _Imp
-
-            SUMMABLE = set(MovimentoImportado.TAXA_FIELDS) | {
-                "valor",
-                "emolumento",
-                "taxa_judiciaria",
-            }
-            grouped = {}  # key -> grouped row dict
-            ungrouped = []  # rows without protocol
-
-            for row in preview_rows:
-                proto = str(row.get("protocolo", "") or "").strip()
-                if not proto:
-                    # No protocol → cannot group, keep as-is
-                    row["meta_raw_headers"] = json.dumps(row["meta_raw_headers"])
-                    row["meta_raw_rows"] = json.dumps([row["meta_raw_row"]])
-                    row["meta_full_data"] = json.dumps(row["meta_full_data"])
-                    ungrouped.append(row)
-                    continue
-
-                if proto not in grouped:
-                    grouped[proto] = {
-                        **row,
-                        "_descricoes": [],
-                        "_raw_rows": [],
-                        "_full_data_list": [],
-                    }
-                    # Initialize summable fields to Decimal
-                    for sf in SUMMABLE:
-                        grouped[proto][sf] = _Imp._parse_decimal(row.get(sf))
-
-                    # Non-summable: already set from first row
-                else:
-                    g = grouped[proto]
-                    # Sum financial fields
-                    for sf in SUMMABLE:
-                        g[sf] = g[sf] + _Imp._parse_decimal(row.get(sf))
-
-                    # Duplicate detection: if any sub-row is duplicated, mark group
-                    if row.get("meta_duplicado"):
-                        g["meta_duplicado"] = True
-
-                # Collect descriptions
-                desc = str(row.get("descricao", "") or "").strip()
-                if desc and desc not in grouped[proto]["_descricoes"]:
-                    grouped[proto]["_descricoes"].append(desc)
-
-                # Collect raw rows
-                grouped[proto]["_raw_rows"].append(row["meta_raw_row"])
-                grouped[proto]["_full_data_list"].append(row["meta_full_data"])
-
-            # Finalize grouped rows
-            preview_rows = []
-            for _, g in grouped.items():
-                rotina_nome = g.get("meta_rotina_nome", "")
-                descs = g.pop("_descricoes")
-                raw_rows_list = g.pop("_raw_rows")
-                full_data_list = g.pop("_full_data_list")
-
-                # Format description: "NomeRotina - Desc1; Desc2"
-                if descs:
-                    g["descricao"] = f"{rotina_nome} - {'; '.join(descs)}"
-                else:
-                    g["descricao"] = rotina_nome
-
-                # Format summable fields for display
-                for sf in SUMMABLE:
-                    val = g.get(sf)
-                    if isinstance(val, Decimal):
-                        g[sf] = f"{val:.2f}"
-
-                # Serialize meta fields for template
-                g["meta_raw_headers"] = json.dumps(g["meta_raw_headers"])
-                g["meta_raw_rows"] = json.dumps(raw_rows_list)
-
-                # Merge full_data for detail modal
-                merged_full = {}
-                for fd in full_data_list:
-                    for k, v in fd.items():
-                        if k not in merged_full:
-                            merged_full[k] = v
-                        elif merged_full[k] != v:
-                            # Append different values
-                            if v not in merged_full[k]:
-                                merged_full[k] += f" | {v}"
-                g["meta_full_data"] = json.dumps(merged_full)
-
-                preview_rows.append(g)
-
-            preview_rows.extend(ungrouped)
-
-            if not preview_rows:
-                html = render_to_string(
-                    "caixa/partials/importados_results.html",
-                    {
-                        "total_importados": 0,
-                        "total_rows": 0,
-                        "logs": all_logs,
-                        "abertura": abertura,
-                    },
-                    request=request,
-                )
-                return HttpResponse(html)
-
-            # Group rows by rotina for tabbed display
-            from collections import OrderedDict
-
-            # Assign global indices for unique hidden field names across tabs
-            for idx, row in enumerate(preview_rows):
-                row["meta_global_index"] = idx
-
-            preview_groups = OrderedDict()
-            for row in preview_rows:
-                rotina_nome = row.get("meta_rotina_nome", "Outros")
-                if rotina_nome not in preview_groups:
-                    preview_groups[rotina_nome] = []
-                preview_groups[rotina_nome].append(row)
-
-            # Convert to list of dicts for template iteration
-            preview_tabs = [
-                {"name": name, "rows": rows, "index": idx}
-                for idx, (name, rows) in enumerate(preview_groups.items())
-            ]
-
-            # Check NFS-e config
-            nfse_config_ativa = False
-            nfse_backend = None
-            try:
-                from caixa_nfse.nfse.models import ConfiguracaoNFSe
-
-                cfg = ConfiguracaoNFSe.objects.filter(tenant=request.user.tenant).first()
-                if cfg and cfg.ativa:
-                    nfse_config_ativa = True
-                    nfse_backend = cfg.backend
-            except Exception:
-                pass
-
-            # Compute active financial columns (non-zero across all rows)
-            ALL_VALUE_FIELDS = ["valor", "emolumento", "taxa_judiciaria"] + [
-                f
-                for f in MovimentoImportado.TAXA_FIELDS
-                if f not in ("emolumento", "taxa_judiciaria")
-            ]
-            LABEL_MAP = {
-                "valor": "Valor Total",
-                "emolumento": "Emolumento",
-                "taxa_judiciaria": "T. Judiciária",
-                "iss": "ISS",
-                "fundesp": "FUNDESP",
-                "funesp": "FUNESP",
-                "estado": "Estado",
-                "fesemps": "FESEMPS",
-                "funemp": "FUNEMP",
-                "funcomp": "FUNCOMP",
-                "fepadsaj": "FEPADSAJ",
-                "funproge": "FUNPROGE",
-                "fundepeg": "FUNDEPEG",
-                "fundaf": "FUNDAF",
-                "femal": "FEMAL",
-                "fecad": "FECAD",
-                "valor_receita_adicional_1": "Rec. Adic. 1",
-                "valor_receita_adicional_2": "Rec. Adic. 2",
-            }
-            active_value_cols = []
-            for field in ALL_VALUE_FIELDS:
-                for row in preview_rows:
-                    raw = row.get(field, "0.00")
-                    try:
-                        if Decimal(str(raw).replace(",", ".")) != Decimal("0.00"):
-                            active_value_cols.append(
-                                {
-                                    "key": field,
-                                    "label": LABEL_MAP.get(field, field.upper()),
-                                }
-                            )
-                            break
-                    except Exception:
-                        pass
-            # Compute min-width for the grid table based on active columns
-            # Base: ~750px for fixed columns + 100px per value column
-            grid_min_width = 750 + len(active_value_cols) * 100
-
-            html = render_to_string(
-                "caixa/partials/importados_preview.html",
-                {
-                    "preview_rows": preview_rows,
-                    "preview_tabs": preview_tabs,
-                    "logs": all_logs,
-                    "abertura": abertura,
-                    "nfse_config_ativa": nfse_config_ativa,
-                    "nfse_backend": nfse_backend,
-                    "active_value_cols": active_value_cols,
-                    "grid_min_width": grid_min_width,
-                },
-                request=request,
-            )
-            return HttpResponse(html)
-
+            buscar_movimentos.delay(*args)
         except Exception:
-            logger.exception("Erro ao buscar movimentos")
-            return HttpResponse(
-                '<div class="p-4 text-red-500 text-sm">'
-                "Erro ao conectar ou executar rotinas. Verifique a conexão e tente novamente.</div>"
-            )
+            logger.exception("Falha ao enfileirar busca de movimentos; executando na requisição")
+            buscar_movimentos(*args)
+
+        return _render_importacao_status(request, abertura, job_id)
 
     def _importar_selecionados(self, request, abertura):
-        """Step 2: Import only selected rows."""
-        import json
+        """Step 2: Import only selected rows (raw rows come from the preview cache)."""
         import logging
 
         from django.http import HttpResponse
@@ -914,6 +656,7 @@ class ImportarMovimentosView(LoginRequiredMixin, UserPassesTestMixin, DetailView
 
         from caixa_nfse.backoffice.models import Rotina
         from caixa_nfse.caixa.services.importador import ImportadorMovimentos
+        from caixa_nfse.caixa.services.preview_cache import PreviewCache
         from caixa_nfse.core.models import ConexaoExterna
 
         logger = logging.getLogger(__name__)
@@ -925,35 +668,46 @@ class ImportarMovimentosView(LoginRequiredMixin, UserPassesTestMixin, DetailView
                 "Nenhum item selecionado para importação.</div>"
             )
 
+        grupos = PreviewCache.carregar(request.POST.get("preview_token"), request.user, abertura)
+        if grupos is None:
+            return HttpResponse(
+                '<div class="p-4 text-amber-500 text-sm">'
+                "A pré-visualização expirou. Busque os movimentos novamente.</div>"
+            )
+
         try:
             conexao_cache = {}
-            total_importados = 0
-            total_duplicados = 0
+            rotina_cache = {}
+            selecoes = []
 
             for idx in selected:
-                conexao_id = request.POST.get(f"conexao_id_{idx}")
-                rotina_id = request.POST.get(f"rotina_id_{idx}")
-                raw_headers = request.POST.get(f"raw_headers_{idx}")
-                raw_rows_json = request.POST.get(f"raw_rows_{idx}")
-
-                if not all([conexao_id, rotina_id, raw_headers, raw_rows_json]):
+                grupo = grupos.get(idx)
+                if not grupo:
                     continue
+                conexao_id = grupo["conexao_id"]
+                rotina_id = grupo["rotina_id"]
 
                 if conexao_id not in conexao_cache:
                     conexao_cache[conexao_id] = ConexaoExterna.objects.get(
                         pk=conexao_id, tenant=request.user.tenant
                     )
-                conexao = conexao_cache[conexao_id]
-                rotina = Rotina.objects.get(pk=rotina_id, ativo=True)
-                headers = json.loads(raw_headers)
-                all_rows = json.loads(raw_rows_json)
-
-                created, skipped = ImportadorMovimentos.salvar_importacao(
-                    abertura, conexao, rotina, headers, all_rows, request.user
+                if rotina_id not in rotina_cache:
+                    rotina_cache[rotina_id] = Rotina.objects.get(pk=rotina_id, ativo=True)
+                selecoes.append(
+                    (
+                        conexao_cache[conexao_id],
+                        rotina_cache[rotina_id],
+                        grupo["headers"],
+                        grupo["rows"],
+                    )
                 )
-                total_importados += created
-                total_duplicados += skipped
 
+            # Single transaction for the whole selection, grouped by (conexão, rotina)
+            total_importados, total_duplicados = ImportadorMovimentos.salvar_importacoes(
+                abertura, selecoes, request.user
+            )
+
+            PreviewCache.descartar(request.POST.get("preview_token"))
             html = render_to_string(
                 "caixa/partials/importados_results.html",
                 {
@@ -975,6 +729,59 @@ class ImportarMovimentosView(LoginRequiredMixin, UserPassesTestMixin, DetailView
             )
 
 
+class ImportacaoStatusView(LoginRequiredMixin, UserPassesTestMixin, DetailView):
+    """Polling endpoint (HTMX) for a background import search."""
+
+    model = AberturaCaixa
+
+    def test_func(self):
+        return self.request.user.pode_operar_caixa
+
+    def get_queryset(self):
+        return AberturaCaixa.objects.filter(tenant=self.request.user.tenant, fechado=False)
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        return _render_importacao_status(request, self.object, kwargs["job_id"])
+
+
+def _render_importacao_status(request, abertura, job_id):
+    """Render the preview when the job is done, the error, or the progress (which polls)."""
+    from django.template.loader import render_to_string
+    from django.utils.html import format_html
+
+    from caixa_nfse.caixa.services.importacao_job import ImportacaoJob
+
+    status = ImportacaoJob.status(job_id, request.user, abertura)
+    if status is None:
+        return HttpResponse(
+            '<div class="p-4 text-amber-500 text-sm">'
+            "A busca expirou. Busque os movimentos novamente.</div>"
+        )
+
+    if status["estado"] == ImportacaoJob.ERRO:
+        return HttpResponse(
+            format_html('<div class="p-4 text-red-500 text-sm">{}</div>', status["mensagem"])
+        )
+
+    if status["estado"] in (ImportacaoJob.PENDENTE, ImportacaoJob.EXECUTANDO):
+        # Still running: the progress partial polls this view again
+        template = "caixa/partials/importacao_progresso.html"
+        contexto = {"job_id": job_id, "status": status}
+    else:
+        # Terminal state: never render the polling partial again
+        resultado = ImportacaoJob.resultado(job_id)
+        if resultado is None:
+            return HttpResponse(
+                '<div class="p-4 text-amber-500 text-sm">'
+                "O resultado da busca expirou. Busque os movimentos novamente.</div>"
+            )
+        template, contexto = resultado
+
+    html = render_to_string(template, {**contexto, "abertura": abertura}, request=request)
+    return HttpResponse(html)
+
+
 class ListaImportadosView(LoginRequiredMixin, UserPassesTestMixin, ListView):
     """List pending imported movements for an abertura."""
 
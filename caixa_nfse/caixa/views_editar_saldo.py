@@ -14,6 +14,7 @@ from django.utils import timezone
 from django.views import View
 
 from caixa_nfse.caixa.models import AberturaCaixa
+from caixa_nfse.caixa.services.saldo import SaldoCaixa
 
 logger = logging.getLogger(__name__)
 
@@ -93,14 +94,8 @@ class EditarSaldoInicialView(LoginRequiredMixin, UserPassesTestMixin, View):
                 ]
             )
 
-            # IMPORTANTE: Refresh abertura para garantir que saldo_movimentos use o novo valor
-            abertura.refresh_from_db()
-
             # Atualizar saldo_atual do caixa para refletir a mudança
-            caixa = abertura.caixa
-            novo_saldo_atual = abertura.saldo_movimentos
-            caixa.saldo_atual = novo_saldo_atual
-            caixa.save(update_fields=["saldo_atual"])
+            novo_saldo_atual = SaldoCaixa.sincronizar(abertura)
 
             logger.info(
                 f"Saldo inicial editado: {valor_anterior} -> {novo_valor}. "
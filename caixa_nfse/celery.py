@@ -6,6 +6,7 @@ import os
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "caixa_nfse.settings.local")
@@ -31,10 +32,31 @@ app.conf.beat_schedule = {
         "schedule": crontab(hour=8, minute=0),  # Daily at 8:00 AM
         "options": {"queue": "default"},
     },
+    "manter-particoes": {
+        "task": "caixa_nfse.core.tasks.manter_particoes_task",
+        "schedule": crontab(hour=3, minute=0),  # Daily at 3:00 AM
+        "options": {"queue": "default"},
+    },
 }
 app.conf.timezone = "America/Sao_Paulo"
 
 
+@worker_process_shutdown.connect
+def fechar_clients_http(**kwargs):
+    """Fecha os clients HTTP keep-alive do NFS-e ao encerrar o processo do worker."""
+    from caixa_nfse.nfse.backends.http_clients import clients
+
+    clients.fechar()
+
+
+@worker_process_shutdown.connect
+def descarregar_contadores_acesso(**kwargs):
+    """Envia os contadores de acesso ainda em memória ao encerrar o processo do worker."""
+    from caixa_nfse.auditoria.acessos import descarregar_ao_sair
+
+    descarregar_ao_sair()
+
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     """Debug task for testing Celery."""
@@ -166,13 +166,17 @@ class Cliente(TenantAwareModel):
         # The user is prompted with a confirmation dialog if invalid.
 
     def save(self, *args, **kwargs):
+        self.preparar_para_gravar()
+        super().save(*args, **kwargs)
+
+    def preparar_para_gravar(self):
+        """Campos derivados calculados no save(); chamar antes de bulk_create."""
         # Generate hash for indexed search (only if document provided)
         if self.cpf_cnpj:
             doc_limpo = re.sub(r"[^0-9]", "", self.cpf_cnpj)
             self.cpf_cnpj_hash = hashlib.sha256(doc_limpo.encode()).hexdigest()
         else:
             self.cpf_cnpj_hash = ""
-        super().save(*args, **kwargs)
 
     @property
     def endereco_completo(self) -> str:
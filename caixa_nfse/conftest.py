@@ -108,3 +108,22 @@ def client_logged(client, user):
     """Return a logged-in test client."""
     client.force_login(user)
     return client
+
+
+@pytest.fixture(autouse=True)
+def http_clients_isolados():
+    """Clients HTTP keep-alive (e mocks de httpx.Client) não passam de um teste a outro."""
+    yield
+    from caixa_nfse.nfse.backends.http_clients import clients
+
+    clients.fechar()
+
+
+@pytest.fixture(autouse=True)
+def contadores_acesso_isolados():
+    """Contagens de acesso em memória não passam de um teste (e de um rollback) a outro."""
+    from caixa_nfse.auditoria import acessos
+
+    acessos.reiniciar()
+    yield
+    acessos.reiniciar()
@@ -2,28 +2,72 @@
 Custom encrypted model fields using Fernet symmetric encryption.
 
 Uses the `cryptography` library (already a project dependency) to transparently
-encrypt/decrypt values at the database layer. The encryption key is derived
-from Django's SECRET_KEY via PBKDF2, so no extra environment variable is needed.
+encrypt/decrypt values at the database layer. Keys come from the
+FIELD_ENCRYPTION_KEYS keyring (MultiFernet: the first key encrypts, all keys
+decrypt); a key derived from Django's SECRET_KEY via PBKDF2 is always the last
+one, so values written before the keyring existed stay readable.
+
+Key derivation is expensive (PBKDF2, 100k iterations) and runs once per
+process: the keyring is cached.
+
+Decryption is lazy: rows load the token (ValorCifrado) and the field's
+descriptor decrypts it on first attribute access, memoizing the plaintext on
+the instance. values()/values_list() return the token; use decifrar().
 """
 
 import base64
+import binascii
+import functools
 import hashlib
+import logging
 
-from cryptography.fernet import Fernet, InvalidToken
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from django.conf import settings
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.query_utils import DeferredAttribute
 
+logger = logging.getLogger(__name__)
 
-def _get_fernet() -> Fernet:
-    """Derive a Fernet key from SECRET_KEY using PBKDF2."""
+
+@functools.lru_cache(maxsize=8)
+def _derivar_chave(segredo: str) -> bytes:
+    """Derive a Fernet key from a secret using PBKDF2 (cached per process)."""
     key_material = hashlib.pbkdf2_hmac(
         "sha256",
-        settings.SECRET_KEY.encode(),
+        segredo.encode(),
         b"encrypted-field-salt",
         iterations=100_000,
     )
-    fernet_key = base64.urlsafe_b64encode(key_material[:32])
-    return Fernet(fernet_key)
+    return base64.urlsafe_b64encode(key_material[:32])
+
+
+def _chave_fernet(chave: str) -> bytes:
+    """A Fernet key as is; any other secret is derived with PBKDF2."""
+    try:
+        if len(base64.urlsafe_b64decode(chave)) == 32:
+            return chave.encode()
+    except (ValueError, binascii.Error):
+        pass
+    return _derivar_chave(chave)
+
+
+def _chaves() -> tuple[bytes, ...]:
+    """Fernet keys of the keyring, primary first; the SECRET_KEY-derived key last."""
+    chaves = [
+        _chave_fernet(chave) for chave in getattr(settings, "FIELD_ENCRYPTION_KEYS", ()) if chave
+    ]
+    chaves.append(_derivar_chave(settings.SECRET_KEY))
+    return tuple(dict.fromkeys(chaves))
+
+
+@functools.lru_cache(maxsize=4)
+def _keyring(chaves: tuple[bytes, ...]) -> MultiFernet:
+    return MultiFernet([Fernet(chave) for chave in chaves])
+
+
+def _get_fernet() -> MultiFernet:
+    """Cached MultiFernet for the current keyring."""
+    return _keyring(_chaves())
 
 
 def _is_encrypted(value: str) -> bool:
@@ -31,26 +75,138 @@ def _is_encrypted(value: str) -> bool:
     return isinstance(value, str) and value.startswith("gAAAAA")
 
 
+class ValorCifrado(str):
+    """Fernet token read from the database, not decrypted yet."""
+
+    __slots__ = ()
+
+
+def decifrar(valor):
+    """Plaintext of a Fernet token; other values (and unknown keys) as is."""
+    if not _is_encrypted(valor):
+        return valor
+    try:
+        return _get_fernet().decrypt(valor.encode()).decode()
+    except InvalidToken:
+        return str(valor)
+
+
+class DecifraSobDemanda(DeferredAttribute):
+    """
+    Decrypts on first access and memoizes the plaintext on the instance.
+
+    A data descriptor (defines __set__): Model.__init__ stores the token in
+    instance.__dict__, which would otherwise shadow __get__.
+    """
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        valor = super().__get__(instance, cls)
+        if isinstance(valor, ValorCifrado):
+            valor = decifrar(valor)
+            instance.__dict__[self.field.attname] = valor
+        return valor
+
+
 class EncryptedCharField(models.CharField):
     """CharField that transparently encrypts/decrypts via Fernet."""
 
+    descriptor_class = DecifraSobDemanda
+
+    def pre_save(self, model_instance, add):
+        """The stored value as is: a token never accessed is not decrypted to be saved."""
+        if self.attname in model_instance.__dict__:
+            return model_instance.__dict__[self.attname]
+        return super().pre_save(model_instance, add)
+
     def get_prep_value(self, value):
         """Encrypt before saving to the database."""
         if value is None or value == "":
             return value
         if _is_encrypted(value):
+            # Includes a ValorCifrado never accessed: saved back unchanged
             return value
         fernet = _get_fernet()
         return fernet.encrypt(value.encode()).decode()
 
     def from_db_value(self, value, expression, connection):
-        """Decrypt when reading from the database."""
+        """Keep the token; DecifraSobDemanda decrypts it when accessed."""
         if value is None or value == "":
             return value
         if not _is_encrypted(value):
             return value
-        try:
-            fernet = _get_fernet()
-            return fernet.decrypt(value.encode()).decode()
-        except InvalidToken:
-            return value
+        return ValorCifrado(value)
+
+
+def reencriptar(model, lote: int = 500) -> int:
+    """
+    Re-encrypt the EncryptedCharField columns of model with the primary key,
+    reading the raw tokens in pk order and writing them with bulk_update, one
+    transaction per batch. Values already under the primary key are skipped.
+
+    Returns:
+        Number of rows rewritten
+    """
+    campos = [f for f in model._meta.concrete_fields if isinstance(f, EncryptedCharField)]
+    if not campos:
+        return 0
+
+    keyring = _get_fernet()
+    primaria = Fernet(_chaves()[0])
+    quote = connection.ops.quote_name
+    pk = model._meta.pk
+    colunas = ", ".join(quote(campo.column) for campo in campos)
+    select = f"SELECT {quote(pk.column)}, {colunas} FROM {quote(model._meta.db_table)}"
+    ordem = f"ORDER BY {quote(pk.column)} LIMIT %s"
+
+    total = 0
+    ultimo = None
+    while True:
+        # Keyset pagination on the pk
+        with connection.cursor() as cursor:
+            if ultimo is None:
+                cursor.execute(f"{select} {ordem}", [lote])
+            else:
+                cursor.execute(
+                    f"{select} WHERE {quote(pk.column)} > %s {ordem}",
+                    [pk.get_db_prep_value(ultimo, connection), lote],
+                )
+            linhas = cursor.fetchall()
+        if not linhas:
+            return total
+
+        alterados = []
+        for pk_valor, *tokens in linhas:
+            novos = [_reencriptar_token(token, keyring, primaria) for token in tokens]
+            if novos != tokens:
+                alterados.append(
+                    model(pk=pk_valor, **{c.attname: v for c, v in zip(campos, novos, strict=True)})
+                )
+        if alterados:
+            # Tokens pass through get_prep_value unchanged; bulk_update fires no signals
+            with transaction.atomic():
+                model._base_manager.bulk_update(alterados, [c.attname for c in campos])
+            total += len(alterados)
+        ultimo = pk.to_python(linhas[-1][0])
+
+
+def _reencriptar_token(token, keyring: MultiFernet, primaria: Fernet):
+    if token is None or token == "":
+        return token
+    if not _is_encrypted(token):
+        # Plaintext left over from before the field was encrypted
+        return keyring.encrypt(token.encode()).decode()
+    try:
+        primaria.decrypt(token.encode())
+        return token
+    except InvalidToken:
+        pass
+    try:
+        return keyring.rotate(token.encode()).decode()
+    except InvalidToken:
+        logger.warning("Valor cifrado com chave desconhecida; mantido como está")
+        return token
@@ -0,0 +1,29 @@
+"""
+Management command for the monthly partitions of RegistroAuditoria and NfseApiLog.
+Creates the upcoming partitions and archives the ones past the retention period.
+"""
+
+from django.core.management.base import BaseCommand
+
+from caixa_nfse.core.particoes import manter_particoes
+
+
+class Command(BaseCommand):
+    help = "Cria partições mensais futuras e arquiva as anteriores à retenção."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sem-arquivar",
+            action="store_true",
+            help="Apenas cria as partições futuras.",
+        )
+
+    def handle(self, *args, **options):
+        resultado = manter_particoes(arquivar=not options["sem_arquivar"])
+        for label, (criadas, arquivos) in resultado.items():
+            self.stdout.write(
+                f"{label}: {len(criadas)} partição(ões) criada(s), {len(arquivos)} arquivada(s)."
+            )
+            for arquivo in arquivos:
+                self.stdout.write(f"  {arquivo}")
+        self.stdout.write(self.style.SUCCESS("Manutenção de partições concluída."))
@@ -0,0 +1,32 @@
+"""
+Management command to re-encrypt EncryptedCharField values after a key is
+added to FIELD_ENCRYPTION_KEYS (the new primary key).
+"""
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from caixa_nfse.core.encrypted_fields import EncryptedCharField, reencriptar
+
+
+class Command(BaseCommand):
+    help = "Re-cifra os campos EncryptedCharField com a chave primária do keyring."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lote",
+            type=int,
+            default=500,
+            help="Linhas lidas e gravadas por transação.",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in apps.get_models():
+            if not any(isinstance(f, EncryptedCharField) for f in model._meta.concrete_fields):
+                continue
+            alterados = reencriptar(model, lote=options["lote"])
+            total += alterados
+            self.stdout.write(f"{model._meta.label}: {alterados} registro(s) re-cifrado(s).")
+
+        self.stdout.write(self.style.SUCCESS(f"{total} registro(s) re-cifrado(s) no total."))
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-16 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_encrypt_conexao_senha'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tenant',
+            name='cadeia_aberturas_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, verbose_name='hash da última abertura'),
+        ),
+        migrations.AddField(
+            model_name='tenant',
+            name='cadeia_aberturas_seq',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='sequência da última abertura'),
+        ),
+    ]
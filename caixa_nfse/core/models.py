@@ -35,10 +35,37 @@ class BaseModel(models.Model):
         auto_now=True,
     )
 
+    # Campos mantidos apenas por UPDATE atômico (F()/lock de linha): save() de uma
+    # instância existente sem update_fields não os sobrescreve com o valor em memória
+    CAMPOS_ATOMICOS: tuple[str, ...] = ()
+
     class Meta:
         abstract = True
         ordering = ["-created_at"]
 
+    def save(self, *args, **kwargs):
+        if (
+            self.CAMPOS_ATOMICOS
+            and not self._state.adding
+            and not args
+            and kwargs.get("update_fields") is None
+            and not kwargs.get("force_insert")
+        ):
+            kwargs["update_fields"] = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.CAMPOS_ATOMICOS
+            ]
+        super().save(*args, **kwargs)
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Refreshed values are the database state the audit trail compares against
+        if getattr(self, "_audit_snapshot", None) is not None:
+            from caixa_nfse.auditoria.signals import snapshot_auditoria
+
+            self._audit_snapshot.update(snapshot_auditoria(self, fields))
+
 
 class BaseAuditModel(BaseModel):
     """
@@ -193,9 +220,24 @@ class Tenant(BaseModel):
         ),
     )
 
+    # Cabeça da cadeia de hash das aberturas de caixa (atualizada sob lock da linha)
+    cadeia_aberturas_hash = models.CharField(
+        _("hash da última abertura"),
+        max_length=64,
+        blank=True,
+        editable=False,
+    )
+    cadeia_aberturas_seq = models.PositiveIntegerField(
+        _("sequência da última abertura"),
+        default=0,
+        editable=False,
+    )
+
     # Status
     ativo = models.BooleanField(_("ativo"), default=True)
 
+    CAMPOS_ATOMICOS = ("cadeia_aberturas_hash", "cadeia_aberturas_seq")
+
     objects = TenantManager()
     all_objects = models.Manager()
 
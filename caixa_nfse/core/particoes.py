@@ -0,0 +1,322 @@
+"""
+Particionamento mensal de tabelas append-only (PostgreSQL).
+
+RegistroAuditoria e NfseApiLog são tabelas PARTITION BY RANGE (created_at),
+uma partição por mês. O ParticionadoManager cria as partições futuras,
+arquiva (COPY para .csv.gz) e remove as antigas; ParticionadoQuerySet.periodo
+filtra por created_at em intervalo aberto, o que permite ao planner descartar
+as partições fora do período (created_at__date não permite).
+
+Em outros bancos (SQLite nos testes) as tabelas são comuns e a manutenção é no-op.
+"""
+
+import gzip
+import logging
+import re
+from datetime import UTC, date, datetime, time, timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COLUNA_PARTICAO = "created_at"
+
+MODELOS_PARTICIONADOS = ("auditoria.RegistroAuditoria", "nfse.NfseApiLog")
+
+_LIMITES = re.compile(r"FROM \((.+?)\) TO \((.+?)\)")
+
+
+def inicio_do_mes(dia: date, meses: int = 0) -> datetime:
+    """Primeiro instante (UTC) do mês de dia deslocado de meses."""
+    indice = dia.year * 12 + dia.month - 1 + meses
+    return datetime(indice // 12, indice % 12 + 1, 1, tzinfo=UTC)
+
+
+def _limite(valor: str) -> datetime | None:
+    if valor == "MINVALUE":
+        return None
+    return datetime.fromisoformat(valor.strip("'"))
+
+
+def _inicio_do_dia(valor) -> datetime:
+    if isinstance(valor, str):
+        valor = date.fromisoformat(valor)
+    return timezone.make_aware(datetime.combine(valor, time.min))
+
+
+class ParticionadoQuerySet(models.QuerySet):
+    def periodo(self, inicio=None, fim=None):
+        """
+        Registros criados entre os dias inicio e fim (inclusive; date ou ISO
+        "AAAA-MM-DD", vazio = sem limite), como intervalo de created_at.
+        """
+        qs = self
+        if inicio:
+            qs = qs.filter(created_at__gte=_inicio_do_dia(inicio))
+        if fim:
+            qs = qs.filter(created_at__lt=_inicio_do_dia(fim) + timedelta(days=1))
+        return qs
+
+
+class ParticionadoManager(models.Manager.from_queryset(ParticionadoQuerySet)):
+    """Manager de modelos particionados por mês em created_at."""
+
+    def _tabela(self) -> str:
+        return self.model._meta.db_table
+
+    def particionado(self) -> bool:
+        """True se a tabela é particionada (PostgreSQL após a migração)."""
+        if connection.vendor != "postgresql":
+            return False
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+                [self._tabela()],
+            )
+            return cursor.fetchone() is not None
+
+    def particoes(self) -> list[tuple[str, datetime | None, datetime]]:
+        """(nome, início, fim) das partições, em ordem; início None = MINVALUE."""
+        if not self.particionado():
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+                "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+                "WHERE i.inhparent = to_regclass(%s)",
+                [self._tabela()],
+            )
+            linhas = cursor.fetchall()
+        particoes = []
+        for nome, limites in linhas:
+            encontrado = _LIMITES.search(limites or "")
+            if encontrado:
+                inicio, fim = (_limite(valor) for valor in encontrado.groups())
+                particoes.append((nome, inicio, fim))
+        return sorted(particoes, key=lambda p: p[2])
+
+    def criar_particoes(self, meses: int = 3) -> list[str]:
+        """
+        Cria as partições mensais que faltam, contíguas à última existente,
+        até cobrir o mês atual e os meses seguintes. Retorna os nomes criados.
+        """
+        particoes = self.particoes()
+        if not particoes:
+            return []
+        tabela = self._tabela()
+        alvo = inicio_do_mes(timezone.now(), meses + 1)
+        with connection.cursor() as cursor:
+            criadas = _criar_particoes(cursor, tabela, particoes[-1][2], alvo)
+        if criadas:
+            logger.info("Partições criadas em %s: %s", tabela, ", ".join(criadas))
+        return criadas
+
+    def arquivar(self, antes_de: datetime, destino) -> list[Path]:
+        """
+        Desanexa as partições inteiramente anteriores a antes_de, grava cada uma
+        em destino/<partição>.csv.gz (COPY) e remove a tabela. Antes, chama
+        model.antes_de_arquivar(fim) se o modelo o definir. Retorna os arquivos.
+        """
+        tabela = self._tabela()
+        quote = connection.ops.quote_name
+        destino = Path(destino)
+        arquivos = []
+        for nome, _inicio, fim in self.particoes():
+            if fim > antes_de:
+                continue
+            destino.mkdir(parents=True, exist_ok=True)
+            preparar = getattr(self.model, "antes_de_arquivar", None)
+            if preparar:
+                preparar(fim)
+            arquivo = destino / f"{nome}.csv.gz"
+            with connection.cursor() as cursor:
+                cursor.execute(f"ALTER TABLE {quote(tabela)} DETACH PARTITION {quote(nome)}")
+                with (
+                    gzip.open(arquivo, "wb") as saida,
+                    cursor.copy(f"COPY {quote(nome)} TO STDOUT WITH (FORMAT csv, HEADER)") as copia,
+                ):
+                    for bloco in copia:
+                        saida.write(bloco)
+                cursor.execute(f"DROP TABLE {quote(nome)}")
+            logger.info("Partição %s arquivada em %s", nome, arquivo)
+            arquivos.append(arquivo)
+        return arquivos
+
+
+def manter_particoes(arquivar: bool = True) -> dict:
+    """
+    Manutenção periódica: cria as partições dos próximos meses e arquiva as
+    anteriores à retenção (NFSE_CONFIG["STORAGE_YEARS"]).
+    Retorna {modelo: (criadas, arquivos)}.
+    """
+    config = getattr(settings, "PARTICIONAMENTO", {})
+    anos = getattr(settings, "NFSE_CONFIG", {}).get("STORAGE_YEARS", 5)
+    antes_de = inicio_do_mes(timezone.now(), -12 * anos)
+    resultado = {}
+    for label in MODELOS_PARTICIONADOS:
+        manager = apps.get_model(label).objects
+        criadas = manager.criar_particoes(config.get("MESES_FUTUROS", 3))
+        arquivos = manager.arquivar(antes_de, config["ARQUIVO_DIR"]) if arquivar else []
+        resultado[label] = (criadas, arquivos)
+    return resultado
+
+
+def _nome_historico(nome: str) -> str:
+    return f"{nome[:54]}_hist"
+
+
+def _nome_default(tabela: str) -> str:
+    return f"{tabela}_default"
+
+
+def _criar_particoes(cursor, tabela: str, inicio: datetime, alvo: datetime) -> list[str]:
+    """
+    Cria as partições mensais de inicio até alvo. Linhas do período que caíram
+    na partição DEFAULT (manutenção atrasada) são movidas para a nova partição.
+    """
+    quote = connection.ops.quote_name
+    default = _nome_default(tabela)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", [default])
+    tem_default = cursor.fetchone()[0]
+    criadas = []
+    while inicio < alvo:
+        fim = inicio_do_mes(inicio, 1)
+        nome = f"{tabela}_p{inicio:%Y%m}"
+        limites = f"FOR VALUES FROM ('{inicio.isoformat()}') TO ('{fim.isoformat()}')"
+        periodo = f"{quote(COLUNA_PARTICAO)} >= %s AND {quote(COLUNA_PARTICAO)} < %s"
+        pendentes = False
+        if tem_default:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {quote(default)} WHERE {periodo})", [inicio, fim]
+            )
+            pendentes = cursor.fetchone()[0]
+        with transaction.atomic():
+            if pendentes:
+                # CREATE ... PARTITION OF falha se o DEFAULT tem linhas do período
+                cursor.execute(f"ALTER TABLE {quote(tabela)} DETACH PARTITION {quote(default)}")
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {quote(nome)} PARTITION OF {quote(tabela)} {limites}"
+            )
+            if pendentes:
+                cursor.execute(
+                    f"INSERT INTO {quote(tabela)} SELECT * FROM {quote(default)} WHERE {periodo}",
+                    [inicio, fim],
+                )
+                cursor.execute(f"DELETE FROM {quote(default)} WHERE {periodo}", [inicio, fim])
+                cursor.execute(
+                    f"ALTER TABLE {quote(tabela)} ATTACH PARTITION {quote(default)} DEFAULT"
+                )
+                logger.warning("Linhas de %s movidas da partição DEFAULT para %s", tabela, nome)
+        criadas.append(nome)
+        inicio = fim
+    return criadas
+
+
+_COLUNAS_UNICAS = re.compile(r"\(([^()]*)\)(\s+WHERE\s.*)?$", re.DOTALL)
+
+
+def _com_chave_particao(definicao: str) -> str:
+    """
+    UNIQUE (constraint ou índice) com created_at no fim da lista de colunas.
+
+    Não enfraquece a cadeia da auditoria: (particao, sequencia) continua única
+    porque a sequência só é atribuída sob o lock da cabeça da partição
+    (CadeiaAuditoria.travar, em RegistroAuditoria.encadear_lote).
+    """
+    colunas = _COLUNAS_UNICAS.search(definicao)
+    if not colunas or COLUNA_PARTICAO in colunas.group(1):
+        return definicao
+    return (
+        f"{definicao[: colunas.start()]}({colunas.group(1)}, {COLUNA_PARTICAO})"
+        f"{colunas.group(2) or ''}"
+    )
+
+
+def particionar_tabela(schema_editor, tabela: str) -> None:
+    """
+    Converte tabela em PARTITION BY RANGE (created_at) sem copiar dados: a
+    tabela atual vira a partição <tabela>_historico (MINVALUE até o próximo
+    mês) e a nova tabela-mãe recebe os índices e as FKs com os nomes originais.
+    A PK passa a ser (id, created_at). As partições dos próximos
+    PARTICIONAMENTO["MESES_FUTUROS"] meses são criadas já aqui, e uma partição
+    DEFAULT recebe as linhas se a manutenção não rodar a tempo.
+
+    O PostgreSQL exige created_at em todo UNIQUE da tabela-mãe: as UNIQUE são
+    recriadas com created_at no fim (_com_chave_particao). No-op fora do
+    PostgreSQL ou se já particionada.
+    """
+    conn = schema_editor.connection
+    if conn.vendor != "postgresql":
+        return
+    quote = conn.ops.quote_name
+    historico = f"{tabela}_historico"
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)", [tabela]
+        )
+        if cursor.fetchone():
+            return
+        cursor.execute(
+            "SELECT conname, contype, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('p', 'u', 'f')",
+            [tabela],
+        )
+        constraints = cursor.fetchall()
+        nomes_constraints = {nome for nome, _tipo, _def in constraints}
+        cursor.execute(
+            "SELECT indexname, indexdef FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND tablename = %s",
+            [tabela],
+        )
+        # Definitions reference the table by name: after the rename they target the parent
+        indices = [(nome, d) for nome, d in cursor.fetchall() if nome not in nomes_constraints]
+
+        cursor.execute(f"ALTER TABLE {quote(tabela)} RENAME TO {quote(historico)}")
+        for nome, tipo, _definicao in constraints:
+            if tipo == "p":
+                cursor.execute(f"ALTER TABLE {quote(historico)} DROP CONSTRAINT {quote(nome)}")
+            elif tipo == "u":
+                cursor.execute(
+                    f"ALTER TABLE {quote(historico)} RENAME CONSTRAINT {quote(nome)} "
+                    f"TO {quote(_nome_historico(nome))}"
+                )
+        for nome, _definicao in indices:
+            cursor.execute(f"ALTER INDEX {quote(nome)} RENAME TO {quote(_nome_historico(nome))}")
+
+        fim = inicio_do_mes(timezone.now(), 1)
+        cursor.execute(
+            f"CREATE TABLE {quote(tabela)} (LIKE {quote(historico)} INCLUDING DEFAULTS "
+            f"INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE ({quote(COLUNA_PARTICAO)})"
+        )
+        cursor.execute(
+            f"ALTER TABLE {quote(tabela)} ATTACH PARTITION {quote(historico)} "
+            f"FOR VALUES FROM (MINVALUE) TO ('{fim.isoformat()}')"
+        )
+        for nome, tipo, definicao in constraints:
+            if tipo == "p":
+                cursor.execute(
+                    f"ALTER TABLE {quote(tabela)} ADD CONSTRAINT {quote(nome)} "
+                    f"PRIMARY KEY (id, {quote(COLUNA_PARTICAO)})"
+                )
+            else:
+                if tipo == "u":
+                    definicao = _com_chave_particao(definicao)
+                cursor.execute(
+                    f"ALTER TABLE {quote(tabela)} ADD CONSTRAINT {quote(nome)} {definicao}"
+                )
+        for _nome, definicao in indices:
+            # Matching indexes of the historical partition are attached, not rebuilt
+            if definicao.startswith("CREATE UNIQUE INDEX"):
+                definicao = _com_chave_particao(definicao)
+            cursor.execute(definicao)
+
+        meses = getattr(settings, "PARTICIONAMENTO", {}).get("MESES_FUTUROS", 3)
+        _criar_particoes(cursor, tabela, fim, inicio_do_mes(timezone.now(), meses + 1))
+        cursor.execute(
+            f"CREATE TABLE {quote(_nome_default(tabela))} PARTITION OF {quote(tabela)} DEFAULT"
+        )
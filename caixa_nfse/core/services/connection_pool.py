@@ -0,0 +1,237 @@
+"""
+Pool de conexões por processo para os bancos externos (Firebird/MSSQL).
+
+Cada ConexaoExterna mantém sua própria lista de conexões ociosas e um semáforo
+que limita as conexões abertas ao mesmo tempo no servidor externo. A versão do
+cadastro (``updated_at``) faz parte da chave: quando a conexão é editada, as
+conexões abertas com a configuração antiga são descartadas em vez de reutilizadas.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 4
+DEFAULT_MAX_OPEN = 8
+DEFAULT_IDLE_TIMEOUT = 300  # seconds
+DEFAULT_ACQUIRE_TIMEOUT = 30  # seconds
+
+# Query barata usada para validar uma conexão ociosa antes de emprestá-la
+HEALTH_CHECK_SQL = {
+    "FIREBIRD": "SELECT 1 FROM RDB$DATABASE",
+    "MSSQL": "SELECT 1",
+}
+
+
+class ConnectionPool:
+    """
+    Pool thread-safe de conexões DB-API, indexado por ConexaoExterna.
+
+    - ``max_size``: conexões ociosas mantidas por ConexaoExterna (excedentes são fechadas)
+    - ``max_open``: conexões emprestadas ao mesmo tempo por ConexaoExterna; quem
+      passar do limite espera até ``acquire_timeout`` segundos (TimeoutError)
+    - ``idle_timeout``: segundos que uma conexão pode ficar ociosa antes de ser fechada
+    - health-check a cada empréstimo de conexão ociosa
+    - descarte automático quando ``conexao.updated_at`` muda
+    """
+
+    def __init__(
+        self,
+        connect,
+        max_size: int | None = None,
+        idle_timeout: int | None = None,
+        max_open: int | None = None,
+        acquire_timeout: float | None = None,
+    ):
+        self._connect = connect
+        self._max_size = max_size
+        self._idle_timeout = idle_timeout
+        self._max_open = max_open
+        self._acquire_timeout = acquire_timeout
+        self._lock = threading.Lock()
+        self._idle: dict[str, list[tuple[object, float]]] = {}
+        self._versions: dict[str, str] = {}
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+
+    @property
+    def max_size(self) -> int:
+        if self._max_size is not None:
+            return self._max_size
+        return _pool_setting("MAX_SIZE", DEFAULT_MAX_SIZE)
+
+    @property
+    def idle_timeout(self) -> int:
+        if self._idle_timeout is not None:
+            return self._idle_timeout
+        return _pool_setting("IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT)
+
+    @property
+    def max_open(self) -> int:
+        if self._max_open is not None:
+            return self._max_open
+        return _pool_setting("MAX_OPEN", DEFAULT_MAX_OPEN)
+
+    @property
+    def acquire_timeout(self) -> float:
+        if self._acquire_timeout is not None:
+            return self._acquire_timeout
+        return _pool_setting("ACQUIRE_TIMEOUT", DEFAULT_ACQUIRE_TIMEOUT)
+
+    @contextmanager
+    def connection(self, conexao):
+        """
+        Empresta uma conexão para a ConexaoExterna informada.
+
+        Com ``max_open`` conexões já emprestadas, espera uma ser devolvida
+        (TimeoutError após ``acquire_timeout``). A conexão volta ao pool ao final
+        do bloco. Se o bloco levantar exceção, a conexão é descartada, pois pode
+        ter ficado em estado inconsistente.
+        """
+        key, version = _pool_key(conexao)
+        slot = self._slot(key)
+        if not slot.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError(
+                f"Limite de {self.max_open} conexões abertas atingido (conexao={key})"
+            )
+        try:
+            conn = self._acquire(conexao, key, version)
+            try:
+                yield conn
+            except BaseException:
+                _close_quietly(conn)
+                raise
+            else:
+                self._release(conn, key, version)
+        finally:
+            slot.release()
+
+    def check(self, conexao) -> None:
+        """Empresta uma conexão e executa o health-check. Levanta exceção em caso de falha."""
+        with self.connection(conexao) as conn:
+            _ping(conn, conexao.tipo_conexao)
+
+    def evict(self, conexao_pk) -> int:
+        """Fecha todas as conexões ociosas de uma ConexaoExterna. Retorna a quantidade."""
+        with self._lock:
+            entries = self._idle.pop(str(conexao_pk), [])
+            self._versions.pop(str(conexao_pk), None)
+        for conn, _ in entries:
+            _close_quietly(conn)
+        return len(entries)
+
+    def clear(self) -> None:
+        """Fecha todas as conexões ociosas do processo."""
+        with self._lock:
+            entries = [e for lst in self._idle.values() for e in lst]
+            self._idle.clear()
+            self._versions.clear()
+        for conn, _ in entries:
+            _close_quietly(conn)
+
+    def idle_count(self, conexao_pk) -> int:
+        """Quantidade de conexões ociosas disponíveis para uma ConexaoExterna."""
+        with self._lock:
+            return len(self._idle.get(str(conexao_pk), []))
+
+    def _slot(self, key: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = threading.BoundedSemaphore(self.max_open)
+            return slot
+
+    def _acquire(self, conexao, key: str, version: str):
+        stale = []
+        candidates = []
+        now = time.monotonic()
+
+        with self._lock:
+            if self._versions.get(key) != version:
+                # Cadastro alterado: nenhuma conexão antiga pode ser reutilizada
+                stale.extend(c for c, _ in self._idle.pop(key, []))
+                self._versions[key] = version
+
+            for conn, last_used in self._idle.pop(key, []):
+                if now - last_used > self.idle_timeout:
+                    stale.append(conn)
+                else:
+                    candidates.append((conn, last_used))
+
+        for conn in stale:
+            _close_quietly(conn)
+
+        # Mais recente primeiro: maior chance de ainda estar viva no servidor
+        while candidates:
+            conn, last_used = candidates.pop()
+            try:
+                _ping(conn, conexao.tipo_conexao)
+            except Exception:
+                logger.info("Conexão ociosa inválida descartada (conexao=%s)", key)
+                _close_quietly(conn)
+                continue
+            self._give_back(candidates, key, version)
+            return conn
+
+        return self._connect(conexao)
+
+    def _release(self, conn, key: str, version: str) -> None:
+        try:
+            # Encerra a transação implícita aberta pelo SELECT (fdb/pymssql)
+            conn.rollback()
+        except Exception:
+            _close_quietly(conn)
+            return
+
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if self._versions.get(key) != version or len(idle) >= self.max_size:
+                keep = False
+            else:
+                idle.append((conn, time.monotonic()))
+                keep = True
+
+        if not keep:
+            _close_quietly(conn)
+
+    def _give_back(self, entries, key: str, version: str) -> None:
+        """Devolve ao pool candidatos que não foram usados neste empréstimo."""
+        if not entries:
+            return
+        with self._lock:
+            if self._versions.get(key) == version:
+                self._idle.setdefault(key, [])[:0] = entries
+                return
+        for conn, _ in entries:
+            _close_quietly(conn)
+
+
+def _pool_setting(name: str, default: int) -> int:
+    return getattr(settings, "EXTERNAL_DB_POOL", {}).get(name, default)
+
+
+def _pool_key(conexao) -> tuple[str, str]:
+    return str(conexao.pk), str(conexao.updated_at)
+
+
+def _ping(conn, tipo_conexao: str) -> None:
+    cursor = conn.cursor()
+    try:
+        cursor.execute(HEALTH_CHECK_SQL.get(tipo_conexao, "SELECT 1"))
+        cursor.fetchone()
+    finally:
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+
+def _close_quietly(conn) -> None:
+    try:
+        conn.close()
+    except Exception:
+        logger.debug("Erro ao fechar conexão externa", exc_info=True)
@@ -1,9 +1,35 @@
+import datetime
 import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 
 import fdb
 import pymssql
 
 from caixa_nfse.core.models import ConexaoExterna
+from caixa_nfse.core.services.connection_pool import ConnectionPool
+
+# Rows fetched per round-trip when streaming a routine
+DEFAULT_BATCH_SIZE = 2000
+
+# DB-API paramstyle of each driver
+PARAMSTYLE = {
+    ConexaoExterna.TipoConexao.FIREBIRD: "qmark",  # fdb: ?
+    ConexaoExterna.TipoConexao.MSSQL: "pyformat",  # pymssql: %(name)s
+}
+
+# @VAR references (group 1); @@GLOBALS (T-SQL) are never variables. Comments,
+# string literals and quoted identifiers match first so their @ is left alone.
+VARIABLE_PATTERN = re.compile(
+    r"--[^\n]*"
+    r"|/\*.*?\*/"
+    r"|'(?:[^']|'')*'"
+    r'|"(?:[^"]|"")*"'
+    r"|\[[^\]]*\]"
+    r"|(?<!@)@(\w+)",
+    re.DOTALL,
+)
 
 
 class SQLExecutor:
@@ -12,10 +38,11 @@ class SQLExecutor:
         """
         Extracts variables from SQL query in the format @VAR_NAME.
         Returns a list of unique variable names.
+
+        Uses VARIABLE_PATTERN, so it lists exactly what compile_sql binds
+        (no @@GLOBALS, nothing inside comments or literals).
         """
-        pattern = r"@(\w+)"
-        variables = re.findall(pattern, sql)
-        return list(set(variables))
+        return list({m.group(1) for m in VARIABLE_PATTERN.finditer(sql) if m.group(1)})
 
     @staticmethod
     def get_connection(conexao: ConexaoExterna):
@@ -48,105 +75,296 @@ class SQLExecutor:
             raise ValueError(f"Tipo de conexão não suportado: {conexao.tipo_conexao}")
 
     @staticmethod
-    def execute_routine(conexao: ConexaoExterna, sql: str, params: dict = None):
+    def check_connection(conexao: ConexaoExterna):
         """
-        Executes the SQL routine with the provided parameters.
-        Returns a tuple (headers, rows, logs).
+        Borrows a pooled connection and runs a trivial health-check query.
+        Raises the driver exception if the database is unreachable.
         """
-        import datetime
+        pool.check(conexao)
 
+    @staticmethod
+    def _new_log():
+        """Returns (logs, log) — the log list and the function that appends to it."""
         logs = []
 
         def log(msg, type="info"):
             now = datetime.datetime.now().strftime("%H:%M:%S")
             logs.append({"time": now, "msg": msg, "type": type})
 
+        return logs, log
+
+    @staticmethod
+    def compile_sql(sql: str, tipo_conexao: str, variables) -> "CompiledSQL":
+        """
+        Translates @VAR references into driver-native placeholders.
+        Only the given variables are bound; other @names (e.g. T-SQL locals)
+        are left untouched. Compiled statements are cached by SQL text, so a
+        Rotina is parsed once per process and the server sees identical text.
+        """
+        names = frozenset(v.upper() for v in variables)
+        return _compile_sql(sql.replace("\r", "").strip(), tipo_conexao, names)
+
+    @staticmethod
+    def _typed_value(key: str, value, log):
+        """
+        Converts a parameter value to the type bound to the driver.
+        ISO (YYYY-MM-DD) and BR (DD/MM/YYYY) dates become date objects;
+        everything else is bound as a stripped string.
+        """
+        if not isinstance(value, str):
+            return value
+
+        val_str = value.strip()
+        if re.match(r"^\d{4}-\d{2}-\d{2}$", val_str):
+            parsed = datetime.datetime.strptime(val_str, "%Y-%m-%d").date()
+            log(f"Convertendo @{key} (ISO) para data {parsed.isoformat()}...", "info")
+            return parsed
+        if re.match(r"^\d{2}/\d{2}/\d{4}$", val_str):
+            parsed = datetime.datetime.strptime(val_str, "%d/%m/%Y").date()
+            log(f"Convertendo @{key} (BR) para data {parsed.isoformat()}...", "info")
+            return parsed
+        return val_str
+
+    @staticmethod
+    def _prepare_sql(sql: str, params: dict, tipo_conexao: str, log):
+        """
+        Compiles the SQL and builds the bind values.
+        Returns (statement, bind_values); bind_values is None when the SQL
+        references none of the params. Raises ValueError on invalid variable names.
+        """
+        for key in params:
+            if not re.match(r"^\w+$", key):
+                raise ValueError(f"Nome de variável inválido: {key}")
+
+        compiled = SQLExecutor.compile_sql(sql, tipo_conexao, params.keys())
+
+        values = {}
+        for key, value in params.items():
+            if key.upper() in compiled.variables:
+                values[key.upper()] = SQLExecutor._typed_value(key, value, log)
+                log(f"Vinculando variável @{key}...", "info")
+
+        log("SQL processado com sucesso.", "success")
+        return compiled.sql, compiled.bind(values)
+
+    @staticmethod
+    def _execute(cursor, statement: str, bind_values):
+        if bind_values is None:
+            cursor.execute(statement)
+        else:
+            cursor.execute(statement, bind_values)
+
+    @staticmethod
+    def _log_connecting(conexao: ConexaoExterna, log):
+        log(
+            f"Conectando ao banco {conexao.get_tipo_conexao_display()} | "
+            f"Host: {conexao.host}:{conexao.porta} | "
+            f"DB: {conexao.database} | "
+            f"User: {conexao.usuario}",
+            "info",
+        )
+
+    @staticmethod
+    def execute_routine(conexao: ConexaoExterna, sql: str, params: dict = None):
+        """
+        Executes the SQL routine with the provided parameters.
+        Returns a tuple (headers, rows, logs).
+        """
+        logs, log = SQLExecutor._new_log()
+
         if params is None:
             params = {}
 
         log(f"Iniciando execução da rotina. Parâmetros recebidos: {list(params.keys())}")
 
-        # Basic SQL Injection prevention for the specific @VAR syntax
-        # Sanitize SQL: remove \r (Windows CRLF) and strip trailing whitespace
-        processed_sql = sql.replace("\r", "").strip()
         try:
-            # Sort by length desc to prioritize longer variable names (extra safety)
-            sorted_params = sorted(params.items(), key=lambda x: len(x[0]), reverse=True)
-
-            for key, value in sorted_params:
-                if not re.match(r"^\w+$", key):
-                    raise ValueError(f"Nome de variável inválido: {key}")
+            processed_sql, bind_values = SQLExecutor._prepare_sql(
+                sql, params, conexao.tipo_conexao, log
+            )
+        except Exception as e:
+            log(f"Erro no processamento do SQL: {str(e)}", "error")
+            return [], [], logs
 
-                val_str = str(value).strip()
+        try:
+            SQLExecutor._log_connecting(conexao, log)
+            with pool.connection(conexao) as conn:
+                cursor = conn.cursor()
+                log("Conexão estabelecida.", "success")
 
-                # Date Handling: Convert to YYYYMMDD (Safe for MSSQL)
-                if re.match(r"^\d{4}-\d{2}-\d{2}$", val_str):
-                    # YYYY-MM-DD -> YYYYMMDD
-                    val_str = val_str.replace("-", "")
-                    log(f"Formatando data (ISO) para {val_str}...", "info")
-                elif re.match(r"^\d{2}/\d{2}/\d{4}$", val_str):
-                    # DD/MM/YYYY -> YYYYMMDD
-                    day, month, year = val_str.split("/")
-                    val_str = f"{year}{month}{day}"
-                    log(f"Formatando data (BR) para {val_str}...", "info")
+                # Log formatted SQL before execution for debugging
+                log(f"SQL Final: {processed_sql}", "info")
 
-                clean_value = val_str.replace("'", "''")
+                log("Executando query...", "info")
+                SQLExecutor._execute(cursor, processed_sql, bind_values)
 
-                # Use regex to avoid partial matches (e.g. replacing @DATA in @DATA_FIM)
-                # Matches @KEY not followed by a word character
-                pattern = re.compile(rf"@{re.escape(key)}(?!\w)", re.IGNORECASE)
-                processed_sql = pattern.sub(f"'{clean_value}'", processed_sql)
+                # Fetch headers
+                if cursor.description:
+                    headers = [desc[0] for desc in cursor.description]
+                    rows = cursor.fetchall()
+                    log(f"Query executada. {len(rows)} registros retornados.", "success")
 
-                log(f"Substituindo variável @{key}...", "info")
+                    # Add sanitized SQL to log for debugging (be careful with sensitive data)
+                    log(
+                        f"SQL Final: {processed_sql[:200]}..."
+                        if len(processed_sql) > 200
+                        else f"SQL Final: {processed_sql}",
+                        "info",
+                    )
+                else:
+                    headers, rows = [], []
+                    log("Query executada. Nenhum resultado retornado.", "warning")
 
-            log("SQL processado com sucesso.", "success")
+            log("Conexão devolvida ao pool.", "info")
+            return headers, rows, logs
 
         except Exception as e:
-            log(f"Erro no processamento do SQL: {str(e)}", "error")
+            log(f"Erro na execução da query: {str(e)}", "error")
             return [], [], logs
 
-        conn = None
+    @staticmethod
+    @contextmanager
+    def stream_routine(
+        conexao: ConexaoExterna,
+        sql: str,
+        params: dict = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ):
+        """
+        Executes the SQL routine and streams the result set in batches.
+
+        Usage::
+
+            with SQLExecutor.stream_routine(conexao, sql, params) as stream:
+                stream.headers        # available before any row is fetched
+                for batch in stream:  # lists of at most batch_size rows
+                    ...
+
+        Only one batch is held in memory at a time. Preparation and connection
+        errors are logged and yield an empty stream (same contract as
+        execute_routine); errors while fetching are logged and re-raised so
+        callers never persist a silently truncated result.
+        """
+        logs, log = SQLExecutor._new_log()
+
+        if params is None:
+            params = {}
+
+        log(
+            f"Iniciando execução da rotina (streaming). Parâmetros recebidos: {list(params.keys())}"
+        )
+
         try:
-            log(
-                f"Conectando ao banco {conexao.get_tipo_conexao_display()} | "
-                f"Host: {conexao.host}:{conexao.porta} | "
-                f"DB: {conexao.database} | "
-                f"User: {conexao.usuario}",
-                "info",
+            processed_sql, bind_values = SQLExecutor._prepare_sql(
+                sql, params, conexao.tipo_conexao, log
             )
-            conn = SQLExecutor.get_connection(conexao)
-            cursor = conn.cursor()
-            log("Conexão estabelecida.", "success")
-
-            # Log formatted SQL before execution for debugging
-            log(f"SQL Final: {processed_sql}", "info")
-
-            log("Executando query...", "info")
-            cursor.execute(processed_sql)
-
-            # Fetch headers
-            if cursor.description:
-                headers = [desc[0] for desc in cursor.description]
-                rows = cursor.fetchall()
-                log(f"Query executada. {len(rows)} registros retornados.", "success")
-
-                # Add sanitized SQL to log for debugging (be careful with sensitive data)
-                log(
-                    f"SQL Final: {processed_sql[:200]}..."
-                    if len(processed_sql) > 200
-                    else f"SQL Final: {processed_sql}",
-                    "info",
-                )
-
-                return headers, rows, logs
-            else:
-                log("Query executada. Nenhum resultado retornado.", "warning")
-                return [], [], logs
+        except Exception as e:
+            log(f"Erro no processamento do SQL: {str(e)}", "error")
+            yield RoutineStream(None, [], logs, log, batch_size)
+            return
+
+        yielded = False
+        try:
+            SQLExecutor._log_connecting(conexao, log)
+            with pool.connection(conexao) as conn:
+                cursor = conn.cursor()
+                log("Conexão estabelecida.", "success")
+                log("Executando query...", "info")
+                SQLExecutor._execute(cursor, processed_sql, bind_values)
+
+                if cursor.description:
+                    headers = [desc[0] for desc in cursor.description]
+                    log("Query executada. Lendo registros em lotes...", "success")
+                    stream = RoutineStream(cursor, headers, logs, log, batch_size)
+                else:
+                    log("Query executada. Nenhum resultado retornado.", "warning")
+                    stream = RoutineStream(None, [], logs, log, batch_size)
+
+                # Exceptions raised by the caller propagate through the pool,
+                # which discards the connection instead of reusing it
+                yielded = True
+                yield stream
+
+            log("Conexão devolvida ao pool.", "info")
 
         except Exception as e:
+            if yielded:
+                raise
             log(f"Erro na execução da query: {str(e)}", "error")
-            return [], [], logs
+            yield RoutineStream(None, [], logs, log, batch_size)
+
+
+class RoutineStream:
+    """
+    Result set of a streamed routine: headers up front, rows in batches.
+    Iterating fetches via cursor.fetchmany(batch_size).
+    """
+
+    def __init__(self, cursor, headers, logs, log, batch_size):
+        self.headers = headers
+        self.logs = logs
+        self.batch_size = batch_size
+        self.row_count = 0
+        self._cursor = cursor
+        self._log = log
+
+    def __iter__(self):
+        if self._cursor is None:
+            return
+        try:
+            while True:
+                batch = self._cursor.fetchmany(self.batch_size)
+                if not batch:
+                    break
+                self.row_count += len(batch)
+                yield batch
+        except Exception as e:
+            self._log(f"Erro ao ler registros: {str(e)}", "error")
+            raise
         finally:
-            if conn:
-                conn.close()
-                log("Conexão fechada.", "info")
+            self._cursor = None
+        self._log(f"Leitura concluída. {self.row_count} registros retornados.", "success")
+
+
+@dataclass(frozen=True)
+class CompiledSQL:
+    """SQL with @VAR replaced by driver placeholders, plus the bind plan."""
+
+    sql: str
+    variables: tuple[str, ...]  # upper-case names, in placeholder order
+    paramstyle: str
+
+    def bind(self, values: dict):
+        """Returns the parameters for cursor.execute, or None if nothing is bound."""
+        if not self.variables:
+            return None
+        if self.paramstyle == "qmark":
+            return tuple(values[name] for name in self.variables)
+        return {name: values[name] for name in self.variables}
+
+
+@lru_cache(maxsize=512)
+def _compile_sql(sql: str, tipo_conexao: str, names: frozenset) -> CompiledSQL:
+    paramstyle = PARAMSTYLE.get(tipo_conexao, "qmark")
+    order = []
+
+    def placeholder(match):
+        name = (match.group(1) or "").upper()
+        if name not in names:
+            return match.group(0)
+        order.append(name)
+        return "?" if paramstyle == "qmark" else f"%({name})s"
+
+    compiled = sql
+    binds_any = any(
+        m.group(1) and m.group(1).upper() in names for m in VARIABLE_PATTERN.finditer(sql)
+    )
+    if paramstyle == "pyformat" and binds_any:
+        # Literal % must be doubled once pymssql interpolates the parameters
+        compiled = sql.replace("%", "%%")
+    compiled = VARIABLE_PATTERN.sub(placeholder, compiled)
+    return CompiledSQL(sql=compiled, variables=tuple(order), paramstyle=paramstyle)
+
+
+# Per-process pool shared by every SQLExecutor call. Resolves get_connection lazily
+# so the driver-level factory can be swapped (e.g. patched in tests).
+pool = ConnectionPool(connect=lambda conexao: SQLExecutor.get_connection(conexao))
@@ -0,0 +1,19 @@
+"""
+Core signals — Descarta conexões externas em pool quando o cadastro muda.
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender="core.ConexaoExterna")
+@receiver(post_delete, sender="core.ConexaoExterna")
+def evict_pooled_connections(sender, instance, **kwargs):
+    """Close idle pooled connections opened with the previous configuration."""
+    try:
+        from caixa_nfse.core.services.sql_executor import pool
+    except ImportError:
+        # Drivers (fdb/pymssql) unavailable: nothing was ever pooled
+        return
+
+    pool.evict(instance.pk)
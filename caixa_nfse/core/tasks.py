@@ -0,0 +1,17 @@
+"""
+Core tasks - Periodic database maintenance.
+"""
+
+from celery import shared_task
+
+from .particoes import manter_particoes
+
+
+@shared_task
+def manter_particoes_task() -> dict:
+    """Cria as partições mensais futuras e arquiva as vencidas."""
+    resultado = manter_particoes()
+    return {
+        label: {"criadas": criadas, "arquivos": [str(a) for a in arquivos]}
+        for label, (criadas, arquivos) in resultado.items()
+    }
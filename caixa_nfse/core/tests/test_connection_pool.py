@@ -0,0 +1,186 @@
+"""
+Tests for core/services/connection_pool.py: ConnectionPool.
+"""
+
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+from caixa_nfse.core.services.connection_pool import ConnectionPool
+
+
+def _conexao(pk="c1", updated_at="v1", tipo="FIREBIRD"):
+    return SimpleNamespace(pk=pk, updated_at=updated_at, tipo_conexao=tipo)
+
+
+@pytest.fixture
+def connect():
+    return MagicMock(side_effect=lambda conexao: MagicMock(name="conn"))
+
+
+class TestConnectionPool:
+    def test_reuses_released_connection(self, connect):
+        pool = ConnectionPool(connect, max_size=2, idle_timeout=60)
+        conexao = _conexao()
+
+        with pool.connection(conexao) as first:
+            pass
+        with pool.connection(conexao) as second:
+            pass
+
+        assert first is second
+        connect.assert_called_once()
+        first.rollback.assert_called()
+
+    def test_health_check_on_borrow(self, connect):
+        pool = ConnectionPool(connect, max_size=2, idle_timeout=60)
+        conexao = _conexao(tipo="MSSQL")
+
+        with pool.connection(conexao) as conn:
+            pass
+        with pool.connection(conexao):
+            pass
+
+        conn.cursor.return_value.execute.assert_called_once_with("SELECT 1")
+
+    def test_dead_connection_is_replaced(self, connect):
+        pool = ConnectionPool(connect, max_size=2, idle_timeout=60)
+        conexao = _conexao()
+
+        with pool.connection(conexao) as dead:
+            pass
+        dead.cursor.return_value.execute.side_effect = Exception("connection lost")
+
+        with pool.connection(conexao) as fresh:
+            pass
+
+        assert fresh is not dead
+        dead.close.assert_called_once()
+        assert connect.call_count == 2
+
+    def test_config_change_evicts_old_connections(self, connect):
+        pool = ConnectionPool(connect, max_size=2, idle_timeout=60)
+
+        with pool.connection(_conexao(updated_at="v1")) as old:
+            pass
+        with pool.connection(_conexao(updated_at="v2")) as new:
+            pass
+
+        assert old is not new
+        old.close.assert_called_once()
+
+    def test_connection_in_use_during_config_change_is_closed(self, connect):
+        pool = ConnectionPool(connect, max_size=2, idle_timeout=60)
+
+        with pool.connection(_conexao(updated_at="v1")) as old:
+            with pool.connection(_conexao(updated_at="v2")):
+                pass
+
+        old.close.assert_called_once()
+        assert pool.idle_count("c1") == 1
+
+    def test_idle_timeout(self, connect):
+        pool = ConnectionPool(connect, max_size=2, idle_timeout=0)
+        conexao = _conexao()
+
+        with pool.connection(conexao) as first:
+            pass
+        time.sleep(0.01)
+        with pool.connection(conexao) as second:
+            pass
+
+        assert first is not second
+        first.close.assert_called_once()
+
+    def test_max_size_closes_overflow(self, connect):
+        pool = ConnectionPool(connect, max_size=1, idle_timeout=60)
+        conexao = _conexao()
+
+        with pool.connection(conexao) as a:
+            with pool.connection(conexao) as b:
+                pass
+
+        assert a is not b
+        assert pool.idle_count("c1") == 1
+        a.close.assert_called_once()
+
+    def test_exception_discards_connection(self, connect):
+        pool = ConnectionPool(connect, max_size=2, idle_timeout=60)
+        conexao = _conexao()
+
+        with pytest.raises(RuntimeError):
+            with pool.connection(conexao) as conn:
+                raise RuntimeError("boom")
+
+        conn.close.assert_called_once()
+        assert pool.idle_count("c1") == 0
+
+    def test_evict_and_clear(self, connect):
+        pool = ConnectionPool(connect, max_size=2, idle_timeout=60)
+
+        with pool.connection(_conexao(pk="a")) as a:
+            pass
+        with pool.connection(_conexao(pk="b")) as b:
+            pass
+
+        assert pool.evict("a") == 1
+        a.close.assert_called_once()
+        pool.clear()
+        b.close.assert_called_once()
+        assert pool.idle_count("b") == 0
+
+    def test_max_open_caps_borrowed_connections(self, connect):
+        pool = ConnectionPool(
+            connect, max_size=2, idle_timeout=60, max_open=1, acquire_timeout=0.05
+        )
+        conexao = _conexao()
+
+        with pool.connection(conexao):
+            with pytest.raises(TimeoutError):
+                with pool.connection(conexao):
+                    pass
+            # Limit is per ConexaoExterna
+            with pool.connection(_conexao(pk="c2")):
+                pass
+
+        # Slot is released after the block, including when it raised
+        with pytest.raises(ValueError):
+            with pool.connection(conexao):
+                raise ValueError
+        with pool.connection(conexao):
+            pass
+
+    def test_max_open_waits_for_release(self, connect):
+        pool = ConnectionPool(connect, max_size=2, idle_timeout=60, max_open=1, acquire_timeout=5)
+        conexao = _conexao()
+        borrowed = threading.Event()
+
+        def hold():
+            with pool.connection(conexao):
+                borrowed.set()
+                time.sleep(0.05)
+
+        worker = threading.Thread(target=hold)
+        worker.start()
+        borrowed.wait()
+        with pool.connection(conexao):
+            pass
+        worker.join()
+
+        connect.assert_called_once()
+
+    def test_settings_defaults(self, connect, settings):
+        settings.EXTERNAL_DB_POOL = {
+            "MAX_SIZE": 7,
+            "IDLE_TIMEOUT": 42,
+            "MAX_OPEN": 3,
+            "ACQUIRE_TIMEOUT": 9,
+        }
+        pool = ConnectionPool(connect)
+        assert pool.max_size == 7
+        assert pool.idle_timeout == 42
+        assert pool.max_open == 3
+        assert pool.acquire_timeout == 9
@@ -1,10 +1,26 @@
 """Tests for EncryptedCharField — encrypt/decrypt transparency."""
 
+import hashlib
+import time
+from io import StringIO
+from unittest.mock import patch
+
 import pytest
+from cryptography.fernet import Fernet
+from django.core.management import call_command
 from django.db import connection
 
+from caixa_nfse.auditoria.models import RegistroAuditoria
 from caixa_nfse.backoffice.models import Sistema
-from caixa_nfse.core.encrypted_fields import EncryptedCharField, _get_fernet, _is_encrypted
+from caixa_nfse.core.encrypted_fields import (
+    EncryptedCharField,
+    ValorCifrado,
+    _derivar_chave,
+    _get_fernet,
+    _is_encrypted,
+    _keyring,
+    decifrar,
+)
 from caixa_nfse.core.models import ConexaoExterna, Tenant
 
 
@@ -115,9 +131,144 @@ class TestEncryptedCharField:
         assert _is_encrypted(prepped)
 
         restored = field.from_db_value(prepped, None, None)
-        assert restored == "hello"
+        assert isinstance(restored, ValorCifrado)
+        assert decifrar(restored) == "hello"
 
     def test_none_passthrough(self):
         field = EncryptedCharField(max_length=500)
         assert field.get_prep_value(None) is None
         assert field.from_db_value(None, None, None) is None
+
+
+def _conexao(tenant, sistema, senha):
+    return ConexaoExterna.objects.create(
+        tenant=tenant,
+        sistema=sistema,
+        tipo_conexao="MSSQL",
+        host="localhost",
+        porta=1433,
+        database="testdb",
+        usuario="sa",
+        senha=senha,
+    )
+
+
+def _senha_bruta(obj):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT senha FROM core_conexaoexterna WHERE id = %s", [obj.pk.hex])
+        return cursor.fetchone()[0]
+
+
+@pytest.mark.django_db
+class TestKeyring:
+    def test_key_derived_once_per_process(self):
+        _derivar_chave.cache_clear()
+        _keyring.cache_clear()
+        field = EncryptedCharField(max_length=500)
+
+        with patch(
+            "caixa_nfse.core.encrypted_fields.hashlib.pbkdf2_hmac", wraps=hashlib.pbkdf2_hmac
+        ) as pbkdf2:
+            token = field.get_prep_value("segredo")
+            inicio = time.perf_counter()
+            for _ in range(200):
+                assert decifrar(field.from_db_value(token, None, None)) == "segredo"
+            por_campo = (time.perf_counter() - inicio) / 200
+
+        assert pbkdf2.call_count == 1
+        # Uncached PBKDF2 (100k iterations) costs tens of ms per field
+        assert por_campo < 0.001
+
+    def test_rotation_and_reencrypt_command(self, settings, tenant, sistema):
+        settings.FIELD_ENCRYPTION_KEYS = []
+        obj = _conexao(tenant, sistema, "Antiga123")
+
+        nova = Fernet.generate_key().decode()
+        settings.FIELD_ENCRYPTION_KEYS = [nova]
+        # Old tokens stay readable through the keyring
+        obj.refresh_from_db()
+        assert obj.senha == "Antiga123"
+
+        out = StringIO()
+        call_command("reencriptar_campos", "--lote", "1", stdout=out)
+        assert "core.ConexaoExterna: 1 registro(s) re-cifrado(s)" in out.getvalue()
+        assert Fernet(nova.encode()).decrypt(_senha_bruta(obj).encode()) == b"Antiga123"
+
+        out = StringIO()
+        call_command("reencriptar_campos", stdout=out)
+        assert "0 registro(s) re-cifrado(s) no total" in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestLazyDecryption:
+    def test_decrypts_only_on_access(self, tenant, sistema):
+        _conexao(tenant, sistema, "Lazy123")
+
+        with patch("caixa_nfse.core.encrypted_fields.decifrar", wraps=decifrar) as mock:
+            obj = ConexaoExterna.objects.get(host="localhost")
+            assert obj.host == "localhost"
+            assert mock.call_count == 0
+            assert isinstance(obj.__dict__["senha"], ValorCifrado)
+
+            assert obj.senha == "Lazy123"
+            assert obj.senha == "Lazy123"
+            assert mock.call_count == 1  # memoized
+
+    def test_loaded_row_returns_plaintext(self, tenant, sistema):
+        original = _conexao(tenant, sistema, "Loaded123")
+
+        obj = ConexaoExterna.objects.get(pk=original.pk)
+        assert obj.senha == "Loaded123"
+        assert [c.senha for c in ConexaoExterna.objects.filter(pk=original.pk)] == ["Loaded123"]
+
+        obj.senha = "Nova123"
+        obj.save()
+        assert _is_encrypted(_senha_bruta(obj))
+        assert ConexaoExterna.objects.get(pk=original.pk).senha == "Nova123"
+
+    def test_untouched_secret_saved_back_unchanged(self, tenant, sistema):
+        original = _conexao(tenant, sistema, "Keep123")
+        token = _senha_bruta(original)
+
+        obj = ConexaoExterna.objects.get(pk=original.pk)
+        obj.host = "outro"
+        with patch("caixa_nfse.core.encrypted_fields.decifrar") as mock:
+            obj.save()
+        mock.assert_not_called()
+        assert _senha_bruta(obj) == token
+
+        # The audit trail masks the secret instead of decrypting it
+        registro = RegistroAuditoria.objects.filter(
+            tabela="ConexaoExterna", registro_id=str(obj.pk), acao="UPDATE"
+        ).latest("sequencia")
+        assert registro.dados_depois["senha"] == "[ENCRYPTED]"
+        assert ConexaoExterna.objects.get(pk=obj.pk).senha == "Keep123"
+
+    def test_changed_secret_is_marked_in_audit(self, tenant, sistema):
+        original = _conexao(tenant, sistema, "old")
+
+        obj = ConexaoExterna.objects.get(pk=original.pk)
+        obj.senha = "new"
+        obj.save()
+
+        registro = RegistroAuditoria.objects.filter(
+            tabela="ConexaoExterna", registro_id=str(obj.pk), acao="UPDATE"
+        ).latest("sequencia")
+        assert registro.dados_antes["senha"] == "[ENCRYPTED]"
+        assert registro.dados_depois["senha"] == "[ENCRYPTED:ALTERADO]"
+        assert "senha" in registro.campos_alterados
+
+    def test_read_but_unchanged_secret_not_marked(self, tenant, sistema):
+        original = _conexao(tenant, sistema, "Keep123")
+
+        obj = ConexaoExterna.objects.get(pk=original.pk)
+        assert obj.senha == "Keep123"
+        obj.senha = "Keep123"
+        obj.host = "outro"
+        obj.save()
+
+        registro = RegistroAuditoria.objects.filter(
+            tabela="ConexaoExterna", registro_id=str(obj.pk), acao="UPDATE"
+        ).latest("sequencia")
+        assert registro.dados_depois["senha"] == "[ENCRYPTED]"
+        assert "senha" not in registro.campos_alterados
@@ -0,0 +1,51 @@
+import datetime
+
+import pytest
+from django.utils import timezone
+
+from caixa_nfse.auditoria.models import RegistroAuditoria
+from caixa_nfse.core.particoes import _com_chave_particao, inicio_do_mes, manter_particoes
+from caixa_nfse.tests.factories import RegistroAuditoriaFactory
+
+
+def test_inicio_do_mes_crosses_years():
+    dia = datetime.date(2026, 11, 20)
+    assert inicio_do_mes(dia) == datetime.datetime(2026, 11, 1, tzinfo=datetime.UTC)
+    assert inicio_do_mes(dia, 2) == datetime.datetime(2027, 1, 1, tzinfo=datetime.UTC)
+    assert inicio_do_mes(dia, -11) == datetime.datetime(2025, 12, 1, tzinfo=datetime.UTC)
+
+
+def test_unique_gets_partition_key():
+    assert _com_chave_particao("UNIQUE (particao, sequencia)") == (
+        "UNIQUE (particao, sequencia, created_at)"
+    )
+    indice = "CREATE UNIQUE INDEX u ON public.t USING btree (a) WHERE (b IS NOT NULL)"
+    assert _com_chave_particao(indice) == (
+        "CREATE UNIQUE INDEX u ON public.t USING btree (a, created_at) WHERE (b IS NOT NULL)"
+    )
+    assert _com_chave_particao("UNIQUE (a, created_at)") == "UNIQUE (a, created_at)"
+
+
+@pytest.mark.django_db
+class TestParticionado:
+    def test_periodo_filters_by_day_range(self):
+        hoje = timezone.localdate()
+        registro = RegistroAuditoriaFactory()
+        antigo = RegistroAuditoriaFactory()
+        RegistroAuditoria.objects.filter(pk=antigo.pk).update(
+            created_at=timezone.now() - datetime.timedelta(days=40)
+        )
+
+        # The factories write audit rows of their own
+        criados = RegistroAuditoria.objects.filter(pk__in=[registro.pk, antigo.pk])
+        qs = criados.periodo(hoje.isoformat(), hoje)
+        assert list(qs.values_list("pk", flat=True)) == [registro.pk]
+        assert criados.periodo().count() == 2
+
+    def test_maintenance_is_noop_without_postgres(self, tmp_path, settings):
+        settings.PARTICIONAMENTO = {"MESES_FUTUROS": 3, "ARQUIVO_DIR": str(tmp_path)}
+        resultado = manter_particoes()
+        assert resultado == {
+            "auditoria.RegistroAuditoria": ([], []),
+            "nfse.NfseApiLog": ([], []),
+        }
@@ -3,13 +3,21 @@ Tests for core/services/sql_executor.py: SQLExecutor.
 Covers lines 25-48 (get_connection), 56-152 (execute_routine).
 """
 
+from datetime import date
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from caixa_nfse.conftest import *  # noqa: F401,F403
 from caixa_nfse.core.models import ConexaoExterna
-from caixa_nfse.core.services.sql_executor import SQLExecutor
+from caixa_nfse.core.services.sql_executor import CompiledSQL, SQLExecutor, pool
+
+
+@pytest.fixture(autouse=True)
+def _clear_pool():
+    yield
+    pool.clear()
+
 
 # ---------------------------------------------------------------------------
 # extract_variables
@@ -29,6 +37,11 @@ class TestExtractVariables:
         sql = "SELECT @A, @A"
         assert SQLExecutor.extract_variables(sql) == ["A"]
 
+    def test_matches_compiled_binds(self):
+        sql = "SELECT @@ROWCOUNT, '@C' FROM t WHERE a = @A -- @B\n/* @D */"
+        assert SQLExecutor.extract_variables(sql) == ["A"]
+        assert SQLExecutor.compile_sql(sql, "MSSQL", ["A"]).sql.count("%(A)s") == 1
+
 
 # ---------------------------------------------------------------------------
 # get_connection
@@ -132,8 +145,11 @@ class TestExecuteRoutine:
         )
         assert headers == ["PROTOCOLO", "VALOR"]
         assert len(rows) == 2
-        assert any("registros retornados" in l["msg"] for l in logs)
-        mock_conn.close.assert_called_once()
+        assert any("registros retornados" in linha["msg"] for linha in logs)
+        # Connection goes back to the pool instead of being closed
+        mock_conn.close.assert_not_called()
+        mock_conn.rollback.assert_called_once()
+        assert pool.idle_count(conexao.pk) == 1
 
     @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
     def test_success_no_results(self, mock_get_conn, conexao):
@@ -146,7 +162,7 @@ class TestExecuteRoutine:
         headers, rows, logs = SQLExecutor.execute_routine(conexao, "UPDATE t SET x=1")
         assert headers == []
         assert rows == []
-        assert any("Nenhum resultado" in l["msg"] for l in logs)
+        assert any("Nenhum resultado" in linha["msg"] for linha in logs)
 
     @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
     def test_connection_error(self, mock_get_conn, conexao):
@@ -154,7 +170,34 @@ class TestExecuteRoutine:
         headers, rows, logs = SQLExecutor.execute_routine(conexao, "SELECT 1")
         assert headers == []
         assert rows == []
-        assert any("Erro na execução" in l["msg"] for l in logs)
+        assert any("Erro na execução" in linha["msg"] for linha in logs)
+
+    @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
+    def test_query_error_discards_connection(self, mock_get_conn, conexao):
+        mock_cursor = MagicMock()
+        mock_cursor.execute.side_effect = Exception("syntax error")
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_conn.return_value = mock_conn
+
+        headers, rows, logs = SQLExecutor.execute_routine(conexao, "SELEC 1")
+        assert headers == []
+        assert any("syntax error" in linha["msg"] for linha in logs)
+        mock_conn.close.assert_called_once()
+        assert pool.idle_count(conexao.pk) == 0
+
+    @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
+    def test_consecutive_routines_reuse_connection(self, mock_get_conn, conexao):
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("ID",)]
+        mock_cursor.fetchall.return_value = [(1,)]
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_conn.return_value = mock_conn
+
+        SQLExecutor.execute_routine(conexao, "SELECT 1 AS ID")
+        SQLExecutor.execute_routine(conexao, "SELECT 2 AS ID")
+        mock_get_conn.assert_called_once()
 
     def test_invalid_variable_name(self, conexao):
         headers, rows, logs = SQLExecutor.execute_routine(
@@ -162,7 +205,7 @@ class TestExecuteRoutine:
         )
         assert headers == []
         assert rows == []
-        assert any("inválido" in l["msg"] for l in logs)
+        assert any("inválido" in linha["msg"] for linha in logs)
 
     @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
     def test_date_format_br(self, mock_get_conn, conexao):
@@ -177,7 +220,28 @@ class TestExecuteRoutine:
             conexao, "SELECT * FROM t WHERE dt = @DATA", {"DATA": "15/03/2025"}
         )
         assert headers == ["X"]
-        assert any("20250315" in l["msg"] for l in logs)
+        assert any("2025-03-15" in linha["msg"] for linha in logs)
+        mock_cursor.execute.assert_called_once_with(
+            "SELECT * FROM t WHERE dt = %(DATA)s", {"DATA": date(2025, 3, 15)}
+        )
+
+    @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
+    def test_params_are_bound_not_inlined(self, mock_get_conn, conexao):
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("X",)]
+        mock_cursor.fetchall.return_value = []
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_conn.return_value = mock_conn
+
+        SQLExecutor.execute_routine(
+            conexao,
+            "SELECT * FROM t WHERE nome LIKE '%A' AND id = @ID AND dt >= @DATA",
+            {"ID": " O'Brien ", "DATA": "2025-01-01"},
+        )
+        sql, values = mock_cursor.execute.call_args[0]
+        assert sql == "SELECT * FROM t WHERE nome LIKE '%%A' AND id = %(ID)s AND dt >= %(DATA)s"
+        assert values == {"ID": "O'Brien", "DATA": date(2025, 1, 1)}
 
     @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
     def test_long_sql_truncated_in_log(self, mock_get_conn, conexao):
@@ -191,7 +255,7 @@ class TestExecuteRoutine:
         long_sql = "SELECT " + "A" * 250 + " FROM t"
         headers, rows, logs = SQLExecutor.execute_routine(conexao, long_sql)
         assert headers == ["X"]
-        assert any("..." in l["msg"] for l in logs)
+        assert any("..." in linha["msg"] for linha in logs)
 
     @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
     def test_no_params(self, mock_get_conn, conexao):
@@ -205,3 +269,128 @@ class TestExecuteRoutine:
         headers, rows, logs = SQLExecutor.execute_routine(conexao, "SELECT 1 AS ID")
         assert headers == ["ID"]
         assert rows == [(1,)]
+
+
+# ---------------------------------------------------------------------------
+# compile_sql
+# ---------------------------------------------------------------------------
+
+
+class TestCompileSQL:
+    def test_firebird_uses_qmark_in_occurrence_order(self):
+        compiled = SQLExecutor.compile_sql(
+            "SELECT * FROM t WHERE a >= @INI AND b <= @FIM OR c = @ini", "FIREBIRD", ["INI", "FIM"]
+        )
+        assert compiled.sql == "SELECT * FROM t WHERE a >= ? AND b <= ? OR c = ?"
+        assert compiled.bind({"INI": 1, "FIM": 2}) == (1, 2, 1)
+
+    def test_comments_and_literals_not_bound(self):
+        sql = (
+            "SELECT '@A' AS a, \"@A\", x FROM t -- filtra por @A\n"
+            "/* @A, @B */ WHERE a = @A AND obs <> 'it''s @B'"
+        )
+        compiled = SQLExecutor.compile_sql(sql, "FIREBIRD", ["A", "B"])
+        assert compiled.sql == sql.replace("a = @A", "a = ?")
+        assert compiled.bind({"A": 1, "B": 2}) == (1,)
+
+    def test_mssql_uses_named_placeholders(self):
+        compiled = SQLExecutor.compile_sql("SELECT @A, @B", "MSSQL", ["a", "b"])
+        assert compiled.sql == "SELECT %(A)s, %(B)s"
+        assert compiled.bind({"A": 1, "B": 2}) == {"A": 1, "B": 2}
+
+    def test_unknown_variables_and_globals_are_kept(self):
+        compiled = SQLExecutor.compile_sql(
+            "DECLARE @X INT; SELECT @@ROWCOUNT, @DATA_FIM, @DATA", "MSSQL", ["DATA"]
+        )
+        assert compiled.sql == "DECLARE @X INT; SELECT @@ROWCOUNT, @DATA_FIM, %(DATA)s"
+
+    def test_no_bound_variables(self):
+        compiled = SQLExecutor.compile_sql("SELECT '%'\r\n", "MSSQL", [])
+        assert compiled == CompiledSQL(sql="SELECT '%'", variables=(), paramstyle="pyformat")
+        assert compiled.bind({}) is None
+
+    def test_cached_by_sql_text(self):
+        first = SQLExecutor.compile_sql("SELECT @A", "FIREBIRD", ["A"])
+        assert SQLExecutor.compile_sql("SELECT @A", "FIREBIRD", ["a"]) is first
+
+
+# ---------------------------------------------------------------------------
+# stream_routine
+# ---------------------------------------------------------------------------
+
+
+@pytest.mark.django_db
+class TestStreamRoutine:
+    @pytest.fixture
+    def conexao(self, tenant):
+        from caixa_nfse.backoffice.models import Sistema
+
+        sistema = Sistema.objects.create(nome="Test", ativo=True)
+        return ConexaoExterna.objects.create(
+            tenant=tenant,
+            sistema=sistema,
+            tipo_conexao="FIREBIRD",
+            host="10.0.0.1",
+            porta=3050,
+            database="/opt/data.fdb",
+            usuario="SYSDBA",
+            senha="masterkey",
+        )
+
+    @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
+    def test_yields_batches_with_headers_up_front(self, mock_get_conn, conexao):
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("PROTOCOLO",), ("VALOR",)]
+        mock_cursor.fetchmany.side_effect = [
+            [("P-001", 1), ("P-002", 2)],
+            [("P-003", 3)],
+            [],
+        ]
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_conn.return_value = mock_conn
+
+        with SQLExecutor.stream_routine(conexao, "SELECT * FROM t", batch_size=2) as stream:
+            assert stream.headers == ["PROTOCOLO", "VALOR"]
+            mock_cursor.fetchmany.assert_not_called()
+            batches = list(stream)
+
+        assert batches == [[("P-001", 1), ("P-002", 2)], [("P-003", 3)]]
+        assert stream.row_count == 3
+        mock_cursor.fetchmany.assert_called_with(2)
+        mock_cursor.fetchall.assert_not_called()
+        assert any("3 registros" in linha["msg"] for linha in stream.logs)
+        assert pool.idle_count(conexao.pk) == 1
+
+    @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
+    def test_connection_error_yields_empty_stream(self, mock_get_conn, conexao):
+        mock_get_conn.side_effect = Exception("Connection refused")
+
+        with SQLExecutor.stream_routine(conexao, "SELECT 1") as stream:
+            assert stream.headers == []
+            assert list(stream) == []
+
+        assert any("Connection refused" in linha["msg"] for linha in stream.logs)
+
+    def test_invalid_variable_yields_empty_stream(self, conexao):
+        with SQLExecutor.stream_routine(conexao, "SELECT @X", {"X;--": "1"}) as stream:
+            assert list(stream) == []
+        assert any("inválido" in linha["msg"] for linha in stream.logs)
+
+    @patch("caixa_nfse.core.services.sql_executor.SQLExecutor.get_connection")
+    def test_fetch_error_propagates_and_discards_connection(self, mock_get_conn, conexao):
+        mock_cursor = MagicMock()
+        mock_cursor.description = [("X",)]
+        mock_cursor.fetchmany.side_effect = [[(1,)], Exception("network down")]
+        mock_conn = MagicMock()
+        mock_conn.cursor.return_value = mock_cursor
+        mock_get_conn.return_value = mock_conn
+
+        with pytest.raises(Exception, match="network down"):
+            with SQLExecutor.stream_routine(conexao, "SELECT X FROM t") as stream:
+                for _ in stream:
+                    pass
+
+        mock_conn.close.assert_called_once()
+        assert pool.idle_count(conexao.pk) == 0
+        assert any("Erro ao ler registros" in linha["msg"] for linha in stream.logs)
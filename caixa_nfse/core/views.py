@@ -182,16 +182,12 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 .first()
             )
 
-            # Calcular totais se houver abertura ativa
+            # Totais materializados da abertura ativa
             total_entradas_caixa = Decimal("0.00")
             total_saidas_caixa = Decimal("0.00")
             if abertura_ativa:
-                totais = abertura_ativa.movimentos.aggregate(
-                    entradas=Sum("valor", filter=models.Q(tipo__in=["ENTRADA", "SUPRIMENTO"])),
-                    saidas=Sum("valor", filter=models.Q(tipo__in=["SAIDA", "SANGRIA", "ESTORNO"])),
-                )
-                total_entradas_caixa = totais["entradas"] or Decimal("0.00")
-                total_saidas_caixa = totais["saidas"] or Decimal("0.00")
+                total_entradas_caixa = abertura_ativa.total_entradas
+                total_saidas_caixa = abertura_ativa.total_saidas
 
             caixas_lista.append(
                 {
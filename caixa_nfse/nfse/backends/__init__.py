@@ -2,6 +2,6 @@
 NFS-e backends - Strategy Pattern for pluggable providers.
 """
 
-from caixa_nfse.nfse.backends.registry import get_backend
+from caixa_nfse.nfse.backends.registry import get_async_backend, get_backend
 
-__all__ = ["get_backend"]
+__all__ = ["get_async_backend", "get_backend"]
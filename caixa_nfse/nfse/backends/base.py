@@ -1,11 +1,14 @@
 """
 Abstract base backend for NFS-e emission.
-All concrete backends must implement this interface.
+All concrete backends must implement this interface; backends that support
+concurrent emission also implement AsyncBaseNFSeBackend.
 """
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 
+from asgiref.sync import sync_to_async
+
 
 @dataclass
 class ResultadoEmissao:
@@ -63,3 +66,46 @@ class BaseNFSeBackend(ABC):
     @abstractmethod
     def baixar_danfse(self, nota, tenant) -> bytes | None:
         """Download the DANFSe PDF. Returns bytes or None."""
+
+
+class AsyncBaseNFSeBackend(ABC):
+    """
+    Async (asyncio) interface for NFS-e backends, used for concurrent emission.
+    Same operations and results as BaseNFSeBackend, as coroutines. ORM access
+    must go through sync_to_async: load the nota with its relations beforehand.
+    """
+
+    @abstractmethod
+    async def emitir(self, nota, tenant) -> ResultadoEmissao:
+        """Emit an NFS-e for the given invoice."""
+
+    @abstractmethod
+    async def consultar(self, nota, tenant) -> ResultadoConsulta:
+        """Query the status of an NFS-e."""
+
+    @abstractmethod
+    async def cancelar(self, nota, tenant, motivo: str) -> ResultadoCancelamento:
+        """Cancel an authorized NFS-e."""
+
+    @abstractmethod
+    async def baixar_danfse(self, nota, tenant) -> bytes | None:
+        """Download the DANFSe PDF. Returns bytes or None."""
+
+
+class SyncBackendAdapter(AsyncBaseNFSeBackend):
+    """Runs a synchronous backend (e.g. MockBackend) behind the async interface."""
+
+    def __init__(self, backend: BaseNFSeBackend):
+        self.backend = backend
+
+    async def emitir(self, nota, tenant) -> ResultadoEmissao:
+        return await sync_to_async(self.backend.emitir)(nota, tenant)
+
+    async def consultar(self, nota, tenant) -> ResultadoConsulta:
+        return await sync_to_async(self.backend.consultar)(nota, tenant)
+
+    async def cancelar(self, nota, tenant, motivo: str) -> ResultadoCancelamento:
+        return await sync_to_async(self.backend.cancelar)(nota, tenant, motivo)
+
+    async def baixar_danfse(self, nota, tenant) -> bytes | None:
+        return await sync_to_async(self.backend.baixar_danfse)(nota, tenant)
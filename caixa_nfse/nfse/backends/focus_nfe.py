@@ -3,17 +3,23 @@ Focus NFe backend — integração com API REST v2 da Focus NFe.
 
 Autenticação: HTTP Basic Auth (api_token como username, senha vazia).
 Processamento assíncrono: emissão retorna status intermediário.
+
+FocusNFeBackend (httpx síncrono) e AsyncFocusNFeBackend (asyncio) compartilham
+URLs, autenticação, mapeamento e interpretação das respostas (FocusNFeGateway).
 """
 
 import logging
 
+from asgiref.sync import sync_to_async
+
 from caixa_nfse.nfse.backends.base import (
+    AsyncBaseNFSeBackend,
     BaseNFSeBackend,
     ResultadoCancelamento,
     ResultadoConsulta,
     ResultadoEmissao,
 )
-from caixa_nfse.nfse.backends.gateway_http import GatewayHttpClient
+from caixa_nfse.nfse.backends.gateway_http import AsyncGatewayHttpClient, GatewayHttpClient
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +29,8 @@ FOCUS_URLS = {
 }
 
 
-class FocusNFeBackend(BaseNFSeBackend, GatewayHttpClient):
-    """Focus NFe gateway backend for NFS-e operations."""
+class FocusNFeGateway:
+    """Focus NFe API: URLs, auth, JSON mapping and response parsing."""
 
     backend_name = "focus_nfe"
 
@@ -90,28 +96,9 @@ class FocusNFeBackend(BaseNFSeBackend, GatewayHttpClient):
             },
         }
 
-    # ── Interface ─────────────────────────────────────────────
-
-    def emitir(self, nota, tenant) -> ResultadoEmissao:
-        config = self._get_config(tenant)
-        if not config:
-            return ResultadoEmissao(
-                sucesso=False,
-                mensagem="Configuração NFS-e não encontrada para este tenant",
-            )
-
-        ref = str(nota.uuid_transacao)
-        payload = self._nota_to_focus_json(nota, tenant)
-
-        response = self._request(
-            "POST",
-            f"/nfse?ref={ref}",
-            config=config,
-            tenant=tenant,
-            nota=nota,
-            json_body=payload,
-        )
+    # ── Respostas ─────────────────────────────────────────────
 
+    def _resultado_emissao(self, response, ref: str) -> ResultadoEmissao:
         if response is None:
             return ResultadoEmissao(
                 sucesso=False,
@@ -156,37 +143,78 @@ class FocusNFeBackend(BaseNFSeBackend, GatewayHttpClient):
             mensagem=msg_erro,
         )
 
-    def consultar(self, nota, tenant) -> ResultadoConsulta:
+    def _resultado_consulta(self, response) -> ResultadoConsulta:
+        if response is None:
+            return ResultadoConsulta(
+                sucesso=False,
+                mensagem="Falha na comunicação com Focus NFe",
+            )
+
+        data = response.json() if response.text else {}
+
+        return ResultadoConsulta(
+            sucesso=response.is_success,
+            status=data.get("status", ""),
+            xml_retorno=data.get("xml_nfse", ""),
+            mensagem=data.get("mensagem", ""),
+        )
+
+    def _resultado_cancelamento(self, response) -> ResultadoCancelamento:
+        if response is None:
+            return ResultadoCancelamento(
+                sucesso=False,
+                mensagem="Falha na comunicação com Focus NFe",
+            )
+
+        data = response.json() if response.text else {}
+
+        return ResultadoCancelamento(
+            sucesso=response.is_success,
+            protocolo=data.get("protocolo", ""),
+            mensagem=data.get("mensagem", "Cancelamento processado"),
+        )
+
+
+class FocusNFeBackend(FocusNFeGateway, BaseNFSeBackend, GatewayHttpClient):
+    """Focus NFe gateway backend for NFS-e operations."""
+
+    def emitir(self, nota, tenant) -> ResultadoEmissao:
         config = self._get_config(tenant)
         if not config:
-            return ResultadoConsulta(
+            return ResultadoEmissao(
                 sucesso=False,
-                mensagem="Configuração NFS-e não encontrada",
+                mensagem="Configuração NFS-e não encontrada para este tenant",
             )
 
-        ref = str(nota.pk)
+        ref = str(nota.uuid_transacao)
+        payload = self._nota_to_focus_json(nota, tenant)
+
         response = self._request(
-            "GET",
-            f"/nfse/{ref}",
+            "POST",
+            f"/nfse?ref={ref}",
             config=config,
             tenant=tenant,
             nota=nota,
+            json_body=payload,
         )
+        return self._resultado_emissao(response, ref)
 
-        if response is None:
+    def consultar(self, nota, tenant) -> ResultadoConsulta:
+        config = self._get_config(tenant)
+        if not config:
             return ResultadoConsulta(
                 sucesso=False,
-                mensagem="Falha na comunicação com Focus NFe",
+                mensagem="Configuração NFS-e não encontrada",
             )
 
-        data = response.json() if response.text else {}
-
-        return ResultadoConsulta(
-            sucesso=response.is_success,
-            status=data.get("status", ""),
-            xml_retorno=data.get("xml_nfse", ""),
-            mensagem=data.get("mensagem", ""),
+        response = self._request(
+            "GET",
+            f"/nfse/{nota.pk}",
+            config=config,
+            tenant=tenant,
+            nota=nota,
         )
+        return self._resultado_consulta(response)
 
     def cancelar(self, nota, tenant, motivo: str) -> ResultadoCancelamento:
         config = self._get_config(tenant)
@@ -196,39 +224,97 @@ class FocusNFeBackend(BaseNFSeBackend, GatewayHttpClient):
                 mensagem="Configuração NFS-e não encontrada",
             )
 
-        ref = str(nota.pk)
         response = self._request(
             "DELETE",
-            f"/nfse/{ref}",
+            f"/nfse/{nota.pk}",
             config=config,
             tenant=tenant,
             nota=nota,
             json_body={"justificativa": motivo},
         )
+        return self._resultado_cancelamento(response)
 
-        if response is None:
-            return ResultadoCancelamento(
+    def baixar_danfse(self, nota, tenant) -> bytes | None:
+        config = self._get_config(tenant)
+        if not config:
+            return None
+
+        return self._request_bytes(
+            "GET",
+            f"/nfse/{nota.pk}.pdf",
+            config=config,
+            tenant=tenant,
+            nota=nota,
+        )
+
+
+class AsyncFocusNFeBackend(FocusNFeGateway, AsyncBaseNFSeBackend, AsyncGatewayHttpClient):
+    """Focus NFe backend on httpx.AsyncClient, for concurrent emission."""
+
+    async def emitir(self, nota, tenant) -> ResultadoEmissao:
+        config = await sync_to_async(self._get_config)(tenant)
+        if not config:
+            return ResultadoEmissao(
                 sucesso=False,
-                mensagem="Falha na comunicação com Focus NFe",
+                mensagem="Configuração NFS-e não encontrada para este tenant",
             )
 
-        data = response.json() if response.text else {}
+        ref = str(nota.uuid_transacao)
+        payload = await sync_to_async(self._nota_to_focus_json)(nota, tenant)
 
-        return ResultadoCancelamento(
-            sucesso=response.is_success,
-            protocolo=data.get("protocolo", ""),
-            mensagem=data.get("mensagem", "Cancelamento processado"),
+        response = await self._request(
+            "POST",
+            f"/nfse?ref={ref}",
+            config=config,
+            tenant=tenant,
+            nota=nota,
+            json_body=payload,
         )
+        return self._resultado_emissao(response, ref)
 
-    def baixar_danfse(self, nota, tenant) -> bytes | None:
-        config = self._get_config(tenant)
+    async def consultar(self, nota, tenant) -> ResultadoConsulta:
+        config = await sync_to_async(self._get_config)(tenant)
+        if not config:
+            return ResultadoConsulta(
+                sucesso=False,
+                mensagem="Configuração NFS-e não encontrada",
+            )
+
+        response = await self._request(
+            "GET",
+            f"/nfse/{nota.pk}",
+            config=config,
+            tenant=tenant,
+            nota=nota,
+        )
+        return self._resultado_consulta(response)
+
+    async def cancelar(self, nota, tenant, motivo: str) -> ResultadoCancelamento:
+        config = await sync_to_async(self._get_config)(tenant)
+        if not config:
+            return ResultadoCancelamento(
+                sucesso=False,
+                mensagem="Configuração NFS-e não encontrada",
+            )
+
+        response = await self._request(
+            "DELETE",
+            f"/nfse/{nota.pk}",
+            config=config,
+            tenant=tenant,
+            nota=nota,
+            json_body={"justificativa": motivo},
+        )
+        return self._resultado_cancelamento(response)
+
+    async def baixar_danfse(self, nota, tenant) -> bytes | None:
+        config = await sync_to_async(self._get_config)(tenant)
         if not config:
             return None
 
-        ref = str(nota.pk)
-        return self._request_bytes(
+        return await self._request_bytes(
             "GET",
-            f"/nfse/{ref}.pdf",
+            f"/nfse/{nota.pk}.pdf",
             config=config,
             tenant=tenant,
             nota=nota,
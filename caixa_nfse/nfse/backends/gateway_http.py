@@ -3,7 +3,8 @@ Base HTTP client for NFS-e gateways with automatic API logging.
 
 Every HTTP call is recorded in NfseApiLog with sanitized headers,
 timing, and UUID correlation. Concrete backends inherit from
-GatewayHttpClient and get logging for free.
+GatewayHttpClient (or AsyncGatewayHttpClient, on httpx.AsyncClient) and get
+logging and a pooled keep-alive client for free.
 """
 
 import json
@@ -13,6 +14,7 @@ import uuid
 
 import httpx
 
+from caixa_nfse.nfse.backends.http_clients import async_clients, clients
 from caixa_nfse.nfse.models_api_log import NfseApiLog
 
 logger = logging.getLogger(__name__)
@@ -39,115 +41,120 @@ class GatewayHttpClient:
         """Return auth headers for the gateway. Subclasses must implement."""
         raise NotImplementedError
 
-    def _request(
-        self,
-        method: str,
-        path: str,
-        *,
-        config,
-        tenant,
-        nota=None,
-        json_body: dict | None = None,
-        params: dict | None = None,
-    ) -> httpx.Response | None:
-        """
-        Execute HTTP request and log it to NfseApiLog.
+    def _http_client(self, config) -> httpx.Client:
+        """Keep-alive client shared by every tenant of this gateway and environment."""
+        return clients.client(self.backend_name, getattr(config, "ambiente", ""))
 
-        Returns httpx.Response on success, None on network/timeout error.
-        The NfseApiLog record is always created regardless of outcome.
-        """
+    def _montar(self, method: str, path: str, config, json_body=None, *, binario=False):
+        """URL, headers and base NfseApiLog fields of a request."""
         request_id = uuid.uuid4()
         url = f"{self._base_url(config).rstrip('/')}/{path.lstrip('/')}"
 
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-            "X-Request-ID": str(request_id),
-        }
+        if binario:
+            headers = {"X-Request-ID": str(request_id)}
+        else:
+            headers = {
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+                "X-Request-ID": str(request_id),
+            }
         headers.update(self._auth_headers(config))
 
-        body_str = json.dumps(json_body, ensure_ascii=False) if json_body else ""
-
         log_kwargs = {
-            "tenant": tenant,
-            "nota": nota,
             "backend": self.backend_name,
             "metodo": method.upper(),
             "url": url,
             "headers_envio": NfseApiLog.sanitize_headers(headers),
-            "body_envio": body_str,
+            "body_envio": json.dumps(json_body, ensure_ascii=False) if json_body else "",
             "request_id": request_id,
         }
-
-        start = time.monotonic()
-        try:
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.request(
-                    method,
-                    url,
-                    headers=headers,
-                    json=json_body,
-                    params=params,
-                )
-
-            elapsed_ms = int((time.monotonic() - start) * 1000)
-
-            NfseApiLog.objects.create(
-                **log_kwargs,
-                status_code=response.status_code,
-                headers_retorno=NfseApiLog.sanitize_headers(dict(response.headers)),
-                body_retorno=response.text[:10_000],  # cap at 10KB
-                duracao_ms=elapsed_ms,
-                sucesso=response.is_success,
-            )
-
+        return url, headers, log_kwargs
+
+    def _log_resposta(self, log_kwargs: dict, response, start: float, *, binario=False) -> dict:
+        """NfseApiLog fields of a completed request."""
+        elapsed_ms = int((time.monotonic() - start) * 1000)
+        if binario:
+            body_retorno = f"<binary {len(response.content)} bytes>"
+        else:
+            body_retorno = response.text[:10_000]  # cap at 10KB
             logger.info(
                 "[%s] %s %s → %s (%dms) req=%s",
                 self.backend_name,
-                method.upper(),
-                url,
+                log_kwargs["metodo"],
+                log_kwargs["url"],
                 response.status_code,
                 elapsed_ms,
-                request_id,
-            )
-            return response
-
-        except httpx.TimeoutException as exc:
-            elapsed_ms = int((time.monotonic() - start) * 1000)
-            NfseApiLog.objects.create(
-                **log_kwargs,
-                duracao_ms=elapsed_ms,
-                sucesso=False,
-                erro=f"Timeout após {elapsed_ms}ms: {exc}",
+                log_kwargs["request_id"],
             )
+        return {
+            **log_kwargs,
+            "status_code": response.status_code,
+            "headers_retorno": NfseApiLog.sanitize_headers(dict(response.headers)),
+            "body_retorno": body_retorno,
+            "duracao_ms": elapsed_ms,
+            "sucesso": response.is_success,
+        }
+
+    def _log_erro(self, log_kwargs: dict, exc: Exception, start: float, *, binario=False) -> dict:
+        """NfseApiLog fields of a failed request (timeout or network error)."""
+        elapsed_ms = int((time.monotonic() - start) * 1000)
+        metodo, url, request_id = log_kwargs["metodo"], log_kwargs["url"], log_kwargs["request_id"]
+        if binario:
+            erro = str(exc)
+        elif isinstance(exc, httpx.TimeoutException):
+            erro = f"Timeout após {elapsed_ms}ms: {exc}"
             logger.error(
                 "[%s] TIMEOUT %s %s (%dms) req=%s",
                 self.backend_name,
-                method.upper(),
+                metodo,
                 url,
                 elapsed_ms,
                 request_id,
             )
-            return None
-
-        except httpx.HTTPError as exc:
-            elapsed_ms = int((time.monotonic() - start) * 1000)
-            NfseApiLog.objects.create(
-                **log_kwargs,
-                duracao_ms=elapsed_ms,
-                sucesso=False,
-                erro=f"HTTP error: {exc}",
-            )
+        else:
+            erro = f"HTTP error: {exc}"
             logger.error(
-                "[%s] ERROR %s %s: %s req=%s",
-                self.backend_name,
-                method.upper(),
+                "[%s] ERROR %s %s: %s req=%s", self.backend_name, metodo, url, exc, request_id
+            )
+        return {**log_kwargs, "duracao_ms": elapsed_ms, "sucesso": False, "erro": erro}
+
+    def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        config,
+        tenant,
+        nota=None,
+        json_body: dict | None = None,
+        params: dict | None = None,
+    ) -> httpx.Response | None:
+        """
+        Execute HTTP request and log it to NfseApiLog.
+
+        Returns httpx.Response on success, None on network/timeout error.
+        The NfseApiLog record is always created regardless of outcome.
+        """
+        url, headers, log_kwargs = self._montar(method, path, config, json_body)
+        log_kwargs.update(tenant=tenant, nota=nota)
+
+        start = time.monotonic()
+        try:
+            response = self._http_client(config).request(
+                method,
                 url,
-                exc,
-                request_id,
+                headers=headers,
+                json=json_body,
+                params=params,
+                timeout=self.timeout,
             )
+        except httpx.HTTPError as exc:
+            NfseApiLog.objects.create(**self._log_erro(log_kwargs, exc, start))
             return None
 
+        NfseApiLog.objects.create(**self._log_resposta(log_kwargs, response, start))
+        return response
+
     def _request_bytes(
         self,
         method: str,
@@ -158,50 +165,87 @@ class GatewayHttpClient:
         nota=None,
     ) -> bytes | None:
         """Execute request expecting binary content (e.g. PDF download)."""
-        request_id = uuid.uuid4()
-        url = f"{self._base_url(config).rstrip('/')}/{path.lstrip('/')}"
-
-        headers = {"X-Request-ID": str(request_id)}
-        headers.update(self._auth_headers(config))
+        url, headers, log_kwargs = self._montar(method, path, config, binario=True)
+        log_kwargs.update(tenant=tenant, nota=nota)
 
         start = time.monotonic()
         try:
-            with httpx.Client(timeout=self.timeout) as client:
-                response = client.request(method, url, headers=headers)
-
-            elapsed_ms = int((time.monotonic() - start) * 1000)
-
-            NfseApiLog.objects.create(
-                tenant=tenant,
-                nota=nota,
-                backend=self.backend_name,
-                metodo=method.upper(),
-                url=url,
-                headers_envio=NfseApiLog.sanitize_headers(headers),
-                body_envio="",
-                status_code=response.status_code,
-                headers_retorno=NfseApiLog.sanitize_headers(dict(response.headers)),
-                body_retorno=f"<binary {len(response.content)} bytes>",
-                duracao_ms=elapsed_ms,
-                sucesso=response.is_success,
-                request_id=request_id,
+            response = self._http_client(config).request(
+                method, url, headers=headers, timeout=self.timeout
             )
+        except httpx.HTTPError as exc:
+            NfseApiLog.objects.create(**self._log_erro(log_kwargs, exc, start, binario=True))
+            return None
+
+        NfseApiLog.objects.create(**self._log_resposta(log_kwargs, response, start, binario=True))
+        return response.content if response.is_success else None
+
+
+class AsyncGatewayHttpClient(GatewayHttpClient):
+    """
+    GatewayHttpClient on httpx.AsyncClient: ``_request`` and ``_request_bytes``
+    are coroutines; the NfseApiLog record is written with ``acreate``.
+    """
 
-            return response.content if response.is_success else None
+    def _http_client(self, config) -> httpx.AsyncClient:
+        """Keep-alive async client of the running event loop."""
+        return async_clients.client(self.backend_name, getattr(config, "ambiente", ""))
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        *,
+        config,
+        tenant,
+        nota=None,
+        json_body: dict | None = None,
+        params: dict | None = None,
+    ) -> httpx.Response | None:
+        """Async counterpart of GatewayHttpClient._request."""
+        url, headers, log_kwargs = self._montar(method, path, config, json_body)
+        log_kwargs.update(tenant=tenant, nota=nota)
 
+        start = time.monotonic()
+        try:
+            response = await self._http_client(config).request(
+                method,
+                url,
+                headers=headers,
+                json=json_body,
+                params=params,
+                timeout=self.timeout,
+            )
         except httpx.HTTPError as exc:
-            elapsed_ms = int((time.monotonic() - start) * 1000)
-            NfseApiLog.objects.create(
-                tenant=tenant,
-                nota=nota,
-                backend=self.backend_name,
-                metodo=method.upper(),
-                url=url,
-                headers_envio=NfseApiLog.sanitize_headers(headers),
-                body_envio="",
-                duracao_ms=elapsed_ms,
-                sucesso=False,
-                erro=str(exc),
-                request_id=request_id,
+            await NfseApiLog.objects.acreate(**self._log_erro(log_kwargs, exc, start))
+            return None
+
+        await NfseApiLog.objects.acreate(**self._log_resposta(log_kwargs, response, start))
+        return response
+
+    async def _request_bytes(
+        self,
+        method: str,
+        path: str,
+        *,
+        config,
+        tenant,
+        nota=None,
+    ) -> bytes | None:
+        """Async counterpart of GatewayHttpClient._request_bytes."""
+        url, headers, log_kwargs = self._montar(method, path, config, binario=True)
+        log_kwargs.update(tenant=tenant, nota=nota)
+
+        start = time.monotonic()
+        try:
+            response = await self._http_client(config).request(
+                method, url, headers=headers, timeout=self.timeout
             )
+        except httpx.HTTPError as exc:
+            await NfseApiLog.objects.acreate(**self._log_erro(log_kwargs, exc, start, binario=True))
             return None
+
+        await NfseApiLog.objects.acreate(
+            **self._log_resposta(log_kwargs, response, start, binario=True)
+        )
+        return response.content if response.is_success else None
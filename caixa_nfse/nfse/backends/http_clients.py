@@ -0,0 +1,141 @@
+"""
+Clients HTTP persistentes (keep-alive) do Portal Nacional e dos gateways NFS-e.
+
+Abrir um httpx.Client por requisição paga DNS, TCP e o handshake TLS/mTLS a
+cada chamada. O registro mantém um client por (backend, ambiente, certificado
+A1), com HTTP/2 quando o pacote h2 está instalado e os limites de NFSE_HTTP.
+O client de um certificado substituído ou invalidado é fechado pelo cache de
+certificados (descartar). Todos são fechados no fim do processo (atexit e
+worker_process_shutdown do Celery).
+
+Os backends assíncronos usam httpx.AsyncClient, que fica preso ao event loop
+em que foi criado: async_clients mantém um conjunto por loop, fechado por quem
+controla o loop (o lote de emissão) com async_clients.fechar().
+"""
+
+import asyncio
+import atexit
+import importlib.util
+import logging
+import os
+import threading
+import weakref
+
+import httpx
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 30  # seconds
+
+
+def _config(nome: str, padrao):
+    return getattr(settings, "NFSE_HTTP", {}).get(nome, padrao)
+
+
+def _http2() -> bool:
+    return bool(_config("HTTP2", True)) and importlib.util.find_spec("h2") is not None
+
+
+class ClientRegistry:
+    """
+    Registro thread-safe de httpx.Client por (backend, ambiente, impressão do
+    certificado). httpx.Client pode ser compartilhado entre threads; após um
+    fork (prefork do Celery, gunicorn) o processo filho cria os seus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: dict[tuple[str, str, str], httpx.Client] = {}
+        self._pid = os.getpid()
+
+    def client(self, backend: str, ambiente: str = "", certificado=None) -> httpx.Client:
+        """Client keep-alive do backend/ambiente, com o mTLS do CertificadoA1 se informado."""
+        chave = (backend, ambiente or "", certificado.impressao if certificado else "")
+        with self._lock:
+            if self._pid != os.getpid():
+                # Sockets herdados do processo pai não podem ser reutilizados
+                self._clients = {}
+                self._pid = os.getpid()
+            client = self._clients.get(chave)
+            if client is None or client.is_closed:
+                client = self._clients[chave] = _criar_client(certificado)
+        return client
+
+    def descartar(self, impressao: str) -> int:
+        """Fecha os clients de um certificado (substituído ou vencido). Retorna a quantidade."""
+        with self._lock:
+            chaves = [chave for chave in self._clients if chave[2] == impressao]
+            clients = [self._clients.pop(chave) for chave in chaves]
+        for client in clients:
+            _fechar(client)
+        return len(clients)
+
+    def fechar(self) -> None:
+        """Fecha todos os clients do processo."""
+        with self._lock:
+            clients = list(self._clients.values())
+            self._clients.clear()
+        for client in clients:
+            _fechar(client)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._clients)
+
+
+class AsyncClientRegistry:
+    """Registro de httpx.AsyncClient por event loop e (backend, ambiente, certificado)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_loop: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def client(self, backend: str, ambiente: str = "", certificado=None) -> httpx.AsyncClient:
+        """AsyncClient keep-alive do event loop corrente."""
+        chave = (backend, ambiente or "", certificado.impressao if certificado else "")
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients_loop = self._por_loop.setdefault(loop, {})
+            client = clients_loop.get(chave)
+            if client is None or client.is_closed:
+                client = clients_loop[chave] = _criar_client(certificado, assincrono=True)
+        return client
+
+    async def fechar(self) -> None:
+        """Fecha os clients do event loop corrente."""
+        with self._lock:
+            clients_loop = self._por_loop.pop(asyncio.get_running_loop(), {})
+        for client in clients_loop.values():
+            try:
+                await client.aclose()
+            except Exception:
+                logger.debug("Erro ao fechar client HTTP assíncrono", exc_info=True)
+
+
+def _criar_client(certificado=None, assincrono: bool = False):
+    limites = httpx.Limits(
+        max_connections=_config("MAX_CONNECTIONS", 20),
+        max_keepalive_connections=_config("MAX_KEEPALIVE", 10),
+        keepalive_expiry=_config("KEEPALIVE_EXPIRY", 30),
+    )
+    classe = httpx.AsyncClient if assincrono else httpx.Client
+    return classe(
+        timeout=_config("TIMEOUT", DEFAULT_TIMEOUT),
+        verify=certificado.ssl_context if certificado else True,
+        http2=_http2(),
+        limits=limites,
+    )
+
+
+def _fechar(client) -> None:
+    try:
+        client.close()
+    except Exception:
+        logger.debug("Erro ao fechar client HTTP", exc_info=True)
+
+
+clients = ClientRegistry()
+async_clients = AsyncClientRegistry()
+
+atexit.register(clients.fechar)
@@ -2,6 +2,9 @@
 Portal Nacional NFS-e — Backend de integração direta.
 """
 
-from caixa_nfse.nfse.backends.portal_nacional.backend import PortalNacionalBackend
+from caixa_nfse.nfse.backends.portal_nacional.backend import (
+    AsyncPortalNacionalBackend,
+    PortalNacionalBackend,
+)
 
-__all__ = ["PortalNacionalBackend"]
+__all__ = ["AsyncPortalNacionalBackend", "PortalNacionalBackend"]
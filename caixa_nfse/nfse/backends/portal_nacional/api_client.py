@@ -12,12 +12,12 @@ A autenticação mTLS usa o certificado digital A1 (.pfx/.p12) do tenant.
 import base64
 import gzip
 import logging
-import tempfile
 from dataclasses import dataclass
 
 import httpx
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.primitives.serialization import pkcs12
+
+from caixa_nfse.nfse.backends.http_clients import async_clients, clients
+from caixa_nfse.nfse.backends.portal_nacional.certificado import carregar_certificado
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +28,11 @@ URLS = {
 
 TIMEOUT_SEGUNDOS = 30
 
+HEADERS = {
+    "Content-Type": "application/json",
+    "Accept": "application/json",
+}
+
 
 @dataclass
 class RespostaAPI:
@@ -45,7 +50,9 @@ class PortalNacionalClient:
     Cliente HTTP para comunicação com a API REST do Portal Nacional NFS-e.
 
     Utiliza certificado digital A1 para autenticação mTLS.
-    Aceita certificado PKCS#12 em bytes (do BinaryField) ou paths de arquivo PEM.
+    Aceita o CertificadoA1 em cache do tenant (SSLContext pronto, client
+    keep-alive compartilhado) ou o certificado PKCS#12 em bytes (do
+    BinaryField), carregado em memória.
     """
 
     def __init__(
@@ -54,62 +61,18 @@ class PortalNacionalClient:
         certificado_bytes: bytes | None = None,
         certificado_senha: str | None = None,
         timeout: int = TIMEOUT_SEGUNDOS,
+        certificado=None,
     ):
         self.base_url = URLS.get(ambiente, URLS["HOMOLOGACAO"])
         self.timeout = timeout
-        self._cert_config = None
-        self._temp_files: list = []
-
-        if certificado_bytes and certificado_senha:
-            self._cert_config = self._extrair_pem(certificado_bytes, certificado_senha)
-
-    def _extrair_pem(self, pfx_bytes: bytes, senha: str) -> tuple[str, str] | None:
-        """Extrai cert e key PEM do PKCS#12 para temp files usados pelo httpx mTLS."""
-        try:
-            chave, cert, cadeia = pkcs12.load_key_and_certificates(pfx_bytes, senha.encode("utf-8"))
-            if not chave or not cert:
-                logger.error("Certificado PKCS#12 sem chave privada ou certificado")
-                return None
-
-            # Salvar cert PEM
-            cert_pem = cert.public_bytes(serialization.Encoding.PEM)
-            if cadeia:
-                for ca in cadeia:
-                    cert_pem += ca.public_bytes(serialization.Encoding.PEM)
-
-            cert_file = tempfile.NamedTemporaryFile(
-                suffix=".pem", prefix="nfse_cert_", delete=False
-            )
-            cert_file.write(cert_pem)
-            cert_file.flush()
-            self._temp_files.append(cert_file)
-
-            # Salvar key PEM
-            key_pem = chave.private_bytes(
-                encoding=serialization.Encoding.PEM,
-                format=serialization.PrivateFormat.TraditionalOpenSSL,
-                encryption_algorithm=serialization.NoEncryption(),
-            )
-            key_file = tempfile.NamedTemporaryFile(suffix=".pem", prefix="nfse_key_", delete=False)
-            key_file.write(key_pem)
-            key_file.flush()
-            self._temp_files.append(key_file)
-
-            return (cert_file.name, key_file.name)
+        self._certificado = certificado
 
-        except Exception:
-            logger.exception("Erro ao extrair PEM do PKCS#12")
-            return None
-
-    def __del__(self):
-        """Remove temp files de cert/key PEM."""
-        import os
-
-        for f in self._temp_files:
+        if certificado is None and certificado_bytes and certificado_senha:
             try:
-                os.unlink(f.name)
-            except OSError:
-                pass
+                certificado = carregar_certificado(certificado_bytes, certificado_senha)
+            except ValueError:
+                logger.exception("Erro ao carregar certificado A1 para mTLS")
+            self._certificado = certificado
 
     def enviar_dps(self, xml_assinado: str) -> RespostaAPI:
         """
@@ -165,56 +128,88 @@ class PortalNacionalClient:
     def _request(self, method: str, endpoint: str, **kwargs) -> RespostaAPI:
         """Executa requisição HTTP com tratamento de erros."""
         url = f"{self.base_url}{endpoint}"
-        headers = {
-            "Content-Type": "application/json",
-            "Accept": "application/json",
-        }
+        try:
+            client = clients.client("portal_nacional", self.base_url, self._certificado)
+            response = client.request(method, url, headers=HEADERS, timeout=self.timeout, **kwargs)
+        except httpx.HTTPError as e:
+            return _resposta_erro(method, url, e)
+        return _resposta_api(response)
+
 
+class AsyncPortalNacionalClient(PortalNacionalClient):
+    """
+    PortalNacionalClient sobre httpx.AsyncClient. _request é um coroutine, logo
+    enviar_dps, consultar_por_chave, consultar_por_dps e cancelar também
+    devem ser aguardados (await); baixar_danfse é reimplementado.
+    """
+
+    async def baixar_danfse(self, chave_acesso: str) -> bytes | None:
+        """Baixa o PDF do DANFSe. Retorna bytes ou None."""
         try:
-            with httpx.Client(
-                timeout=self.timeout,
-                cert=self._cert_config,
-                verify=True,
-            ) as client:
-                response = client.request(method, url, headers=headers, **kwargs)
-
-            dados = None
-            xml_retorno = ""
-
-            if response.headers.get("content-type", "").startswith("application/json"):
-                dados = response.json()
-                xml_retorno = dados.get("nfseXmlGZipB64", "")
-                if xml_retorno:
-                    xml_retorno = _descompactar_xml(xml_retorno)
-
-            sucesso = 200 <= response.status_code < 300
-            mensagem = ""
-            if dados and not sucesso:
-                mensagem = dados.get("mensagem", dados.get("message", str(dados)))
-
-            return RespostaAPI(
-                sucesso=sucesso,
-                status_code=response.status_code,
-                dados=dados,
-                mensagem=mensagem,
-                xml_retorno=xml_retorno,
-            )
+            response = await self._request("GET", f"/danfse/{chave_acesso}")
+            if response.sucesso and response.dados:
+                pdf_b64 = response.dados.get("pdf", "")
+                if pdf_b64:
+                    return base64.b64decode(pdf_b64)
+            return None
+        except Exception:
+            logger.exception("Erro ao baixar DANFSe para chave %s", chave_acesso)
+            return None
 
-        except httpx.TimeoutException:
-            logger.error("Timeout na requisição %s %s", method, url)
-            return RespostaAPI(
-                sucesso=False,
-                status_code=0,
-                mensagem="Timeout na comunicação com o Portal Nacional",
+    async def _request(self, method: str, endpoint: str, **kwargs) -> RespostaAPI:
+        """Executa requisição HTTP assíncrona com tratamento de erros."""
+        url = f"{self.base_url}{endpoint}"
+        try:
+            client = async_clients.client("portal_nacional", self.base_url, self._certificado)
+            response = await client.request(
+                method, url, headers=HEADERS, timeout=self.timeout, **kwargs
             )
-
         except httpx.HTTPError as e:
-            logger.error("Erro HTTP na requisição %s %s: %s", method, url, e)
-            return RespostaAPI(
-                sucesso=False,
-                status_code=0,
-                mensagem=f"Erro de comunicação: {e}",
-            )
+            return _resposta_erro(method, url, e)
+        return _resposta_api(response)
+
+
+def _resposta_api(response) -> RespostaAPI:
+    """Converte a resposta HTTP do Portal Nacional em RespostaAPI."""
+    dados = None
+    xml_retorno = ""
+
+    if response.headers.get("content-type", "").startswith("application/json"):
+        dados = response.json()
+        xml_retorno = dados.get("nfseXmlGZipB64", "")
+        if xml_retorno:
+            xml_retorno = _descompactar_xml(xml_retorno)
+
+    sucesso = 200 <= response.status_code < 300
+    mensagem = ""
+    if dados and not sucesso:
+        mensagem = dados.get("mensagem", dados.get("message", str(dados)))
+
+    return RespostaAPI(
+        sucesso=sucesso,
+        status_code=response.status_code,
+        dados=dados,
+        mensagem=mensagem,
+        xml_retorno=xml_retorno,
+    )
+
+
+def _resposta_erro(method: str, url: str, erro: httpx.HTTPError) -> RespostaAPI:
+    """RespostaAPI de timeout ou falha de comunicação."""
+    if isinstance(erro, httpx.TimeoutException):
+        logger.error("Timeout na requisição %s %s", method, url)
+        return RespostaAPI(
+            sucesso=False,
+            status_code=0,
+            mensagem="Timeout na comunicação com o Portal Nacional",
+        )
+
+    logger.error("Erro HTTP na requisição %s %s: %s", method, url, erro)
+    return RespostaAPI(
+        sucesso=False,
+        status_code=0,
+        mensagem=f"Erro de comunicação: {erro}",
+    )
 
 
 def _compactar_xml(xml_string: str) -> str:
@@ -6,17 +6,29 @@ Fluxo de emissão:
 2. Assinar XML com certificado A1 (xml_signer)
 3. Enviar DPS compactada via API REST (api_client)
 4. Processar resposta e atualizar nota
+
+AsyncPortalNacionalBackend faz o mesmo fluxo com o envio em httpx.AsyncClient.
 """
 
 import logging
 
+from asgiref.sync import sync_to_async
+
 from caixa_nfse.nfse.backends.base import (
+    AsyncBaseNFSeBackend,
     BaseNFSeBackend,
     ResultadoCancelamento,
     ResultadoConsulta,
     ResultadoEmissao,
 )
-from caixa_nfse.nfse.backends.portal_nacional.api_client import PortalNacionalClient
+from caixa_nfse.nfse.backends.portal_nacional.api_client import (
+    AsyncPortalNacionalClient,
+    PortalNacionalClient,
+)
+from caixa_nfse.nfse.backends.portal_nacional.certificado import (
+    CertificadoA1,
+    obter_certificado,
+)
 from caixa_nfse.nfse.backends.portal_nacional.danfse import baixar_danfse_portal
 from caixa_nfse.nfse.backends.portal_nacional.xml_builder import (
     construir_dps,
@@ -39,49 +51,18 @@ class PortalNacionalBackend(BaseNFSeBackend):
         Emite NFS-e: constrói DPS → assina → envia ao Portal Nacional.
         """
         try:
-            # 1. Construir XML DPS
-            dps_element = construir_dps(nota, tenant)
-
-            # 2. Assinar XML
-            certificado_bytes = _obter_certificado(tenant)
-            if certificado_bytes is None:
-                return ResultadoEmissao(
-                    sucesso=False,
-                    mensagem="Certificado digital A1 não configurado para este tenant",
-                )
-
-            dps_assinado = assinar_xml(
-                dps_element,
-                certificado_bytes,
-                tenant.certificado_senha or "",
-            )
-            xml_assinado = dps_para_string(dps_assinado)
+            # 1-2. Construir e assinar XML DPS
+            assinado = _assinar_dps(nota, tenant)
+            if assinado is None:
+                return _sem_certificado()
+            certificado, xml_assinado = assinado
 
             # 3. Enviar ao Portal Nacional
-            client = _criar_client(nota, tenant)
+            client = _criar_client(nota, tenant, certificado)
             resposta = client.enviar_dps(xml_assinado)
 
-            if not resposta.sucesso:
-                return ResultadoEmissao(
-                    sucesso=False,
-                    mensagem=resposta.mensagem or f"Erro HTTP {resposta.status_code}",
-                    xml_envio=xml_assinado,
-                    xml_retorno=resposta.xml_retorno,
-                )
-
-            # 4. Processar resposta de sucesso
-            dados = resposta.dados or {}
-            return ResultadoEmissao(
-                sucesso=True,
-                numero_nfse=dados.get("nNFSe"),
-                chave_acesso=dados.get("chNFSe", ""),
-                codigo_verificacao=dados.get("cVerif", ""),
-                protocolo=dados.get("nProt", ""),
-                xml_envio=xml_assinado,
-                xml_retorno=resposta.xml_retorno,
-                pdf_url=dados.get("urlDanfse", ""),
-                mensagem="NFS-e emitida com sucesso via Portal Nacional",
-            )
+            # 4. Processar resposta
+            return _resultado_emissao(resposta, xml_assinado)
 
         except ValueError as e:
             logger.error("Erro de validação na emissão: %s", e)
@@ -105,24 +86,9 @@ class PortalNacionalBackend(BaseNFSeBackend):
             elif nota.id_dps:
                 resposta = client.consultar_por_dps(nota.id_dps)
             else:
-                return ResultadoConsulta(
-                    sucesso=False,
-                    mensagem="Sem chave de acesso ou ID da DPS para consulta",
-                )
-
-            if not resposta.sucesso:
-                return ResultadoConsulta(
-                    sucesso=False,
-                    mensagem=resposta.mensagem,
-                )
-
-            dados = resposta.dados or {}
-            return ResultadoConsulta(
-                sucesso=True,
-                status=dados.get("sit", ""),
-                xml_retorno=resposta.xml_retorno,
-                mensagem="Consulta realizada com sucesso",
-            )
+                return _sem_chave_consulta()
+
+            return _resultado_consulta(resposta)
 
         except Exception as e:
             logger.exception("Erro ao consultar NFS-e no Portal Nacional")
@@ -132,26 +98,11 @@ class PortalNacionalBackend(BaseNFSeBackend):
         """Solicita cancelamento da NFS-e no Portal Nacional."""
         try:
             if not nota.chave_acesso:
-                return ResultadoCancelamento(
-                    sucesso=False,
-                    mensagem="Chave de acesso não disponível para cancelamento",
-                )
+                return _sem_chave_cancelamento()
 
             client = _criar_client(nota, tenant)
             resposta = client.cancelar(nota.chave_acesso, motivo)
-
-            if not resposta.sucesso:
-                return ResultadoCancelamento(
-                    sucesso=False,
-                    mensagem=resposta.mensagem,
-                )
-
-            dados = resposta.dados or {}
-            return ResultadoCancelamento(
-                sucesso=True,
-                protocolo=dados.get("nProt", ""),
-                mensagem="NFS-e cancelada com sucesso via Portal Nacional",
-            )
+            return _resultado_cancelamento(resposta)
 
         except Exception as e:
             logger.exception("Erro ao cancelar NFS-e no Portal Nacional")
@@ -166,6 +117,168 @@ class PortalNacionalBackend(BaseNFSeBackend):
         return baixar_danfse_portal(client, nota.chave_acesso)
 
 
+class AsyncPortalNacionalBackend(AsyncBaseNFSeBackend):
+    """
+    PortalNacionalBackend sobre httpx.AsyncClient, para emissão concorrente.
+
+    Montagem e assinatura da DPS (ORM e CPU) rodam via sync_to_async; só a
+    comunicação com o Portal é assíncrona.
+    """
+
+    async def emitir(self, nota, tenant) -> ResultadoEmissao:
+        """Emite NFS-e: constrói DPS → assina → envia ao Portal Nacional."""
+        try:
+            assinado = await sync_to_async(_assinar_dps)(nota, tenant)
+            if assinado is None:
+                return _sem_certificado()
+            certificado, xml_assinado = assinado
+
+            client = _criar_client(nota, tenant, certificado, AsyncPortalNacionalClient)
+            resposta = await client.enviar_dps(xml_assinado)
+            return _resultado_emissao(resposta, xml_assinado)
+
+        except ValueError as e:
+            logger.error("Erro de validação na emissão: %s", e)
+            return ResultadoEmissao(sucesso=False, mensagem=str(e))
+
+        except Exception as e:
+            logger.exception("Erro inesperado na emissão via Portal Nacional")
+            return ResultadoEmissao(
+                sucesso=False,
+                mensagem=f"Erro inesperado: {e}",
+            )
+
+    async def consultar(self, nota, tenant) -> ResultadoConsulta:
+        """Consulta status da NFS-e no Portal Nacional."""
+        try:
+            client = await _criar_client_async(nota, tenant)
+
+            if nota.chave_acesso:
+                resposta = await client.consultar_por_chave(nota.chave_acesso)
+            elif nota.id_dps:
+                resposta = await client.consultar_por_dps(nota.id_dps)
+            else:
+                return _sem_chave_consulta()
+
+            return _resultado_consulta(resposta)
+
+        except Exception as e:
+            logger.exception("Erro ao consultar NFS-e no Portal Nacional")
+            return ResultadoConsulta(sucesso=False, mensagem=str(e))
+
+    async def cancelar(self, nota, tenant, motivo: str) -> ResultadoCancelamento:
+        """Solicita cancelamento da NFS-e no Portal Nacional."""
+        try:
+            if not nota.chave_acesso:
+                return _sem_chave_cancelamento()
+
+            client = await _criar_client_async(nota, tenant)
+            resposta = await client.cancelar(nota.chave_acesso, motivo)
+            return _resultado_cancelamento(resposta)
+
+        except Exception as e:
+            logger.exception("Erro ao cancelar NFS-e no Portal Nacional")
+            return ResultadoCancelamento(sucesso=False, mensagem=str(e))
+
+    async def baixar_danfse(self, nota, tenant) -> bytes | None:
+        """Baixa o PDF do DANFSe via Portal Nacional."""
+        if not nota.chave_acesso:
+            return None
+
+        client = await _criar_client_async(nota, tenant)
+        return await client.baixar_danfse(nota.chave_acesso)
+
+
+def _sem_certificado() -> ResultadoEmissao:
+    return ResultadoEmissao(
+        sucesso=False,
+        mensagem="Certificado digital A1 não configurado para este tenant",
+    )
+
+
+def _sem_chave_consulta() -> ResultadoConsulta:
+    return ResultadoConsulta(
+        sucesso=False,
+        mensagem="Sem chave de acesso ou ID da DPS para consulta",
+    )
+
+
+def _sem_chave_cancelamento() -> ResultadoCancelamento:
+    return ResultadoCancelamento(
+        sucesso=False,
+        mensagem="Chave de acesso não disponível para cancelamento",
+    )
+
+
+def _assinar_dps(nota, tenant) -> tuple[CertificadoA1, str] | None:
+    """
+    Constrói e assina a DPS. Retorna (certificado, xml assinado), ou None se o
+    tenant não tem certificado A1.
+
+    Raises:
+        ValueError: Se a DPS ou o certificado forem inválidos.
+    """
+    dps_element = construir_dps(nota, tenant)
+    certificado = _certificado_tenant(tenant)
+    if certificado is None:
+        return None
+    return certificado, dps_para_string(assinar_xml(dps_element, certificado))
+
+
+def _resultado_emissao(resposta, xml_assinado: str) -> ResultadoEmissao:
+    if not resposta.sucesso:
+        return ResultadoEmissao(
+            sucesso=False,
+            mensagem=resposta.mensagem or f"Erro HTTP {resposta.status_code}",
+            xml_envio=xml_assinado,
+            xml_retorno=resposta.xml_retorno,
+        )
+
+    dados = resposta.dados or {}
+    return ResultadoEmissao(
+        sucesso=True,
+        numero_nfse=dados.get("nNFSe"),
+        chave_acesso=dados.get("chNFSe", ""),
+        codigo_verificacao=dados.get("cVerif", ""),
+        protocolo=dados.get("nProt", ""),
+        xml_envio=xml_assinado,
+        xml_retorno=resposta.xml_retorno,
+        pdf_url=dados.get("urlDanfse", ""),
+        mensagem="NFS-e emitida com sucesso via Portal Nacional",
+    )
+
+
+def _resultado_consulta(resposta) -> ResultadoConsulta:
+    if not resposta.sucesso:
+        return ResultadoConsulta(
+            sucesso=False,
+            mensagem=resposta.mensagem,
+        )
+
+    dados = resposta.dados or {}
+    return ResultadoConsulta(
+        sucesso=True,
+        status=dados.get("sit", ""),
+        xml_retorno=resposta.xml_retorno,
+        mensagem="Consulta realizada com sucesso",
+    )
+
+
+def _resultado_cancelamento(resposta) -> ResultadoCancelamento:
+    if not resposta.sucesso:
+        return ResultadoCancelamento(
+            sucesso=False,
+            mensagem=resposta.mensagem,
+        )
+
+    dados = resposta.dados or {}
+    return ResultadoCancelamento(
+        sucesso=True,
+        protocolo=dados.get("nProt", ""),
+        mensagem="NFS-e cancelada com sucesso via Portal Nacional",
+    )
+
+
 def _obter_certificado(tenant) -> bytes | None:
     """Obtém bytes do certificado digital A1 do tenant."""
     cert = getattr(tenant, "certificado_digital", None)
@@ -187,11 +300,37 @@ def _obter_certificado(tenant) -> bytes | None:
     return None
 
 
-def _criar_client(nota, tenant) -> PortalNacionalClient:
-    """Cria instância do client HTTP configurada para o ambiente da nota."""
+def _certificado_tenant(tenant) -> CertificadoA1 | None:
+    """
+    Certificado A1 do tenant já carregado (cache por tenant e hash do .pfx).
+
+    Raises:
+        ValueError: Se o certificado não puder ser carregado.
+    """
     cert_bytes = _obter_certificado(tenant)
-    return PortalNacionalClient(
+    if cert_bytes is None:
+        return None
+    return obter_certificado(tenant.pk, cert_bytes, tenant.certificado_senha or "")
+
+
+def _criar_client(
+    nota,
+    tenant,
+    certificado: CertificadoA1 | None = None,
+    classe: type[PortalNacionalClient] = PortalNacionalClient,
+) -> PortalNacionalClient:
+    """Cria instância do client HTTP configurada para o ambiente da nota."""
+    if certificado is None:
+        try:
+            certificado = _certificado_tenant(tenant)
+        except ValueError:
+            logger.exception("Certificado A1 do tenant %s inválido; client sem mTLS", tenant)
+    return classe(
         ambiente=nota.ambiente or "HOMOLOGACAO",
-        certificado_bytes=cert_bytes,
-        certificado_senha=tenant.certificado_senha or "",
+        certificado=certificado,
     )
+
+
+async def _criar_client_async(nota, tenant) -> AsyncPortalNacionalClient:
+    """_criar_client do client assíncrono (a carga do certificado roda fora do loop)."""
+    return await sync_to_async(_criar_client)(nota, tenant, classe=AsyncPortalNacionalClient)
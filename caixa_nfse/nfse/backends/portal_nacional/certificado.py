@@ -0,0 +1,161 @@
+"""
+Cache por processo dos certificados A1 (PKCS#12) dos tenants.
+
+Abrir o .pfx (pkcs12.load_key_and_certificates) é caro e era repetido na
+assinatura e em cada client mTLS. Cada tenant mantém aqui uma entrada com a
+chave privada, o certificado, a cadeia e o ssl.SSLContext mTLS já preparados,
+identificada pelo hash do .pfx e da senha: um novo upload gera outro hash e
+substitui a entrada em qualquer processo (o upload também chama invalidar()).
+Certificados vencidos não ficam no cache. Ao sair do cache, os clients HTTP
+keep-alive abertos com o certificado são fechados.
+"""
+
+import hashlib
+import logging
+import os
+import secrets
+import ssl
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+
+from cryptography.hazmat.primitives import serialization
+
+from caixa_nfse.nfse.backends.http_clients import clients
+from caixa_nfse.nfse.backends.portal_nacional.xml_signer import _carregar_certificado
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_cache: dict[str, "CertificadoA1"] = {}
+
+
+@dataclass(frozen=True)
+class CertificadoA1:
+    """Certificado A1 já carregado: chave, certificado, cadeia e contexto mTLS."""
+
+    impressao: str
+    chave_privada: object = field(repr=False)
+    certificado: object
+    cadeia: tuple = ()
+    ssl_context: ssl.SSLContext = field(default=None, repr=False, compare=False)
+
+    @property
+    def validade(self) -> datetime:
+        return self.certificado.not_valid_after_utc
+
+    @property
+    def vencido(self) -> bool:
+        return self.validade <= datetime.now(UTC)
+
+
+def impressao(pfx_bytes: bytes, senha: str) -> str:
+    """Hash SHA-256 do .pfx e da senha (identifica a versão do certificado)."""
+    return hashlib.sha256(pfx_bytes + b"\0" + senha.encode("utf-8")).hexdigest()
+
+
+def carregar_certificado(pfx_bytes: bytes, senha: str) -> CertificadoA1:
+    """
+    Abre o PKCS#12 e prepara o SSLContext mTLS, sem cache.
+
+    Raises:
+        ValueError: Se o certificado não puder ser carregado.
+    """
+    chave, cert, cadeia = _carregar_certificado(pfx_bytes, senha)
+    return CertificadoA1(
+        impressao=impressao(pfx_bytes, senha),
+        chave_privada=chave,
+        certificado=cert,
+        cadeia=tuple(cadeia),
+        ssl_context=_criar_ssl_context(chave, cert, cadeia),
+    )
+
+
+def obter_certificado(tenant_id, pfx_bytes: bytes, senha: str) -> CertificadoA1:
+    """
+    Certificado do tenant, do cache quando o .pfx e a senha não mudaram.
+
+    Raises:
+        ValueError: Se o certificado não puder ser carregado.
+    """
+    chave = str(tenant_id)
+    atual = impressao(pfx_bytes, senha)
+    with _lock:
+        certificado = _cache.get(chave)
+    if certificado and certificado.impressao == atual and not certificado.vencido:
+        return certificado
+
+    certificado = carregar_certificado(pfx_bytes, senha)
+    with _lock:
+        if certificado.vencido:
+            anterior = _cache.pop(chave, None)
+            logger.warning(
+                "Certificado A1 do tenant %s vencido em %s", tenant_id, certificado.validade
+            )
+        else:
+            anterior = _cache.get(chave)
+            _cache[chave] = certificado
+    _descartar_clients([anterior], manter=certificado.impressao)
+    return certificado
+
+
+def invalidar(tenant_id=None) -> None:
+    """Descarta o certificado em cache do tenant (ou de todos) e seus clients HTTP."""
+    with _lock:
+        if tenant_id is None:
+            removidos = list(_cache.values())
+            _cache.clear()
+        else:
+            removidos = [_cache.pop(str(tenant_id), None)]
+    _descartar_clients(removidos)
+
+
+def _descartar_clients(certificados, manter: str = "") -> None:
+    """Fecha os clients keep-alive abertos com certificados que saíram do cache."""
+    for certificado in certificados:
+        if certificado and certificado.impressao != manter:
+            clients.descartar(certificado.impressao)
+
+
+def _criar_ssl_context(chave, cert, cadeia) -> ssl.SSLContext:
+    """SSLContext de cliente com o certificado A1, carregado em memória."""
+    senha_pem = secrets.token_bytes(32)
+    pem = chave.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.BestAvailableEncryption(senha_pem),
+    )
+    pem += cert.public_bytes(serialization.Encoding.PEM)
+    for ca in cadeia or ():
+        pem += ca.public_bytes(serialization.Encoding.PEM)
+
+    contexto = ssl.create_default_context()
+    _carregar_cadeia(contexto, pem, senha_pem)
+    return contexto
+
+
+def _carregar_cadeia(contexto: ssl.SSLContext, pem: bytes, senha: bytes) -> None:
+    """
+    load_cert_chain só aceita caminhos: no Linux o PEM vai para um arquivo
+    anônimo em memória (memfd), lido por /proc/self/fd. Sem memfd/procfs usa
+    um arquivo temporário removido logo após a carga. Nos dois casos a chave
+    está cifrada com uma senha descartável.
+    """
+    if hasattr(os, "memfd_create") and os.path.isdir("/proc/self/fd"):
+        fd = os.memfd_create("nfse_a1", os.MFD_CLOEXEC)
+        try:
+            with open(fd, "wb", closefd=False) as arquivo:
+                arquivo.write(pem)
+            contexto.load_cert_chain(f"/proc/self/fd/{fd}", password=senha)
+        finally:
+            os.close(fd)
+        return
+
+    fd, caminho = tempfile.mkstemp(suffix=".pem", prefix="nfse_a1_")
+    try:
+        with os.fdopen(fd, "wb") as arquivo:
+            arquivo.write(pem)
+        contexto.load_cert_chain(caminho, password=senha)
+    finally:
+        os.unlink(caminho)
@@ -7,7 +7,7 @@ ou de gateways que forneçam URL direta.
 
 import logging
 
-import httpx
+from caixa_nfse.nfse.backends.http_clients import clients
 
 logger = logging.getLogger(__name__)
 
@@ -47,12 +47,11 @@ def baixar_danfse_por_url(pdf_url: str, timeout: int = 15) -> bytes | None:
         return None
 
     try:
-        with httpx.Client(timeout=timeout) as http:
-            response = http.get(pdf_url)
-            if response.status_code == 200:
-                return response.content
-            logger.warning("DANFSe download falhou: HTTP %d", response.status_code)
-            return None
+        response = clients.client("danfse").get(pdf_url, timeout=timeout)
+        if response.status_code == 200:
+            return response.content
+        logger.warning("DANFSe download falhou: HTTP %d", response.status_code)
+        return None
     except Exception:
         logger.exception("Erro ao baixar DANFSe de %s", pdf_url)
         return None
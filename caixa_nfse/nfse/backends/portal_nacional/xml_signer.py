@@ -16,8 +16,8 @@ logger = logging.getLogger(__name__)
 
 def assinar_xml(
     xml_element: etree._Element,
-    certificado_bytes: bytes,
-    senha: str,
+    certificado_bytes,
+    senha: str = "",
     reference_uri: str | None = None,
 ) -> etree._Element:
     """
@@ -25,7 +25,8 @@ def assinar_xml(
 
     Args:
         xml_element: Elemento XML raiz a ser assinado.
-        certificado_bytes: Conteúdo binário do certificado .pfx/.p12.
+        certificado_bytes: Conteúdo binário do certificado .pfx/.p12, ou
+            CertificadoA1 já carregado (cache do tenant; senha ignorada).
         senha: Senha do certificado.
         reference_uri: URI de referência para a assinatura (ex: '#DPS...').
             Se None, detecta automaticamente pelo atributo Id.
@@ -37,7 +38,11 @@ def assinar_xml(
         ValueError: Se o certificado não puder ser carregado.
         signxml.exceptions.InvalidInput: Se o XML for inválido.
     """
-    chave_privada, certificado, cadeia = _carregar_certificado(certificado_bytes, senha)
+    if isinstance(certificado_bytes, (bytes, bytearray, memoryview)):
+        chave_privada, certificado, _cadeia = _carregar_certificado(bytes(certificado_bytes), senha)
+    else:
+        chave_privada = certificado_bytes.chave_privada
+        certificado = certificado_bytes.certificado
 
     if reference_uri is None:
         reference_uri = _detectar_reference_uri(xml_element)
@@ -1,15 +1,23 @@
 """
 Backend registry — factory for selecting the appropriate NFS-e backend
 based on the tenant's ConfiguracaoNFSe.
+
+get_async_backend returns the async variant (httpx.AsyncClient) when the
+backend has one, or the sync backend wrapped in SyncBackendAdapter.
 """
 
 import logging
 
-from caixa_nfse.nfse.backends.base import BaseNFSeBackend
+from caixa_nfse.nfse.backends.base import (
+    AsyncBaseNFSeBackend,
+    BaseNFSeBackend,
+    SyncBackendAdapter,
+)
 
 logger = logging.getLogger(__name__)
 
 _BACKEND_MAP: dict[str, type[BaseNFSeBackend]] = {}
+_ASYNC_BACKEND_MAP: dict[str, type[AsyncBaseNFSeBackend]] = {}
 
 
 def register_backend(key: str, backend_class: type[BaseNFSeBackend]) -> None:
@@ -17,6 +25,11 @@ def register_backend(key: str, backend_class: type[BaseNFSeBackend]) -> None:
     _BACKEND_MAP[key] = backend_class
 
 
+def register_async_backend(key: str, backend_class: type[AsyncBaseNFSeBackend]) -> None:
+    """Register an async backend class under the given key."""
+    _ASYNC_BACKEND_MAP[key] = backend_class
+
+
 def _ensure_defaults() -> None:
     """Lazily register built-in backends on first access."""
     if "mock" not in _BACKEND_MAP:
@@ -26,25 +39,34 @@ def _ensure_defaults() -> None:
 
     if "portal_nacional" not in _BACKEND_MAP:
         try:
-            from caixa_nfse.nfse.backends.portal_nacional import PortalNacionalBackend
+            from caixa_nfse.nfse.backends.portal_nacional import (
+                AsyncPortalNacionalBackend,
+                PortalNacionalBackend,
+            )
 
             register_backend("portal_nacional", PortalNacionalBackend)
+            register_async_backend("portal_nacional", AsyncPortalNacionalBackend)
         except ImportError:
             logger.debug("portal_nacional backend unavailable (missing httpx?)")
 
     if "focus_nfe" not in _BACKEND_MAP:
         try:
-            from caixa_nfse.nfse.backends.focus_nfe import FocusNFeBackend
+            from caixa_nfse.nfse.backends.focus_nfe import AsyncFocusNFeBackend, FocusNFeBackend
 
             register_backend("focus_nfe", FocusNFeBackend)
+            register_async_backend("focus_nfe", AsyncFocusNFeBackend)
         except ImportError:
             logger.debug("focus_nfe backend unavailable (missing httpx?)")
 
     if "tecnospeed" not in _BACKEND_MAP:
         try:
-            from caixa_nfse.nfse.backends.tecnospeed import TecnoSpeedBackend
+            from caixa_nfse.nfse.backends.tecnospeed import (
+                AsyncTecnoSpeedBackend,
+                TecnoSpeedBackend,
+            )
 
             register_backend("tecnospeed", TecnoSpeedBackend)
+            register_async_backend("tecnospeed", AsyncTecnoSpeedBackend)
         except ImportError:
             logger.debug("tecnospeed backend unavailable (missing httpx?)")
 
@@ -76,6 +98,23 @@ def get_backend(tenant) -> BaseNFSeBackend:
     return backend_class()
 
 
+def get_async_backend(tenant) -> AsyncBaseNFSeBackend:
+    """
+    Return the async backend instance for a tenant.
+    Backends without an async variant (mock, custom) run in a thread via
+    SyncBackendAdapter. Touches the ORM: call it through sync_to_async.
+    """
+    _ensure_defaults()
+
+    config = _get_config(tenant)
+    backend_class = _ASYNC_BACKEND_MAP.get(config.backend) if config is not None else None
+    if backend_class is None:
+        return SyncBackendAdapter(get_backend(tenant))
+
+    logger.info("Async backend selected for tenant %s: %s", tenant, config.backend)
+    return backend_class()
+
+
 def _get_config(tenant) -> object | None:
     """Fetch ConfiguracaoNFSe for a tenant, or None."""
     from caixa_nfse.nfse.models import ConfiguracaoNFSe
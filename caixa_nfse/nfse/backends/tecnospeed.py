@@ -3,17 +3,24 @@ TecnoSpeed backend — integração com API REST TecnoSpeed NFS-e.
 
 Autenticação: Header token_sh (Software House token).
 Processamento assíncrono com polling ou callback.
+
+TecnoSpeedBackend (httpx síncrono) e AsyncTecnoSpeedBackend (asyncio)
+compartilham URLs, autenticação, mapeamento e interpretação das respostas
+(TecnoSpeedGateway).
 """
 
 import logging
 
+from asgiref.sync import sync_to_async
+
 from caixa_nfse.nfse.backends.base import (
+    AsyncBaseNFSeBackend,
     BaseNFSeBackend,
     ResultadoCancelamento,
     ResultadoConsulta,
     ResultadoEmissao,
 )
-from caixa_nfse.nfse.backends.gateway_http import GatewayHttpClient
+from caixa_nfse.nfse.backends.gateway_http import AsyncGatewayHttpClient, GatewayHttpClient
 
 logger = logging.getLogger(__name__)
 
@@ -23,8 +30,8 @@ TECNOSPEED_URLS = {
 }
 
 
-class TecnoSpeedBackend(BaseNFSeBackend, GatewayHttpClient):
-    """TecnoSpeed gateway backend for NFS-e operations."""
+class TecnoSpeedGateway:
+    """TecnoSpeed API: URLs, auth, JSON mapping and response parsing."""
 
     backend_name = "tecnospeed"
 
@@ -88,27 +95,9 @@ class TecnoSpeedBackend(BaseNFSeBackend, GatewayHttpClient):
             "valor_total": str(nota.valor_servicos or "0"),
         }
 
-    # ── Interface ─────────────────────────────────────────────
-
-    def emitir(self, nota, tenant) -> ResultadoEmissao:
-        config = self._get_config(tenant)
-        if not config:
-            return ResultadoEmissao(
-                sucesso=False,
-                mensagem="Configuração NFS-e não encontrada para este tenant",
-            )
-
-        payload = self._nota_to_tecnospeed_json(nota, tenant)
-
-        response = self._request(
-            "POST",
-            "/nfse/enviar",
-            config=config,
-            tenant=tenant,
-            nota=nota,
-            json_body=payload,
-        )
+    # ── Respostas ─────────────────────────────────────────────
 
+    def _resultado_emissao(self, response, ref: str) -> ResultadoEmissao:
         if response is None:
             return ResultadoEmissao(
                 sucesso=False,
@@ -132,7 +121,7 @@ class TecnoSpeedBackend(BaseNFSeBackend, GatewayHttpClient):
                 )
             return ResultadoEmissao(
                 sucesso=True,
-                protocolo=data.get("protocolo", str(nota.pk)),
+                protocolo=data.get("protocolo", ref),
                 json_bruto=data,
                 mensagem=f"NFS-e em processamento: {situacao}",
             )
@@ -155,36 +144,77 @@ class TecnoSpeedBackend(BaseNFSeBackend, GatewayHttpClient):
             mensagem=msg_erro,
         )
 
-    def consultar(self, nota, tenant) -> ResultadoConsulta:
+    def _resultado_consulta(self, response) -> ResultadoConsulta:
+        if response is None:
+            return ResultadoConsulta(
+                sucesso=False,
+                mensagem="Falha na comunicação com TecnoSpeed",
+            )
+
+        data = response.json() if response.text else {}
+
+        return ResultadoConsulta(
+            sucesso=response.is_success,
+            status=data.get("situacao", ""),
+            xml_retorno=data.get("xml", ""),
+            mensagem=data.get("mensagem", ""),
+        )
+
+    def _resultado_cancelamento(self, response) -> ResultadoCancelamento:
+        if response is None:
+            return ResultadoCancelamento(
+                sucesso=False,
+                mensagem="Falha na comunicação com TecnoSpeed",
+            )
+
+        data = response.json() if response.text else {}
+
+        return ResultadoCancelamento(
+            sucesso=response.is_success,
+            protocolo=data.get("protocolo", ""),
+            mensagem=data.get("mensagem", "Cancelamento processado"),
+        )
+
+
+class TecnoSpeedBackend(TecnoSpeedGateway, BaseNFSeBackend, GatewayHttpClient):
+    """TecnoSpeed gateway backend for NFS-e operations."""
+
+    def emitir(self, nota, tenant) -> ResultadoEmissao:
         config = self._get_config(tenant)
         if not config:
-            return ResultadoConsulta(
+            return ResultadoEmissao(
                 sucesso=False,
-                mensagem="Configuração NFS-e não encontrada",
+                mensagem="Configuração NFS-e não encontrada para este tenant",
             )
 
+        payload = self._nota_to_tecnospeed_json(nota, tenant)
+
         response = self._request(
-            "GET",
-            f"/nfse/consultar/{nota.pk}",
+            "POST",
+            "/nfse/enviar",
             config=config,
             tenant=tenant,
             nota=nota,
+            json_body=payload,
         )
+        return self._resultado_emissao(response, str(nota.pk))
 
-        if response is None:
+    def consultar(self, nota, tenant) -> ResultadoConsulta:
+        config = self._get_config(tenant)
+        if not config:
             return ResultadoConsulta(
                 sucesso=False,
-                mensagem="Falha na comunicação com TecnoSpeed",
+                mensagem="Configuração NFS-e não encontrada",
             )
 
-        data = response.json() if response.text else {}
-
-        return ResultadoConsulta(
-            sucesso=response.is_success,
-            status=data.get("situacao", ""),
-            xml_retorno=data.get("xml", ""),
-            mensagem=data.get("mensagem", ""),
+        response = self._request(
+            "GET",
+            f"/nfse/consultar/{nota.pk}",
+            config=config,
+            tenant=tenant,
+            nota=nota,
         )
+        return self._resultado_consulta(response)
 
     def cancelar(self, nota, tenant, motivo: str) -> ResultadoCancelamento:
         config = self._get_config(tenant)
@@ -205,27 +235,89 @@ class TecnoSpeedBackend(BaseNFSeBackend, GatewayHttpClient):
                 "motivo_cancelamento": motivo,
             },
         )
+        return self._resultado_cancelamento(response)
 
-        if response is None:
-            return ResultadoCancelamento(
+    def baixar_danfse(self, nota, tenant) -> bytes | None:
+        config = self._get_config(tenant)
+        if not config:
+            return None
+
+        return self._request_bytes(
+            "GET",
+            f"/nfse/imprimir/{nota.pk}",
+            config=config,
+            tenant=tenant,
+            nota=nota,
+        )
+
+
+class AsyncTecnoSpeedBackend(TecnoSpeedGateway, AsyncBaseNFSeBackend, AsyncGatewayHttpClient):
+    """TecnoSpeed backend on httpx.AsyncClient, for concurrent emission."""
+
+    async def emitir(self, nota, tenant) -> ResultadoEmissao:
+        config = await sync_to_async(self._get_config)(tenant)
+        if not config:
+            return ResultadoEmissao(
                 sucesso=False,
-                mensagem="Falha na comunicação com TecnoSpeed",
+                mensagem="Configuração NFS-e não encontrada para este tenant",
             )
 
-        data = response.json() if response.text else {}
+        payload = await sync_to_async(self._nota_to_tecnospeed_json)(nota, tenant)
 
-        return ResultadoCancelamento(
-            sucesso=response.is_success,
-            protocolo=data.get("protocolo", ""),
-            mensagem=data.get("mensagem", "Cancelamento processado"),
+        response = await self._request(
+            "POST",
+            "/nfse/enviar",
+            config=config,
+            tenant=tenant,
+            nota=nota,
+            json_body=payload,
         )
+        return self._resultado_emissao(response, str(nota.pk))
 
-    def baixar_danfse(self, nota, tenant) -> bytes | None:
-        config = self._get_config(tenant)
+    async def consultar(self, nota, tenant) -> ResultadoConsulta:
+        config = await sync_to_async(self._get_config)(tenant)
+        if not config:
+            return ResultadoConsulta(
+                sucesso=False,
+                mensagem="Configuração NFS-e não encontrada",
+            )
+
+        response = await self._request(
+            "GET",
+            f"/nfse/consultar/{nota.pk}",
+            config=config,
+            tenant=tenant,
+            nota=nota,
+        )
+        return self._resultado_consulta(response)
+
+    async def cancelar(self, nota, tenant, motivo: str) -> ResultadoCancelamento:
+        config = await sync_to_async(self._get_config)(tenant)
+        if not config:
+            return ResultadoCancelamento(
+                sucesso=False,
+                mensagem="Configuração NFS-e não encontrada",
+            )
+
+        response = await self._request(
+            "POST",
+            "/nfse/cancelar",
+            config=config,
+            tenant=tenant,
+            nota=nota,
+            json_body={
+                "id": str(nota.pk),
+                "motivo_cancelamento": motivo,
+            },
+        )
+        return self._resultado_cancelamento(response)
+
+    async def baixar_danfse(self, nota, tenant) -> bytes | None:
+        config = await sync_to_async(self._get_config)(tenant)
         if not config:
             return None
 
-        return self._request_bytes(
+        return await self._request_bytes(
             "GET",
             f"/nfse/imprimir/{nota.pk}",
             config=config,
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-16 19:00
+
+from django.db import migrations
+
+from caixa_nfse.core.particoes import particionar_tabela
+
+
+def particionar(apps, schema_editor):
+    NfseApiLog = apps.get_model("nfse", "NfseApiLog")
+    particionar_tabela(schema_editor, NfseApiLog._meta.db_table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('nfse', '0005_nfse_hardening_idempotencia'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, migrations.RunPython.noop),
+    ]
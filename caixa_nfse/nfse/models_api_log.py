@@ -11,6 +11,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 
 from caixa_nfse.core.models import TenantAwareModel
+from caixa_nfse.core.particoes import ParticionadoManager
 
 
 class NfseApiLog(TenantAwareModel):
@@ -98,6 +99,9 @@ class NfseApiLog(TenantAwareModel):
         db_index=True,
     )
 
+    # Particionada por mês em created_at no PostgreSQL (core.particoes)
+    objects = ParticionadoManager()
+
     class Meta:
         verbose_name = _("log de API NFS-e")
         verbose_name_plural = _("logs de API NFS-e")
@@ -2,11 +2,16 @@
 NFS-e tasks - Celery tasks for async NFS-e operations.
 """
 
+import asyncio
 import logging
+from collections import defaultdict
 
+from asgiref.sync import async_to_sync, sync_to_async
 from celery import shared_task
+from django.conf import settings
 
-from .backends.registry import get_backend
+from .backends.http_clients import async_clients
+from .backends.registry import get_async_backend, get_backend
 from .models import EventoFiscal, NotaFiscalServico, StatusNFSe, TipoEventoFiscal
 from .services import criar_nfse_de_movimento
 
@@ -28,74 +33,150 @@ def enviar_nfse(self, nota_id: str) -> dict:
         tenant = nota.tenant
 
         backend = get_backend(tenant)
+        _marcar_envio(nota, backend.__class__.__name__)
 
-        # Marca status ENVIANDO antes da chamada
-        nota.status = StatusNFSe.ENVIANDO
-        nota.save(update_fields=["status", "updated_at"])
+        resultado = backend.emitir(nota, tenant)
+        return _aplicar_resultado(nota, resultado)
 
-        # Registra evento de envio
-        EventoFiscal.objects.create(
-            tenant=tenant,
-            nota=nota,
-            tipo=TipoEventoFiscal.ENVIO,
-            mensagem=f"Enviando via {backend.__class__.__name__}",
-            sucesso=True,
-        )
+    except NotaFiscalServico.DoesNotExist:
+        logger.error("Nota %s não encontrada", nota_id)
+        return {"success": False, "error": "Nota não encontrada"}
 
-        resultado = backend.emitir(nota, tenant)
+    except Exception as e:
+        logger.exception("Erro ao enviar NFS-e %s", nota_id)
+        self.retry(exc=e)
 
-        # Salvar retorno bruto do gateway
-        nota.json_retorno_gateway = resultado.json_bruto
-
-        if resultado.sucesso:
-            nota.status = StatusNFSe.AUTORIZADA
-            nota.numero_nfse = resultado.numero_nfse or nota.numero_rps
-            nota.codigo_verificacao = resultado.codigo_verificacao or ""
-            nota.chave_acesso = resultado.chave_acesso or ""
-            nota.protocolo = resultado.protocolo or ""
-            nota.xml_nfse = resultado.xml_retorno or ""
-            nota.pdf_url = resultado.pdf_url or ""
-            nota.mensagem_erro = ""
-            nota.save()
-
-            EventoFiscal.objects.create(
-                tenant=tenant,
-                nota=nota,
-                tipo=TipoEventoFiscal.AUTORIZACAO,
-                mensagem=resultado.mensagem or "Nota autorizada com sucesso",
-                xml_envio=resultado.xml_envio or "",
-                xml_retorno=resultado.xml_retorno or "",
-                protocolo=resultado.protocolo or "",
-                sucesso=True,
-            )
 
-            return {"success": True, "nota_id": str(nota.pk)}
+def _marcar_envio(nota, nome_backend: str) -> None:
+    """Marca a nota como ENVIANDO e registra o evento de envio."""
+    nota.status = StatusNFSe.ENVIANDO
+    nota.save(update_fields=["status", "updated_at"])
+
+    EventoFiscal.objects.create(
+        tenant=nota.tenant,
+        nota=nota,
+        tipo=TipoEventoFiscal.ENVIO,
+        mensagem=f"Enviando via {nome_backend}",
+        sucesso=True,
+    )
+
+
+def _aplicar_resultado(nota, resultado) -> dict:
+    """Atualiza a nota com o resultado da emissão (incluindo json_retorno_gateway)."""
+    tenant = nota.tenant
+
+    # Salvar retorno bruto do gateway
+    nota.json_retorno_gateway = resultado.json_bruto
 
-        # Emissão rejeitada
-        nota.status = StatusNFSe.REJEITADA
+    if resultado.sucesso:
+        nota.status = StatusNFSe.AUTORIZADA
+        nota.numero_nfse = resultado.numero_nfse or nota.numero_rps
+        nota.codigo_verificacao = resultado.codigo_verificacao or ""
+        nota.chave_acesso = resultado.chave_acesso or ""
+        nota.protocolo = resultado.protocolo or ""
         nota.xml_nfse = resultado.xml_retorno or ""
-        nota.mensagem_erro = resultado.mensagem or "Emissão rejeitada"
-        nota.save(update_fields=["status", "xml_nfse", "mensagem_erro", "json_retorno_gateway"])
+        nota.pdf_url = resultado.pdf_url or ""
+        nota.mensagem_erro = ""
+        nota.save()
 
         EventoFiscal.objects.create(
             tenant=tenant,
             nota=nota,
-            tipo=TipoEventoFiscal.REJEICAO,
-            mensagem=resultado.mensagem or "Emissão rejeitada",
+            tipo=TipoEventoFiscal.AUTORIZACAO,
+            mensagem=resultado.mensagem or "Nota autorizada com sucesso",
             xml_envio=resultado.xml_envio or "",
             xml_retorno=resultado.xml_retorno or "",
-            sucesso=False,
+            protocolo=resultado.protocolo or "",
+            sucesso=True,
         )
 
-        return {"success": False, "error": resultado.mensagem or "Emissão rejeitada"}
+        return {"success": True, "nota_id": str(nota.pk)}
 
-    except NotaFiscalServico.DoesNotExist:
-        logger.error("Nota %s não encontrada", nota_id)
-        return {"success": False, "error": "Nota não encontrada"}
+    # Emissão rejeitada
+    nota.status = StatusNFSe.REJEITADA
+    nota.xml_nfse = resultado.xml_retorno or ""
+    nota.mensagem_erro = resultado.mensagem or "Emissão rejeitada"
+    nota.save(update_fields=["status", "xml_nfse", "mensagem_erro", "json_retorno_gateway"])
+
+    EventoFiscal.objects.create(
+        tenant=tenant,
+        nota=nota,
+        tipo=TipoEventoFiscal.REJEICAO,
+        mensagem=resultado.mensagem or "Emissão rejeitada",
+        xml_envio=resultado.xml_envio or "",
+        xml_retorno=resultado.xml_retorno or "",
+        sucesso=False,
+    )
+
+    return {"success": False, "error": resultado.mensagem or "Emissão rejeitada"}
+
+
+@shared_task
+def enviar_lote_nfse(nota_ids: list[str]) -> dict:
+    """
+    Emite um lote de NFS-e concorrentemente via backends assíncronos.
+
+    Até NFSE_LOTE["MAX_CONCORRENCIA"] emissões ficam em andamento no worker,
+    no máximo NFSE_LOTE["MAX_POR_TENANT"] por tenant. Uma falha inesperada não
+    interrompe o lote: a nota é reenfileirada em enviar_nfse, que tem retry.
+    """
+    resultados = async_to_sync(_enviar_lote)(nota_ids)
+    for resultado in resultados:
+        if resultado.pop("reenviar", False):
+            enviar_nfse.delay(resultado["nota_id"])
+            resultado["reenviada"] = True
+    return {
+        "enviadas": sum(1 for r in resultados if r["success"]),
+        "resultados": resultados,
+    }
+
+
+async def _enviar_lote(nota_ids: list[str]) -> list[dict]:
+    lote = getattr(settings, "NFSE_LOTE", {})
+    limite = asyncio.Semaphore(lote.get("MAX_CONCORRENCIA", 50))
+    max_por_tenant = lote.get("MAX_POR_TENANT", 10)
+    por_tenant: dict = defaultdict(lambda: asyncio.Semaphore(max_por_tenant))
+
+    notas = await sync_to_async(_carregar_lote)(nota_ids)
+
+    async def emitir(nota) -> dict:
+        async with por_tenant[nota.tenant_id], limite:
+            return await _emitir_async(nota)
+
+    try:
+        emitidas = await asyncio.gather(*(emitir(nota) for nota in notas))
+    finally:
+        await async_clients.fechar()
+
+    resultados = {str(nota.pk): resultado for nota, resultado in zip(notas, emitidas, strict=True)}
+    for nota_id in nota_ids:
+        if str(nota_id) not in resultados:
+            logger.error("Nota %s não encontrada", nota_id)
+            resultados[str(nota_id)] = {"success": False, "error": "Nota não encontrada"}
+    return [{"nota_id": str(nota_id), **resultados[str(nota_id)]} for nota_id in nota_ids]
+
+
+def _carregar_lote(nota_ids: list[str]) -> list:
+    """Notas do lote com as relações usadas pelos backends (sem ORM dentro do loop)."""
+    return list(
+        NotaFiscalServico.objects.select_related(
+            "tenant", "tenant__config_nfse", "cliente", "servico"
+        ).filter(pk__in=nota_ids)
+    )
+
+
+async def _emitir_async(nota) -> dict:
+    try:
+        backend = await sync_to_async(get_async_backend)(nota.tenant)
+        nome = type(getattr(backend, "backend", backend)).__name__
+        await sync_to_async(_marcar_envio)(nota, nome)
+
+        resultado = await backend.emitir(nota, nota.tenant)
+        return await sync_to_async(_aplicar_resultado)(nota, resultado)
 
     except Exception as e:
-        logger.exception("Erro ao enviar NFS-e %s", nota_id)
-        self.retry(exc=e)
+        logger.exception("Erro ao enviar NFS-e %s; reenfileirando", nota.pk)
+        return {"success": False, "error": str(e), "reenviar": True}
 
 
 @shared_task(bind=True, max_retries=3, retry_backoff=True, retry_backoff_max=600)
@@ -280,23 +280,24 @@ class TestPortalNacionalClient:
 
         assert resposta.xml_retorno == xml_retorno
 
-    def test_cert_config_quando_fornecido(self):
-        """Deve configurar certificado para mTLS quando fornecido."""
-        with patch.object(
-            PortalNacionalClient,
-            "_extrair_pem",
-            return_value=("/tmp/cert.pem", "/tmp/key.pem"),
-        ):
+    def test_certificado_quando_fornecido(self):
+        """Deve carregar o certificado para mTLS quando fornecido."""
+        certificado = MagicMock()
+        with patch(
+            "caixa_nfse.nfse.backends.portal_nacional.api_client.carregar_certificado",
+            return_value=certificado,
+        ) as carregar:
             client = PortalNacionalClient(
                 certificado_bytes=b"fake-pfx-bytes",
                 certificado_senha="senha",
             )
-            assert client._cert_config == ("/tmp/cert.pem", "/tmp/key.pem")
+        carregar.assert_called_once_with(b"fake-pfx-bytes", "senha")
+        assert client._certificado is certificado
 
-    def test_cert_config_none_quando_ausente(self):
-        """Sem certificado, _cert_config deve ser None."""
+    def test_certificado_none_quando_ausente(self):
+        """Sem certificado, _certificado deve ser None."""
         client = PortalNacionalClient()
-        assert client._cert_config is None
+        assert client._certificado is None
 
 
 class TestRespostaAPI:
@@ -0,0 +1,165 @@
+"""
+Tests for the async NFS-e backends (AsyncBaseNFSeBackend) and get_async_backend.
+HTTP calls are mocked; coroutines run through async_to_sync, as in the batch task.
+"""
+
+from unittest.mock import MagicMock, patch
+
+import httpx
+import pytest
+from asgiref.sync import async_to_sync
+
+from caixa_nfse.nfse.backends.base import SyncBackendAdapter
+from caixa_nfse.nfse.backends.focus_nfe import AsyncFocusNFeBackend
+from caixa_nfse.nfse.backends.http_clients import async_clients
+from caixa_nfse.nfse.backends.mock import MockBackend
+from caixa_nfse.nfse.backends.portal_nacional.api_client import RespostaAPI
+from caixa_nfse.nfse.backends.portal_nacional.backend import AsyncPortalNacionalBackend
+from caixa_nfse.nfse.backends.registry import get_async_backend
+from caixa_nfse.nfse.backends.tecnospeed import AsyncTecnoSpeedBackend
+from caixa_nfse.nfse.models_api_log import NfseApiLog
+from caixa_nfse.tests.factories import ConfiguracaoNFSeFactory, NotaFiscalServicoFactory
+
+
+@pytest.fixture
+def nota(db):
+    return NotaFiscalServicoFactory()
+
+
+@pytest.fixture
+def mock_config():
+    config = MagicMock()
+    config.api_token = "test-token"
+    config.api_secret = ""
+    config.ambiente = "HOMOLOGACAO"
+    return config
+
+
+def _mock_response(status_code=200, json_data=None):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.is_success = 200 <= status_code < 300
+    resp.headers = {"Content-Type": "application/json"}
+    resp.json.return_value = json_data or {}
+    resp.text = str(json_data or "")
+    return resp
+
+
+@pytest.mark.django_db
+class TestAsyncGatewayBackends:
+    def test_focus_emitir_autorizada(self, nota, mock_config):
+        backend = AsyncFocusNFeBackend()
+        resposta = _mock_response(200, {"status": "autorizado", "numero": "12345"})
+
+        with (
+            patch.object(backend, "_get_config", return_value=mock_config),
+            patch.object(backend, "_request", return_value=resposta) as mock_request,
+        ):
+            resultado = async_to_sync(backend.emitir)(nota, nota.tenant)
+
+        assert resultado.sucesso is True
+        assert resultado.numero_nfse == "12345"
+        assert mock_request.await_count == 1
+
+    def test_tecnospeed_emitir_falha_comunicacao(self, nota, mock_config):
+        backend = AsyncTecnoSpeedBackend()
+
+        with (
+            patch.object(backend, "_get_config", return_value=mock_config),
+            patch.object(backend, "_request", return_value=None),
+        ):
+            resultado = async_to_sync(backend.emitir)(nota, nota.tenant)
+
+        assert resultado.sucesso is False
+
+    def test_request_uses_async_client_and_logs(self, nota, mock_config):
+        backend = AsyncFocusNFeBackend()
+        resposta = httpx.Response(
+            200,
+            json={"status": "autorizado"},
+            request=httpx.Request("GET", "https://homologacao.focusnfe.com.br/v2/nfse/1"),
+        )
+
+        async def requisitar():
+            try:
+                return await backend._request(
+                    "GET", "/nfse/1", config=mock_config, tenant=nota.tenant, nota=nota
+                )
+            finally:
+                await async_clients.fechar()
+
+        with patch(
+            "caixa_nfse.nfse.backends.http_clients.httpx.AsyncClient.request",
+            return_value=resposta,
+        ) as mock_request:
+            response = async_to_sync(requisitar)()
+
+        assert response is resposta
+        assert mock_request.await_count == 1
+        log = NfseApiLog.objects.get(nota=nota)
+        assert log.sucesso is True
+        assert log.backend == "focus_nfe"
+
+
+@pytest.mark.django_db
+class TestAsyncPortalNacionalBackend:
+    def test_emitir_sucesso(self, nota):
+        backend = AsyncPortalNacionalBackend()
+        client = MagicMock()
+        client.enviar_dps.return_value = RespostaAPI(
+            sucesso=True, status_code=201, dados={"nNFSe": "1", "chNFSe": "C" * 50}
+        )
+
+        async def enviar_dps(xml):
+            return client.enviar_dps(xml)
+
+        with (
+            patch(
+                "caixa_nfse.nfse.backends.portal_nacional.backend._assinar_dps",
+                return_value=(MagicMock(), "<DPS/>"),
+            ),
+            patch(
+                "caixa_nfse.nfse.backends.portal_nacional.backend._criar_client",
+                return_value=MagicMock(enviar_dps=enviar_dps),
+            ),
+        ):
+            resultado = async_to_sync(backend.emitir)(nota, nota.tenant)
+
+        assert resultado.sucesso is True
+        assert resultado.chave_acesso == "C" * 50
+        assert resultado.xml_envio == "<DPS/>"
+        client.enviar_dps.assert_called_once_with("<DPS/>")
+
+    def test_emitir_sem_certificado(self, nota):
+        with patch(
+            "caixa_nfse.nfse.backends.portal_nacional.backend._assinar_dps", return_value=None
+        ):
+            resultado = async_to_sync(AsyncPortalNacionalBackend().emitir)(nota, nota.tenant)
+
+        assert resultado.sucesso is False
+        assert "Certificado" in resultado.mensagem
+
+    def test_consultar_sem_chave(self, nota):
+        nota.chave_acesso = ""
+        nota.id_dps = ""
+
+        with patch("caixa_nfse.nfse.backends.portal_nacional.backend._criar_client"):
+            resultado = async_to_sync(AsyncPortalNacionalBackend().consultar)(nota, nota.tenant)
+
+        assert resultado.sucesso is False
+
+
+@pytest.mark.django_db
+class TestGetAsyncBackend:
+    def test_async_variant_for_gateway(self):
+        config = ConfiguracaoNFSeFactory(backend="focus_nfe")
+        assert isinstance(get_async_backend(config.tenant), AsyncFocusNFeBackend)
+
+    def test_mock_wrapped_in_adapter(self, nota):
+        ConfiguracaoNFSeFactory(tenant=nota.tenant, backend="mock")
+
+        backend = get_async_backend(nota.tenant)
+
+        assert isinstance(backend, SyncBackendAdapter)
+        assert isinstance(backend.backend, MockBackend)
+        assert async_to_sync(backend.emitir)(nota, nota.tenant).sucesso is True
@@ -0,0 +1,119 @@
+"""
+Testes do cache de certificados A1 por tenant (portal_nacional/certificado.py).
+"""
+
+import ssl
+from datetime import UTC, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.hazmat.primitives.serialization import pkcs12
+
+from caixa_nfse.nfse.backends.portal_nacional import certificado
+from caixa_nfse.nfse.backends.portal_nacional.backend import PortalNacionalBackend
+from caixa_nfse.tests.factories import NotaFiscalServicoFactory
+
+SENHA = "test1234"
+
+
+def _gerar_pfx(validade: timedelta = timedelta(days=365)) -> bytes:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    subject = x509.Name([x509.NameAttribute(x509.oid.NameOID.COMMON_NAME, "Tenant Teste")])
+    agora = datetime.now(UTC)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(agora - timedelta(days=400))
+        .not_valid_after(agora + validade)
+        .sign(key, hashes.SHA256())
+    )
+    return pkcs12.serialize_key_and_certificates(
+        b"a1", key, cert, None, serialization.BestAvailableEncryption(SENHA.encode())
+    )
+
+
+@pytest.fixture(scope="module")
+def pfx():
+    return _gerar_pfx()
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    certificado.invalidar()
+    yield
+    certificado.invalidar()
+
+
+def _contar_parses():
+    return patch(
+        "caixa_nfse.nfse.backends.portal_nacional.xml_signer.pkcs12.load_key_and_certificates",
+        wraps=pkcs12.load_key_and_certificates,
+    )
+
+
+class TestCacheCertificado:
+    def test_parsed_once_per_tenant(self, pfx):
+        with _contar_parses() as load:
+            primeiro = certificado.obter_certificado("t1", pfx, SENHA)
+            segundo = certificado.obter_certificado("t1", pfx, SENHA)
+
+        assert load.call_count == 1
+        assert segundo is primeiro
+        assert isinstance(primeiro.ssl_context, ssl.SSLContext)
+        assert not primeiro.vencido
+
+    def test_new_certificate_replaces_entry(self, pfx):
+        antigo = certificado.obter_certificado("t1", pfx, SENHA)
+        novo = certificado.obter_certificado("t1", _gerar_pfx(), SENHA)
+
+        assert novo.impressao != antigo.impressao
+        assert certificado.obter_certificado("t1", pfx, SENHA) is not antigo
+
+    def test_invalidar_forces_reload(self, pfx):
+        certificado.obter_certificado("t1", pfx, SENHA)
+        certificado.invalidar("t1")
+
+        with _contar_parses() as load:
+            certificado.obter_certificado("t1", pfx, SENHA)
+        assert load.call_count == 1
+
+    def test_expired_certificate_not_cached(self):
+        vencido = _gerar_pfx(validade=timedelta(days=-1))
+
+        with _contar_parses() as load:
+            assert certificado.obter_certificado("t1", vencido, SENHA).vencido
+            certificado.obter_certificado("t1", vencido, SENHA)
+        assert load.call_count == 2
+
+    def test_invalid_certificate_raises(self):
+        with pytest.raises(ValueError):
+            certificado.obter_certificado("t1", b"invalido", SENHA)
+
+
+@pytest.mark.django_db
+class TestBackendUsaCache:
+    @patch("caixa_nfse.nfse.backends.http_clients.httpx.Client")
+    def test_emitir_and_consultar_skip_pkcs12_after_warm_up(self, mock_httpx, pfx):
+        response = MagicMock(status_code=200, headers={"content-type": "application/json"})
+        response.json.return_value = {"nNFSe": "1", "chNFSe": "C" * 50, "sit": "AUTORIZADA"}
+        mock_httpx.return_value.request.return_value = response
+
+        nota = NotaFiscalServicoFactory(chave_acesso="C" * 50)
+        nota.tenant.certificado_digital = pfx
+        nota.tenant.certificado_senha = SENHA
+        backend = PortalNacionalBackend()
+
+        assert backend.emitir(nota, nota.tenant).sucesso is True
+        with _contar_parses() as load:
+            assert backend.emitir(nota, nota.tenant).sucesso is True
+            assert backend.consultar(nota, nota.tenant).sucesso is True
+        assert load.call_count == 0
+
+        contexto = certificado.obter_certificado(nota.tenant.pk, pfx, SENHA).ssl_context
+        assert mock_httpx.call_args.kwargs["verify"] is contexto
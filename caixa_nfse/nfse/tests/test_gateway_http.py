@@ -56,8 +56,7 @@ class TestGatewayHttpClientRequest:
 
         ctx = MagicMock()
         ctx.request.return_value = mock_response
-        mock_client_cls.return_value.__enter__ = MagicMock(return_value=ctx)
-        mock_client_cls.return_value.__exit__ = MagicMock(return_value=False)
+        mock_client_cls.return_value = ctx
 
         result = gateway._request(
             "POST",
@@ -78,8 +77,7 @@ class TestGatewayHttpClientRequest:
 
         ctx = MagicMock()
         ctx.request.side_effect = httpx.TimeoutException("timeout")
-        mock_client_cls.return_value.__enter__ = MagicMock(return_value=ctx)
-        mock_client_cls.return_value.__exit__ = MagicMock(return_value=False)
+        mock_client_cls.return_value = ctx
 
         result = gateway._request("GET", "/slow", config=mock_config, tenant=tenant)
 
@@ -93,8 +91,7 @@ class TestGatewayHttpClientRequest:
 
         ctx = MagicMock()
         ctx.request.side_effect = httpx.HTTPError("connection failed")
-        mock_client_cls.return_value.__enter__ = MagicMock(return_value=ctx)
-        mock_client_cls.return_value.__exit__ = MagicMock(return_value=False)
+        mock_client_cls.return_value = ctx
 
         result = gateway._request("GET", "/error", config=mock_config, tenant=tenant)
 
@@ -109,8 +106,7 @@ class TestGatewayHttpClientRequest:
 
         ctx = MagicMock()
         ctx.request.return_value = mock_response
-        mock_client_cls.return_value.__enter__ = MagicMock(return_value=ctx)
-        mock_client_cls.return_value.__exit__ = MagicMock(return_value=False)
+        mock_client_cls.return_value = ctx
 
         result = gateway._request(
             "GET",
@@ -135,8 +131,7 @@ class TestGatewayHttpClientRequestBytes:
 
         ctx = MagicMock()
         ctx.request.return_value = mock_response
-        mock_client_cls.return_value.__enter__ = MagicMock(return_value=ctx)
-        mock_client_cls.return_value.__exit__ = MagicMock(return_value=False)
+        mock_client_cls.return_value = ctx
 
         result = gateway._request_bytes("GET", "/doc.pdf", config=mock_config, tenant=tenant)
 
@@ -150,8 +145,7 @@ class TestGatewayHttpClientRequestBytes:
 
         ctx = MagicMock()
         ctx.request.return_value = mock_response
-        mock_client_cls.return_value.__enter__ = MagicMock(return_value=ctx)
-        mock_client_cls.return_value.__exit__ = MagicMock(return_value=False)
+        mock_client_cls.return_value = ctx
 
         result = gateway._request_bytes("GET", "/missing.pdf", config=mock_config, tenant=tenant)
 
@@ -164,8 +158,7 @@ class TestGatewayHttpClientRequestBytes:
 
         ctx = MagicMock()
         ctx.request.side_effect = httpx.HTTPError("network error")
-        mock_client_cls.return_value.__enter__ = MagicMock(return_value=ctx)
-        mock_client_cls.return_value.__exit__ = MagicMock(return_value=False)
+        mock_client_cls.return_value = ctx
 
         result = gateway._request_bytes("GET", "/broken.pdf", config=mock_config, tenant=tenant)
 
@@ -0,0 +1,82 @@
+"""
+Testes do registro de clients HTTP keep-alive (backends/http_clients.py).
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from caixa_nfse.nfse.backends.http_clients import ClientRegistry
+from caixa_nfse.nfse.backends.portal_nacional.api_client import PortalNacionalClient
+
+
+@pytest.fixture
+def registro():
+    registro = ClientRegistry()
+    yield registro
+    registro.fechar()
+
+
+def _certificado(impressao):
+    return MagicMock(impressao=impressao, ssl_context=None)
+
+
+class TestClientRegistry:
+    def test_reuses_client_per_backend_ambiente_certificate(self, registro):
+        client = registro.client("focus_nfe", "HOMOLOGACAO")
+
+        assert registro.client("focus_nfe", "HOMOLOGACAO") is client
+        assert registro.client("focus_nfe", "PRODUCAO") is not client
+        assert registro.client("tecnospeed", "HOMOLOGACAO") is not client
+        assert registro.client("focus_nfe", "HOMOLOGACAO", _certificado("a")) is not client
+        assert len(registro) == 4
+
+    def test_descartar_closes_certificate_clients(self, registro):
+        antigo = registro.client("portal_nacional", "HOMOLOGACAO", _certificado("a"))
+        outro = registro.client("portal_nacional", "HOMOLOGACAO", _certificado("b"))
+
+        assert registro.descartar("a") == 1
+        assert antigo.is_closed
+        assert not outro.is_closed
+        assert registro.client("portal_nacional", "HOMOLOGACAO", _certificado("a")) is not antigo
+
+    def test_fechar_and_closed_clients_recreated(self, registro):
+        client = registro.client("danfse")
+        registro.fechar()
+
+        assert client.is_closed
+        assert len(registro) == 0
+        assert not registro.client("danfse").is_closed
+
+    def test_fork_drops_inherited_clients(self, registro):
+        client = registro.client("danfse")
+        with patch("caixa_nfse.nfse.backends.http_clients.os.getpid", return_value=-1):
+            assert registro.client("danfse") is not client
+        client.close()
+
+    def test_limits_and_http2_from_settings(self, registro, settings):
+        settings.NFSE_HTTP = {"HTTP2": False, "MAX_CONNECTIONS": 5, "KEEPALIVE_EXPIRY": 15}
+        with patch("caixa_nfse.nfse.backends.http_clients.httpx.Client") as client_cls:
+            registro.client("focus_nfe", "HOMOLOGACAO")
+
+        kwargs = client_cls.call_args.kwargs
+        assert kwargs["http2"] is False
+        assert kwargs["limits"].max_connections == 5
+        assert kwargs["limits"].keepalive_expiry == 15
+
+
+class TestPortalNacionalClientPooled:
+    @patch("caixa_nfse.nfse.backends.http_clients.httpx.Client")
+    def test_requests_share_one_client(self, mock_client_cls):
+        resposta = MagicMock(status_code=200, headers={"content-type": "application/json"})
+        resposta.json.return_value = {"sit": "AUTORIZADA"}
+        mock_client_cls.return_value.is_closed = False
+        mock_client_cls.return_value.request.return_value = resposta
+
+        client = PortalNacionalClient()
+        client.consultar_por_chave("CHAVE1")
+        PortalNacionalClient().consultar_por_chave("CHAVE2")
+
+        mock_client_cls.assert_called_once()
+        assert mock_client_cls.return_value.request.call_count == 2
+        assert mock_client_cls.return_value.request.call_args.kwargs["timeout"] == client.timeout
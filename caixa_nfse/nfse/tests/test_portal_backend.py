@@ -32,10 +32,10 @@ class TestPortalNacionalBackendEmitir:
 
     @patch("caixa_nfse.nfse.backends.portal_nacional.backend._criar_client")
     @patch("caixa_nfse.nfse.backends.portal_nacional.backend.assinar_xml")
-    @patch("caixa_nfse.nfse.backends.portal_nacional.backend._obter_certificado")
+    @patch("caixa_nfse.nfse.backends.portal_nacional.backend._certificado_tenant")
     def test_emitir_sucesso(self, mock_cert, mock_assinar, mock_client):
         """Emissão bem-sucedida deve retornar dados da NFS-e."""
-        mock_cert.return_value = b"cert_bytes"
+        mock_cert.return_value = MagicMock()
 
         from lxml import etree
 
@@ -66,10 +66,10 @@ class TestPortalNacionalBackendEmitir:
 
     @patch("caixa_nfse.nfse.backends.portal_nacional.backend._criar_client")
     @patch("caixa_nfse.nfse.backends.portal_nacional.backend.assinar_xml")
-    @patch("caixa_nfse.nfse.backends.portal_nacional.backend._obter_certificado")
+    @patch("caixa_nfse.nfse.backends.portal_nacional.backend._certificado_tenant")
     def test_emitir_rejeitada(self, mock_cert, mock_assinar, mock_client):
         """Rejeição do Portal deve retornar erro com mensagem."""
-        mock_cert.return_value = b"cert_bytes"
+        mock_cert.return_value = MagicMock()
 
         from lxml import etree
 
@@ -102,10 +102,10 @@ class TestPortalNacionalBackendEmitir:
 
     @patch("caixa_nfse.nfse.backends.portal_nacional.backend._criar_client")
     @patch("caixa_nfse.nfse.backends.portal_nacional.backend.assinar_xml")
-    @patch("caixa_nfse.nfse.backends.portal_nacional.backend._obter_certificado")
+    @patch("caixa_nfse.nfse.backends.portal_nacional.backend._certificado_tenant")
     def test_emitir_erro_inesperado(self, mock_cert, mock_assinar, mock_client):
         """Exceção inesperada deve ser capturada."""
-        mock_cert.return_value = b"cert_bytes"
+        mock_cert.return_value = MagicMock()
 
         from lxml import etree
 
@@ -294,7 +294,7 @@ class TestDanfseService:
         resultado = baixar_danfse_por_url("")
         assert resultado is None
 
-    @patch("caixa_nfse.nfse.backends.portal_nacional.danfse.httpx.Client")
+    @patch("caixa_nfse.nfse.backends.http_clients.httpx.Client")
     def test_baixar_por_url_sucesso(self, mock_client_cls):
         """URL válida com resposta 200 deve retornar bytes."""
         mock_response = MagicMock()
@@ -310,7 +310,7 @@ class TestDanfseService:
         resultado = baixar_danfse_por_url("https://example.com/danfse.pdf")
         assert resultado == b"%PDF content"
 
-    @patch("caixa_nfse.nfse.backends.portal_nacional.danfse.httpx.Client")
+    @patch("caixa_nfse.nfse.backends.http_clients.httpx.Client")
     def test_baixar_por_url_erro_http(self, mock_client_cls):
         """Resposta não-200 deve retornar None."""
         mock_response = MagicMock()
@@ -325,7 +325,7 @@ class TestDanfseService:
         resultado = baixar_danfse_por_url("https://example.com/danfse.pdf")
         assert resultado is None
 
-    @patch("caixa_nfse.nfse.backends.portal_nacional.danfse.httpx.Client")
+    @patch("caixa_nfse.nfse.backends.http_clients.httpx.Client")
     def test_baixar_por_url_excecao(self, mock_client_cls):
         """Exceção no download deve retornar None."""
         mock_client = MagicMock()
@@ -1,8 +1,9 @@
 """
 Tests for nfse/tasks.py — enviar_nfse, emitir_nfse_movimento,
-verificar_certificados_vencendo, consultar_lote_nfse.
+verificar_certificados_vencendo, consultar_lote_nfse, enviar_lote_nfse.
 """
 
+import asyncio
 import uuid
 from datetime import timedelta
 from decimal import Decimal
@@ -239,3 +240,86 @@ class TestConsultarLoteNfse:
 
         found_invalid = next(r for r in res_list if r["id"] == invalid_id)
         assert "error" in found_invalid
+
+
+class _BackendConcorrente:
+    """Async backend fake que mede quantas emissões ficam em andamento."""
+
+    def __init__(self, falhar=()):
+        self.em_andamento = 0
+        self.maximo = 0
+        self.falhar = falhar
+
+    async def emitir(self, nota, tenant):
+        self.em_andamento += 1
+        self.maximo = max(self.maximo, self.em_andamento)
+        await asyncio.sleep(0.05)
+        self.em_andamento -= 1
+        if nota.pk in self.falhar:
+            raise RuntimeError("timeout")
+        return MagicMock(
+            sucesso=True,
+            numero_nfse=1,
+            codigo_verificacao="ABC",
+            chave_acesso="CHAVE",
+            protocolo="PROT",
+            xml_envio="",
+            xml_retorno="",
+            pdf_url="",
+            json_bruto={},
+            mensagem="ok",
+        )
+
+
+@pytest.mark.django_db
+class TestEnviarLoteNfse:
+    @patch("caixa_nfse.nfse.tasks.get_async_backend")
+    def test_emite_concorrente_com_limite_por_tenant(self, mock_get_backend, settings):
+        settings.NFSE_LOTE = {"MAX_CONCORRENCIA": 50, "MAX_POR_TENANT": 3}
+        backend = _BackendConcorrente()
+        mock_get_backend.return_value = backend
+        tenant = TenantFactory()
+        notas = NotaFiscalServicoFactory.create_batch(8, tenant=tenant, status=StatusNFSe.RASCUNHO)
+
+        result = tasks.enviar_lote_nfse([str(n.pk) for n in notas])
+
+        assert result["enviadas"] == 8
+        assert backend.maximo == 3
+        for nota in notas:
+            nota.refresh_from_db()
+            assert nota.status == StatusNFSe.AUTORIZADA
+        assert EventoFiscal.objects.filter(tipo=TipoEventoFiscal.AUTORIZACAO).count() == 8
+
+    @patch("caixa_nfse.nfse.tasks.get_async_backend")
+    def test_limite_global_entre_tenants(self, mock_get_backend, settings):
+        settings.NFSE_LOTE = {"MAX_CONCORRENCIA": 4, "MAX_POR_TENANT": 10}
+        backend = _BackendConcorrente()
+        mock_get_backend.return_value = backend
+        notas = [NotaFiscalServicoFactory(tenant=TenantFactory()) for _ in range(6)]
+
+        result = tasks.enviar_lote_nfse([str(n.pk) for n in notas])
+
+        assert result["enviadas"] == 6
+        assert backend.maximo == 4
+
+    @patch("caixa_nfse.nfse.tasks.enviar_nfse")
+    @patch("caixa_nfse.nfse.tasks.get_async_backend")
+    def test_falha_e_nota_inexistente_nao_interrompem_lote(self, mock_get_backend, mock_enviar):
+        ok, erro = NotaFiscalServicoFactory.create_batch(2, tenant=TenantFactory())
+        mock_get_backend.return_value = _BackendConcorrente(falhar={erro.pk})
+        inexistente = str(uuid.uuid4())
+
+        result = tasks.enviar_lote_nfse([str(ok.pk), str(erro.pk), inexistente])
+
+        por_id = {r["nota_id"]: r for r in result["resultados"]}
+        assert result["enviadas"] == 1
+        assert por_id[str(ok.pk)]["success"] is True
+        assert por_id[str(erro.pk)] == {
+            "nota_id": str(erro.pk),
+            "success": False,
+            "error": "timeout",
+            "reenviada": True,
+        }
+        assert por_id[inexistente]["error"] == "Nota não encontrada"
+        # Unexpected failures go back to enviar_nfse, which retries
+        mock_enviar.delay.assert_called_once_with(str(erro.pk))
@@ -301,7 +301,10 @@ class NFSeConfigForm(forms.ModelForm):
                 self.tenant.certificado_senha = cert_senha
                 updated = True
             if updated and commit:
+                from .backends.portal_nacional.certificado import invalidar
+
                 self.tenant.save(update_fields=["certificado_digital", "certificado_senha"])
+                invalidar(self.tenant.pk)
         return config
 
 
@@ -632,10 +632,7 @@ class LogAcoesView(ExportMixin, GerenteRequiredMixin, TemplateView):
 
         registros = RegistroAuditoria.objects.filter(tenant=tenant).select_related("usuario")
 
-        if data_inicio:
-            registros = registros.filter(created_at__date__gte=data_inicio)
-        if data_fim:
-            registros = registros.filter(created_at__date__lte=data_fim)
+        registros = registros.periodo(data_inicio, data_fim)
         if acao:
             registros = registros.filter(acao=acao)
         if tabela:
@@ -109,7 +109,13 @@ CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.redis.RedisCache",
         "LOCATION": config("REDIS_URL", default="redis://localhost:6379/0"),
-    }
+    },
+    # Pré-visualizações da importação de movimentos (precisa de armazenamento real)
+    "importacao": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("REDIS_URL", default="redis://localhost:6379/0"),
+        "KEY_PREFIX": "importacao",
+    },
 }
 
 # Password validation
@@ -208,6 +214,59 @@ if SENTRY_DSN:
 # Encryption Key for sensitive fields
 FIELD_ENCRYPTION_KEY = config("FIELD_ENCRYPTION_KEY", default="")
 
+# Keyring do EncryptedCharField (Fernet, mais nova primeiro): a primeira cifra,
+# todas decifram; a chave derivada do SECRET_KEY é sempre a última. Após incluir
+# uma chave nova, rodar "manage.py reencriptar_campos".
+FIELD_ENCRYPTION_KEYS = config("FIELD_ENCRYPTION_KEYS", default="", cast=Csv())
+
+# Pool de conexões com bancos externos (ConexaoExterna → Firebird/MSSQL)
+EXTERNAL_DB_POOL = {
+    # Conexões ociosas mantidas por ConexaoExterna
+    "MAX_SIZE": config("EXTERNAL_DB_POOL_MAX_SIZE", default=4, cast=int),
+    # Conexões abertas ao mesmo tempo por ConexaoExterna e por processo (limita a
+    # carga no servidor externo; manter >= IMPORTACAO_PARALELA["MAX_POR_CONEXAO"])
+    "MAX_OPEN": config("EXTERNAL_DB_POOL_MAX_OPEN", default=8, cast=int),
+    "IDLE_TIMEOUT": config("EXTERNAL_DB_POOL_IDLE_TIMEOUT", default=300, cast=int),  # seconds
+    # Espera máxima por uma conexão quando MAX_OPEN foi atingido
+    "ACQUIRE_TIMEOUT": config("EXTERNAL_DB_POOL_ACQUIRE_TIMEOUT", default=30, cast=int),
+}
+
+# Execução paralela das rotinas na importação de movimentos
+IMPORTACAO_PARALELA = {
+    "MAX_WORKERS": config("IMPORTACAO_MAX_WORKERS", default=8, cast=int),
+    "MAX_POR_CONEXAO": config("IMPORTACAO_MAX_POR_CONEXAO", default=2, cast=int),
+    "TIMEOUT": config("IMPORTACAO_TIMEOUT", default=120, cast=int),  # seconds
+}
+
+# Pré-visualização da importação armazenada no cache "importacao"
+IMPORTACAO_PREVIEW = {
+    "TTL": config("IMPORTACAO_PREVIEW_TTL", default=1800, cast=int),  # seconds
+}
+
+# Cadeia de hash da auditoria, particionada por empresa (e opcionalmente por dia)
+AUDITORIA_CADEIA = {
+    "DIARIA": config("AUDITORIA_CADEIA_DIARIA", default=False, cast=bool),
+    "VERIFICACAO_WORKERS": config("AUDITORIA_VERIFICACAO_WORKERS", default=4, cast=int),
+}
+
+# Escrita da auditoria: tabelas financeiras na transação, demais eventos (VIEW
+# incluído) em lote via Celery após o commit (caixa_nfse.auditoria.fila)
+AUDITORIA_ESCRITA = {
+    "ASSINCRONA": config("AUDITORIA_ASSINCRONA", default=True, cast=bool),
+    "LOTE": config("AUDITORIA_LOTE", default=500, cast=int),
+}
+
+# Auditoria dos acessos a telas (VIEW): registro detalhado só nos prefixos
+# REGISTRAR, deduplicado por usuário/caminho; os demais viram contadores
+# agregados (ContadorAcesso). MODO "registro" registra todo acesso.
+AUDITORIA_ACESSOS = {
+    "MODO": config("AUDITORIA_ACESSOS_MODO", default="agregado"),
+    "REGISTRAR": ["/auditoria/", "/relatorios/", "/contabil/", "/platform/", "/admin/"],
+    "EXCLUIR": ["/static/", "/media/", "/admin/jsi18n/", "/__debug__/", "/favicon.ico"],
+    "JANELA_DEDUP": config("AUDITORIA_ACESSOS_JANELA", default=300, cast=int),  # seconds
+    "INTERVALO_ENVIO": config("AUDITORIA_ACESSOS_INTERVALO", default=60, cast=int),  # seconds
+}
+
 # NFS-e Configuration
 NFSE_CONFIG = {
     "AMBIENTE": config("NFSE_AMBIENTE", default="homologacao"),
@@ -215,6 +274,29 @@ NFSE_CONFIG = {
     "STORAGE_YEARS": 5,  # Anos de retenção de XMLs
 }
 
+# Clients HTTP keep-alive do Portal Nacional e gateways NFS-e (por backend,
+# ambiente e certificado A1); HTTP/2 requer o pacote h2 (httpx[http2])
+NFSE_HTTP = {
+    "HTTP2": config("NFSE_HTTP2", default=True, cast=bool),
+    "MAX_CONNECTIONS": config("NFSE_HTTP_MAX_CONNECTIONS", default=20, cast=int),
+    "MAX_KEEPALIVE": config("NFSE_HTTP_MAX_KEEPALIVE", default=10, cast=int),
+    "KEEPALIVE_EXPIRY": config("NFSE_HTTP_KEEPALIVE_EXPIRY", default=30, cast=int),  # seconds
+    "TIMEOUT": config("NFSE_TIMEOUT", default=30, cast=int),  # seconds
+}
+
+# Emissão em lote (enviar_lote_nfse): emissões simultâneas por worker e por tenant
+NFSE_LOTE = {
+    "MAX_CONCORRENCIA": config("NFSE_LOTE_MAX_CONCORRENCIA", default=50, cast=int),
+    "MAX_POR_TENANT": config("NFSE_LOTE_MAX_POR_TENANT", default=10, cast=int),
+}
+
+# Partições mensais (PostgreSQL) de RegistroAuditoria e NfseApiLog: criadas com
+# antecedência e arquivadas em .csv.gz após NFSE_CONFIG["STORAGE_YEARS"]
+PARTICIONAMENTO = {
+    "MESES_FUTUROS": config("PARTICOES_MESES_FUTUROS", default=3, cast=int),
+    "ARQUIVO_DIR": config("PARTICOES_ARQUIVO_DIR", default=str(BASE_DIR / "arquivo")),
+}
+
 # Logging
 LOGGING = {
     "version": 1,
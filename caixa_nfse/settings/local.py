@@ -19,11 +19,23 @@ INTERNAL_IPS = ["127.0.0.1"]
 # Email - Console backend for development
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# Celery runs tasks synchronously in local dev unless CELERY_TASK_ALWAYS_EAGER=False
+# (then start a worker: celery -A caixa_nfse worker)
+CELERY_TASK_ALWAYS_EAGER = config("CELERY_TASK_ALWAYS_EAGER", default=True, cast=bool)
+CELERY_TASK_EAGER_PROPAGATES = True
+
 # Disable caching in development (no Redis required)
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.dummy.DummyCache",
-    }
+    },
+    # Import preview handoff needs a real store. locmem is per-process, so it
+    # only works with eager tasks; a separate worker needs the shared Redis cache
+    "importacao": (
+        {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        if CELERY_TASK_ALWAYS_EAGER
+        else CACHES["importacao"]  # noqa: F405
+    ),
 }
 
 # Simplified logging for development
@@ -51,10 +63,6 @@ if not USE_POSTGRES:
         }
     }
 
-# Disable Celery for local dev (tasks run synchronously)
-CELERY_TASK_ALWAYS_EAGER = True
-CELERY_TASK_EAGER_PROPAGATES = True
-
 # Disable security features for local development
 SECURE_SSL_REDIRECT = False
 SESSION_COOKIE_SECURE = False
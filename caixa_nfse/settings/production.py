@@ -23,7 +23,12 @@ CACHES = {
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
         },
-    }
+    },
+    "importacao": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": config("REDIS_URL"),  # noqa: F405
+        "KEY_PREFIX": "importacao",
+    },
 }
 
 # Session
@@ -25,13 +25,20 @@ STATICFILES_STORAGE = "django.contrib.staticfiles.storage.StaticFilesStorage"
 CACHES = {
     "default": {
         "BACKEND": "django.core.cache.backends.dummy.DummyCache",
-    }
+    },
+    # Import preview handoff needs a real store
+    "importacao": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
 }
 
 # Celery - run tasks synchronously in tests
 CELERY_TASK_ALWAYS_EAGER = True
 CELERY_TASK_EAGER_PROPAGATES = True
 
+# Audit records written synchronously (tests read them right after the save)
+AUDITORIA_ESCRITA = {**AUDITORIA_ESCRITA, "ASSINCRONA": False}  # noqa: F405
+
 # Password hashers - faster for tests
 PASSWORD_HASHERS = [
     "django.contrib.auth.hashers.MD5PasswordHasher",
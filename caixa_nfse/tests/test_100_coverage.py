@@ -248,6 +248,18 @@ class TestRotinaExtrairVariaveis(TestCase):
         r = Rotina(sistema=s, nome="R2", sql_content="SELECT @VAR1 FROM t")
         assert "VAR1" in r.extrair_variaveis()
 
+    def test_skips_globals_comments_and_system_vars(self):
+        from caixa_nfse.backoffice.models import Rotina, Sistema
+
+        s = Sistema.objects.create(nome="Sys3", ativo=True)
+        r = Rotina(
+            sistema=s,
+            nome="R3",
+            sql_content="SELECT @@ROWCOUNT, '@X' FROM t WHERE a = @A -- @B",
+            sql_content_extra="/* @C */ AND k = @SERVICOANDAMENTO",
+        )
+        assert r.extrair_variaveis() == ["A"]
+
 
 # ===========================================================================
 # core/views.py — L314, L321-325, L330-331, L344-345
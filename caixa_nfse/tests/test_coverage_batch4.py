@@ -38,14 +38,14 @@ class TestEncryptedCharField:
         assert result == "gAAAAA_invalid_broken_token"  # Lines 55-56
 
     def test_roundtrip_encrypt_decrypt(self):
-        from caixa_nfse.core.encrypted_fields import EncryptedCharField
+        from caixa_nfse.core.encrypted_fields import EncryptedCharField, decifrar
 
         field = EncryptedCharField(max_length=500)
         original = "my-secret-api-key"
         encrypted = field.get_prep_value(original)
         assert encrypted != original
         assert encrypted.startswith("gAAAAA")
-        decrypted = field.from_db_value(encrypted, None, None)
+        decrypted = decifrar(field.from_db_value(encrypted, None, None))
         assert decrypted == original
 
 
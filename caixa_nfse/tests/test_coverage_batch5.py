@@ -11,15 +11,15 @@ import pytest
 # ─── api_client.py (23 miss: 68-101, 109-111) ──────────────────
 
 
-class TestPortalNacionalClientPem:
-    """Covers _extrair_pem and __del__ cleanup."""
+class TestPortalNacionalClientCertificado:
+    """Covers in-memory loading of the PKCS#12 certificate for mTLS."""
 
-    def test_extrair_pem_no_key_returns_none(self):
-        """Line 71: chave is None → return None."""
+    def test_certificado_no_key_returns_none(self):
+        """chave is None → no certificate, no mTLS."""
         from caixa_nfse.nfse.backends.portal_nacional.api_client import PortalNacionalClient
 
         with patch(
-            "caixa_nfse.nfse.backends.portal_nacional.api_client.pkcs12.load_key_and_certificates"
+            "caixa_nfse.nfse.backends.portal_nacional.xml_signer.pkcs12.load_key_and_certificates"
         ) as mock_load:
             mock_load.return_value = (None, MagicMock(), None)
             client = PortalNacionalClient(
@@ -27,14 +27,14 @@ class TestPortalNacionalClientPem:
                 certificado_bytes=b"fake-pfx",
                 certificado_senha="1234",
             )
-        assert client._cert_config is None
+        assert client._certificado is None
 
-    def test_extrair_pem_exception_returns_none(self):
-        """Line 100-101: exception in extraction → return None."""
+    def test_certificado_exception_returns_none(self):
+        """Exception in loading → no certificate."""
         from caixa_nfse.nfse.backends.portal_nacional.api_client import PortalNacionalClient
 
         with patch(
-            "caixa_nfse.nfse.backends.portal_nacional.api_client.pkcs12.load_key_and_certificates",
+            "caixa_nfse.nfse.backends.portal_nacional.xml_signer.pkcs12.load_key_and_certificates",
             side_effect=Exception("invalid pfx"),
         ):
             client = PortalNacionalClient(
@@ -42,10 +42,13 @@ class TestPortalNacionalClientPem:
                 certificado_bytes=b"bad-data",
                 certificado_senha="wrong",
             )
-        assert client._cert_config is None
+        assert client._certificado is None
+
+    def test_certificado_success_without_temp_files(self, tmp_path):
+        """Happy path: SSLContext built in memory, nothing written to the temp dir."""
+        import ssl
+        import tempfile
 
-    def test_extrair_pem_success_with_chain(self):
-        """Lines 68-98: full happy path with certificate chain."""
         from cryptography import x509
         from cryptography.hazmat.primitives import hashes, serialization
         from cryptography.hazmat.primitives.asymmetric import rsa
@@ -69,36 +72,21 @@ class TestPortalNacionalClientPem:
             b"test",
             key,
             cert,
-            None,
+            [cert],
             serialization.BestAvailableEncryption(b"test1234"),
         )
 
         from caixa_nfse.nfse.backends.portal_nacional.api_client import PortalNacionalClient
 
-        client = PortalNacionalClient(
-            ambiente="HOMOLOGACAO",
-            certificado_bytes=pfx_bytes,
-            certificado_senha="test1234",
-        )
-        assert client._cert_config is not None
-        assert len(client._cert_config) == 2  # (cert_path, key_path)
-        # Cleanup
-        del client
-
-    def test_del_cleans_up_temp_files(self):
-        """Lines 109-111: __del__ removes temp files."""
-        from caixa_nfse.nfse.backends.portal_nacional.api_client import PortalNacionalClient
-
-        # Create client without cert
-        client = PortalNacionalClient(ambiente="HOMOLOGACAO")
-        # Add fake temp files
-        mock_file = MagicMock()
-        mock_file.name = "/tmp/fake_cert.pem"
-        client._temp_files.append(mock_file)
-
-        with patch("os.unlink") as mock_unlink:
-            client.__del__()
-        mock_unlink.assert_called_once_with("/tmp/fake_cert.pem")
+        with patch.object(tempfile, "tempdir", str(tmp_path)):
+            client = PortalNacionalClient(
+                ambiente="HOMOLOGACAO",
+                certificado_bytes=pfx_bytes,
+                certificado_senha="test1234",
+            )
+        assert isinstance(client._certificado.ssl_context, ssl.SSLContext)
+        assert len(client._certificado.cadeia) == 1
+        assert list(tmp_path.iterdir()) == []
 
 
 # ─── importador.py (14 miss: 186, 359-362, 426, 433, 435, 497, 501, 556-559, 599) ──